@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """Check order history and entry prices"""
-import requests
 import os
 from datetime import datetime
 
+from tradingbot.alpaca_client import AlpacaClient, AlpacaError
+
 # Load credentials from environment variables
 API_KEY = os.environ.get('ALPACA_API_KEY')
 API_SECRET = os.environ.get('ALPACA_SECRET_KEY')
@@ -16,17 +17,19 @@ if not API_KEY or not API_SECRET:
     print("   export ALPACA_SECRET_KEY=your_secret")
     exit(1)
 
-headers = {
-    "APCA-API-KEY-ID": API_KEY,
-    "APCA-API-SECRET-KEY": API_SECRET
-}
+client = AlpacaClient(API_KEY, API_SECRET, BASE_URL)
 
 print("=" * 80)
 print("📋 ORDER HISTORY - Last 20 orders")
 print("=" * 80)
 print()
 
-orders = requests.get(f"{BASE_URL}/v2/orders?status=all&limit=20", headers=headers).json()
+try:
+    orders = client.get_orders(status='all', limit=20)
+except AlpacaError as e:
+    print(f"❌ Error: {e.status_code}")
+    print(e.body)
+    exit(1)
 
 for order in orders:
     symbol = order['symbol']
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """Check Alpaca portfolio status and P&L"""
-import requests
 import os
 from datetime import datetime
 
+from tradingbot.alpaca_client import AlpacaClient, AlpacaError
+
 # Load credentials from environment variables
 API_KEY = os.environ.get('ALPACA_API_KEY')
 API_SECRET = os.environ.get('ALPACA_SECRET_KEY')
@@ -16,23 +17,25 @@ if not API_KEY or not API_SECRET:
     print("   export ALPACA_SECRET_KEY=your_secret")
     exit(1)
 
-headers = {
-    "APCA-API-KEY-ID": API_KEY,
-    "APCA-API-SECRET-KEY": API_SECRET
-}
+client = AlpacaClient(API_KEY, API_SECRET, BASE_URL)
 
 print("=" * 80)
 print("📊 ALPACA PORTFOLIO STATUS")
 print("=" * 80)
 print()
 
-account_resp = requests.get(f"{BASE_URL}/v2/account", headers=headers)
-if account_resp.status_code != 200:
-    print(f"❌ Error: {account_resp.status_code}")
-    print(account_resp.text)
+# Account and positions in parallel
+try:
+    status = client.fan_out({
+        'account': (client.get_account,),
+        'positions': (client.get_positions,),
+    })
+except AlpacaError as e:
+    print(f"❌ Error: {e.status_code}")
+    print(e.body)
     exit(1)
 
-account = account_resp.json()
+account = status['account']
 equity = float(account.get('equity', 0))
 last_equity = float(account.get('last_equity', 0))
 cash = float(account.get('cash', 0))
@@ -44,7 +47,7 @@ print(f"📈 Daily P&L: ${daily_pnl:+,.2f} ({daily_pnl_pct:+.2f}%)")
 print(f"💵 Cash: ${cash:,.2f}")
 print()
 
-positions = requests.get(f"{BASE_URL}/v2/positions", headers=headers).json()
+positions = status['positions']
 if positions:
     print("=" * 80)
     print(f"📍 OPEN POSITIONS ({len(positions)})")
@@ -0,0 +1,57 @@
+-- Migration 003: Intraday portfolio snapshots
+-- Date: 2026-10-19
+-- Description: account_balance stays the daily rollup (drawdown gate, dashboard);
+-- intraday account state, per-position state and Alpaca orders are stored by
+-- tradingbot/snapshots.py so status checks and time-travel queries read the DB.
+
+-- Intraday account state (one row per snapshot)
+CREATE TABLE IF NOT EXISTS account_snapshots (
+    snapshot_at TIMESTAMPTZ PRIMARY KEY,
+    equity DECIMAL(14,2) NOT NULL,
+    last_equity DECIMAL(14,2),
+    cash DECIMAL(14,2),
+    buying_power DECIMAL(14,2),
+    long_market_value DECIMAL(14,2),
+    position_count INTEGER DEFAULT 0
+);
+
+-- Positions at each snapshot (no rows = flat portfolio)
+CREATE TABLE IF NOT EXISTS position_snapshots (
+    snapshot_at TIMESTAMPTZ NOT NULL REFERENCES account_snapshots(snapshot_at) ON DELETE CASCADE,
+    symbol VARCHAR(10) NOT NULL,
+    qty DECIMAL(14,4) NOT NULL,
+    avg_entry_price DECIMAL(12,4),
+    current_price DECIMAL(12,4),
+    market_value DECIMAL(14,2),
+    unrealized_pl DECIMAL(14,2),
+    unrealized_plpc DECIMAL(10,6),
+    PRIMARY KEY (snapshot_at, symbol)
+);
+
+CREATE INDEX IF NOT EXISTS idx_position_snapshots_symbol ON position_snapshots(symbol, snapshot_at DESC);
+
+-- Latest known state of each Alpaca order
+CREATE TABLE IF NOT EXISTS alpaca_orders (
+    id VARCHAR(64) PRIMARY KEY,
+    client_order_id VARCHAR(128),
+    symbol VARCHAR(10) NOT NULL,
+    side VARCHAR(10) NOT NULL,
+    qty DECIMAL(14,4),
+    order_type VARCHAR(20),
+    order_class VARCHAR(20),
+    status VARCHAR(30) NOT NULL,
+    filled_qty DECIMAL(14,4),
+    filled_avg_price DECIMAL(12,4),
+    limit_price DECIMAL(12,4),
+    stop_price DECIMAL(12,4),
+    created_at TIMESTAMPTZ,
+    filled_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_alpaca_orders_created ON alpaca_orders(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alpaca_orders_symbol ON alpaca_orders(symbol, created_at DESC);
+
+COMMENT ON TABLE account_snapshots IS 'Intraday account state (account_balance keeps the daily rollup)';
+COMMENT ON TABLE position_snapshots IS 'Open positions at each account snapshot';
+COMMENT ON TABLE alpaca_orders IS 'Latest known state of each Alpaca order';
@@ -0,0 +1,55 @@
+-- Migration 004: NOTIFY triggers for the dashboard push channel
+-- Date: 2026-10-19
+-- Description: web/app.py LISTENs on these channels and streams new rows to
+-- open dashboards over SSE (/api/stream) instead of each tab polling.
+
+-- New EMA snapshots -> one notification per statement, so bulk loads
+-- (load_historical_data, recalc) don't flood pg_notify and every SSE stream.
+-- Payload: {"symbols": {"NVDA": <last id before the insert>, ...}}; listeners
+-- refetch rows with id > that per subscribed symbol. If the map would not fit
+-- the 8000 byte NOTIFY limit it degrades to {"since": <id>} for all symbols.
+CREATE OR REPLACE FUNCTION notify_ema_snapshot() RETURNS trigger AS $$
+DECLARE
+    payload text;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM new_rows) THEN
+        RETURN NULL;
+    END IF;
+    SELECT json_build_object('symbols', json_object_agg(symbol, since))::text INTO payload
+    FROM (SELECT symbol, min(id) - 1 AS since FROM new_rows GROUP BY symbol) s;
+    IF octet_length(payload) > 7900 THEN
+        payload := json_build_object('since', (SELECT min(id) - 1 FROM new_rows))::text;
+    END IF;
+    PERFORM pg_notify('ema_snapshots', payload);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_ema_snapshots_notify ON ema_snapshots;
+CREATE TRIGGER trg_ema_snapshots_notify
+    AFTER INSERT ON ema_snapshots
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_ema_snapshot();
+
+-- Summary inputs changed -> listeners recompute /api/summary once per statement
+CREATE OR REPLACE FUNCTION notify_dashboard_summary() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('dashboard_summary', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_account_balance_notify ON account_balance;
+CREATE TRIGGER trg_account_balance_notify
+    AFTER INSERT OR UPDATE ON account_balance
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_dashboard_summary();
+
+DROP TRIGGER IF EXISTS trg_sentiment_scores_notify ON sentiment_scores;
+CREATE TRIGGER trg_sentiment_scores_notify
+    AFTER INSERT OR UPDATE ON sentiment_scores
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_dashboard_summary();
+
+DROP TRIGGER IF EXISTS trg_positions_notify ON positions;
+CREATE TRIGGER trg_positions_notify
+    AFTER INSERT ON positions
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_dashboard_summary();
@@ -0,0 +1,8 @@
+-- Migration 005: Composite (symbol, timestamp) index on ema_snapshots
+-- Date: 2026-10-19
+-- Description: /api/overview reads the latest row and a sparkline window per
+-- symbol with LATERAL ... ORDER BY timestamp DESC LIMIT n; this turns each of
+-- those into a short index scan instead of filtering the symbol index.
+
+CREATE INDEX IF NOT EXISTS idx_ema_snapshots_symbol_timestamp
+    ON ema_snapshots(symbol, timestamp DESC);
@@ -0,0 +1,24 @@
+-- Migration 006: OHLCV bars at native resolution
+-- Date: 2026-10-19
+-- Description: ema_snapshots keeps close/volume only; fill simulation needs
+-- open/high/low. Rows older than the hot window can be moved to the binary
+-- archive (python -m tradingbot.archive export ... --delete).
+
+CREATE TABLE IF NOT EXISTS bars (
+    symbol VARCHAR(10) NOT NULL,
+    timeframe VARCHAR(5) NOT NULL,      -- '1m', '5m', '1h', '1d', ...
+    ts TIMESTAMPTZ NOT NULL,            -- bar open time
+    open DECIMAL(12,4) NOT NULL,
+    high DECIMAL(12,4) NOT NULL,
+    low DECIMAL(12,4) NOT NULL,
+    close DECIMAL(12,4) NOT NULL,
+    volume BIGINT,
+    vwap DECIMAL(12,4),
+    source VARCHAR(20),                 -- 'alpaca', 'yahoo', ...
+    PRIMARY KEY (symbol, timeframe, ts)
+);
+
+-- Cheap time-range pruning for exports and retention deletes
+CREATE INDEX IF NOT EXISTS idx_bars_ts_brin ON bars USING BRIN (ts);
+
+COMMENT ON TABLE bars IS 'OHLCV bars at native resolution (hot history; cold history lives in data/archive)';
@@ -0,0 +1,17 @@
+-- Migration 007: High-water marks for the news / social collectors
+-- Date: 2026-10-19
+-- Description: tradingbot.collectors pages each (source, symbol) feed only
+-- back to the newest item it already stored. The cursor keeps that item's
+-- publish time plus the ids published at exactly that time, so items
+-- sharing the boundary timestamp are neither lost nor re-inserted.
+
+CREATE TABLE IF NOT EXISTS collector_cursors (
+    source VARCHAR(20) NOT NULL,            -- 'eodhd', 'finnhub', 'reddit'
+    symbol VARCHAR(10) NOT NULL,
+    last_published_at TIMESTAMPTZ NOT NULL,
+    last_article_ids TEXT[] NOT NULL DEFAULT '{}',
+    last_run_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (source, symbol)
+);
+
+COMMENT ON TABLE collector_cursors IS 'Per-(source, symbol) high-water marks of tradingbot.collectors';
@@ -0,0 +1,25 @@
+-- Migration 008: Partial/composite indexes for the sentiment pipeline
+-- Date: 2026-10-19
+-- Description: Get_Unanalyzed_News reads
+--   WHERE symbol = ... AND analyzed = false ORDER BY published_at DESC LIMIT 10
+-- per symbol; the partial index holds only the (small) unanalyzed backlog
+-- in that order, so the read is a short index scan and the LIMIT stops it.
+-- mark_articles_analyzed uses the same index to find its rows.
+-- Get_Last_Sentiment (ORDER BY date DESC LIMIT 1 per symbol) and the
+-- executor's date >= CURRENT_DATE - n window read (symbol, date DESC).
+-- The single-column boolean index and sentiment_scores(symbol) are covered
+-- by the new ones and only cost writes, so they are dropped.
+-- Benchmark: python scripts/benchmark_sentiment_queries.py
+
+CREATE INDEX IF NOT EXISTS idx_news_unanalyzed_symbol_published
+    ON news_articles(symbol, published_at DESC)
+    WHERE NOT analyzed;
+
+CREATE INDEX IF NOT EXISTS idx_sentiment_symbol_date
+    ON sentiment_scores(symbol, date DESC);
+
+DROP INDEX IF EXISTS idx_news_analyzed;
+DROP INDEX IF EXISTS idx_sentiment_symbol;
+
+ANALYZE news_articles;
+ANALYZE sentiment_scores;
@@ -0,0 +1,25 @@
+-- Migration 009: Full-text and recency search over news_articles
+-- Date: 2026-10-19
+-- Description: Generated tsvector (title weighted A, content B) with a GIN
+-- index, so keyword search is an index lookup instead of an ILIKE scan, plus
+-- (published_at DESC, id DESC) keys for keyset pagination of the newest-first
+-- result list (tradingbot.news_search, /api/news, Telegram "news").
+-- Adding a STORED generated column rewrites the table once.
+
+ALTER TABLE news_articles
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_news_search_vector
+    ON news_articles USING GIN (search_vector);
+
+CREATE INDEX IF NOT EXISTS idx_news_published_id
+    ON news_articles(published_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_news_symbol_published_id
+    ON news_articles(symbol, published_at DESC, id DESC);
+
+ANALYZE news_articles;
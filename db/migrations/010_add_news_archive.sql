@@ -0,0 +1,31 @@
+-- Migration 010: Compressed cold storage for old article content
+-- Date: 2026-10-19
+-- Description: Analyzed articles older than N days keep a slim row in
+-- news_articles (id, article_id, symbol, title, url, published_at, source; the
+-- article_id keeps collector dedup working) while content moves into
+-- news_archive_chunks: one row per batch of up to a few hundred articles of
+-- one symbol, compressed together (python -m tradingbot.news_archive run).
+-- rehydrate_articles() restores the text on demand for backtests.
+
+CREATE TABLE IF NOT EXISTS news_archive_chunks (
+    id BIGSERIAL PRIMARY KEY,
+    symbol VARCHAR(10) NOT NULL,
+    first_published_at TIMESTAMPTZ NOT NULL,
+    last_published_at TIMESTAMPTZ NOT NULL,
+    article_count INTEGER NOT NULL,
+    codec VARCHAR(10) NOT NULL,         -- 'zlib'
+    raw_bytes INTEGER NOT NULL,         -- size before compression
+    payload BYTEA NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Payload is already compressed: store it out of line without a second pass
+ALTER TABLE news_archive_chunks ALTER COLUMN payload SET STORAGE EXTERNAL;
+
+CREATE INDEX IF NOT EXISTS idx_news_archive_chunks_symbol_published
+    ON news_archive_chunks(symbol, first_published_at);
+
+ALTER TABLE news_articles
+    ADD COLUMN IF NOT EXISTS archive_chunk_id BIGINT REFERENCES news_archive_chunks(id);
+
+COMMENT ON TABLE news_archive_chunks IS 'Compressed content/url of archived news_articles rows';
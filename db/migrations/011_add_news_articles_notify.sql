@@ -0,0 +1,21 @@
+-- Migration 011: NOTIFY on new news_articles rows
+-- Date: 2026-10-19
+-- Description: tradingbot.pipeline LISTENs on 'news_articles' and starts
+-- scoring the notified symbols as soon as any collector (Python or n8n)
+-- commits new articles, instead of waiting for the next timer. One
+-- notification per statement, payload = comma-separated symbols.
+
+CREATE OR REPLACE FUNCTION notify_news_articles() RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM new_rows) THEN
+        PERFORM pg_notify('news_articles', (SELECT string_agg(DISTINCT symbol, ',') FROM new_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_news_articles_notify ON news_articles;
+CREATE TRIGGER trg_news_articles_notify
+    AFTER INSERT ON news_articles
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_news_articles();
@@ -0,0 +1,39 @@
+-- Migration 012: End-to-end latency tracing for tradingbot.pipeline
+-- Date: 2026-10-19
+-- Description: One pipeline_runs row per (run, symbol) with the publish
+-- time of the scored articles and the wall-clock time each stage finished,
+-- plus one row per run (symbol NULL) for decide/execute. timings holds
+-- per-stage seconds (collect, dedupe, score, finbert, aggregate, decide,
+-- load_inputs, fetch, orders, execute). sentiment_scores and positions get
+-- the run_id that last wrote them, so an order can be traced back to the
+-- articles behind it (python -m tradingbot.tracing report).
+
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    id BIGSERIAL PRIMARY KEY,
+    run_id UUID NOT NULL,
+    symbol VARCHAR(10),                 -- NULL = run-level row (decide/execute)
+    trigger VARCHAR(20) NOT NULL,       -- 'manual', 'collect', 'news'
+    status VARCHAR(10) NOT NULL,        -- 'ok', 'idle', 'failed', 'skipped'
+    error TEXT,
+    articles INTEGER NOT NULL DEFAULT 0,
+    newest_published_at TIMESTAMPTZ,
+    oldest_published_at TIMESTAMPTZ,
+    fetched_at TIMESTAMPTZ,
+    started_at TIMESTAMPTZ NOT NULL,
+    collected_at TIMESTAMPTZ,
+    deduped_at TIMESTAMPTZ,
+    scored_at TIMESTAMPTZ,
+    aggregated_at TIMESTAMPTZ,
+    decided_at TIMESTAMPTZ,
+    ordered_at TIMESTAMPTZ,
+    timings JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started ON pipeline_runs(started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_run_id ON pipeline_runs(run_id);
+
+ALTER TABLE sentiment_scores ADD COLUMN IF NOT EXISTS run_id UUID;
+ALTER TABLE positions ADD COLUMN IF NOT EXISTS run_id UUID;
+
+COMMENT ON TABLE pipeline_runs IS 'Per-run, per-symbol stage timestamps of tradingbot.pipeline';
@@ -2,13 +2,22 @@
 """
 Backtest EMA crossover strategy on historical data from database
 Shows what profit we could have made with our strategy
+--batch runs all symbols against one shared cash account (tradingbot.portfolio)
 """
 
 import os
 import sys
+import numpy as np
 import psycopg2
 from datetime import datetime, timedelta
 from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot import metrics
+from tradingbot.portfolio import SIZING, align_series, ema_crossovers, print_portfolio, simulate_portfolio
+from tradingbot.resample import BAR_MINUTES, load_bars, normalize_timeframe
+from tradingbot.timeindex import ema_warmup_bars, from_epoch_ns, to_epoch_ns, warmup_start, window_bounds
 
 # DB config
 DB_CONFIG = {
@@ -77,8 +86,45 @@ def calculate_ema(prices, period):
     return ema
 
 
-def backtest_strategy(symbol, config=None, start_time=None, window_hours=None):
-    """Run backtest for given symbol and period"""
+def load_rows(conn, symbol, start_dt, end_dt, warmup_bars, timeframe='1m'):
+    """
+    (timestamp, close) rows for the window plus warmup_bars before it, and
+    the epoch-ns bar starts used to locate the window
+    """
+    if timeframe == '1m':
+        # Raw snapshots (only close prices)
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                (SELECT timestamp, close_price
+                 FROM ema_snapshots
+                 WHERE symbol = %s
+                   AND close_price IS NOT NULL
+                   AND timestamp < %s
+                 ORDER BY timestamp DESC
+                 LIMIT %s)
+                UNION ALL
+                (SELECT timestamp, close_price
+                 FROM ema_snapshots
+                 WHERE symbol = %s
+                   AND close_price IS NOT NULL
+                   AND timestamp >= %s
+                   AND timestamp <= %s)
+                ORDER BY timestamp ASC
+                """,
+                (symbol.upper(), start_dt, warmup_bars, symbol.upper(), start_dt, end_dt)
+            )
+            rows = cursor.fetchall()
+        return rows, to_epoch_ns([r[0] for r in rows])
+    
+    # Session-aligned bars; warmup measured in trading minutes
+    load_from = warmup_start(start_dt, warmup_bars, BAR_MINUTES[timeframe])
+    bars = load_bars(conn, symbol, timeframe, load_from, end_dt)
+    return list(zip(from_epoch_ns(bars['end']), bars['close'].tolist())), bars['start']
+
+
+def backtest_strategy(symbol, config=None, start_time=None, window_hours=None, timeframe='1m'):
+    """Run backtest for given symbol and period (raw snapshots or resampled bars)"""
     if config is None:
         config = STRATEGY_CONFIG
     
@@ -95,49 +141,32 @@ def backtest_strategy(symbol, config=None, start_time=None, window_hours=None):
     print(f"EMA: {config['ema_short']}/{config['ema_long']} with {config['confirmation_percent']}% confirmation")
     print(f"{'='*70}\n")
     
-    # Fetch historical data (only close prices)
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    
     # Use specific time window
     from datetime import datetime, timedelta
     start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
     end_dt = start_dt + timedelta(hours=window_hours)
     
-    # Load extra data before start_time for EMA warmup (1 day earlier)
-    warmup_start_dt = start_dt - timedelta(days=1)
-    
-    cursor.execute(
-        """
-        SELECT timestamp, close_price
-        FROM ema_snapshots
-        WHERE symbol = %s
-          AND close_price IS NOT NULL
-          AND timestamp >= %s
-          AND timestamp <= %s
-        ORDER BY timestamp ASC
-        """,
-        (symbol.upper(), warmup_start_dt, end_dt)
-        )
-    
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    # Warmup: exactly the bars the long EMA needs, however many weekends or
+    # holidays sit in between (a flat "1 day" is empty on a Monday)
+    warmup_bars = ema_warmup_bars(max(config['ema_short'], config['ema_long']))
+    timeframe = normalize_timeframe(timeframe)
+    
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        rows, bar_starts = load_rows(conn, symbol, start_dt, end_dt, warmup_bars, timeframe)
+    finally:
+        conn.close()
     
     if not rows:
         print(f"No data found for {symbol}")
         return None
     
-    print(f"Loaded {len(rows)} data points (including warmup period)\n")
+    print(f"Loaded {len(rows)} {timeframe} bars (including warmup period)\n")
     
     # Find index where actual backtest window starts
-    backtest_start_idx = 0
-    for i, (ts, _) in enumerate(rows):
-        if ts >= start_dt:
-            backtest_start_idx = i
-            break
+    backtest_start_idx, _ = window_bounds(bar_starts, start_dt)
     
-    print(f"Warmup period: {backtest_start_idx} data points")
+    print(f"Warmup period: {backtest_start_idx} data points (needed {warmup_bars})")
     print(f"Backtest period: {len(rows) - backtest_start_idx} data points\n")
     
     # Calculate EMAs on ALL data (including warmup)
@@ -227,7 +256,7 @@ def backtest_strategy(symbol, config=None, start_time=None, window_hours=None):
     
     # Close any open position at end
     if position:
-        final_price = rows[-1][1]
+        final_price = float(rows[-1][1])
         pnl = position.close(final_price, rows[-1][0], config['commission_percent'])
         capital += (position.shares * final_price)
         trades.append(position)
@@ -242,13 +271,17 @@ def backtest_strategy(symbol, config=None, start_time=None, window_hours=None):
     winning_trades = [t for t in trades if t.pnl > 0]
     losing_trades = [t for t in trades if t.pnl < 0]
     
-    win_rate = (len(winning_trades) / len(trades) * 100) if trades else 0
     avg_win = sum(t.pnl for t in winning_trades) / len(winning_trades) if winning_trades else 0
     avg_loss = sum(t.pnl for t in losing_trades) / len(losing_trades) if losing_trades else 0
     
-    max_equity = max(equity_curve)
-    max_drawdown = min(equity_curve) - max_equity
-    max_drawdown_percent = (max_drawdown / max_equity * 100) if max_equity > 0 else 0
+    equity = np.asarray(equity_curve, dtype=float)
+    stats = metrics.summarize(equity, metrics.periods_per_year(timeframe),
+                              trade_pnl=[t.pnl for t in trades])
+    win_rate = stats['win_rate'] * 100
+    max_equity = float(equity.max())
+    # Deepest fall from a running peak (negative, like the percentage)
+    max_drawdown, max_drawdown_fraction, _ = metrics.max_drawdown_point(equity)
+    max_drawdown_percent = max_drawdown_fraction * 100
     
     # Print results
     print(f"\n{'='*70}")
@@ -262,12 +295,14 @@ def backtest_strategy(symbol, config=None, start_time=None, window_hours=None):
     print(f"Total Return:       ${total_return:>12,.2f} ({total_return_percent:+.2f}%)")
     print(f"Max Equity:         ${max_equity:>12,.2f}")
     print(f"Max Drawdown:       ${max_drawdown:>12,.2f} ({max_drawdown_percent:.2f}%)")
+    print(f"Sharpe Ratio:       {stats['sharpe']:>12.2f}")
     print(f"\n--- TRADES ---")
     print(f"Total Trades:       {len(trades):>12}")
     print(f"Winning Trades:     {len(winning_trades):>12} ({win_rate:.1f}%)")
     print(f"Losing Trades:      {len(losing_trades):>12}")
     print(f"Average Win:        ${avg_win:>12,.2f}")
     print(f"Average Loss:       ${avg_loss:>12,.2f}")
+    print(f"Profit Factor:      {stats['profit_factor']:>12.2f}")
     
     if trades:
         best_trade = max(trades, key=lambda t: t.pnl)
@@ -291,9 +326,59 @@ def backtest_strategy(symbol, config=None, start_time=None, window_hours=None):
         'avg_loss': avg_loss,
         'max_drawdown': max_drawdown,
         'max_drawdown_percent': max_drawdown_percent,
+        'max_drawdown_duration': stats['max_drawdown_duration'],
+        'sharpe_ratio': stats['sharpe'],
+        'sortino_ratio': stats['sortino'],
+        'profit_factor': stats['profit_factor'],
     }
 
 
+def backtest_portfolio(symbols, config=None, start_time=None, window_hours=None, timeframe='1m',
+                       max_positions=None, sizing='equal'):
+    """All symbols on one time axis against a single cash account"""
+    if config is None:
+        config = STRATEGY_CONFIG
+    
+    start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+    end_dt = start_dt + timedelta(hours=window_hours)
+    warmup_bars = ema_warmup_bars(max(config['ema_short'], config['ema_long']))
+    timeframe = normalize_timeframe(timeframe)
+    
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        series = []
+        for symbol in symbols:
+            rows, bar_starts = load_rows(conn, symbol, start_dt, end_dt, warmup_bars, timeframe)
+            series.append({'ts': bar_starts, 'close': [float(r[1]) for r in rows]})
+    finally:
+        conn.close()
+    
+    ts, m = align_series(series)
+    if not len(ts):
+        print("No data found")
+        return None
+    
+    # Signals over warmup + window; trading only inside the window
+    cross = ema_crossovers(m['close'], config['ema_short'], config['ema_long'])
+    in_window = (ts >= to_epoch_ns([start_dt])[0])[:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        strength = (cross['ema_short'] - cross['ema_long']) / cross['ema_long']
+    
+    result = simulate_portfolio(
+        ts, m['close'], cross['bullish'] & in_window, cross['bearish'] & in_window,
+        fill_price=cross['cross_price'], priority=strength,
+        initial_capital=config['initial_capital'], max_positions=max_positions, sizing=sizing,
+        position_size_percent=config['position_size_percent'],
+        commission_percent=config['commission_percent'],
+    )
+    first = int(np.searchsorted(ts, to_epoch_ns([start_dt])[0]))
+    result = {k: (v[first:] if k in ('ts', 'equity', 'cash', 'gross', 'exposure', 'positions', 'drawdown') else v)
+              for k, v in result.items()}
+    print_portfolio(result, symbols, f"EMA {config['ema_short']}/{config['ema_long']} PORTFOLIO - {timeframe}",
+                    metrics.periods_per_year(timeframe))
+    return result
+
+
 if __name__ == '__main__':
     import argparse
     
@@ -305,8 +390,8 @@ Examples:
   # Backtest NVDA for specific time window
   %(prog)s --symbol NVDA --start-time "2026-01-02T16:00:00Z" --window-hours 6
   
-  # Backtest multiple symbols
-  %(prog)s --batch NVDA AAPL TSLA --start-time "2026-01-02T16:00:00Z" --window-hours 24
+  # Backtest multiple symbols on one shared account, at most 2 positions
+  %(prog)s --batch NVDA AAPL TSLA --start-time "2026-01-02T16:00:00Z" --window-hours 24 --max-positions 2
   
   # Custom config
   %(prog)s --symbol NVDA --capital 50000 --commission 0.1 --start-time "2026-01-02T16:00:00Z" --window-hours 8
@@ -323,6 +408,12 @@ Examples:
     parser.add_argument('--confirmation', type=float, default=0.75, help='Confirmation percent (default: 0.75)')
     parser.add_argument('--start-time', type=str, required=True, help='Start time in ISO format (required)')
     parser.add_argument('--window-hours', type=int, required=True, help='Window hours from start time (required)')
+    parser.add_argument('--timeframe', default='1m', help='Bar timeframe: 1m (raw snapshots), 5m, 15m, 1h, 1d (default: 1m)')
+    parser.add_argument('--max-positions', type=int, help='Batch: max open positions (default: no limit)')
+    parser.add_argument('--sizing', choices=SIZING, default='equal',
+                        help='Batch: equal slots, percent of equity or percent of cash (default: equal)')
+    parser.add_argument('--independent', action='store_true',
+                        help='Batch: separate capital per symbol instead of one shared account')
     
     args = parser.parse_args()
     
@@ -334,10 +425,13 @@ Examples:
     config['ema_long'] = args.ema_long
     config['confirmation_percent'] = args.confirmation
     
-    if args.batch:
+    if args.batch and not args.independent:
+        backtest_portfolio(args.batch, config, args.start_time, args.window_hours, args.timeframe,
+                           args.max_positions, args.sizing)
+    elif args.batch:
         results = []
         for symbol in args.batch:
-            result = backtest_strategy(symbol, config, args.start_time, args.window_hours)
+            result = backtest_strategy(symbol, config, args.start_time, args.window_hours, args.timeframe)
             if result:
                 results.append(result)
         
@@ -357,6 +451,6 @@ Examples:
             print(f"Total Trades:          {sum(r['trades'] for r in results)}")
             print(f"{'='*70}\n")
     else:
-        backtest_strategy(args.symbol, config, args.start_time, args.window_hours)
+        backtest_strategy(args.symbol, config, args.start_time, args.window_hours, args.timeframe)
     
     print("✅ Backtest complete!")
@@ -3,12 +3,19 @@
 Backtest Golden Cross / Death Cross Strategy
 - Buy on Golden Cross (SMA50 crosses above SMA200)
 - Sell on Death Cross (SMA50 crosses below SMA200)
-- Daily timeframe, no stop-loss
+- Daily timeframe by default (--timeframe), no stop-loss
 """
 
 import os
+import sys
 import psycopg2
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot import metrics
+from tradingbot.resample import load_bars
+from tradingbot.timeindex import from_epoch_ns
 
 # DB config
 DB_CONFIG = {
@@ -63,8 +70,8 @@ def calculate_sma(prices, period):
     return sma
 
 
-def backtest_strategy(symbol, config=None):
-    """Run backtest for given symbol"""
+def backtest_strategy(symbol, config=None, timeframe='1d'):
+    """Run backtest for given symbol (daily bars by default)"""
     if config is None:
         config = STRATEGY_CONFIG
     
@@ -76,24 +83,14 @@ def backtest_strategy(symbol, config=None):
     print(f"SMA: {config['sma_short']}/{config['sma_long']}")
     print(f"{'='*70}\n")
     
-    # Fetch historical data (daily bars)
+    # Minute snapshots resampled into session bars (cached after the first run)
     conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """
-        SELECT timestamp, close_price
-        FROM ema_snapshots
-        WHERE symbol = %s
-          AND close_price IS NOT NULL
-        ORDER BY timestamp ASC
-        """,
-        (symbol.upper(),)
-    )
+    try:
+        bars = load_bars(conn, symbol, timeframe)
+    finally:
+        conn.close()
     
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    rows = list(zip(from_epoch_ns(bars['end']), bars['close']))
     
     if not rows:
         print(f"No data found for {symbol}")
@@ -103,7 +100,7 @@ def backtest_strategy(symbol, config=None):
         print(f"Not enough data for SMA{config['sma_long']} calculation. Need at least {config['sma_long']} bars, got {len(rows)}")
         return None
     
-    print(f"Loaded {len(rows)} daily bars")
+    print(f"Loaded {len(rows)} {timeframe} bars")
     print(f"Period: {rows[0][0].strftime('%Y-%m-%d')} to {rows[-1][0].strftime('%Y-%m-%d')}\n")
     
     # Extract prices
@@ -205,19 +202,9 @@ def backtest_strategy(symbol, config=None):
         print(f"Average Win:      ${avg_win:,.2f}")
         print(f"Average Loss:     ${avg_loss:,.2f}")
         
-        # Max drawdown
-        peak = equity_curve[0]
-        max_drawdown = 0
-        max_drawdown_percent = 0
-        
-        for equity in equity_curve:
-            if equity > peak:
-                peak = equity
-            drawdown = peak - equity
-            drawdown_pct = (drawdown / peak) * 100
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
-                max_drawdown_percent = drawdown_pct
+        # Max drawdown (dollars and percent at the same trough)
+        max_drawdown, max_drawdown_fraction, _ = metrics.max_drawdown_point(equity_curve)
+        max_drawdown, max_drawdown_percent = -max_drawdown, -max_drawdown_fraction * 100
         
         print(f"Max Drawdown:     ${max_drawdown:,.2f} ({max_drawdown_percent:.2f}%)")
     
@@ -267,6 +254,7 @@ Examples:
     parser.add_argument('--commission', type=float, default=0.0, help='Commission percent (default: 0.0)')
     parser.add_argument('--sma-short', type=int, default=50, help='Short SMA period (default: 50)')
     parser.add_argument('--sma-long', type=int, default=200, help='Long SMA period (default: 200)')
+    parser.add_argument('--timeframe', default='1d', help='Bar timeframe: 1h, 1d, 1w, ... (default: 1d)')
     
     args = parser.parse_args()
     
@@ -279,7 +267,7 @@ Examples:
     if args.batch:
         results = []
         for symbol in args.batch:
-            result = backtest_strategy(symbol, config)
+            result = backtest_strategy(symbol, config, args.timeframe)
             if result:
                 results.append(result)
         
@@ -299,4 +287,4 @@ Examples:
             print(f"Total Trades:          {sum(r['trades'] for r in results)}")
             print(f"{'='*70}\n")
     else:
-        backtest_strategy(args.symbol, config)
+        backtest_strategy(args.symbol, config, args.timeframe)
@@ -8,6 +8,9 @@ Strategy Logic:
 - Select top-4 symbols with highest sentiment
 - Rebalance portfolio: equal weight (25% each)
 - Sell positions not in top-4, buy new top-4
+- New positions carry the executor's bracket (2% stop / 4% target), resolved
+  intraday against each day's OHLC (tradingbot.fills); the legs are day
+  orders like the live ones, so they only cover the session after entry
 
 Metrics Calculated:
 - Total Return
@@ -25,13 +28,17 @@ Data Sources:
 - Sentiment scores: data/sentiment_proxy_2023-2025.csv
 """
 
-import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot.executor import EXECUTOR_CONFIG
+from tradingbot.fills import REASONS, STOP, bracket_levels, check_brackets
+from tradingbot.metrics import drawdown, summarize
+from tradingbot.reports import REPORTS_DIR, backtest_result, render_report
+
 # Configuration
 CONFIG = {
     'initial_capital': 10000.0,
@@ -40,11 +47,18 @@ CONFIG = {
     'top_n': 4,  # Select top-4 by sentiment
     'commission': 0.0,  # Alpaca commission-free
     'slippage': 0.001,  # 0.1% slippage per trade
+    'brackets': True,  # Model the executor's stop-loss / take-profit legs
+    'stop_loss_percent': EXECUTOR_CONFIG['stop_loss_percent'],
+    'take_profit_percent': EXECUTOR_CONFIG['take_profit_percent'],
+    'ambiguous_fill': 'stop',  # Bar touching both levels: 'stop', 'target' or 'open'
+    'bracket_tif': 'day',  # 'day' like the live legs (next session only), or 'gtc'
 }
 
 # Paths
 DATA_DIR = Path(__file__).parent.parent / 'data'
-REPORTS_DIR = Path(__file__).parent.parent / 'reports'
+
+# Days whose sentiment ranking the report shows
+EXAMPLE_DATES = ['2023-01-03', '2023-06-15', '2024-01-15', '2025-06-15', '2025-12-29']
 
 
 class Portfolio:
@@ -53,6 +67,7 @@ class Portfolio:
     def __init__(self, initial_capital):
         self.cash = initial_capital
         self.positions = {}  # {symbol: shares}
+        self.brackets = {}  # {symbol: (stop, target)}
         self.equity_history = []
         self.trades = []
         self.current_date = None
@@ -89,6 +104,10 @@ class Portfolio:
                 shares_to_buy = target_shares - current_shares
                 cost = shares_to_buy * prices[symbol] * (1 + config['slippage'])
                 if cost <= self.cash:
+                    if current_shares == 0 and config['brackets']:
+                        stop, target = bracket_levels(prices[symbol], config['stop_loss_percent'],
+                                                      config['take_profit_percent'])
+                        self.brackets[symbol] = (float(stop), float(target))
                     self.positions[symbol] = self.positions.get(symbol, 0) + shares_to_buy
                     self.cash -= cost
                     self._record_trade('BUY', symbol, shares_to_buy, prices[symbol], date)
@@ -103,6 +122,38 @@ class Portfolio:
                 
                 if self.positions[symbol] == 0:
                     del self.positions[symbol]
+                    self.brackets.pop(symbol, None)
+    
+    def apply_brackets(self, bars, date, config):
+        """
+        Fill stop/target legs hit during the day, all positions at once
+        
+        bars: {symbol: (open, high, low)} for the day. Returns exits by reason.
+        Legs are placed after the close, so with day TIF every bracket held
+        now is in its only session and expires at this close.
+        """
+        symbols = [s for s in self.brackets if s in self.positions and s in bars]
+        exits = self._fill_brackets(symbols, bars, date, config) if symbols else {}
+        if config['bracket_tif'] == 'day':
+            self.brackets.clear()
+        return exits
+    
+    def _fill_brackets(self, symbols, bars, date, config):
+        ohl = np.array([bars[s] for s in symbols], dtype=float)
+        levels = np.array([self.brackets[s] for s in symbols], dtype=float)
+        reasons, fills = check_brackets(ohl[:, 0], ohl[:, 1], ohl[:, 2], levels[:, 0], levels[:, 1],
+                                        config['ambiguous_fill'], config['slippage'])
+        exits = {}
+        for symbol, reason, price in zip(symbols, reasons, fills):
+            if not reason:
+                continue
+            shares = self.positions.pop(symbol)
+            self.brackets.pop(symbol)
+            # Stop fills already include slippage; limit fills never slip
+            self.cash += shares * price
+            self._record_trade('STOP' if reason == STOP else 'TARGET', symbol, shares, price, date)
+            exits[REASONS[reason]] = exits.get(REASONS[reason], 0) + 1
+        return exits
     
     def _close_position(self, symbol, price, date, config):
         """Close entire position"""
@@ -114,6 +165,7 @@ class Portfolio:
         self.cash += proceeds
         self._record_trade('SELL', symbol, shares, price, date)
         del self.positions[symbol]
+        self.brackets.pop(symbol, None)
     
     def _record_trade(self, action, symbol, shares, price, date):
         """Record trade in history"""
@@ -188,46 +240,30 @@ def calculate_metrics(portfolio, config):
         return {}
     
     initial_capital = config['initial_capital']
-    final_equity = equity_df.iloc[-1]['equity']
-    
-    # Returns
-    equity_df['returns'] = equity_df['equity'].pct_change()
-    total_return = (final_equity - initial_capital) / initial_capital
+    equity = equity_df['equity'].to_numpy(dtype=float)
+    stats = summarize(equity, initial=initial_capital)
     
-    # Sharpe Ratio (annualized, assuming 252 trading days)
-    returns_std = equity_df['returns'].std()
-    if returns_std > 0:
-        sharpe = (equity_df['returns'].mean() / returns_std) * np.sqrt(252)
-    else:
-        sharpe = 0.0
-    
-    # Max Drawdown
-    equity_df['cummax'] = equity_df['equity'].cummax()
-    equity_df['drawdown'] = (equity_df['equity'] - equity_df['cummax']) / equity_df['cummax']
-    max_drawdown = equity_df['drawdown'].min()
-    
-    # Win Rate
-    trades_df = pd.DataFrame(portfolio.trades)
-    if len(trades_df) > 0:
-        buy_trades = trades_df[trades_df['action'] == 'BUY']
-        sell_trades = trades_df[trades_df['action'] == 'SELL']
-        num_trades = len(buy_trades) + len(sell_trades)
-    else:
-        num_trades = 0
+    # Drawdown measured from the starting capital too, not just the first close
+    equity_df['drawdown'] = drawdown(np.concatenate([[initial_capital], equity]))[1:]
     
-    # Trading days
-    trading_days = len(equity_df)
+    trades = portfolio.trades
+    actions = np.array([t['action'] for t in trades])
     
     metrics = {
         'initial_capital': initial_capital,
-        'final_equity': final_equity,
-        'total_return': total_return,
-        'total_return_pct': total_return * 100,
-        'sharpe_ratio': sharpe,
-        'max_drawdown': max_drawdown,
-        'max_drawdown_pct': max_drawdown * 100,
-        'num_trades': num_trades,
-        'trading_days': trading_days,
+        'final_equity': float(equity[-1]),
+        'total_return': stats['total_return'],
+        'total_return_pct': stats['total_return'] * 100,
+        'cagr_pct': stats['cagr'] * 100,
+        'sharpe_ratio': stats['sharpe'],
+        'sortino_ratio': stats['sortino'],
+        'max_drawdown': stats['max_drawdown'],
+        'max_drawdown_pct': stats['max_drawdown'] * 100,
+        'max_drawdown_days': stats['max_drawdown_duration'],
+        'num_trades': len(trades),
+        'stop_exits': int(np.sum(actions == 'STOP')),
+        'target_exits': int(np.sum(actions == 'TARGET')),
+        'trading_days': len(equity),
         'avg_positions': equity_df['positions'].mean(),
     }
     
@@ -258,6 +294,10 @@ def run_backtest():
     
     print(f"\n💰 Initial Capital: ${CONFIG['initial_capital']:,.2f}")
     print(f"📊 Strategy: Top-{CONFIG['top_n']} by sentiment, equal weight")
+    if CONFIG['brackets']:
+        print(f"🛡️  Brackets: {CONFIG['stop_loss_percent']*100:.1f}% stop / "
+              f"{CONFIG['take_profit_percent']*100:.1f}% target, {CONFIG['bracket_tif']} orders "
+              f"(ambiguous bars: {CONFIG['ambiguous_fill']})")
     print(f"💼 Symbols: {', '.join(CONFIG['symbols'])}")
     
     # Initialize portfolio
@@ -281,6 +321,12 @@ def run_backtest():
         
         prices_dict = dict(zip(day_prices['symbol'], day_prices['close']))
         
+        # Bracket legs trigger intraday, before the close rebalance
+        if CONFIG['brackets'] and portfolio.brackets:
+            day_bars = dict(zip(day_prices['symbol'],
+                                zip(day_prices['open'], day_prices['high'], day_prices['low'])))
+            portfolio.apply_brackets(day_bars, date, CONFIG)
+        
         # Rebalance if needed
         current_symbols = set(portfolio.positions.keys())
         target_symbols = set(top_symbols)
@@ -313,19 +359,20 @@ def run_backtest():
     
     print(f"\n📊 Risk Metrics:")
     print(f"  Sharpe Ratio:     {metrics['sharpe_ratio']:>12.2f}")
-    print(f"  Max Drawdown:     {metrics['max_drawdown_pct']:>12.2f}%")
+    print(f"  Sortino Ratio:    {metrics['sortino_ratio']:>12.2f}")
+    print(f"  Max Drawdown:     {metrics['max_drawdown_pct']:>12.2f}% ({metrics['max_drawdown_days']} days)")
     
     print(f"\n📈 Trading Activity:")
     print(f"  Total Trades:     {metrics['num_trades']:>12}")
+    if CONFIG['brackets']:
+        print(f"  Stop-Loss Exits:  {metrics['stop_exits']:>12}")
+        print(f"  Take-Profit Exits:{metrics['target_exits']:>12}")
     print(f"  Trading Days:     {metrics['trading_days']:>12}")
     print(f"  Avg Positions:    {metrics['avg_positions']:>12.1f}")
     print(f"  Rebalances:       {rebalance_count:>12}")
     
-    # Generate report
-    generate_report(metrics, equity_df, portfolio, sentiment)
-    
-    # Plot results
-    plot_results(equity_df, portfolio)
+    # Report, metrics and chart
+    generate_report(equity_df, portfolio, sentiment)
     
     # Decision
     print(f"\n{'='*70}")
@@ -344,191 +391,71 @@ def run_backtest():
     return metrics, equity_df, portfolio
 
 
-def generate_report(metrics, equity_df, portfolio, sentiment_data=None):
-    """Generate markdown report"""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    report_path = REPORTS_DIR / f'backtest_v1_results_{timestamp}.md'
-    
-    with open(report_path, 'w') as f:
-        f.write(f"# Sentiment-Based Top-4 Strategy Backtest Results\n\n")
-        f.write(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        f.write(f"## Strategy Configuration\n\n")
-        f.write(f"- **Initial Capital:** ${CONFIG['initial_capital']:,.2f}\n")
-        f.write(f"- **Strategy:** Top-{CONFIG['top_n']} symbols by sentiment\n")
-        f.write(f"- **Position Size:** {CONFIG['position_size']*100:.0f}% per symbol\n")
-        f.write(f"- **Symbols:** {', '.join(CONFIG['symbols'])}\n")
-        f.write(f"- **Slippage:** {CONFIG['slippage']*100:.2f}%\n")
-        f.write(f"- **Commission:** {CONFIG['commission']*100:.2f}%\n\n")
-        
-        f.write(f"## Performance Summary\n\n")
-        f.write(f"| Metric | Value |\n")
-        f.write(f"|--------|-------|\n")
-        f.write(f"| Initial Capital | ${metrics['initial_capital']:,.2f} |\n")
-        f.write(f"| Final Equity | ${metrics['final_equity']:,.2f} |\n")
-        f.write(f"| Total Return | {metrics['total_return_pct']:.2f}% |\n")
-        f.write(f"| Sharpe Ratio | {metrics['sharpe_ratio']:.2f} |\n")
-        f.write(f"| Max Drawdown | {metrics['max_drawdown_pct']:.2f}% |\n")
-        f.write(f"| Total Trades | {metrics['num_trades']} |\n")
-        f.write(f"| Trading Days | {metrics['trading_days']} |\n")
-        f.write(f"| Avg Positions | {metrics['avg_positions']:.1f} |\n\n")
-        
-        f.write(f"## Decision\n\n")
-        if metrics['sharpe_ratio'] >= 0.5:
-            f.write(f"✅ **GO:** Sharpe ratio {metrics['sharpe_ratio']:.2f} >= 0.5\n\n")
-            f.write(f"Strategy shows promise. Proceed to Phase 2.\n\n")
-        else:
-            f.write(f"❌ **NO-GO:** Sharpe ratio {metrics['sharpe_ratio']:.2f} < 0.5\n\n")
-            f.write(f"Strategy underperforms. Consider pivot or refinement.\n\n")
-        
-        # Trade log
-        f.write(f"## Trade Log (Last 50 Trades)\n\n")
-        trades_df = pd.DataFrame(portfolio.trades)
-        if len(trades_df) > 0:
-            f.write(f"| Date | Action | Symbol | Shares | Price | Value |\n")
-            f.write(f"|------|--------|--------|--------|-------|-------|\n")
-            for _, trade in trades_df.tail(50).iterrows():
-                f.write(f"| {trade['date'].strftime('%Y-%m-%d')} | {trade['action']} | "
-                       f"{trade['symbol']} | {trade['shares']} | "
-                       f"${trade['price']:.2f} | ${trade['value']:.2f} |\n")
-            f.write(f"\n")
-        
-        # Monthly performance
-        f.write(f"## Monthly Performance\n\n")
-        equity_df['month'] = equity_df['date'].dt.to_period('M')
-        monthly = equity_df.groupby('month').agg({
-            'equity': ['first', 'last']
-        })
-        monthly.columns = ['start', 'end']
-        monthly['return'] = (monthly['end'] - monthly['start']) / monthly['start'] * 100
-        
-        f.write(f"| Month | Start Equity | End Equity | Return |\n")
-        f.write(f"|-------|--------------|------------|--------|\n")
-        for month, row in monthly.iterrows():
-            f.write(f"| {month} | ${row['start']:,.2f} | ${row['end']:,.2f} | "
-                   f"{row['return']:+.2f}% |\n")
-        f.write(f"\n")
-        
-        # Decision-making analysis
-        if sentiment_data is not None:
-            f.write(f"## Decision-Making Logic\n\n")
-            f.write(f"**Strategy:** Each day, rank all 7 symbols by sentiment score and select the top-4.\n\n")
-            
-            # Sample days
-            example_dates = ['2023-01-03', '2023-06-15', '2024-01-15', '2025-06-15', '2025-12-29']
-            f.write(f"### Example Days\n\n")
-            
-            for date_str in example_dates:
-                date = pd.to_datetime(date_str)
-                day_sentiment = sentiment_data[sentiment_data['date'] == date].copy()
-                
-                if len(day_sentiment) == 0:
-                    continue
-                
-                day_sentiment = day_sentiment.sort_values('sentiment', ascending=False)
-                
-                f.write(f"#### {date_str}\n\n")
-                f.write(f"| Rank | Symbol | Sentiment | Selected |\n")
-                f.write(f"|------|--------|-----------|----------|\n")
-                
-                for i, (_, row) in enumerate(day_sentiment.iterrows(), 1):
-                    selected = "✅ BUY" if i <= 4 else "❌ SKIP"
-                    f.write(f"| {i} | {row['symbol']} | {row['sentiment']:.4f} | {selected} |\n")
-                
-                top_4 = day_sentiment.head(4)['symbol'].tolist()
-                f.write(f"\n**Portfolio:** {', '.join(top_4)}\n\n")
-            
-            # Rebalancing frequency
-            f.write(f"### Rebalancing Frequency\n\n")
-            
-            all_dates = sorted(sentiment_data['date'].unique())
-            rebalance_count = 0
-            prev_portfolio = None
-            
-            for date in all_dates:
-                day_sentiment = sentiment_data[sentiment_data['date'] == date]
-                if len(day_sentiment) == 0:
-                    continue
-                
-                current_portfolio = set(day_sentiment.nlargest(4, 'sentiment')['symbol'].tolist())
-                
-                if prev_portfolio is not None and current_portfolio != prev_portfolio:
-                    rebalance_count += 1
-                
-                prev_portfolio = current_portfolio
-            
-            total_days = len(all_dates)
-            rebalance_pct = (rebalance_count / total_days) * 100
-            avg_days = total_days / rebalance_count if rebalance_count > 0 else 0
-            
-            f.write(f"- **Total Trading Days:** {total_days}\n")
-            f.write(f"- **Rebalances:** {rebalance_count}\n")
-            f.write(f"- **Rebalance Frequency:** {rebalance_pct:.1f}% of days\n")
-            f.write(f"- **Avg Days Between Rebalances:** {avg_days:.1f}\n\n")
-            
-            # Symbol popularity
-            f.write(f"### Symbol Selection Frequency\n\n")
-            
-            symbol_days = {}
-            for date in all_dates:
-                day_sentiment = sentiment_data[sentiment_data['date'] == date]
-                if len(day_sentiment) == 0:
-                    continue
-                
-                top_4 = day_sentiment.nlargest(4, 'sentiment')['symbol'].tolist()
-                for symbol in top_4:
-                    symbol_days[symbol] = symbol_days.get(symbol, 0) + 1
-            
-            sorted_symbols = sorted(symbol_days.items(), key=lambda x: x[1], reverse=True)
-            
-            f.write(f"| Symbol | Days in Portfolio | Percentage | Avg per Year |\n")
-            f.write(f"|--------|-------------------|------------|---------------|\n")
-            
-            for symbol, days in sorted_symbols:
-                pct = (days / total_days) * 100
-                days_per_year = days / 3
-                f.write(f"| {symbol} | {days} | {pct:.1f}% | {days_per_year:.0f} |\n")
-            
-            f.write(f"\n💡 Portfolio always holds exactly 4 symbols (equal weight 25% each)\n\n")
-        
-        f.write(f"## Equity Curve\n\n")
-        f.write(f"See: `backtest_equity_curve_{timestamp}.png`\n\n")
-    
-    print(f"\n📄 Report saved: {report_path}")
+def selection_matrix(sentiment_df, symbols, top_n):
+    """Daily sentiment as (dates x symbols) scores plus the top-N picks"""
+    pivot = sentiment_df.pivot_table(index='date', columns='symbol', values='sentiment').reindex(columns=symbols)
+    scores = pivot.to_numpy(dtype=float)
+    order = np.argsort(-np.nan_to_num(scores, nan=-np.inf), axis=1, kind='stable')
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(len(symbols))[None, :], axis=1)
+    selected = (rank < top_n) & ~np.isnan(scores)
+    return pivot.index.to_numpy(), scores, selected
+
 
+def build_result(equity_df, portfolio, sentiment_data=None):
+    """Standard results object for tradingbot.reports"""
+    settings = {
+        'Initial Capital': f"${CONFIG['initial_capital']:,.2f}",
+        'Strategy': f"Top-{CONFIG['top_n']} symbols by sentiment",
+        'Position Size': f"{CONFIG['position_size']*100:.0f}% per symbol",
+        'Symbols': ', '.join(CONFIG['symbols']),
+        'Slippage': f"{CONFIG['slippage']*100:.2f}%",
+        'Commission': f"{CONFIG['commission']*100:.2f}%",
+    }
+    if CONFIG['brackets']:
+        settings['Brackets'] = (f"{CONFIG['stop_loss_percent']*100:.1f}% stop / "
+                                f"{CONFIG['take_profit_percent']*100:.1f}% target, {CONFIG['bracket_tif']} orders")
+    
+    selection = None
+    if sentiment_data is not None:
+        dates, scores, selected = selection_matrix(sentiment_data, CONFIG['symbols'], CONFIG['top_n'])
+        selection = {'dates': dates, 'symbols': CONFIG['symbols'], 'scores': scores,
+                     'selected': selected, 'examples': EXAMPLE_DATES}
+    
+    return backtest_result('backtest_v1', equity_df['date'], equity_df['equity'], CONFIG['initial_capital'],
+                           portfolio.trades, 'Sentiment-Based Top-4 Strategy Backtest Results',
+                           settings, positions=equity_df['positions'], selection=selection)
 
-def plot_results(equity_df, portfolio):
-    """Plot equity curve"""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    plot_path = REPORTS_DIR / f'backtest_equity_curve_{timestamp}.png'
-    
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
-    
-    # Equity curve
-    ax1.plot(equity_df['date'], equity_df['equity'], linewidth=2, label='Portfolio Equity')
-    ax1.axhline(y=CONFIG['initial_capital'], color='gray', linestyle='--', alpha=0.5, label='Initial Capital')
-    ax1.set_title('Portfolio Equity Over Time', fontsize=16, fontweight='bold')
-    ax1.set_xlabel('Date')
-    ax1.set_ylabel('Equity ($)')
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-    ax1.set_ylim(bottom=0)
-    
-    # Drawdown
-    ax2.fill_between(equity_df['date'], equity_df['drawdown'] * 100, 0, alpha=0.3, color='red')
-    ax2.plot(equity_df['date'], equity_df['drawdown'] * 100, linewidth=1, color='darkred')
-    ax2.set_title('Drawdown (%)', fontsize=16, fontweight='bold')
-    ax2.set_xlabel('Date')
-    ax2.set_ylabel('Drawdown (%)')
-    ax2.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(plot_path, dpi=150, bbox_inches='tight')
-    print(f"📊 Chart saved: {plot_path}")
-    plt.close()
+
+def generate_report(equity_df, portfolio, sentiment_data=None):
+    """Markdown + HTML report, metrics JSON and equity chart under one name"""
+    paths = render_report(build_result(equity_df, portfolio, sentiment_data), REPORTS_DIR)['paths']
+    print(f"\n📄 Report saved: {paths['md']}")
+    print(f"🌐 HTML report:  {paths['html']}")
+    print(f"📊 Chart saved:  {paths['png']}")
 
 
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Backtest the sentiment top-4 strategy')
+    parser.add_argument('--no-brackets', action='store_true', help='Do not model stop-loss / take-profit legs')
+    parser.add_argument('--stop-loss', type=float, help='Stop-loss percent (default: executor, 2.0)')
+    parser.add_argument('--take-profit', type=float, help='Take-profit percent (default: executor, 4.0)')
+    parser.add_argument('--ambiguous', choices=['stop', 'target', 'open'], default='stop',
+                        help='Fill order when a bar touches both levels (default: stop)')
+    parser.add_argument('--tif', choices=['day', 'gtc'], default=CONFIG['bracket_tif'],
+                        help='Bracket legs: day (live executor, next session only) or gtc (default: day)')
+    args = parser.parse_args()
+    
+    CONFIG['brackets'] = not args.no_brackets
+    if args.stop_loss is not None:
+        CONFIG['stop_loss_percent'] = args.stop_loss / 100
+    if args.take_profit is not None:
+        CONFIG['take_profit_percent'] = args.take_profit / 100
+    CONFIG['ambiguous_fill'] = args.ambiguous
+    CONFIG['bracket_tif'] = args.tif
+    
     try:
         metrics, equity_df, portfolio = run_backtest()
     except KeyboardInterrupt:
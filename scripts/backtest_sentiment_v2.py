@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Backtest the V2 Sentiment Executor
+==================================
+
+Replays the decision pipeline of tradingbot.executor day by day, using the
+executor's own rule functions:
+
+- Macro_Event_Gate (macro_event_gate) and the 10% drawdown kill switch
+  against the 30-day equity peak (check_drawdown)
+- price > EMA200, EMA9 > EMA21, RSI14 < 70, volume > volume_ma20
+  (technical_filter_masks), with the unfiltered fallback
+- top-4 by sentiment (2-day average), max 2 per sector (select_top_matrix)
+- close deselected positions, open new ones with a fixed $500 notional
+  bracket (2% stop / 4% target, whole shares)
+
+The four filters are computed once as date x symbol boolean matrices from
+daily bars, so each day's selection is a row lookup; only cash and
+positions are stepped through time. Decisions on day D use indicators up
+to the close of D-1 and sentiment dated up to D; orders fill at D's open
+and bracket legs are resolved against D's bar (tradingbot.fills). Brackets
+are day orders like the live ones (legs expire at the close) unless
+--tif gtc is given.
+
+Data sources:
+- csv: data/historical_{symbol}_2023-2025.csv + data/sentiment_proxy_2023-2025.csv
+- db:  bars (1d) via tradingbot.bars, sentiment_scores, tracked_symbols
+"""
+
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot.executor import (
+    EXECUTOR_CONFIG, check_drawdown, macro_event_gate, select_top_matrix, technical_filter_masks,
+)
+from tradingbot.fills import STOP, bracket_levels, check_brackets
+from tradingbot.indicators import ema_matrix, rsi_matrix, sma_matrix
+from tradingbot.metrics import summarize
+from tradingbot.reports import REPORTS_DIR, backtest_result, render_report
+from tradingbot.timeindex import MARKET_TZ
+
+CONFIG = dict(
+    EXECUTOR_CONFIG,
+    initial_capital=10000.0,
+    slippage=0.0005,        # Market orders (entries, exits, stop fills)
+    bracket_tif='day',      # 'day' like the live orders, or 'gtc'
+    ambiguous_fill='stop',  # Bar touching both bracket levels: 'stop', 'target' or 'open'
+    drawdown_window_days=30,
+)
+
+# Seeded in migration 002; used when tracked_symbols is not available
+SECTORS = {
+    'AAPL': 'Technology', 'MSFT': 'Technology', 'NVDA': 'Technology',
+    'GOOGL': 'Communication Services', 'META': 'Communication Services',
+    'AMZN': 'Consumer Discretionary', 'TSLA': 'Consumer Discretionary',
+}
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+
+
+# ============================================================
+# Data
+# ============================================================
+
+def _matrix(dates, series, field):
+    """Align per-symbol {date: value} arrays on a shared date axis"""
+    out = np.full((len(dates), len(series)), np.nan)
+    index = {d: i for i, d in enumerate(dates)}
+    for j, s in enumerate(series):
+        rows = [index[d] for d in s['dates']]
+        out[rows, j] = s[field]
+    return out
+
+
+def build_market(symbols, sectors, series, sentiment_rows):
+    """
+    Market dict: trading dates, symbols, sector ids and (dates x symbols)
+    open/high/low/close/volume matrices plus raw daily sentiment rows
+    """
+    dates = sorted({d for s in series for d in s['dates']})
+    sector_names = sorted({sectors.get(s) or 'Unknown' for s in symbols})
+    market = {
+        'dates': dates,
+        'symbols': list(symbols),
+        'sector_ids': np.array([sector_names.index(sectors.get(s) or 'Unknown') for s in symbols]),
+        'sector_names': sector_names,
+        'sentiment_rows': sentiment_rows,
+    }
+    for field in ('open', 'high', 'low', 'close', 'volume'):
+        market[field] = _matrix(dates, series, field)
+    return market
+
+
+def load_csv_market(symbols):
+    """Daily CSVs written by fetch_historical_data.py and the sentiment proxy"""
+    import pandas as pd
+
+    series = []
+    for symbol in symbols:
+        df = pd.read_csv(DATA_DIR / f'historical_{symbol}_2023-2025.csv')
+        series.append({
+            'dates': [date.fromisoformat(str(d)[:10]) for d in df['date']],
+            **{f: df[f].to_numpy(dtype=float) for f in ('open', 'high', 'low', 'close', 'volume')},
+        })
+    sent = pd.read_csv(DATA_DIR / 'sentiment_proxy_2023-2025.csv')
+    sentiment_rows = [(date.fromisoformat(str(d)[:10]), s, float(v))
+                      for d, s, v in zip(sent['date'], sent['symbol'], sent['sentiment'])]
+    return build_market(symbols, SECTORS, series, sentiment_rows)
+
+
+def load_db_market(conn, start, end, symbols=None):
+    """Active tracked symbols with daily bars (warmup included) and sentiment"""
+    from tradingbot.bars import load_ohlcv
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT symbol, sector FROM tracked_symbols WHERE active = true ORDER BY symbol")
+        sectors = dict(cur.fetchall())
+        cur.execute(
+            """
+            SELECT date, symbol, sentiment_score
+            FROM sentiment_scores
+            WHERE date BETWEEN %s AND %s
+            """,
+            (start - timedelta(days=CONFIG['sentiment_lookback_days']), end),
+        )
+        sentiment_rows = [(r[0], r[1], float(r[2])) for r in cur.fetchall()]
+
+    symbols = symbols or list(sectors)
+    # ~300 sessions of history before start for EMA200 and its seed
+    warm = datetime.combine(start - timedelta(days=450), datetime.min.time(), MARKET_TZ)
+    stop = datetime.combine(end, datetime.max.time(), MARKET_TZ)
+    series = []
+    for symbol in symbols:
+        bars = load_ohlcv(conn, symbol, '1d', warm, stop)
+        series.append({
+            'dates': [datetime.fromtimestamp(t / 1e9, timezone.utc).astimezone(MARKET_TZ).date()
+                      for t in bars['ts']],
+            **{f: np.asarray(bars[f], dtype=float) for f in ('open', 'high', 'low', 'close', 'volume')},
+        })
+    return build_market(symbols, sectors, series, sentiment_rows)
+
+
+def rolling_sentiment(market, lookback_days):
+    """
+    Executor score per trading day: AVG(sentiment_score) over
+    date >= D - lookback_days (calendar days, D included), NaN if none
+    """
+    dates, symbols = market['dates'], market['symbols']
+    if not market['sentiment_rows']:
+        return np.full((len(dates), len(symbols)), np.nan)
+    col = {s: j for j, s in enumerate(symbols)}
+    first = min(min(r[0] for r in market['sentiment_rows']), dates[0])
+    last = max(max(r[0] for r in market['sentiment_rows']), dates[-1])
+    n_days = (last - first).days + 1
+
+    total = np.zeros((n_days + 1, len(symbols)))
+    count = np.zeros((n_days + 1, len(symbols)))
+    for d, s, v in market['sentiment_rows']:
+        if s in col:
+            total[(d - first).days + 1, col[s]] += v
+            count[(d - first).days + 1, col[s]] += 1
+    total, count = np.cumsum(total, axis=0), np.cumsum(count, axis=0)
+
+    hi = np.array([(d - first).days + 1 for d in dates])
+    lo = np.maximum(hi - lookback_days - 1, 0)
+    n = count[hi] - count[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, np.round((total[hi] - total[lo]) / n, 4), np.nan)
+
+
+def _shift(matrix):
+    """Values as of the previous row (yesterday's close)"""
+    out = np.full(matrix.shape, np.nan)
+    out[1:] = matrix[:-1]
+    return out
+
+
+def build_signals(market, config):
+    """Filter masks, scores and selections as (dates x symbols) matrices"""
+    close = market['close']
+    volume = np.nan_to_num(market['volume'])
+    indicators = {
+        'close': close,
+        'ema9': ema_matrix(close, 9),
+        'ema21': ema_matrix(close, 21),
+        'ema200': ema_matrix(close, 200),
+        'rsi14': rsi_matrix(close, 14),
+        'volume': np.where(np.isnan(close), np.nan, volume),
+        'volume_ma20': sma_matrix(volume, 20),
+    }
+    known = {k: _shift(v) for k, v in indicators.items()}
+    masks = technical_filter_masks(known['close'], known['ema9'], known['ema21'], known['ema200'],
+                                   known['rsi14'], known['volume'], known['volume_ma20'],
+                                   rsi_max=config['rsi_max'])
+    passes = masks['trend'] & masks['ema'] & masks['rsi'] & masks['volume']
+    scores = rolling_sentiment(market, config['sentiment_lookback_days'])
+    selected = select_top_matrix(scores, passes, market['sector_ids'],
+                                 config['top_n'], config['max_per_sector'])
+    return {'masks': masks, 'passes': passes, 'scores': scores, 'selected': selected,
+            'warm': ~np.isnan(known['ema200'])}
+
+
+# ============================================================
+# Simulation
+# ============================================================
+
+def simulate(market, signals, config, start_idx=0):
+    """Step cash and positions through the trading days from start_idx"""
+    dates, symbols = market['dates'], market['symbols']
+    opens, highs, lows, closes = market['open'], market['high'], market['low'], market['close']
+    scores, selected = signals['scores'], signals['selected']
+    n_days, n_sym = opens.shape
+    slip = config['slippage']
+    macro_configured = bool(config['fomc_dates'] or config['earnings_by_symbol'])
+
+    cash = config['initial_capital']
+    shares = np.zeros(n_sym, dtype=np.int64)
+    stop = np.full(n_sym, np.nan)
+    target = np.full(n_sym, np.nan)
+    bracket_until = np.full(n_sym, -1, dtype=np.int64)
+    last_close = np.full(n_sym, np.nan)
+    if start_idx > 0:
+        last_close = _ffill_last(closes[:start_idx])
+
+    equity_dates, equity, exposure, positions = [], [], [], []
+    trades = []
+    skipped = {}
+
+    def trade(action, t, cols, qty, price):
+        for j, q, p in zip(cols, qty, price):
+            trades.append({'date': dates[t], 'action': action, 'symbol': symbols[j],
+                           'shares': int(q), 'price': float(p), 'value': float(q * p)})
+
+    for t in range(start_idx, n_days):
+        today = dates[t]
+        open_px = np.where(np.isnan(opens[t]), last_close, opens[t])
+
+        # Gates, in executor order: macro first, then drawdown at run time
+        reason = None
+        if macro_configured:
+            scored = [symbols[j] for j in np.flatnonzero(~np.isnan(scores[t]))]
+            reason = macro_event_gate(scored, today, config['fomc_dates'],
+                                      config['earnings_by_symbol'], config['macro_window_days'])
+        if reason is None:
+            equity_now = cash + float(np.nansum(shares * open_px))
+            window_start = today - timedelta(days=config['drawdown_window_days'])
+            recent = [e for d, e in zip(equity_dates[-config['drawdown_window_days']:],
+                                        equity[-config['drawdown_window_days']:]) if d >= window_start]
+            peak = max(recent + [equity_now])
+            dd = check_drawdown(equity_now, peak, config['max_drawdown'])
+            if dd['skip_trading']:
+                reason = 'drawdown'
+        else:
+            reason = 'macro'
+
+        if reason is None:
+            # plan_rebalance: close what is no longer selected, open what is new
+            to_close = np.flatnonzero((shares > 0) & ~selected[t] & ~np.isnan(open_px))
+            if len(to_close):
+                fill = open_px[to_close] * (1 - slip)
+                cash += float(np.sum(shares[to_close] * fill))
+                trade('SELL', t, to_close, shares[to_close], fill)
+                shares[to_close] = 0
+                bracket_until[to_close] = -1
+
+            to_open = np.flatnonzero(selected[t] & (shares == 0) & ~np.isnan(opens[t]))
+            if len(to_open):
+                price = opens[t, to_open]
+                qty = (config['value_per_symbol'] // price).astype(np.int64)
+                cost = qty * price * (1 + slip)
+                ok = (qty > 0) & (np.cumsum(np.where(qty > 0, cost, 0.0)) <= cash)
+                to_open, price, qty, cost = to_open[ok], price[ok], qty[ok], cost[ok]
+                cash -= float(cost.sum())
+                shares[to_open] = qty
+                trade('BUY', t, to_open, qty, price * (1 + slip))
+                stop[to_open], target[to_open] = bracket_levels(
+                    price, config['stop_loss_percent'], config['take_profit_percent'])
+                bracket_until[to_open] = t if config['bracket_tif'] == 'day' else n_days
+        else:
+            skipped[reason] = skipped.get(reason, 0) + 1
+
+        # Bracket legs during the session, every live one at once
+        live = np.flatnonzero((shares > 0) & (bracket_until >= t) & ~np.isnan(opens[t]))
+        if len(live):
+            hit, fill = check_brackets(opens[t, live], highs[t, live], lows[t, live],
+                                       stop[live], target[live], config['ambiguous_fill'], slip)
+            for code in np.unique(hit[hit != 0]):
+                cols = live[hit == code]
+                px = fill[hit == code]
+                cash += float(np.sum(shares[cols] * px))
+                trade('STOP' if code == STOP else 'TARGET', t, cols, shares[cols], px)
+                shares[cols] = 0
+                bracket_until[cols] = -1
+
+        last_close = np.where(np.isnan(closes[t]), last_close, closes[t])
+        held = float(np.nansum(shares * last_close))
+        equity_dates.append(today)
+        equity.append(cash + held)
+        exposure.append(held / (cash + held) if cash + held > 0 else 0.0)
+        positions.append(int(np.count_nonzero(shares)))
+
+    return {
+        'dates': equity_dates,
+        'equity': np.array(equity),
+        'exposure': np.array(exposure),
+        'positions': np.array(positions),
+        'trades': trades,
+        'skipped': skipped,
+    }
+
+
+def _ffill_last(matrix):
+    """Last non-NaN value per column"""
+    valid = ~np.isnan(matrix)
+    idx = np.where(valid.any(axis=0), len(matrix) - 1 - np.argmax(valid[::-1], axis=0), 0)
+    return np.where(valid.any(axis=0), matrix[idx, np.arange(matrix.shape[1])], np.nan)
+
+
+def calculate_metrics(result, config):
+    equity = result['equity']
+    if len(equity) == 0:
+        return {}
+    trades = result['trades']
+    stats = summarize(equity, initial=config['initial_capital'],
+                      traded_value=[t['value'] for t in trades] or [0.0])
+
+    actions = [t['action'] for t in trades]
+    return {
+        'initial_capital': config['initial_capital'],
+        'final_equity': float(equity[-1]),
+        'total_return_pct': stats['total_return'] * 100,
+        'cagr_pct': stats['cagr'] * 100,
+        'sharpe_ratio': stats['sharpe'],
+        'sortino_ratio': stats['sortino'],
+        'max_drawdown_pct': stats['max_drawdown'] * 100,
+        'max_drawdown_days': stats['max_drawdown_duration'],
+        'num_trades': len(actions),
+        'buys': actions.count('BUY'),
+        'stop_exits': actions.count('STOP'),
+        'target_exits': actions.count('TARGET'),
+        'avg_positions': float(result['positions'].mean()),
+        'avg_exposure_pct': float(result['exposure'].mean() * 100),
+        'turnover': stats['turnover'],
+        'trading_days': len(equity),
+    }
+
+
+def run_backtest(market, config, start=None, end=None):
+    dates = np.array(market['dates'], dtype='datetime64[D]')
+    if end is not None:
+        stop = int(np.searchsorted(dates, np.datetime64(end), 'right'))
+        market = dict(market, dates=market['dates'][:stop],
+                      **{f: market[f][:stop] for f in ('open', 'high', 'low', 'close', 'volume')})
+
+    t0 = time.perf_counter()
+    signals = build_signals(market, config)
+    t1 = time.perf_counter()
+
+    if start is None:
+        # First day with EMA200 for some symbol (before that every day falls back)
+        warm_rows = np.flatnonzero(signals['warm'].any(axis=1))
+        start_idx = int(warm_rows[0]) if len(warm_rows) else 0
+    else:
+        start_idx = int(np.searchsorted(dates, np.datetime64(start)))
+
+    result = simulate(market, signals, config, start_idx)
+    t2 = time.perf_counter()
+    result['timings'] = {'signals': t1 - t0, 'simulate': t2 - t1}
+    result['masks'] = {k: float(np.mean(v[start_idx:])) for k, v in signals['masks'].items()}
+    result['selection'] = {'dates': market['dates'][start_idx:], 'symbols': market['symbols'],
+                           'scores': signals['scores'][start_idx:], 'selected': signals['selected'][start_idx:]}
+    return result
+
+
+def build_result(result, config):
+    """Standard results object for tradingbot.reports"""
+    settings = {
+        'Initial Capital': f"${config['initial_capital']:,.2f}",
+        'Strategy': f"Top-{config['top_n']} by {config['sentiment_lookback_days']}-day sentiment, "
+                    f"max {config['max_per_sector']} per sector",
+        'Value per Symbol': f"${config['value_per_symbol']:,.2f}",
+        'Brackets': f"{config['stop_loss_percent']*100:.1f}% stop / {config['take_profit_percent']*100:.1f}% target, "
+                    f"{config['bracket_tif']} orders",
+        'Slippage': f"{config['slippage']*100:.2f}%",
+    }
+    return backtest_result('backtest_v2', result['dates'], result['equity'], config['initial_capital'],
+                           result['trades'], 'V2 Sentiment Executor Backtest Results', settings,
+                           positions=result['positions'], exposure=result['exposure'],
+                           selection=result['selection'])
+
+
+def print_results(result, metrics, config):
+    print(f"\n{'='*70}")
+    print(f"📊 V2 BACKTEST RESULTS ({result['dates'][0]} → {result['dates'][-1]})")
+    print(f"{'='*70}\n")
+
+    print(f"💰 Financial Performance:")
+    print(f"  Initial Capital:  ${metrics['initial_capital']:>12,.2f}")
+    print(f"  Final Equity:     ${metrics['final_equity']:>12,.2f}")
+    print(f"  Total Return:     {metrics['total_return_pct']:>12.2f}%")
+
+    print(f"\n📊 Risk Metrics:")
+    print(f"  Sharpe Ratio:     {metrics['sharpe_ratio']:>12.2f}")
+    print(f"  Sortino Ratio:    {metrics['sortino_ratio']:>12.2f}")
+    print(f"  Max Drawdown:     {metrics['max_drawdown_pct']:>12.2f}% ({metrics['max_drawdown_days']} days)")
+    print(f"  Avg Exposure:     {metrics['avg_exposure_pct']:>12.1f}%")
+    print(f"  Turnover:         {metrics['turnover']:>12.1f}x / year")
+
+    print(f"\n📈 Trading Activity:")
+    print(f"  Total Trades:     {metrics['num_trades']:>12}")
+    print(f"  Entries:          {metrics['buys']:>12}")
+    print(f"  Stop-Loss Exits:  {metrics['stop_exits']:>12}")
+    print(f"  Take-Profit Exits:{metrics['target_exits']:>12}")
+    print(f"  Avg Positions:    {metrics['avg_positions']:>12.1f}")
+    print(f"  Trading Days:     {metrics['trading_days']:>12}")
+    for reason, days in sorted(result['skipped'].items()):
+        print(f"  Skipped ({reason}):{days:>{12 - len(reason) + 7}}")
+
+    print(f"\n🔍 Filter pass rates (symbol-days):")
+    for name, rate in result['masks'].items():
+        print(f"  {name:<8} {rate * 100:6.1f}%")
+
+    timings = ', '.join(f"{k}={v * 1000:.0f}ms" for k, v in result['timings'].items())
+    print(f"\n⏱️  {timings}")
+    print(f"{'='*70}\n")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Backtest the V2 sentiment executor')
+    parser.add_argument('--source', choices=['csv', 'db'], default='csv', help='Input data (default: csv)')
+    parser.add_argument('--symbols', nargs='+', help='Symbols (default: tracked symbols / CSV set)')
+    parser.add_argument('--start', type=date.fromisoformat, help='First trading day (default: after EMA200 warmup)')
+    parser.add_argument('--end', type=date.fromisoformat, help='Last trading day')
+    parser.add_argument('--initial-capital', type=float, default=CONFIG['initial_capital'])
+    parser.add_argument('--value-per-symbol', type=float, default=CONFIG['value_per_symbol'],
+                        help='Notional per new position (default: 500)')
+    parser.add_argument('--tif', choices=['day', 'gtc'], default=CONFIG['bracket_tif'],
+                        help='Bracket legs expire at the close (day, live behaviour) or stay (gtc)')
+    parser.add_argument('--ambiguous', choices=['stop', 'target', 'open'], default=CONFIG['ambiguous_fill'],
+                        help='Fill order when a bar touches both levels (default: stop)')
+    parser.add_argument('--report', action='store_true', help=f'Write Markdown/HTML report to {REPORTS_DIR}')
+    args = parser.parse_args()
+
+    config = dict(CONFIG, initial_capital=args.initial_capital, value_per_symbol=args.value_per_symbol,
+                  bracket_tif=args.tif, ambiguous_fill=args.ambiguous)
+
+    print(f"\n{'='*70}")
+    print(f"🚀 V2 SENTIMENT EXECUTOR BACKTEST")
+    print(f"{'='*70}")
+
+    if args.source == 'csv':
+        market = load_csv_market(args.symbols or sorted(SECTORS))
+    else:
+        from tradingbot.config import get_db_conn
+        conn = get_db_conn()
+        try:
+            market = load_db_market(conn, args.start or date(2023, 1, 1), args.end or date.today(), args.symbols)
+        finally:
+            conn.close()
+
+    print(f"📂 {len(market['symbols'])} symbols x {len(market['dates'])} days "
+          f"({market['dates'][0]} → {market['dates'][-1]})")
+    print(f"🛡️  Brackets: {config['stop_loss_percent']*100:.1f}% stop / "
+          f"{config['take_profit_percent']*100:.1f}% target, {config['bracket_tif']} orders")
+
+    result = run_backtest(market, config, args.start, args.end)
+    if not len(result['equity']):
+        print("❌ No trading days in range")
+        raise SystemExit(1)
+    print_results(result, calculate_metrics(result, config), config)
+    if args.report:
+        paths = render_report(build_result(result, config))['paths']
+        print(f"📄 Report saved: {paths['md']} (+ .html, .json, _equity.png)")
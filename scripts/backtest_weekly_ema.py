@@ -4,11 +4,22 @@ Backtest Weekly EMA Crossover Strategy
 - Buy when EMA10 crosses above EMA30 (on weekly close)
 - Sell when EMA10 crosses below EMA30
 - Optional: Filter with EMA50 (only trade above EMA50)
+- --batch runs all symbols against one shared cash account (tradingbot.portfolio)
 """
 
 import os
+import sys
+import numpy as np
 import psycopg2
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot import metrics
+from tradingbot.indicators import ema_matrix
+from tradingbot.portfolio import SIZING, align_series, ema_crossovers, print_portfolio, simulate_portfolio
+from tradingbot.resample import load_bars
+from tradingbot.timeindex import from_epoch_ns
 
 # DB config
 DB_CONFIG = {
@@ -72,8 +83,8 @@ def calculate_ema(prices, period):
     return ema
 
 
-def backtest_strategy(symbol, timeframe='1wk', config=None, start_date=None, end_date=None):
-    """Run backtest for given symbol on weekly timeframe"""
+def backtest_strategy(symbol, timeframe='1w', config=None, start_date=None, end_date=None):
+    """Run backtest for given symbol (weekly bars by default)"""
     if config is None:
         config = STRATEGY_CONFIG
     
@@ -88,45 +99,14 @@ def backtest_strategy(symbol, timeframe='1wk', config=None, start_date=None, end
         print(f"Filter: Only trade above EMA{config['ema_filter']}")
     print(f"{'='*70}\n")
     
-    # Fetch historical data (weekly bars)
+    # Minute snapshots resampled into session-aligned bars (cached after the first run)
     conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    
-    # Load weekly data - take last day of each week (Friday or last trading day)
-    sql = """
-        WITH weekly_data AS (
-            SELECT 
-                DATE_TRUNC('week', timestamp) as week_start,
-                MAX(timestamp) as week_end,
-                (ARRAY_AGG(close_price ORDER BY timestamp DESC))[1] as close_price
-            FROM ema_snapshots
-            WHERE symbol = %s
-              AND close_price IS NOT NULL
-              {date_filter}
-            GROUP BY DATE_TRUNC('week', timestamp)
-            ORDER BY week_start
-        )
-        SELECT week_end as timestamp, close_price
-        FROM weekly_data
-        ORDER BY timestamp ASC
-    """
-    
-    params = [symbol.upper()]
-    date_filter = ""
-    
-    if start_date:
-        date_filter += " AND timestamp >= %s"
-        params.append(start_date)
-    if end_date:
-        date_filter += " AND timestamp <= %s"
-        params.append(end_date)
-    
-    sql = sql.format(date_filter=date_filter)
-    cursor.execute(sql, tuple(params))
-    
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    try:
+        bars = load_bars(conn, symbol, timeframe, start_date, end_date)
+    finally:
+        conn.close()
+    
+    rows = list(zip(from_epoch_ns(bars['end']), bars['close']))
     
     if not rows:
         print(f"No data found for {symbol}")
@@ -137,7 +117,7 @@ def backtest_strategy(symbol, timeframe='1wk', config=None, start_date=None, end
         print(f"Not enough data. Need at least {min_bars} bars, got {len(rows)}")
         return None
     
-    print(f"Loaded {len(rows)} weekly bars")
+    print(f"Loaded {len(rows)} {timeframe} bars")
     print(f"Period: {rows[0][0].strftime('%Y-%m-%d')} to {rows[-1][0].strftime('%Y-%m-%d')}\n")
     
     # Extract prices
@@ -239,6 +219,12 @@ def backtest_strategy(symbol, timeframe='1wk', config=None, start_date=None, end
     total_return = final_capital - config['initial_capital']
     total_return_pct = (total_return / config['initial_capital']) * 100
     
+    equity = np.asarray(equity_curve, dtype=float)
+    stats = metrics.summarize(equity, metrics.periods_per_year(timeframe),
+                              trade_pnl=[t.pnl for t in trades])
+    max_drawdown, max_drawdown_fraction, _ = metrics.max_drawdown_point(equity)
+    max_drawdown, max_drawdown_percent = -max_drawdown, -max_drawdown_fraction * 100
+    
     print(f"\n{'='*70}")
     print(f"RESULTS")
     print(f"{'='*70}")
@@ -250,7 +236,7 @@ def backtest_strategy(symbol, timeframe='1wk', config=None, start_date=None, end
     if trades:
         winning_trades = [t for t in trades if t.pnl > 0]
         losing_trades = [t for t in trades if t.pnl < 0]
-        win_rate = (len(winning_trades) / len(trades)) * 100 if trades else 0
+        win_rate = stats['win_rate'] * 100
         
         avg_win = sum(t.pnl for t in winning_trades) / len(winning_trades) if winning_trades else 0
         avg_loss = sum(t.pnl for t in losing_trades) / len(losing_trades) if losing_trades else 0
@@ -262,21 +248,9 @@ def backtest_strategy(symbol, timeframe='1wk', config=None, start_date=None, end
         if losing_trades:
             print(f"Average Loss:     ${avg_loss:,.2f}")
         
-        # Max drawdown
-        peak = equity_curve[0]
-        max_drawdown = 0
-        max_drawdown_percent = 0
-        
-        for equity in equity_curve:
-            if equity > peak:
-                peak = equity
-            drawdown = peak - equity
-            drawdown_pct = (drawdown / peak) * 100
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
-                max_drawdown_percent = drawdown_pct
-        
         print(f"Max Drawdown:     ${max_drawdown:,.2f} ({max_drawdown_percent:.2f}%)")
+        print(f"Sharpe Ratio:     {stats['sharpe']:.2f}")
+        print(f"Profit Factor:    {stats['profit_factor']:.2f}")
     
     # Buy & Hold comparison
     buy_hold_return = ((close_prices[-1] - close_prices[0]) / close_prices[0]) * 100
@@ -295,10 +269,57 @@ def backtest_strategy(symbol, timeframe='1wk', config=None, start_date=None, end
         'win_rate': win_rate if trades else 0,
         'max_drawdown': max_drawdown if trades else 0,
         'max_drawdown_percent': max_drawdown_percent if trades else 0,
+        'max_drawdown_duration': stats['max_drawdown_duration'],
+        'sharpe_ratio': stats['sharpe'],
+        'profit_factor': stats['profit_factor'],
         'buy_hold_return': buy_hold_return,
     }
 
 
+def backtest_portfolio(symbols, timeframe='1w', config=None, start_date=None, end_date=None,
+                       max_positions=None, sizing='equal'):
+    """Same rules for every symbol, one cash account and a position limit"""
+    if config is None:
+        config = STRATEGY_CONFIG
+    
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        series = []
+        for symbol in symbols:
+            bars = load_bars(conn, symbol, timeframe, start_date, end_date)
+            series.append({'ts': bars['start'], 'close': bars['close']})
+    finally:
+        conn.close()
+    
+    ts, m = align_series(series)
+    if not len(ts):
+        print("No data found")
+        return None
+    close = m['close']
+    
+    cross = ema_crossovers(close, config['ema_short'], config['ema_long'])
+    entries, exits = cross['bullish'], cross['bearish']
+    if config['use_filter']:
+        with np.errstate(invalid='ignore'):
+            above = close >= ema_matrix(close, config['ema_filter'])
+        entries = entries & above
+        exits = exits | (~above & ~np.isnan(close))
+    
+    # Strongest crossover first when slots are scarce
+    with np.errstate(invalid='ignore', divide='ignore'):
+        strength = (cross['ema_short'] - cross['ema_long']) / cross['ema_long']
+    
+    result = simulate_portfolio(
+        ts, close, entries, exits, priority=strength,
+        initial_capital=config['initial_capital'], max_positions=max_positions, sizing=sizing,
+        position_size_percent=config.get('position_size_percent', 100),
+        commission_percent=config['commission_percent'],
+    )
+    print_portfolio(result, symbols, f"WEEKLY EMA {config['ema_short']}/{config['ema_long']} PORTFOLIO - {timeframe}",
+                    metrics.periods_per_year(timeframe))
+    return result
+
+
 if __name__ == '__main__':
     import argparse
     
@@ -313,8 +334,11 @@ Examples:
   # Backtest without EMA50 filter
   %(prog)s --symbol SPY --no-filter
   
-  # Backtest multiple symbols
-  %(prog)s --batch SPY QQQ
+  # Backtest multiple symbols on one $10k account, at most 3 positions
+  %(prog)s --batch SPY QQQ IWM DIA --max-positions 3
+  
+  # Old behaviour: every symbol gets its own capital
+  %(prog)s --batch SPY QQQ --independent
   
   # Custom parameters
   %(prog)s --symbol SPY --ema-short 10 --ema-long 30 --ema-filter 50
@@ -331,6 +355,14 @@ Examples:
     parser.add_argument('--no-filter', action='store_true', help='Disable EMA50 filter')
     parser.add_argument('--start-date', type=str, help='Start date YYYY-MM-DD (optional)')
     parser.add_argument('--end-date', type=str, help='End date YYYY-MM-DD (optional)')
+    parser.add_argument('--timeframe', default='1w', help='Bar timeframe: 1h, 1d, 1w, ... (default: 1w)')
+    parser.add_argument('--max-positions', type=int, help='Batch: max open positions (default: no limit)')
+    parser.add_argument('--sizing', choices=SIZING, default='equal',
+                        help='Batch: equal slots, percent of equity or percent of cash (default: equal)')
+    parser.add_argument('--position-size', type=float, default=100,
+                        help='Batch: percent for --sizing percent/cash (default: 100)')
+    parser.add_argument('--independent', action='store_true',
+                        help='Batch: separate capital per symbol instead of one shared account')
     
     args = parser.parse_args()
     
@@ -342,10 +374,14 @@ Examples:
     config['ema_filter'] = args.ema_filter
     config['use_filter'] = not args.no_filter
     
-    if args.batch:
+    if args.batch and not args.independent:
+        config['position_size_percent'] = args.position_size
+        backtest_portfolio(args.batch, args.timeframe, config, args.start_date, args.end_date,
+                           args.max_positions, args.sizing)
+    elif args.batch:
         results = []
         for symbol in args.batch:
-            result = backtest_strategy(symbol, '1wk', config, args.start_date, args.end_date)
+            result = backtest_strategy(symbol, args.timeframe, config, args.start_date, args.end_date)
             if result:
                 results.append(result)
         
@@ -365,4 +401,4 @@ Examples:
             print(f"Total Trades:          {sum(r['trades'] for r in results)}")
             print(f"{'='*70}\n")
     else:
-        backtest_strategy(args.symbol, '1wk', config, args.start_date, args.end_date)
+        backtest_strategy(args.symbol, args.timeframe, config, args.start_date, args.end_date)
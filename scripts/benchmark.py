@@ -0,0 +1,734 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: indicator kernels, backtest cores, selection, queries, endpoints
+
+Every benchmark runs on a synthetic, seeded dataset (N symbols x M years of
+regular-session minute bars, daily bars resampled from them, AR(1)
+sentiment), so numbers are comparable between runs and machines. Groups:
+
+  kernels     ema/rsi/sma matrices, the scripts' list EMA, 1m -> 1d resample
+  backtests   EMA crossover portfolio, weekly EMA portfolio, sentiment v1
+              (top-N rebalance) and v2 (executor replay) cores
+  selection   executor top-N selection, per day and as a matrix
+  archive     binary archive write / open + slice
+  db          (--db) bulk loaders, executor/bar queries, /api/data,
+              /api/summary, /chart and the per-symbol DB backtests
+
+The db group builds the full schema (schema.sql, sentiment_schema.sql,
+all migrations) in a scratch schema of the local Postgres
+(POSTGRES_* variables) and seeds it. Scripts and the web app reach it
+through PGOPTIONS search_path. Loader runs are rolled back, and the
+schema is dropped at the end unless --keep is given.
+
+Each run is appended to a JSON history (median/min/p90 per benchmark,
+git commit, versions, dataset parameters). `compare` diffs two runs and
+flags anything slower than --threshold percent; --fail turns that into
+exit code 1 for CI.
+
+Usage:
+  python scripts/benchmark.py run --label baseline
+  python scripts/benchmark.py run --symbols 50 --years 2 --only ema_matrix rsi_matrix
+  python scripts/benchmark.py run --db --label "after index change"
+  python scripts/benchmark.py compare                 # latest vs previous run
+  python scripts/benchmark.py compare --base baseline --threshold 5 --fail
+  python scripts/benchmark.py list
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import psycopg2
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR.parent))
+from tradingbot.config import ROOT_DIR, get_db_conn
+from tradingbot.timeindex import MARKET_TZ, previous_trading_day, session_table
+
+HISTORY_FILE = ROOT_DIR / 'reports' / 'benchmark_history.json'
+SCHEMA = 'bench_suite'
+THRESHOLD = 10.0  # percent
+
+BENCHMARKS = {}
+
+
+def bench(group, repeat=None, db=False):
+    """Register setup(ds[, env]) -> (callable, items) as a benchmark"""
+    def register(setup):
+        BENCHMARKS[setup.__name__] = {'group': group, 'setup': setup, 'repeat': repeat, 'db': db}
+        return setup
+    return register
+
+
+# ============================================================
+# Synthetic dataset
+# ============================================================
+
+def make_dataset(n_symbols=10, years=1, seed=42, end=None):
+    """
+    Seeded market: minute bars for every regular session of `years` years
+    up to the last completed session (a few correlated GBM paths), daily
+    bars resampled from them and AR(1) daily sentiment
+    """
+    rng = np.random.default_rng(seed)
+    last = previous_trading_day(end or datetime.now(MARKET_TZ).date())
+    days, opens, closes = session_table(last - timedelta(days=round(365.25 * years)), last)
+    minutes = ((closes - opens) // 60_000_000_000).astype(np.int64)
+    day_of = np.repeat(np.arange(len(days)), minutes)
+    offset = np.arange(len(day_of)) - np.repeat(np.cumsum(minutes) - minutes, minutes)
+    ts = opens[day_of] + offset * 60_000_000_000
+
+    n = len(ts)
+    market = rng.normal(0, 0.0006, n)
+    beta = rng.uniform(0.5, 1.5, n_symbols)
+    rets = market[:, None] * beta + rng.normal(0, 0.0008, (n, n_symbols))
+    close = rng.uniform(20, 500, n_symbols) * np.exp(np.cumsum(rets, axis=0))
+    open_ = np.vstack([close[:1], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, (n, n_symbols))) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(8, 1, (n, n_symbols)).round()
+
+    starts = np.cumsum(minutes) - minutes
+    ends = np.cumsum(minutes) - 1
+    daily = {
+        'dates': list(days),
+        'ts': opens,
+        'open': open_[starts],
+        'high': np.maximum.reduceat(high, starts, axis=0),
+        'low': np.minimum.reduceat(low, starts, axis=0),
+        'close': close[ends],
+        'volume': np.add.reduceat(volume, starts, axis=0),
+    }
+
+    sentiment = np.zeros((len(days), n_symbols))
+    noise = rng.normal(0, 0.25, sentiment.shape)
+    for t in range(1, len(days)):
+        sentiment[t] = 0.8 * sentiment[t - 1] + noise[t]
+    sectors = ('Technology', 'Financials', 'Health Care', 'Energy', 'Consumer Discretionary')
+
+    return {
+        'symbols': [f"SYM{j:03d}" for j in range(n_symbols)],
+        'sectors': [sectors[j % len(sectors)] for j in range(n_symbols)],
+        'ts': ts, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+        'daily': daily,
+        'sentiment': np.clip(np.tanh(sentiment), -1, 1).round(4),
+        'params': {'symbols': n_symbols, 'years': years, 'seed': seed, 'bars': int(n)},
+    }
+
+
+def _script(name):
+    """Import a script module from scripts/ (they are not a package)"""
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    return __import__(name)
+
+
+def _quiet(fn):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+
+# ============================================================
+# Kernels
+# ============================================================
+
+@bench('kernels')
+def ema_matrix(ds):
+    """indicators.ema_matrix, EMA20 over every symbol's minute closes"""
+    from tradingbot.indicators import ema_matrix
+    return lambda: ema_matrix(ds['close'], 20), ds['close'].size
+
+
+@bench('kernels')
+def rsi_matrix(ds):
+    """indicators.rsi_matrix, RSI14 over every symbol's minute closes"""
+    from tradingbot.indicators import rsi_matrix
+    return lambda: rsi_matrix(ds['close'], 14), ds['close'].size
+
+
+@bench('kernels')
+def sma_matrix(ds):
+    """indicators.sma_matrix, volume MA20"""
+    from tradingbot.indicators import sma_matrix
+    return lambda: sma_matrix(ds['volume'], 20), ds['volume'].size
+
+
+@bench('kernels', repeat=3)
+def ema_list_loop(ds):
+    """calculate_ema of the backtest scripts (pure Python), one symbol"""
+    calculate_ema = _script('backtest_ema_strategy').calculate_ema
+    prices = ds['close'][:, 0].tolist()
+    return lambda: calculate_ema(prices, 20), len(prices)
+
+
+@bench('kernels')
+def resample_1d(ds):
+    """resample.resample 1m -> 1d OHLCV, symbol by symbol"""
+    from tradingbot.resample import resample
+    columns = [tuple(ds[f][:, j] for f in ('close', 'open', 'high', 'low', 'volume'))
+               for j in range(len(ds['symbols']))]
+
+    def run():
+        for close, open_, high, low, volume in columns:
+            resample(ds['ts'], close, '1d', open_, high, low, volume)
+    return run, ds['close'].size
+
+
+# ============================================================
+# Backtest cores
+# ============================================================
+
+@bench('backtests')
+def ema_crossover_portfolio(ds):
+    """backtest_ema_strategy --batch core on 5m bars: crossovers + shared-cash simulation"""
+    from tradingbot.portfolio import ema_crossovers, simulate_portfolio
+    close = ds['close'][4::5]
+    ts = ds['ts'][4::5]
+
+    def run():
+        sig = ema_crossovers(close, 5, 20)
+        return simulate_portfolio(ts, close, sig['bullish'], sig['bearish'], fill_price=sig['cross_price'])
+    return run, close.size
+
+
+@bench('backtests')
+def weekly_ema_portfolio(ds):
+    """backtest_weekly_ema --batch core on daily closes"""
+    from tradingbot.portfolio import ema_crossovers, simulate_portfolio
+    daily = ds['daily']
+
+    def run():
+        sig = ema_crossovers(daily['close'], 10, 30)
+        return simulate_portfolio(daily['ts'], daily['close'], sig['bullish'], sig['bearish'])
+    return run, daily['close'].size
+
+
+@bench('backtests', repeat=3)
+def sentiment_v1(ds):
+    """backtest_sentiment_v1.run_backtest with in-memory prices/sentiment, no report files"""
+    import pandas as pd
+
+    v1 = _script('backtest_sentiment_v1')
+    daily = ds['daily']
+    dates = pd.to_datetime(daily['dates'])
+    prices = pd.concat([
+        pd.DataFrame({'date': dates, 'symbol': s,
+                      **{f: daily[f][:, j] for f in ('open', 'high', 'low', 'close', 'volume')}})
+        for j, s in enumerate(ds['symbols'])
+    ], ignore_index=True)
+    sentiment = pd.DataFrame({
+        'date': np.repeat(dates, len(ds['symbols'])),
+        'symbol': ds['symbols'] * len(dates),
+        'sentiment': ds['sentiment'].ravel(),
+    })
+    v1.load_data = lambda: (prices.copy(), sentiment.copy())
+    v1.generate_report = lambda *args, **kwargs: None
+    v1.CONFIG['symbols'] = list(ds['symbols'])
+    return _quiet(v1.run_backtest), daily['close'].size
+
+
+@bench('backtests')
+def sentiment_v2(ds):
+    """backtest_sentiment_v2.run_backtest (signals + simulation) on a synthetic market"""
+    v2 = _script('backtest_sentiment_v2')
+    daily = ds['daily']
+    series = [{'dates': daily['dates'], **{f: daily[f][:, j] for f in ('open', 'high', 'low', 'close', 'volume')}}
+              for j in range(len(ds['symbols']))]
+    rows = [(d, s, float(ds['sentiment'][t, j]))
+            for t, d in enumerate(daily['dates']) for j, s in enumerate(ds['symbols'])]
+    market = v2.build_market(ds['symbols'], dict(zip(ds['symbols'], ds['sectors'])), series, rows)
+    return lambda: v2.run_backtest(market, v2.CONFIG), daily['close'].size
+
+
+# ============================================================
+# Selection
+# ============================================================
+
+@bench('selection')
+def select_top_matrix(ds):
+    """executor.select_top_matrix over every day at once (backtest v2)"""
+    from tradingbot.executor import select_top_matrix
+    scores = ds['sentiment']
+    passes = np.random.default_rng(0).random(scores.shape) < 0.6
+    sector_ids = np.unique(ds['sectors'], return_inverse=True)[1]
+    return lambda: select_top_matrix(scores, passes, sector_ids), scores.size
+
+
+@bench('selection')
+def select_top_symbols(ds):
+    """Executor's per-run selection (dict rows), every day of the dataset"""
+    from tradingbot.executor import select_top_symbols
+    daily = ds['daily']
+    ema = {s: {'close_price': 100.0, 'ema9': 101.0, 'ema21': 100.0, 'ema200': 90.0, 'rsi14': 55.0,
+               'volume': 2e6, 'volume_ma20': 1e6} for s in ds['symbols']}
+    days = [[{'symbol': s, 'score': float(ds['sentiment'][t, j]), 'sector': ds['sectors'][j]}
+             for j, s in enumerate(ds['symbols'])] for t in range(len(daily['dates']))]
+
+    def run():
+        for scores in days:
+            select_top_symbols(scores, ema)
+    return run, ds['sentiment'].size
+
+
+# ============================================================
+# Archive
+# ============================================================
+
+def _bars_dict(ds, j):
+    return {'ts': ds['ts'], **{f: ds[f][:, j] for f in ('open', 'high', 'low', 'close', 'volume')},
+            'vwap': ds['close'][:, j]}
+
+
+@bench('archive')
+def archive_write(ds):
+    """archive.write_archive, one symbol's minute bars"""
+    from tradingbot.archive import write_archive
+    tmp = Path(tempfile.mkdtemp(prefix='bench_archive_'))
+    bars = _bars_dict(ds, 0)
+    return lambda: write_archive(tmp / 'SYM000_1m.bin', 'SYM000', '1m', bars), len(ds['ts'])
+
+
+@bench('archive')
+def archive_read_slice(ds):
+    """Open (mmap) + window over a quarter of the bars"""
+    from tradingbot.archive import Archive, write_archive
+    tmp = Path(tempfile.mkdtemp(prefix='bench_archive_'))
+    path = tmp / 'SYM000_1m.bin'
+    write_archive(path, 'SYM000', '1m', _bars_dict(ds, 0))
+    lo, hi = int(ds['ts'][len(ds['ts']) // 4]), int(ds['ts'][len(ds['ts']) // 2])
+
+    def run():
+        bars = Archive(path).window(lo, hi)
+        return float(bars['close'].sum())
+    return run, len(ds['ts']) // 4
+
+
+# ============================================================
+# Database (local Postgres)
+# ============================================================
+
+def setup_db(ds, schema=SCHEMA, batch=5000):
+    """Full schema in a scratch schema, seeded from the dataset"""
+    from psycopg2.extras import execute_values
+
+    from tradingbot.bars import save_bars
+    from tradingbot.indicators import ema_matrix, rsi_matrix, sma_matrix
+
+    os.environ['PGOPTIONS'] = f"-c search_path={schema},public"
+    conn = get_db_conn()
+    t0 = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"SET search_path TO {schema}, public")
+        for path in [ROOT_DIR / 'db' / 'schema.sql', ROOT_DIR / 'db' / 'sentiment_schema.sql'] + \
+                sorted((ROOT_DIR / 'db' / 'migrations').glob('[0-9]*.sql')):
+            cur.execute(path.read_text())
+        cur.execute("UPDATE tracked_symbols SET active = false")
+        execute_values(cur, "INSERT INTO tracked_symbols (symbol, name, sector, active) VALUES %s",
+                       [(s, s, sector, True) for s, sector in zip(ds['symbols'], ds['sectors'])])
+
+        close = ds['close']
+        columns = {f'ema{p}': ema_matrix(close, p) for p in (5, 8, 9, 13, 20, 21, 34, 50, 100, 200)}
+        columns['rsi14'] = rsi_matrix(close, 14)
+        columns['volume_ma20'] = sma_matrix(ds['volume'], 20)
+        names = list(columns)
+        stamps = [datetime.fromtimestamp(t / 1e9, timezone.utc) for t in ds['ts'].tolist()]
+        for j, symbol in enumerate(ds['symbols']):
+            values = np.column_stack([close[:, j], ds['volume'][:, j]] + [columns[c][:, j] for c in names]).round(4)
+            values = np.where(np.isnan(values), None, values).tolist()
+            for i in range(0, len(stamps), batch):
+                execute_values(
+                    cur,
+                    f"""
+                    INSERT INTO ema_snapshots (timestamp, symbol, close_price, volume, {', '.join(names)}, action, crossover)
+                    VALUES %s
+                    """,
+                    [(stamps[k], symbol, *values[k], 'hold', 'none') for k in range(i, min(i + batch, len(stamps)))],
+                    page_size=batch,
+                )
+
+        daily = ds['daily']
+        for j, symbol in enumerate(ds['symbols']):
+            save_bars(conn, symbol, '1d', [
+                {'t': datetime.fromtimestamp(t / 1e9, timezone.utc), 'o': o, 'h': h, 'l': lo, 'c': c, 'v': int(v)}
+                for t, o, h, lo, c, v in zip(daily['ts'].tolist(), *(daily[f][:, j].tolist()
+                                                                    for f in ('open', 'high', 'low', 'close', 'volume')))
+            ], source='bench')
+        execute_values(cur, "INSERT INTO sentiment_scores (date, symbol, sentiment_score, rationale) VALUES %s",
+                       [(d, s, float(ds['sentiment'][t, j]), 'bench')
+                        for t, d in enumerate(daily['dates']) for j, s in enumerate(ds['symbols'])])
+        today = date.today()
+        execute_values(cur, "INSERT INTO account_balance (date, balance, change) VALUES %s",
+                       [(today - timedelta(days=k), 10000 + 50 * np.sin(k), 0.001) for k in range(30)])
+        execute_values(cur, "INSERT INTO positions (date, symbol, order_type, value, sentiment_score) VALUES %s",
+                       [(today, s, 'buy', 500, 0.5) for s in ds['symbols'][:4]])
+        cur.execute("ANALYZE")
+    conn.commit()
+    print(f"🗄️  Seeded {schema}: {len(ds['ts']) * len(ds['symbols']):,} ema_snapshots rows "
+          f"in {time.perf_counter() - t0:.1f}s")
+    return {'conn': conn, 'schema': schema}
+
+
+def drop_db(env):
+    conn = env['conn']
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {env['schema']} CASCADE")
+    conn.commit()
+    conn.close()
+
+
+def _rolled_back(conn, fn):
+    def run():
+        try:
+            return fn()
+        finally:
+            conn.rollback()
+    return run
+
+
+def _web_client():
+    sys.path.insert(0, str(ROOT_DIR / 'web'))
+    import app as web_app
+    return web_app.app.test_client()
+
+
+def _get(client, url):
+    def run():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url}: HTTP {response.status_code}")
+        return response.data
+    return run
+
+
+@bench('db', repeat=3, db=True)
+def loader_save_bars(ds, env):
+    """bars.save_bars upsert, one symbol's minute bars (rolled back)"""
+    from tradingbot.bars import save_bars
+    rows = [{'t': datetime.fromtimestamp(t / 1e9, timezone.utc), 'o': o, 'h': h, 'l': lo, 'c': c, 'v': int(v)}
+            for t, o, h, lo, c, v in zip(ds['ts'].tolist(), *(ds[f][:, 0].tolist()
+                                                              for f in ('open', 'high', 'low', 'close', 'volume')))]
+    conn = env['conn']
+    return _rolled_back(conn, lambda: save_bars(conn, 'SYM000', '1m', rows, source='bench')), len(rows)
+
+
+@bench('db', repeat=3, db=True)
+def loader_save_articles(ds, env):
+    """collectors.save_articles, 10k articles (rolled back)"""
+    from tradingbot.collectors import save_articles
+    rng = np.random.default_rng(1)
+    now = datetime.now(timezone.utc)
+    rows = [{'article_id': f"bench-{k}", 'symbol': ds['symbols'][k % len(ds['symbols'])],
+             'title': f"Synthetic headline {k}", 'content': 'lorem ipsum ' * int(rng.integers(10, 200)),
+             'url': f"https://example.com/{k}", 'published_at': now - timedelta(minutes=k), 'source': 'bench'}
+            for k in range(10_000)]
+    conn = env['conn']
+    return _rolled_back(conn, lambda: save_articles(conn, rows)), len(rows)
+
+
+@bench('db', db=True)
+def query_executor_inputs(ds, env):
+    """executor.load_inputs (balance peak, 2-day scores, latest snapshots)"""
+    from tradingbot.executor import load_inputs
+    conn = env['conn']
+    return _rolled_back(conn, lambda: load_inputs(conn)), len(ds['symbols'])
+
+
+@bench('db', db=True)
+def query_load_ohlcv(ds, env):
+    """bars.load_ohlcv, one symbol's daily bars from the table"""
+    from tradingbot.bars import load_ohlcv
+    conn = env['conn']
+    return _rolled_back(conn, lambda: load_ohlcv(conn, 'SYM000', '1d', archive_dir=None)), len(ds['daily']['ts'])
+
+
+@bench('db', db=True)
+def query_load_bars_5m(ds, env):
+    """resample.load_bars from ema_snapshots, cache off"""
+    from tradingbot.resample import load_bars
+    conn = env['conn']
+    return _rolled_back(conn, lambda: load_bars(conn, 'SYM000', '5m', cache=None)), len(ds['ts'])
+
+
+@bench('db', db=True)
+def endpoint_api_data(ds, env):
+    """GET /api/data/<symbol>?days=7"""
+    return _get(_web_client(), '/api/data/SYM000?days=7'), None
+
+
+@bench('db', db=True)
+def endpoint_api_summary(ds, env):
+    """GET /api/summary"""
+    return _get(_web_client(), '/api/summary'), None
+
+
+@bench('db', repeat=5, db=True)
+def endpoint_chart(ds, env):
+    """GET /chart/<symbol>.png?days=5, indicator cache cleared each run"""
+    from tradingbot.indicators import indicator_cache
+    client = _web_client()
+    fetch = _get(client, '/chart/SYM000.png?days=5&emas=5,50')
+
+    def run():
+        indicator_cache.clear()
+        return fetch()
+    return run, None
+
+
+def _db_backtest(module, call):
+    from tradingbot import resample
+
+    mod = _script(module)
+    resample.bar_cache.directory = None
+
+    def run():
+        resample.bar_cache.data.clear()
+        return call(mod)
+    return _quiet(run)
+
+
+@bench('db', repeat=3, db=True)
+def backtest_ema_db(ds, env):
+    """backtest_ema_strategy.backtest_strategy, last 5 sessions of 1m bars"""
+    start = datetime.fromtimestamp(ds['daily']['ts'][-5] / 1e9, timezone.utc).isoformat()
+    return _db_backtest('backtest_ema_strategy',
+                        lambda m: m.backtest_strategy('SYM000', start_time=start, window_hours=24 * 7)), None
+
+
+@bench('db', repeat=3, db=True)
+def backtest_golden_cross_db(ds, env):
+    """backtest_golden_cross.backtest_strategy on daily bars resampled from ema_snapshots"""
+    return _db_backtest('backtest_golden_cross', lambda m: m.backtest_strategy('SYM000')), None
+
+
+@bench('db', repeat=3, db=True)
+def backtest_weekly_ema_db(ds, env):
+    """backtest_weekly_ema.backtest_strategy on weekly bars resampled from ema_snapshots"""
+    return _db_backtest('backtest_weekly_ema', lambda m: m.backtest_strategy('SYM000')), None
+
+
+# ============================================================
+# Runner and history
+# ============================================================
+
+def measure(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times = np.array(times)
+    return {
+        'runs': len(times),
+        'median': float(np.median(times)),
+        'min': float(times.min()),
+        'p90': float(np.percentile(times, 90)),
+        'mean': float(times.mean()),
+    }
+
+
+def selected_benchmarks(only=None, groups=None, db=False):
+    names = []
+    for name, spec in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        if groups and spec['group'] not in groups:
+            continue
+        if spec['db'] and not db:
+            continue
+        names.append(name)
+    return names
+
+
+def run_suite(ds, names, repeat=5, db_env=None):
+    results = {}
+    for name in names:
+        spec = BENCHMARKS[name]
+        args = (ds, db_env) if spec['db'] else (ds,)
+        fn, items = spec['setup'](*args)
+        stats = measure(fn, spec['repeat'] or repeat)
+        stats['group'] = spec['group']
+        if items:
+            stats['items'] = items
+            stats['items_per_s'] = items / stats['median']
+        results[name] = stats
+        rate = f"  {stats['items_per_s']:>14,.0f} items/s" if items else ''
+        print(f"   {spec['group']:<10} {name:<28} {stats['median'] * 1000:10.2f}ms "
+              f"(min {stats['min'] * 1000:.2f}, p90 {stats['p90'] * 1000:.2f}){rate}")
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                             text=True, timeout=5)
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT_DIR,
+                               capture_output=True, text=True, timeout=5).stdout.strip()
+        return out.stdout.strip() + ('-dirty' if dirty else '') if out.returncode == 0 else None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_history(path=HISTORY_FILE):
+    return json.loads(path.read_text()) if path.exists() else []
+
+
+def save_history(history, path=HISTORY_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(history, indent=2))
+    tmp.replace(path)
+
+
+def find_run(history, ref):
+    """Run by index (-1 = latest), id or label"""
+    try:
+        return history[int(ref)]
+    except (ValueError, IndexError):
+        pass
+    for run in reversed(history):
+        if ref in (run['id'], run.get('label')):
+            return run
+    raise SystemExit(f"❌ No run {ref!r} in history")
+
+
+def compare(base, head, threshold=THRESHOLD):
+    """[(name, base median, head median, change %, verdict)] for benchmarks in both runs"""
+    rows = []
+    for name, stats in head['results'].items():
+        if name not in base['results']:
+            continue
+        before, after = base['results'][name]['median'], stats['median']
+        change = (after / before - 1) * 100 if before else 0.0
+        verdict = 'regression' if change > threshold else 'faster' if change < -threshold else 'same'
+        rows.append((name, before, after, change, verdict))
+    return rows
+
+
+def print_comparison(base, head, rows, threshold):
+    print(f"📊 {base['id']} ({base.get('label') or base['commit']}) -> {head['id']} ({head.get('label') or head['commit']}),"
+          f" threshold {threshold:.0f}%")
+    if base['params'] != head['params']:
+        print(f"⚠️  Different datasets: {base['params']} vs {head['params']}")
+    icons = {'regression': '🐢', 'faster': '🚀', 'same': '  '}
+    for name, before, after, change, verdict in rows:
+        print(f"   {icons[verdict]} {name:<28} {before * 1000:10.2f}ms -> {after * 1000:10.2f}ms  {change:+7.1f}%")
+    slower = [r for r in rows if r[4] == 'regression']
+    print(f"\n{'❌' if slower else '✅'} {len(slower)} regressions, "
+          f"{sum(r[4] == 'faster' for r in rows)} faster, {len(rows)} compared")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite with JSON history and regression check')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_p = sub.add_parser('run', help='Run benchmarks and append them to the history')
+    run_p.add_argument('--symbols', type=int, default=10, help='Synthetic symbols (default: 10)')
+    run_p.add_argument('--years', type=float, default=1, help='Years of minute bars (default: 1)')
+    run_p.add_argument('--seed', type=int, default=42)
+    run_p.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark (default: 5)')
+    run_p.add_argument('--only', nargs='+', help='Benchmark names')
+    run_p.add_argument('--groups', nargs='+', help='Groups (kernels, backtests, selection, archive, db)')
+    run_p.add_argument('--db', action='store_true', help='Include the db group (local Postgres)')
+    run_p.add_argument('--keep', action='store_true', help=f'Keep the {SCHEMA} schema afterwards')
+    run_p.add_argument('--label', help='Name for this run (usable in compare)')
+    run_p.add_argument('--history', type=Path, default=HISTORY_FILE)
+    run_p.add_argument('--no-save', action='store_true', help='Do not write the history')
+
+    cmp_p = sub.add_parser('compare', help='Compare two runs from the history')
+    cmp_p.add_argument('--base', default='-2', help='Index, id or label (default: previous run)')
+    cmp_p.add_argument('--head', default='-1', help='Index, id or label (default: latest run)')
+    cmp_p.add_argument('--threshold', type=float, default=THRESHOLD, help=f'Percent (default: {THRESHOLD:.0f})')
+    cmp_p.add_argument('--fail', action='store_true', help='Exit 1 when anything regressed')
+    cmp_p.add_argument('--history', type=Path, default=HISTORY_FILE)
+
+    list_p = sub.add_parser('list', help='List benchmarks and stored runs')
+    list_p.add_argument('--history', type=Path, default=HISTORY_FILE)
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for name, spec in BENCHMARKS.items():
+            doc = (spec['setup'].__doc__ or '').strip().splitlines()
+            print(f"   {spec['group']:<10} {name:<28} {doc[0] if doc else ''}")
+        for i, run in enumerate(load_history(args.history)):
+            print(f"   [{i}] {run['id']} {run['timestamp'][:16]} {run['commit'] or '-':<14} "
+                  f"{run.get('label') or '':<24} {len(run['results'])} benchmarks")
+        return 0
+
+    if args.command == 'compare':
+        history = load_history(args.history)
+        if len(history) < 2 and (args.base, args.head) == ('-2', '-1'):
+            print("⚠️  Need two runs in the history")
+            return 1
+        base, head = find_run(history, args.base), find_run(history, args.head)
+        slower = print_comparison(base, head, compare(base, head, args.threshold), args.threshold)
+        return 1 if slower and args.fail else 0
+
+    names = selected_benchmarks(args.only, args.groups, args.db)
+    if not names:
+        print("⚠️  Nothing selected (db benchmarks need --db)")
+        return 1
+    t0 = time.perf_counter()
+    ds = make_dataset(args.symbols, args.years, args.seed)
+    print(f"🧪 Dataset: {args.symbols} symbols x {args.years:g} years = {ds['params']['bars'] * args.symbols:,} "
+          f"minute bars ({time.perf_counter() - t0:.1f}s)")
+
+    env = None
+    if any(BENCHMARKS[n]['db'] for n in names):
+        try:
+            env = setup_db(ds)
+        except psycopg2.OperationalError as e:
+            print(f"❌ Cannot reach Postgres for the db group: {str(e).strip()}")
+            return 1
+    try:
+        results = run_suite(ds, names, args.repeat, env)
+    finally:
+        if env is not None:
+            if args.keep:
+                env['conn'].close()
+            else:
+                drop_db(env)
+
+    run = {
+        'id': datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ'),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'label': args.label,
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'host': platform.node(),
+        'params': ds['params'],
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if not args.no_save:
+        history = load_history(args.history)
+        history.append(run)
+        save_history(history, args.history)
+        print(f"💾 Run {run['id']} saved to {args.history} ({len(history)} runs)")
+        if len(history) > 1:
+            print()
+            print_comparison(history[-2], run, compare(history[-2], run), THRESHOLD)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
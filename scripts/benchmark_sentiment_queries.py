@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Benchmark the sentiment pipeline's hot queries before/after migration 008
+
+Builds db/sentiment_schema.sql in a scratch schema (default: bench_sentiment),
+seeds it reproducibly (1M articles by default, ~2% unanalyzed, three years
+of daily scores per symbol), times every pipeline query, applies
+008_add_sentiment_pipeline_indexes.sql and times them again.
+Nothing outside the scratch schema is touched; it is dropped at the end
+unless --keep is given.
+
+Usage:
+  python scripts/benchmark_sentiment_queries.py
+  python scripts/benchmark_sentiment_queries.py --articles 200000 --runs 100 --json bench.json
+  python scripts/benchmark_sentiment_queries.py --keep   # inspect with EXPLAIN afterwards
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot.config import ROOT_DIR, get_db_conn
+
+SCHEMA_FILE = ROOT_DIR / 'db' / 'sentiment_schema.sql'
+MIGRATION_FILE = ROOT_DIR / 'db' / 'migrations' / '008_add_sentiment_pipeline_indexes.sql'
+
+# Pipeline queries as the workflows / executor issue them. Writes run inside
+# a transaction that is rolled back, so every run sees the same data.
+QUERIES = {
+    'get_unanalyzed_news': (
+        """
+        SELECT id, title, content, url, published_at, source FROM news_articles
+        WHERE symbol = %(symbol)s AND analyzed = false ORDER BY published_at DESC LIMIT 10
+        """, False),
+    'get_last_sentiment': (
+        """
+        SELECT sentiment_score, rationale, article_count FROM sentiment_scores
+        WHERE symbol = %(symbol)s ORDER BY date DESC LIMIT 1
+        """, False),
+    'executor_scores': (
+        """
+        SELECT ss.symbol, ROUND(AVG(ss.sentiment_score), 4) AS score,
+               MAX(ss.rationale) FILTER (WHERE ss.date = CURRENT_DATE) AS rationale, ts.sector
+        FROM sentiment_scores ss
+        JOIN tracked_symbols ts ON ss.symbol = ts.symbol
+        WHERE ss.date >= CURRENT_DATE - 2 AND ts.active = true
+        GROUP BY ss.symbol, ts.sector
+        ORDER BY score DESC
+        """, False),
+    'mark_articles_analyzed': (
+        """
+        UPDATE news_articles SET analyzed = true
+        WHERE symbol = %(symbol)s AND analyzed = false AND fetched_at >= CURRENT_DATE
+        """, True),
+}
+
+
+def create_schema(conn, schema):
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"SET search_path TO {schema}")
+        cur.execute(SCHEMA_FILE.read_text())
+    conn.commit()
+
+
+def seed(conn, articles, symbols, unanalyzed, days, seed_value):
+    """Deterministic data: setseed() + generate_series, all server-side"""
+    t0 = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute("SELECT setseed(%s)", (seed_value,))
+        cur.execute(
+            """
+            INSERT INTO tracked_symbols (symbol, name, sector, active)
+            SELECT 'S' || lpad(i::text, 4, '0'), 'Bench ' || i, 'Sector ' || (i %% 11), i %% 10 <> 0
+            FROM generate_series(1, %s) i
+            ON CONFLICT (symbol) DO NOTHING
+            """,
+            (max(symbols - 7, 0),),
+        )
+        # Articles: uniform over symbols and the last year, a random share
+        # still unanalyzed
+        cur.execute(
+            """
+            WITH syms AS (SELECT array_agg(symbol ORDER BY symbol) AS s FROM tracked_symbols)
+            INSERT INTO news_articles (article_id, symbol, title, content, url, published_at,
+                                       source, fetched_at, analyzed)
+            SELECT 'bench_' || i, s[1 + i %% array_length(s, 1)], 'Headline ' || i,
+                   repeat('lorem ipsum ', 20), 'https://example.com/' || i, p, 'Bench',
+                   p + interval '5 minutes', random() >= %s
+            FROM syms, generate_series(1, %s) i,
+                 LATERAL (SELECT NOW() - random() * interval '365 days' AS p) t
+            """,
+            (unanalyzed, articles),
+        )
+        cur.execute(
+            """
+            INSERT INTO sentiment_scores (date, symbol, sentiment_score, rationale, article_count)
+            SELECT d::date, ts.symbol, round((random() * 2 - 1)::numeric, 4), 'bench', 1 + (random() * 9)::int
+            FROM tracked_symbols ts,
+                 generate_series(CURRENT_DATE - %s, CURRENT_DATE, interval '1 day') d
+            """,
+            (days,),
+        )
+        cur.execute("ANALYZE news_articles; ANALYZE sentiment_scores; ANALYZE tracked_symbols")
+        cur.execute("SELECT COUNT(*) FROM news_articles")
+        n_articles = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM sentiment_scores")
+        n_scores = cur.fetchone()[0]
+    conn.commit()
+    print(f"🌱 Seeded {n_articles:,} articles, {n_scores:,} scores in {time.perf_counter() - t0:.1f}s")
+
+
+def time_queries(conn, symbols, runs, warmup, rng):
+    """{query: {'p50', 'p99', 'mean'}} in milliseconds"""
+    out = {}
+    for name, (sql, write) in QUERIES.items():
+        samples = []
+        for i in range(warmup + runs):
+            params = {'symbol': rng.choice(symbols)}
+            with conn.cursor() as cur:
+                t0 = time.perf_counter()
+                cur.execute(sql, params)
+                if cur.description:
+                    cur.fetchall()
+                elapsed = time.perf_counter() - t0
+            if write:
+                conn.rollback()
+            else:
+                conn.commit()
+            if i >= warmup:
+                samples.append(elapsed * 1000)
+        samples = np.array(samples)
+        out[name] = {'p50': float(np.percentile(samples, 50)), 'p99': float(np.percentile(samples, 99)),
+                     'mean': float(samples.mean())}
+    return out
+
+
+def print_results(before, after):
+    print(f"\n{'query':<26}{'p50 before':>12}{'p50 after':>12}{'p99 before':>12}{'p99 after':>12}{'speedup':>10}")
+    print("-" * 84)
+    for name in QUERIES:
+        b, a = before[name], after[name]
+        speedup = b['p50'] / a['p50'] if a['p50'] else float('inf')
+        print(f"{name:<26}{b['p50']:>10.2f}ms{a['p50']:>10.2f}ms{b['p99']:>10.2f}ms{a['p99']:>10.2f}ms"
+              f"{speedup:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sentiment pipeline queries before/after migration 008')
+    parser.add_argument('--articles', type=int, default=1_000_000)
+    parser.add_argument('--symbols', type=int, default=100, help='Tracked symbols (default: 100)')
+    parser.add_argument('--unanalyzed', type=float, default=0.02, help='Share of unanalyzed articles')
+    parser.add_argument('--days', type=int, default=3 * 365, help='Days of sentiment scores per symbol')
+    parser.add_argument('--runs', type=int, default=200, help='Timed runs per query')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=float, default=0.42, help='setseed() value in [-1, 1]')
+    parser.add_argument('--schema', default='bench_sentiment')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch schema')
+    args = parser.parse_args()
+
+    conn = get_db_conn()
+    try:
+        create_schema(conn, args.schema)
+        seed(conn, args.articles, args.symbols, args.unanalyzed, args.days, args.seed)
+        with conn.cursor() as cur:
+            cur.execute("SELECT symbol FROM tracked_symbols ORDER BY symbol")
+            symbols = [r[0] for r in cur.fetchall()]
+        conn.commit()
+
+        print(f"⏱️  Before migration 008 ({args.runs} runs per query)...")
+        before = time_queries(conn, symbols, args.runs, args.warmup, random.Random(1))
+
+        t0 = time.perf_counter()
+        with conn.cursor() as cur:
+            cur.execute(MIGRATION_FILE.read_text())
+        conn.commit()
+        print(f"🔧 Applied {MIGRATION_FILE.name} in {time.perf_counter() - t0:.1f}s")
+
+        print("⏱️  After migration 008...")
+        after = time_queries(conn, symbols, args.runs, args.warmup, random.Random(1))
+        print_results(before, after)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'params': vars(args), 'before': before, 'after': after}, f, indent=2)
+            print(f"\n💾 Results saved to {args.json}")
+    finally:
+        conn.rollback()
+        if not args.keep:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE")
+            conn.commit()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
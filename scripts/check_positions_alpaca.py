@@ -2,10 +2,13 @@
 """
 Check current Alpaca positions and P&L
 """
-import requests
-import json
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot.alpaca_client import AlpacaClient
 
 # Alpaca Paper Trading API
 BASE_URL = os.environ.get('ALPACA_BASE_URL', 'https://paper-api.alpaca.markets')
@@ -21,37 +24,25 @@ if not API_KEY or not API_SECRET:
     print("   export ALPACA_SECRET_KEY=your_secret")
     exit(1)
 
-headers = {
-    "APCA-API-KEY-ID": API_KEY,
-    "APCA-API-SECRET-KEY": API_SECRET
-}
-
-def get_account():
-    """Get account info"""
-    response = requests.get(f"{BASE_URL}/v2/account", headers=headers)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"❌ Account error: {response.status_code} - {response.text}")
-        return None
-
-def get_positions():
-    """Get all open positions"""
-    response = requests.get(f"{BASE_URL}/v2/positions", headers=headers)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"❌ Positions error: {response.status_code} - {response.text}")
-        return []
+client = AlpacaClient(API_KEY, API_SECRET, BASE_URL)
 
-def get_orders():
-    """Get all orders (including stop-loss and take-profit)"""
-    response = requests.get(f"{BASE_URL}/v2/orders?status=all&limit=50", headers=headers)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"❌ Orders error: {response.status_code} - {response.text}")
-        return []
+def fetch_all():
+    """Get account, positions and orders (including stop-loss and take-profit) in parallel"""
+    results = client.fetch_status(orders_limit=50, return_exceptions=True)
+    
+    account = results['account']
+    if isinstance(account, Exception):
+        print(f"❌ Account error: {account}")
+        account = None
+    positions = results['positions']
+    if isinstance(positions, Exception):
+        print(f"❌ Positions error: {positions}")
+        positions = []
+    orders = results['orders']
+    if isinstance(orders, Exception):
+        print(f"❌ Orders error: {orders}")
+        orders = []
+    return account, positions, orders
 
 def main():
     print("=" * 80)
@@ -59,8 +50,9 @@ def main():
     print("=" * 80)
     print()
     
+    account, positions, orders = fetch_all()
+    
     # Account info
-    account = get_account()
     if account:
         equity = float(account.get('equity', 0))
         last_equity = float(account.get('last_equity', 0))
@@ -76,7 +68,6 @@ def main():
         print()
     
     # Positions
-    positions = get_positions()
     if positions:
         print("=" * 80)
         print(f"📍 OPEN POSITIONS ({len(positions)})")
@@ -106,7 +97,6 @@ def main():
         print()
     
     # Recent orders
-    orders = get_orders()
     if orders:
         print("=" * 80)
         print(f"📋 RECENT ORDERS (Last 10)")
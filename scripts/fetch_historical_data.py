@@ -4,32 +4,36 @@ Fetch Historical Stock Data (2023-2025)
 Task 1.1.1 - Phase 1: Validation
 
 Fetches daily OHLCV data for specified symbols from Alpaca API
-and saves to CSV files for backtesting.
+and saves to CSV files for backtesting. All symbols are requested together
+through the shared client (one paginated multi-symbol bars request).
 """
 
 import os
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
 from dotenv import load_dotenv
-from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
-from alpaca.data.timeframe import TimeFrame
 import pandas as pd
+import requests
 
-# Load environment variables
+# Load environment variables (before tradingbot.config reads ALPACA_* URLs)
 load_dotenv()
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot.alpaca_client import AlpacaClient, AlpacaError
+
 # Configuration
 SYMBOLS = ['AAPL', 'AMZN', 'GOOGL', 'META', 'MSFT', 'NVDA', 'TSLA']
 START_DATE = datetime(2023, 1, 1)
 END_DATE = datetime(2025, 12, 31)
 DATA_DIR = 'data'
-TIMEFRAME = TimeFrame.Day
+TIMEFRAME = '1Day'
 
 def fetch_historical_data():
     """Fetch historical data for all symbols"""
     
     # Initialize Alpaca client
-    client = StockHistoricalDataClient(
+    client = AlpacaClient(
         os.getenv('ALPACA_API_KEY'),
         os.getenv('ALPACA_SECRET_KEY')
     )
@@ -44,56 +48,50 @@ def fetch_historical_data():
     
     results = {}
     
-    for symbol in SYMBOLS:
-        try:
-            print(f"\nFetching {symbol}...", end=' ')
-            
-            # Create request
-            request = StockBarsRequest(
-                symbol_or_symbols=symbol,
-                timeframe=TIMEFRAME,
-                start=START_DATE,
-                end=END_DATE
-            )
-            
-            # Fetch data
-            bars = client.get_stock_bars(request)
-            
-            # Convert to DataFrame
-            df = bars.df
-            
-            if df.empty:
-                print(f"❌ No data returned")
-                continue
-            
-            # Reset index to get timestamp as column
-            df = df.reset_index()
-            
-            # Rename columns for clarity
-            df.columns = ['symbol', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']
-            
-            # Convert timestamp to date
-            df['date'] = pd.to_datetime(df['timestamp']).dt.date
-            
-            # Select and reorder columns
-            df = df[['date', 'open', 'high', 'low', 'close', 'volume', 'vwap']]
-            
-            # Save to CSV
-            filename = f"{DATA_DIR}/historical_{symbol}_2023-2025.csv"
-            df.to_csv(filename, index=False)
-            
-            results[symbol] = {
-                'bars': len(df),
-                'start': df['date'].min(),
-                'end': df['date'].max(),
-                'file': filename
-            }
-            
-            print(f"✅ {len(df)} bars saved to {filename}")
-            
-        except Exception as e:
-            print(f"❌ Error: {str(e)}")
-            results[symbol] = {'error': str(e)}
+    try:
+        bars_by_symbol = client.get_bars(
+            SYMBOLS,
+            timeframe=TIMEFRAME,
+            start=START_DATE.strftime('%Y-%m-%d'),
+            end=END_DATE.strftime('%Y-%m-%d'),
+        )
+    except (AlpacaError, requests.RequestException) as e:
+        print(f"❌ Error: {e}")
+        bars_by_symbol = {}
+        results = {symbol: {'error': str(e)} for symbol in SYMBOLS}
+    
+    for symbol, bars in bars_by_symbol.items():
+        print(f"\n{symbol}...", end=' ')
+        
+        if not bars:
+            print(f"❌ No data returned")
+            continue
+        
+        df = pd.DataFrame(bars).rename(columns={
+            't': 'timestamp', 'o': 'open', 'h': 'high', 'l': 'low',
+            'c': 'close', 'v': 'volume', 'vw': 'vwap',
+        })
+        if 'vwap' not in df:
+            df['vwap'] = None
+        
+        # Convert timestamp to date
+        df['date'] = pd.to_datetime(df['timestamp']).dt.date
+        
+        # Select and reorder columns
+        df = df[['date', 'open', 'high', 'low', 'close', 'volume', 'vwap']]
+        
+        # Save to CSV
+        filename = f"{DATA_DIR}/historical_{symbol}_2023-2025.csv"
+        df.to_csv(filename, index=False)
+        
+        results[symbol] = {
+            'bars': len(df),
+            'start': df['date'].min(),
+            'end': df['date'].max(),
+            'file': filename
+        }
+        
+        print(f"✅ {len(df)} bars saved to {filename}")
     
     # Summary
     print("\n" + "=" * 60)
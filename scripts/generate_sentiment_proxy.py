@@ -12,9 +12,6 @@ import requests
 import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
-from tqdm import tqdm
 import time
 
 # Load environment variables
@@ -38,6 +35,9 @@ class SentimentAnalyzer:
     """FinBERT sentiment analyzer"""
     
     def __init__(self):
+        # Heavy imports only when the model is actually needed
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
         print("Loading FinBERT model (ProsusAI/finbert)...")
         self.tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL)
         self.model = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL)
@@ -49,6 +49,8 @@ class SentimentAnalyzer:
         Analyze sentiment of text
         Returns: sentiment score from -1 (negative) to +1 (positive)
         """
+        import torch
+
         try:
             # Tokenize
             inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding=True)
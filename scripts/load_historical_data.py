@@ -4,26 +4,16 @@ Load historical OHLC data from Yahoo Finance and calculate EMA for visualization
 Supports any stock symbol, flexible timeframes, and easy data backfilling
 """
 
-import os
 import sys
-try:
-    import yfinance as yf
-except ImportError:
-    print("ERROR: yfinance not installed. Installing...")
-    os.system("pip3 install yfinance --break-system-packages 2>/dev/null || pip3 install yfinance --user")
-    import yfinance as yf
+from pathlib import Path
 
 import psycopg2
 from datetime import datetime, timedelta
 
-# DB config
-DB_CONFIG = {
-    'host': os.environ.get('POSTGRES_HOST', 'localhost'),
-    'port': int(os.environ.get('POSTGRES_PORT', '5432')),
-    'dbname': os.environ.get('POSTGRES_DB', 'trading_bot'),
-    'user': os.environ.get('POSTGRES_USER'),
-    'password': os.environ.get('POSTGRES_PASSWORD'),
-}
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot.bars import save_bars
+from tradingbot.config import DB_CONFIG
+from tradingbot.resample import TIMEFRAME_ALIASES
 
 
 def calculate_ema(prices, period):
@@ -50,6 +40,11 @@ def fetch_bars_yahoo(symbol, interval='5m', period='7d'):
     interval: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo
     period: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
     """
+    try:
+        import yfinance as yf
+    except ImportError:
+        raise SystemExit("❌ yfinance is not installed: pip install yfinance") from None
+
     print(f"Fetching {symbol} data: interval={interval}, period={period}")
     ticker = yf.Ticker(symbol)
     
@@ -75,10 +70,26 @@ def fetch_bars_yahoo(symbol, interval='5m', period='7d'):
     return bars
 
 
+def save_ohlcv(symbol, interval, bars):
+    """Keep the full OHLCV bars (the EMA table only stores closes)"""
+    timeframe = TIMEFRAME_ALIASES.get(interval, interval)
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        count = save_bars(conn, symbol, timeframe, bars, source='yahoo')
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"Saved {count} {timeframe} OHLCV bars")
+
+
 def process_and_save(symbol, interval='5m', period='7d'):
     """Fetch bars, calculate EMA, and save to database"""
     bars = fetch_bars_yahoo(symbol, interval, period)
-    
+    if not bars:
+        return
+
+    save_ohlcv(symbol, interval, bars)
+
     if len(bars) < 21:
         print(f"Not enough bars: {len(bars)} < 21")
         return
@@ -130,11 +141,11 @@ def process_and_save(symbol, interval='5m', period='7d'):
             cursor.execute(
                 """
                 INSERT INTO ema_snapshots 
-                (timestamp, symbol, close_price, ema5, ema8, ema9, ema13, ema20, ema21, ema34, ema50, ema100, ema200, action, crossover, message)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                (timestamp, symbol, close_price, volume, ema5, ema8, ema9, ema13, ema20, ema21, ema34, ema50, ema100, ema200, action, crossover, message)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ON CONFLICT DO NOTHING
                 """,
-                (timestamp, symbol, close_price, 
+                (timestamp, symbol, close_price, bar['v'],
                  ema_vals[5], ema_vals[8], ema_vals[9], ema_vals[13], 
                  ema_vals[20], ema_vals[21], ema_vals[34], ema_vals[50], 
                  ema_vals[100], ema_vals[200],
@@ -7,12 +7,10 @@ Adds EMA periods: 8, 9, 13, 21, 34, 50, 100, 200
 import psycopg2
 import sys
 from datetime import datetime
+from pathlib import Path
 
-# Database connection settings
-DB_CONFIG = {
-    'database': 'trading_bot',
-    'user': 'postgres'
-}
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot.config import DB_CONFIG
 
 def calculate_ema(prices, period):
     """
@@ -0,0 +1,4 @@
+"""
+TradingBot shared Python modules
+Pure decision logic, Alpaca access and DB helpers used by scripts, web and executors
+"""
@@ -0,0 +1,3 @@
+from tradingbot.cli import main
+
+raise SystemExit(main())
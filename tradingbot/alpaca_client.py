@@ -0,0 +1,276 @@
+"""
+Shared Alpaca REST client
+
+- One keep-alive session pool, safe to share between worker threads
+- Timeouts on every call, retry with exponential backoff + full jitter
+  (connection errors, 429 honouring Retry-After, 5xx)
+- Client-side token-bucket rate limiter (Alpaca allows 200 req/min)
+- Short-TTL cache for read endpoints, cleared by any write
+- Concurrent fan-out helpers: fetch_status() gets account + positions + orders
+  in one round-trip time
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tradingbot.config import ALPACA_CONFIG
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AlpacaError(Exception):
+    """Non-2xx response from Alpaca"""
+
+    def __init__(self, status_code, body, url=None):
+        super().__init__(f"{status_code} {url or ''}: {body}")
+        self.status_code = status_code
+        self.body = body
+        self.url = url
+
+
+class RateLimiter:
+    """Blocking token bucket: acquire() waits until a request slot is free"""
+
+    def __init__(self, per_minute=200, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def sleep_before_retry(attempt, backoff, response=None):
+    """Honour Retry-After when the server sends it, else jittered exponential backoff"""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            time.sleep(float(retry_after))
+            return
+        except ValueError:
+            pass
+    time.sleep(random.uniform(0, backoff * (2 ** attempt)))
+
+
+def request_with_retry(session, method, url, limiter=None, retries=3, backoff=0.25, on_attempt=None, **kwargs):
+    """
+    Send a request, retrying connection errors and RETRY_STATUSES
+
+    Every attempt waits for the limiter (if any) and calls on_attempt().
+    Returns the last response; the caller checks its status. Connection
+    errors on the last attempt are raised.
+    """
+    attempts = retries + 1
+    for attempt in range(attempts):
+        if limiter:
+            limiter.acquire()
+        if on_attempt:
+            on_attempt()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == attempts - 1:
+                raise
+            sleep_before_retry(attempt, backoff)
+            continue
+        if response.status_code in RETRY_STATUSES and attempt < attempts - 1:
+            sleep_before_retry(attempt, backoff, response)
+            continue
+        return response
+
+
+class TTLCache:
+    """Tiny thread-safe TTL cache for GET responses"""
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            hit = self.data.get(key)
+            if hit and hit[0] > time.monotonic():
+                return hit[1]
+            self.data.pop(key, None)
+            return None
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+class AlpacaClient:
+    """Thin wrapper around the trading and market data endpoints we use"""
+
+    def __init__(self, api_key=None, api_secret=None, base_url=None, data_url=None,
+                 pool_size=10, timeout=10.0, max_retries=3, backoff=0.25,
+                 rate_limit_per_min=200, cache_ttl=2.0):
+        self.base_url = (base_url or ALPACA_CONFIG['base_url']).rstrip('/')
+        self.data_url = (data_url or ALPACA_CONFIG['data_url']).rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.limiter = RateLimiter(rate_limit_per_min) if rate_limit_per_min else None
+        self.cache = TTLCache(cache_ttl) if cache_ttl else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'APCA-API-KEY-ID': api_key or ALPACA_CONFIG['api_key'] or '',
+            'APCA-API-SECRET-KEY': api_secret or ALPACA_CONFIG['api_secret'] or '',
+        })
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, method, url, cache=False, retry=None, **kwargs):
+        """
+        Send a request and return decoded JSON (None for empty bodies)
+
+        cache: serve/store GET responses in the TTL cache
+        retry: defaults to True for GET/DELETE; POSTs are retried only when the
+               caller makes them idempotent (e.g. with a client_order_id)
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        if retry is None:
+            retry = method in ('GET', 'DELETE')
+
+        key = None
+        if cache and self.cache and method == 'GET':
+            key = (url, tuple(sorted((kwargs.get('params') or {}).items())))
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+        if method != 'GET' and self.cache:
+            self.cache.clear()
+
+        response = request_with_retry(self.session, method, url, self.limiter,
+                                      self.max_retries if retry else 0, self.backoff, **kwargs)
+        if response.status_code >= 400:
+            raise AlpacaError(response.status_code, response.text, url)
+
+        data = response.json() if response.content else None
+        if key is not None:
+            self.cache.set(key, data)
+        return data
+
+    # --- Concurrency helpers ---
+
+    def fan_out(self, calls, return_exceptions=False):
+        """
+        Run independent calls concurrently over the shared pool
+
+        calls: {name: (fn, *args)} -> {name: result}
+        The first exception is re-raised unless return_exceptions is set,
+        in which case failed calls map to their exception.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(len(calls), self.pool_size) or 1) as pool:
+            futures = {name: pool.submit(call[0], *call[1:]) for name, call in calls.items()}
+            for name, f in futures.items():
+                try:
+                    results[name] = f.result()
+                except (AlpacaError, requests.RequestException) as e:
+                    if not return_exceptions:
+                        raise
+                    results[name] = e
+        return results
+
+    def map_symbols(self, fn, symbols):
+        """fn(symbol) for every symbol concurrently -> {symbol: result or exception}"""
+        return self.fan_out({s: (fn, s) for s in symbols}, return_exceptions=True)
+
+    def fetch_status(self, orders_limit=50, return_exceptions=False):
+        """Account, positions and recent orders in parallel"""
+        return self.fan_out({
+            'account': (self.get_account,),
+            'positions': (self.get_positions,),
+            'orders': (self.get_orders, 'all', orders_limit),
+        }, return_exceptions)
+
+    # --- Trading API ---
+
+    def get_account(self):
+        return self.request('GET', f"{self.base_url}/v2/account", cache=True)
+
+    def get_positions(self):
+        return self.request('GET', f"{self.base_url}/v2/positions", cache=True)
+
+    def get_orders(self, status='all', limit=50, symbols=None):
+        params = {'status': status, 'limit': limit}
+        if symbols:
+            params['symbols'] = ','.join(symbols)
+        return self.request('GET', f"{self.base_url}/v2/orders", params=params, cache=status != 'open')
+
+    def submit_order(self, order):
+        return self.request('POST', f"{self.base_url}/v2/orders", json=order,
+                            retry=bool(order.get('client_order_id')))
+
+    def get_order_by_client_id(self, client_order_id):
+        return self.request('GET', f"{self.base_url}/v2/orders:by_client_order_id",
+                            params={'client_order_id': client_order_id})
+
+    def cancel_order(self, order_id):
+        return self.request('DELETE', f"{self.base_url}/v2/orders/{order_id}")
+
+    def close_position(self, symbol):
+        return self.request('DELETE', f"{self.base_url}/v2/positions/{symbol}")
+
+    # --- Market data API ---
+
+    def get_latest_trade(self, symbol):
+        return self.request('GET', f"{self.data_url}/v2/stocks/{symbol}/trades/latest")
+
+    def get_bars(self, symbols, timeframe='1Day', start=None, end=None, limit=10000,
+                 adjustment='raw', feed=None):
+        """Multi-symbol bars with pagination -> {symbol: [bar, ...]}"""
+        params = {'symbols': ','.join(symbols), 'timeframe': timeframe, 'limit': limit,
+                  'adjustment': adjustment}
+        if start:
+            params['start'] = start
+        if end:
+            params['end'] = end
+        if feed:
+            params['feed'] = feed
+
+        out = {s: [] for s in symbols}
+        while True:
+            page = self.request('GET', f"{self.data_url}/v2/stocks/bars", params=params)
+            for symbol, bars in (page.get('bars') or {}).items():
+                out.setdefault(symbol, []).extend(bars)
+            token = page.get('next_page_token')
+            if not token:
+                return out
+            params['page_token'] = token
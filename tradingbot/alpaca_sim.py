@@ -0,0 +1,820 @@
+#!/usr/bin/env python3
+"""
+Local Alpaca API simulator for offline end-to-end runs and benchmarks
+
+Implements the endpoints the scripts, executor and workflows use:
+  GET    /v2/account
+  GET    /v2/positions             DELETE /v2/positions/{symbol}
+  GET    /v2/orders                POST   /v2/orders (simple + bracket)
+  GET    /v2/orders:by_client_order_id
+  DELETE /v2/orders                DELETE /v2/orders/{id}
+  GET    /v2/stocks/bars           GET    /v2/stocks/{symbol}/bars
+  GET    /v2/stocks/{symbol}/trades/latest
+
+Prices come from replayed bars. The replay clock only moves through the
+control endpoint (POST /sim/advance) or SimBroker.advance(), and data endpoints
+never return bars after the clock. Market orders fill at the current close
+(fill_mode='close') or the next bar's open (fill_mode='next_open'). Bracket legs
+trigger on bar high/low, and the stop wins when both legs trigger in one bar.
+Latency, a token-bucket rate limit (429) and random or scripted faults are
+configurable.
+
+Usage:
+  python -m tradingbot.alpaca_sim --bars NVDA=data/historical_NVDA_2023-2025.csv --port 5055
+  export ALPACA_BASE_URL=http://127.0.0.1:5055 ALPACA_DATA_URL=http://127.0.0.1:5055
+"""
+
+import bisect
+import csv
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SIM_CONFIG = {
+    'initial_cash': 100000.0,
+    'fill_mode': 'close',        # 'close' (fill on submit) or 'next_open' (fill on next bar)
+    'slippage_bps': 0.0,         # Adverse slippage on market fills
+    'latency_ms': 0.0,           # Added to every request
+    'latency_jitter_ms': 0.0,
+    'rate_limit_per_min': 200,   # Alpaca default; 0 disables
+    'error_rate': 0.0,           # Probability of a random 500 on any request
+    'require_auth': True,
+    'seed': 42,
+}
+
+
+def parse_time(value):
+    """ISO timestamp or date -> aware UTC datetime"""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def format_time(dt):
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def format_qty(qty):
+    return f"{qty:.6f}".rstrip('0').rstrip('.')
+
+
+def load_bars_csv(path):
+    """Read bars from a CSV with date/timestamp, open, high, low, close, volume columns"""
+    bars = []
+    with open(path) as f:
+        for row in csv.DictReader(f):
+            ts = row.get('timestamp') or row.get('date') or row.get('t')
+            bars.append({
+                't': parse_time(ts),
+                'o': float(row['open']),
+                'h': float(row['high']),
+                'l': float(row['low']),
+                'c': float(row['close']),
+                'v': int(float(row.get('volume') or 0)),
+            })
+    bars.sort(key=lambda b: b['t'])
+    return bars
+
+
+class SimError(Exception):
+    """Maps to an Alpaca-style JSON error response"""
+
+    def __init__(self, status, message, code=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.code = code or status * 100000
+
+
+class MarketReplay:
+    """Per-symbol bar arrays with a shared replay clock"""
+
+    def __init__(self, bars_by_symbol, start=None):
+        self.bars = {}
+        self.times = {}
+        for symbol, bars in bars_by_symbol.items():
+            bars = sorted(({**b, 't': parse_time(b['t'])} for b in bars), key=lambda b: b['t'])
+            self.bars[symbol.upper()] = bars
+            self.times[symbol.upper()] = [b['t'] for b in bars]
+        self.timeline = sorted({t for ts in self.times.values() for t in ts})
+        if not self.timeline:
+            raise ValueError("MarketReplay needs at least one bar")
+        self.clock_idx = bisect.bisect_right(self.timeline, parse_time(start)) - 1 if start else 0
+        self.clock_idx = max(self.clock_idx, 0)
+
+    @property
+    def clock(self):
+        return self.timeline[self.clock_idx]
+
+    def at_end(self):
+        return self.clock_idx >= len(self.timeline) - 1
+
+    def step(self):
+        """Move the clock to the next timestamp; returns {symbol: bar} printed at that time"""
+        if self.at_end():
+            return {}
+        self.clock_idx += 1
+        now = self.clock
+        out = {}
+        for symbol, times in self.times.items():
+            i = bisect.bisect_left(times, now)
+            if i < len(times) and times[i] == now:
+                out[symbol] = self.bars[symbol][i]
+        return out
+
+    def last_bar(self, symbol):
+        times = self.times.get(symbol)
+        if not times:
+            return None
+        i = bisect.bisect_right(times, self.clock) - 1
+        return self.bars[symbol][i] if i >= 0 else None
+
+    def price(self, symbol):
+        bar = self.last_bar(symbol)
+        return bar['c'] if bar else None
+
+    def bars_between(self, symbol, start=None, end=None):
+        """Bars in [start, end], never past the clock"""
+        times = self.times.get(symbol, [])
+        end = min(parse_time(end), self.clock) if end else self.clock
+        lo = bisect.bisect_left(times, parse_time(start)) if start else 0
+        hi = bisect.bisect_right(times, end)
+        return self.bars.get(symbol, [])[lo:hi]
+
+
+class SimBroker:
+    """Account, positions and order book with a bar-driven fill model"""
+
+    def __init__(self, market, config=None):
+        self.config = {**SIM_CONFIG, **(config or {})}
+        self.market = market
+        self.lock = threading.RLock()
+        self.cash = float(self.config['initial_cash'])
+        self.positions = {}        # symbol -> {'qty', 'cost_basis', 'asset_id'}
+        self.orders = {}           # id -> order dict (Alpaca shape)
+        self.by_client_id = {}
+        self.last_equity = self.cash
+        self.fills = []
+
+    # --- Helpers ---
+
+    def _now(self):
+        return format_time(self.market.clock)
+
+    def _price(self, symbol):
+        price = self.market.price(symbol)
+        if price is None:
+            raise SimError(422, f"no market data for {symbol}", 42210000)
+        return price
+
+    def _new_order(self, symbol, side, qty, order_type, tif, order_class='simple',
+                   limit_price=None, stop_price=None, client_order_id=None, status='new'):
+        order = {
+            'id': str(uuid.uuid4()),
+            'client_order_id': client_order_id or str(uuid.uuid4()),
+            'created_at': self._now(),
+            'updated_at': self._now(),
+            'submitted_at': self._now(),
+            'filled_at': None,
+            'canceled_at': None,
+            'asset_class': 'us_equity',
+            'symbol': symbol,
+            'qty': format_qty(qty),
+            'filled_qty': '0',
+            'filled_avg_price': None,
+            'order_class': order_class,
+            'order_type': order_type,
+            'type': order_type,
+            'side': side,
+            'time_in_force': tif,
+            'limit_price': None if limit_price is None else f"{limit_price:.2f}",
+            'stop_price': None if stop_price is None else f"{stop_price:.2f}",
+            'status': status,
+            'legs': None,
+        }
+        self.orders[order['id']] = order
+        self.by_client_id[order['client_order_id']] = order
+        return order
+
+    def _open_sell_qty(self, symbol, exclude=()):
+        """Qty held by open sell orders for a symbol (a bracket's OCO legs count once)"""
+        groups = {}
+        for o in self.orders.values():
+            if o['symbol'] == symbol and o['side'] == 'sell' and o['id'] not in exclude \
+                    and o['status'] in ('new', 'accepted', 'pending_new', 'held'):
+                key = o.get('_parent_id') or o['id']
+                groups[key] = max(groups.get(key, 0.0), float(o['qty']))
+        return sum(groups.values())
+
+    def _fill(self, order, price):
+        qty = float(order['qty'])
+        symbol = order['symbol']
+        slip = self.config['slippage_bps'] / 10000.0
+        if order['type'] == 'market':
+            price = price * (1 + slip) if order['side'] == 'buy' else price * (1 - slip)
+
+        pos = self.positions.get(symbol)
+        if order['side'] == 'buy':
+            cost = qty * price
+            if cost > self.cash + 1e-9:
+                order['status'] = 'rejected'
+                order['updated_at'] = self._now()
+                # Held bracket legs die with the parent
+                for leg in order.get('legs') or []:
+                    self._cancel(leg)
+                return False
+            self.cash -= cost
+            if pos is None:
+                pos = self.positions[symbol] = {'qty': 0.0, 'cost_basis': 0.0, 'asset_id': str(uuid.uuid4())}
+            pos['qty'] += qty
+            pos['cost_basis'] += cost
+        else:
+            held = pos['qty'] if pos else 0.0
+            qty = min(qty, held)
+            if qty <= 0:
+                order['status'] = 'canceled'
+                order['canceled_at'] = order['updated_at'] = self._now()
+                return False
+            self.cash += qty * price
+            pos['cost_basis'] -= pos['cost_basis'] * (qty / pos['qty'])
+            pos['qty'] -= qty
+            if pos['qty'] <= 1e-9:
+                del self.positions[symbol]
+
+        order['status'] = 'filled'
+        order['filled_qty'] = format_qty(qty)
+        order['filled_avg_price'] = f"{price:.4f}"
+        order['filled_at'] = order['updated_at'] = self._now()
+        self.fills.append({'t': self._now(), 'id': order['id'], 'symbol': symbol,
+                           'side': order['side'], 'qty': qty, 'price': price})
+
+        # Parent filled -> activate legs; leg filled -> cancel OCO sibling
+        for leg in order.get('legs') or []:
+            if leg['status'] == 'held':
+                leg['status'] = 'new'
+                leg['updated_at'] = self._now()
+        parent_id = order.get('_parent_id')
+        if parent_id:
+            for leg in self.orders[parent_id].get('legs') or []:
+                if leg['id'] != order['id'] and leg['status'] in ('new', 'held'):
+                    self._cancel(leg)
+        return True
+
+    def _cancel(self, order):
+        if order['status'] in ('filled', 'canceled', 'expired', 'rejected'):
+            return False
+        order['status'] = 'canceled'
+        order['canceled_at'] = order['updated_at'] = self._now()
+        for leg in order.get('legs') or []:
+            self._cancel(leg)
+        return True
+
+    # --- Trading API ---
+
+    def account(self):
+        with self.lock:
+            long_value = sum(p['qty'] * (self.market.price(s) or 0) for s, p in self.positions.items())
+            equity = self.cash + long_value
+            return {
+                'id': 'sim-account',
+                'account_number': 'SIM000001',
+                'status': 'ACTIVE',
+                'currency': 'USD',
+                'cash': f"{self.cash:.2f}",
+                'buying_power': f"{self.cash:.2f}",
+                'portfolio_value': f"{equity:.2f}",
+                'equity': f"{equity:.2f}",
+                'last_equity': f"{self.last_equity:.2f}",
+                'long_market_value': f"{long_value:.2f}",
+                'short_market_value': '0',
+                'pattern_day_trader': False,
+                'trading_blocked': False,
+            }
+
+    def position_view(self, symbol, pos):
+        price = self.market.price(symbol) or 0.0
+        market_value = pos['qty'] * price
+        avg_entry = pos['cost_basis'] / pos['qty'] if pos['qty'] else 0.0
+        unrealized = market_value - pos['cost_basis']
+        return {
+            'asset_id': pos['asset_id'],
+            'symbol': symbol,
+            'exchange': 'NASDAQ',
+            'asset_class': 'us_equity',
+            'qty': format_qty(pos['qty']),
+            'qty_available': format_qty(pos['qty'] - self._open_sell_qty(symbol)),
+            'side': 'long',
+            'avg_entry_price': f"{avg_entry:.4f}",
+            'cost_basis': f"{pos['cost_basis']:.2f}",
+            'market_value': f"{market_value:.2f}",
+            'current_price': f"{price:.4f}",
+            'lastday_price': f"{price:.4f}",
+            'unrealized_pl': f"{unrealized:.2f}",
+            'unrealized_plpc': f"{(unrealized / pos['cost_basis']) if pos['cost_basis'] else 0:.6f}",
+        }
+
+    def list_positions(self):
+        with self.lock:
+            return [self.position_view(s, p) for s, p in sorted(self.positions.items())]
+
+    def get_position(self, symbol):
+        with self.lock:
+            pos = self.positions.get(symbol)
+            if pos is None:
+                raise SimError(404, 'position does not exist', 40410000)
+            return self.position_view(symbol, pos)
+
+    def close_position(self, symbol):
+        with self.lock:
+            pos = self.positions.get(symbol)
+            if pos is None:
+                raise SimError(404, 'position does not exist', 40410000)
+            if self._open_sell_qty(symbol) > 0:
+                raise SimError(403, 'insufficient qty available for order', 40310000)
+            return self.submit_order({'symbol': symbol, 'qty': pos['qty'], 'side': 'sell',
+                                      'type': 'market', 'time_in_force': 'day'})
+
+    def submit_order(self, payload):
+        with self.lock:
+            symbol = str(payload.get('symbol') or '').upper()
+            side = payload.get('side')
+            order_type = payload.get('type') or payload.get('order_type') or 'market'
+            tif = payload.get('time_in_force') or 'day'
+            order_class = payload.get('order_class') or 'simple'
+            client_order_id = payload.get('client_order_id')
+
+            if not symbol or side not in ('buy', 'sell'):
+                raise SimError(422, 'invalid symbol or side', 40010000)
+            if client_order_id and client_order_id in self.by_client_id:
+                raise SimError(422, 'client_order_id must be unique', 40010001)
+            price = self._price(symbol)
+
+            if payload.get('notional') is not None and payload.get('qty') is None:
+                qty = float(payload['notional']) / price
+            else:
+                qty = float(payload.get('qty') or 0)
+            if qty <= 0:
+                raise SimError(422, 'qty must be > 0', 40010000)
+
+            if order_class == 'bracket':
+                if qty != int(qty):
+                    raise SimError(422, 'fractional orders must be simple orders', 40010000)
+                tp = (payload.get('take_profit') or {}).get('limit_price')
+                sl = (payload.get('stop_loss') or {}).get('stop_price')
+                if tp is None or sl is None:
+                    raise SimError(422, 'bracket orders require take_profit and stop_loss', 40010000)
+                tp, sl = float(tp), float(sl)
+                if side == 'buy' and not (sl < price < tp):
+                    raise SimError(422, 'take_profit.limit_price must be > stop_loss.stop_price', 42210000)
+
+            if side == 'buy' and qty * price > self.cash + 1e-9:
+                raise SimError(403, 'insufficient buying power', 40310000)
+            if side == 'sell':
+                held = self.positions.get(symbol, {}).get('qty', 0.0)
+                if qty > held - self._open_sell_qty(symbol) + 1e-9:
+                    raise SimError(403, 'insufficient qty available for order', 40310000)
+
+            limit_price = payload.get('limit_price')
+            stop_price = payload.get('stop_price')
+            order = self._new_order(
+                symbol, side, qty, order_type, tif, order_class,
+                None if limit_price is None else float(limit_price),
+                None if stop_price is None else float(stop_price),
+                client_order_id,
+            )
+
+            if order_class == 'bracket':
+                exit_side = 'sell' if side == 'buy' else 'buy'
+                tp_leg = self._new_order(symbol, exit_side, qty, 'limit', tif, 'bracket',
+                                         limit_price=tp, status='held')
+                sl_leg = self._new_order(symbol, exit_side, qty, 'stop', tif, 'bracket',
+                                         stop_price=sl, status='held')
+                for leg in (tp_leg, sl_leg):
+                    leg['_parent_id'] = order['id']
+                order['legs'] = [tp_leg, sl_leg]
+
+            if order_type == 'market' and self.config['fill_mode'] == 'close':
+                self._fill(order, price)
+            return self.public(order)
+
+    def list_orders(self, status='open', limit=50, symbols=None, nested=False):
+        with self.lock:
+            open_states = ('new', 'accepted', 'pending_new', 'held', 'partially_filled')
+            out = []
+            for o in reversed(list(self.orders.values())):
+                if o.get('_parent_id') and nested:
+                    continue
+                if symbols and o['symbol'] not in symbols:
+                    continue
+                if status == 'open' and o['status'] not in open_states:
+                    continue
+                if status == 'closed' and o['status'] in open_states:
+                    continue
+                out.append(self.public(o))
+                if len(out) >= limit:
+                    break
+            return out
+
+    def get_order(self, order_id=None, client_order_id=None):
+        with self.lock:
+            order = self.orders.get(order_id) if order_id else self.by_client_id.get(client_order_id)
+            if order is None:
+                raise SimError(404, 'order not found', 40410000)
+            return self.public(order)
+
+    def cancel_order(self, order_id):
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                raise SimError(404, 'order not found', 40410000)
+            if not self._cancel(order):
+                raise SimError(422, f"order is already in \"{order['status']}\" state", 42210000)
+
+    def cancel_all(self):
+        with self.lock:
+            cancelled = []
+            for o in list(self.orders.values()):
+                if self._cancel(o):
+                    cancelled.append({'id': o['id'], 'status': 200})
+            return cancelled
+
+    @staticmethod
+    def public(order):
+        out = {k: v for k, v in order.items() if not k.startswith('_')}
+        if order.get('legs'):
+            out['legs'] = [SimBroker.public(leg) for leg in order['legs']]
+        return out
+
+    # --- Replay ---
+
+    def _process_bar(self, symbol, bar):
+        """Trigger pending orders for one symbol against one bar"""
+        pending = [o for o in self.orders.values()
+                   if o['symbol'] == symbol and o['status'] in ('new', 'accepted')]
+        # Market orders first (they may activate bracket legs)
+        for o in pending:
+            if o['type'] == 'market':
+                self._fill(o, bar['o'])
+
+        legs = [o for o in self.orders.values()
+                if o['symbol'] == symbol and o['status'] == 'new' and o['type'] in ('limit', 'stop')]
+        # Stops before limits: if a bar spans both legs, assume the stop hit first
+        for o in sorted(legs, key=lambda o: o['type'] != 'stop'):
+            if o['status'] != 'new':
+                continue
+            if o['type'] == 'stop':
+                stop = float(o['stop_price'])
+                if o['side'] == 'sell' and bar['l'] <= stop:
+                    self._fill(o, min(bar['o'], stop))
+                elif o['side'] == 'buy' and bar['h'] >= stop:
+                    self._fill(o, max(bar['o'], stop))
+            else:
+                limit = float(o['limit_price'])
+                if o['side'] == 'sell' and bar['h'] >= limit:
+                    self._fill(o, max(bar['o'], limit))
+                elif o['side'] == 'buy' and bar['l'] <= limit:
+                    self._fill(o, min(bar['o'], limit))
+
+    def advance(self, bars=1, until=None):
+        """Replay bars forward, filling orders; returns the new clock"""
+        with self.lock:
+            until = parse_time(until) if until else None
+            steps = 0
+            while not self.market.at_end():
+                if until is not None and self.market.timeline[self.market.clock_idx + 1] > until:
+                    break
+                if until is None and steps >= bars:
+                    break
+                prev_day = self.market.clock.date()
+                printed = self.market.step()
+                if self.market.clock.date() != prev_day:
+                    self.last_equity = float(self.account()['equity'])
+                for symbol, bar in printed.items():
+                    self._process_bar(symbol, bar)
+                steps += 1
+            return self.market.clock
+
+    def state(self):
+        with self.lock:
+            return {
+                'clock': self._now(),
+                'account': self.account(),
+                'positions': self.list_positions(),
+                'open_orders': len(self.list_orders('open', limit=10000)),
+                'fills': len(self.fills),
+            }
+
+
+class RateLimiter:
+    """Token bucket; capacity = per-minute limit"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        if self.capacity <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class FaultInjector:
+    """Random error rate plus scripted faults: inject(pattern, status, count)"""
+
+    def __init__(self, error_rate=0.0, seed=None):
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.scripted = []      # [method, regex, status, remaining]
+        self.lock = threading.Lock()
+
+    def inject(self, pattern, status=500, count=1, method=None):
+        with self.lock:
+            self.scripted.append([method, re.compile(pattern), status, count])
+
+    def check(self, method, path):
+        with self.lock:
+            for fault in self.scripted:
+                f_method, regex, status, remaining = fault
+                if remaining > 0 and (f_method is None or f_method == method) and regex.search(path):
+                    fault[3] -= 1
+                    return status
+            self.scripted = [f for f in self.scripted if f[3] > 0]
+            if self.error_rate and self.random.random() < self.error_rate:
+                return 500
+        return None
+
+
+class SimHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'AlpacaSim/1.0'
+
+    ROUTES = [
+        ('GET', r'^/v2/account$', 'h_account'),
+        ('GET', r'^/v2/positions$', 'h_positions'),
+        ('GET', r'^/v2/positions/(?P<symbol>[^/]+)$', 'h_position'),
+        ('DELETE', r'^/v2/positions/(?P<symbol>[^/]+)$', 'h_close_position'),
+        ('GET', r'^/v2/orders$', 'h_orders'),
+        ('GET', r'^/v2/orders:by_client_order_id$', 'h_order_by_client_id'),
+        ('GET', r'^/v2/orders/(?P<order_id>[^/]+)$', 'h_order'),
+        ('POST', r'^/v2/orders$', 'h_submit_order'),
+        ('DELETE', r'^/v2/orders$', 'h_cancel_all'),
+        ('DELETE', r'^/v2/orders/(?P<order_id>[^/]+)$', 'h_cancel_order'),
+        ('GET', r'^/v2/stocks/bars$', 'h_bars_multi'),
+        ('GET', r'^/v2/stocks/(?P<symbol>[^/]+)/bars$', 'h_bars'),
+        ('GET', r'^/v2/stocks/(?P<symbol>[^/]+)/trades/latest$', 'h_latest_trade'),
+        ('GET', r'^/sim/state$', 'h_sim_state'),
+        ('POST', r'^/sim/advance$', 'h_sim_advance'),
+        ('POST', r'^/sim/faults$', 'h_sim_faults'),
+    ]
+    COMPILED = [(m, re.compile(p), h) for m, p, h in ROUTES]
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    # --- Plumbing ---
+
+    def _send(self, status, payload=None):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _error(self, status, message, code=None):
+        self._send(status, {'code': code or status * 100000, 'message': message})
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        self.query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        server = self.server
+
+        if server.config['latency_ms'] or server.config['latency_jitter_ms']:
+            delay = server.config['latency_ms'] + server.random.uniform(0, server.config['latency_jitter_ms'])
+            time.sleep(delay / 1000.0)
+
+        is_control = path.startswith('/sim/')
+        if not is_control:
+            if server.config['require_auth'] and not self.headers.get('APCA-API-KEY-ID'):
+                return self._error(401, 'unauthorized.', 40110000)
+            if not server.limiter.allow():
+                return self._error(429, 'rate limit exceeded', 42910000)
+            fault = server.faults.check(method, path)
+            if fault:
+                return self._error(fault, 'injected fault')
+
+        for route_method, regex, handler in self.COMPILED:
+            match = regex.match(path)
+            if route_method == method and match:
+                try:
+                    return getattr(self, handler)(**match.groupdict())
+                except SimError as e:
+                    return self._error(e.status, e.message, e.code)
+                except (ValueError, KeyError, TypeError) as e:
+                    return self._error(422, str(e), 40010000)
+        return self._error(404, 'endpoint not found', 40410000)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    # --- Trading API ---
+
+    def h_account(self):
+        self._send(200, self.server.broker.account())
+
+    def h_positions(self):
+        self._send(200, self.server.broker.list_positions())
+
+    def h_position(self, symbol):
+        self._send(200, self.server.broker.get_position(symbol.upper()))
+
+    def h_close_position(self, symbol):
+        self._send(200, self.server.broker.close_position(symbol.upper()))
+
+    def h_orders(self):
+        symbols = self.query.get('symbols')
+        self._send(200, self.server.broker.list_orders(
+            status=self.query.get('status', 'open'),
+            limit=int(self.query.get('limit', 50)),
+            symbols={s.strip().upper() for s in symbols.split(',')} if symbols else None,
+            nested=self.query.get('nested') == 'true',
+        ))
+
+    def h_order(self, order_id):
+        self._send(200, self.server.broker.get_order(order_id=order_id))
+
+    def h_order_by_client_id(self):
+        self._send(200, self.server.broker.get_order(client_order_id=self.query.get('client_order_id')))
+
+    def h_submit_order(self):
+        self._send(200, self.server.broker.submit_order(self._body()))
+
+    def h_cancel_all(self):
+        self._send(207, self.server.broker.cancel_all())
+
+    def h_cancel_order(self, order_id):
+        self.server.broker.cancel_order(order_id)
+        self._send(204)
+
+    # --- Market data API ---
+
+    def _bars_payload(self, symbol):
+        market = self.server.broker.market
+        bars = market.bars_between(symbol, self.query.get('start'), self.query.get('end'))
+        limit = int(self.query.get('limit', 1000))
+        offset = int(self.query.get('page_token') or 0)
+        page = bars[offset:offset + limit]
+        next_token = str(offset + limit) if offset + limit < len(bars) else None
+        return [{'t': format_time(b['t']), 'o': b['o'], 'h': b['h'], 'l': b['l'],
+                 'c': b['c'], 'v': b['v']} for b in page], next_token
+
+    def h_bars(self, symbol):
+        bars, next_token = self._bars_payload(symbol.upper())
+        self._send(200, {'bars': bars, 'symbol': symbol.upper(), 'next_page_token': next_token})
+
+    def h_bars_multi(self):
+        symbols = [s.strip().upper() for s in self.query.get('symbols', '').split(',') if s.strip()]
+        out, next_token = {}, None
+        for symbol in symbols:
+            bars, token = self._bars_payload(symbol)
+            if bars:
+                out[symbol] = bars
+            next_token = next_token or token
+        self._send(200, {'bars': out, 'next_page_token': next_token})
+
+    def h_latest_trade(self, symbol):
+        market = self.server.broker.market
+        bar = market.last_bar(symbol.upper())
+        if bar is None:
+            raise SimError(404, f"no trades for {symbol}", 40410000)
+        self._send(200, {'symbol': symbol.upper(), 'trade': {
+            't': format_time(bar['t']), 'x': 'V', 'p': bar['c'], 's': 100, 'c': ['@'], 'i': 0, 'z': 'C',
+        }})
+
+    # --- Simulator control ---
+
+    def h_sim_state(self):
+        self._send(200, self.server.broker.state())
+
+    def h_sim_advance(self):
+        body = self._body()
+        clock = self.server.broker.advance(bars=int(body.get('bars', 1)), until=body.get('until'))
+        self._send(200, {'clock': format_time(clock)})
+
+    def h_sim_faults(self):
+        body = self._body()
+        if 'error_rate' in body:
+            self.server.faults.error_rate = float(body['error_rate'])
+        if 'pattern' in body:
+            self.server.faults.inject(body['pattern'], int(body.get('status', 500)),
+                                      int(body.get('count', 1)), body.get('method'))
+        self._send(200, {'error_rate': self.server.faults.error_rate})
+
+
+class SimServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, broker, verbose=False):
+        super().__init__(address, SimHandler)
+        self.broker = broker
+        self.config = broker.config
+        self.verbose = verbose
+        self.random = random.Random(self.config['seed'])
+        self.limiter = RateLimiter(self.config['rate_limit_per_min'])
+        self.faults = FaultInjector(self.config['error_rate'], self.config['seed'])
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_simulator(bars_by_symbol, config=None, host='127.0.0.1', port=0, start=None, verbose=False):
+    """Start a simulator on a background thread; returns the server (server.url, server.broker)"""
+    broker = SimBroker(MarketReplay(bars_by_symbol, start=start), config)
+    server = SimServer((host, port), broker, verbose)
+    thread = threading.Thread(target=server.serve_forever, name='alpaca-sim', daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Run a local Alpaca API simulator',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  %(prog)s --bars NVDA=data/historical_NVDA_2023-2025.csv AAPL=data/historical_AAPL_2023-2025.csv
+  %(prog)s --bars NVDA=nvda.csv --latency-ms 80 --rate-limit 200 --error-rate 0.02
+        '''
+    )
+    parser.add_argument('--bars', nargs='+', required=True, help='SYMBOL=path.csv entries')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--start', help='Initial replay clock (ISO, default: first bar)')
+    parser.add_argument('--cash', type=float, default=SIM_CONFIG['initial_cash'])
+    parser.add_argument('--fill-mode', choices=['close', 'next_open'], default=SIM_CONFIG['fill_mode'])
+    parser.add_argument('--slippage-bps', type=float, default=0.0)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=SIM_CONFIG['rate_limit_per_min'],
+                        help='Requests per minute, 0 to disable (default: 200)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    bars = {}
+    for entry in args.bars:
+        symbol, path = entry.split('=', 1)
+        bars[symbol.upper()] = load_bars_csv(path)
+
+    config = {
+        'initial_cash': args.cash,
+        'fill_mode': args.fill_mode,
+        'slippage_bps': args.slippage_bps,
+        'latency_ms': args.latency_ms,
+        'latency_jitter_ms': args.jitter_ms,
+        'rate_limit_per_min': args.rate_limit,
+        'error_rate': args.error_rate,
+    }
+    broker = SimBroker(MarketReplay(bars, start=args.start), config)
+    server = SimServer((args.host, args.port), broker, args.verbose)
+    print(f"🧪 Alpaca simulator on {server.url} ({len(bars)} symbols, clock {format_time(broker.market.clock)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopped")
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Compact binary archive for cold OHLCV history
+
+One file per (symbol, timeframe) under data/archive/<timeframe>/<SYMBOL>.tbar:
+
+  header   64 bytes  magic 'TBAR', version, row count, first timestamp (epoch
+                     ns), timestamp unit (ns), symbol, timeframe
+  dt       int32[n]  timestamp deltas in units (dt[0] = 0)
+  open     float32[n]
+  high     float32[n]
+  low      float32[n]
+  close    float32[n]
+  vwap     float32[n]  (NaN when unknown)
+  volume   int64[n]
+
+Columns are fixed-width and 8-byte aligned, so open_archive() maps them
+straight from the page cache with np.memmap: nothing is parsed or copied
+until a backtest touches the values, and only the timestamps are rebuilt
+(one cumsum). 1-minute bars cost 32 bytes per row, about 16 MB per symbol
+for five years of regular sessions.
+
+float32 keeps ~7 significant digits (a $1,234.5678 price reads back as
+1234.568), which is fine for cold history; the bars table keeps DECIMALs.
+
+Usage:
+  python -m tradingbot.archive export --symbols NVDA AAPL --timeframe 1m --before 2025-01-01
+  python -m tradingbot.archive export --all --before 2025-01-01 --delete
+  python -m tradingbot.archive info data/archive/1m/NVDA.tbar
+"""
+
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+from tradingbot.config import ROOT_DIR
+
+ARCHIVE_DIR = ROOT_DIR / 'data' / 'archive'
+
+MAGIC = b'TBAR'
+VERSION = 1
+HEADER = struct.Struct('<4sHHqqq16s8s')  # magic, version, reserved, n, t0, unit, symbol, timeframe
+HEADER_SIZE = 64
+DEFAULT_UNIT = 10**9  # second resolution: int32 deltas cover gaps of ~68 years
+
+COLUMNS = (
+    ('dt', np.int32),
+    ('open', np.float32),
+    ('high', np.float32),
+    ('low', np.float32),
+    ('close', np.float32),
+    ('vwap', np.float32),
+    ('volume', np.int64),
+)
+
+
+def archive_path(symbol, timeframe, directory=ARCHIVE_DIR):
+    return directory / timeframe / f"{symbol.upper()}.tbar"
+
+
+def _layout(n):
+    """Byte offset of each column for n rows"""
+    offsets, pos = {}, HEADER_SIZE
+    for name, dtype in COLUMNS:
+        offsets[name] = pos
+        pos += -(-n * np.dtype(dtype).itemsize // 8) * 8
+    return offsets, pos
+
+
+def write_archive(path, symbol, timeframe, bars, unit=DEFAULT_UNIT):
+    """
+    Write sorted bars (dict of arrays: ts in epoch ns, open, high, low,
+    close, volume, optional vwap) to path, atomically
+    """
+    ts = np.asarray(bars['ts'], dtype=np.int64)
+    n = len(ts)
+    if n == 0:
+        raise ValueError(f"No bars to archive for {symbol} {timeframe}")
+    if np.any(ts % unit):
+        raise ValueError(f"Timestamps are not whole multiples of {unit} ns")
+    deltas = np.diff(ts) // unit
+    if n > 1 and (deltas.min() <= 0 or deltas.max() > np.iinfo(np.int32).max):
+        raise ValueError("Timestamps must be strictly increasing with gaps that fit in int32")
+
+    columns = {
+        'dt': np.concatenate(([0], deltas)),
+        'open': bars['open'],
+        'high': bars['high'],
+        'low': bars['low'],
+        'close': bars['close'],
+        'vwap': bars.get('vwap', np.full(n, np.nan)),
+        'volume': np.nan_to_num(np.asarray(bars['volume'], dtype=float)),
+    }
+    offsets, size = _layout(n)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        f.truncate(size)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, n, int(ts[0]), unit,
+                            symbol.upper().encode(), timeframe.encode()))
+        for name, dtype in COLUMNS:
+            f.seek(offsets[name])
+            f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+    tmp.replace(path)
+    return size
+
+
+class Archive:
+    """Memory-mapped view of one .tbar file (columns are read-only arrays)"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise ValueError(f"{path}: truncated header")
+        magic, version, _, n, t0, unit, symbol, timeframe = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a bar archive")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported archive version {version}")
+        self.n = n
+        self.t0 = t0
+        self.unit = unit
+        self.symbol = symbol.rstrip(b'\0').decode()
+        self.timeframe = timeframe.rstrip(b'\0').decode()
+
+        offsets, size = _layout(n)
+        self._mm = np.memmap(path, dtype=np.uint8, mode='r', shape=(size,))
+        self.columns = {
+            name: self._mm[offsets[name]:offsets[name] + n * np.dtype(dtype).itemsize].view(dtype)
+            for name, dtype in COLUMNS
+        }
+        self._ts = None
+
+    @property
+    def ts(self):
+        """Epoch-ns timestamps (rebuilt from the deltas once, then kept)"""
+        if self._ts is None:
+            ts = np.cumsum(self.columns['dt'], dtype=np.int64)
+            ts *= self.unit
+            ts += self.t0
+            ts.setflags(write=False)
+            self._ts = ts
+        return self._ts
+
+    def __len__(self):
+        return self.n
+
+    def window(self, start_ns=None, end_ns=None):
+        """
+        Bars with start_ns <= ts <= end_ns as a dict of arrays
+
+        Price and volume columns are views into the mapping (no copy).
+        """
+        ts = self.ts
+        i0 = int(np.searchsorted(ts, start_ns, 'left')) if start_ns is not None else 0
+        i1 = int(np.searchsorted(ts, end_ns, 'right')) if end_ns is not None else self.n
+        bars = {'ts': ts[i0:i1]}
+        for name, _ in COLUMNS[1:]:
+            bars[name] = self.columns[name][i0:i1]
+        return bars
+
+    def first_last(self):
+        if self.n == 0:
+            return None, None
+        return int(self.ts[0]), int(self.ts[-1])
+
+
+def open_archive(symbol, timeframe, directory=ARCHIVE_DIR):
+    """Archive for (symbol, timeframe), or None when nothing is archived"""
+    path = archive_path(symbol, timeframe, directory)
+    return Archive(path) if path.exists() else None
+
+
+def merge_bars(old, new):
+    """Union of two bar dicts by timestamp; rows in `new` win on duplicates"""
+    ts = np.concatenate([old['ts'], new['ts']])
+    order = np.argsort(ts, kind='stable')
+    ts = ts[order]
+    # Keep the last occurrence of each timestamp (new rows come second)
+    keep = np.ones(len(ts), dtype=bool)
+    keep[:-1] = ts[1:] != ts[:-1]
+    idx = order[keep]
+    merged = {'ts': ts[keep]}
+    for name in ('open', 'high', 'low', 'close', 'vwap', 'volume'):
+        merged[name] = np.concatenate([
+            np.asarray(old.get(name, np.full(len(old['ts']), np.nan)), dtype=float),
+            np.asarray(new.get(name, np.full(len(new['ts']), np.nan)), dtype=float),
+        ])[idx]
+    return merged
+
+
+def export_symbol(conn, symbol, timeframe, before, directory=ARCHIVE_DIR, delete=False):
+    """
+    Move bars older than `before` from the bars table into the archive
+
+    Existing archive rows are kept (merged). With delete=True the exported
+    rows are removed from the table in the same transaction, after the file
+    has been written. Returns the number of rows exported.
+    """
+    from tradingbot.bars import fetch_bars
+
+    new = fetch_bars(conn, symbol, timeframe, end=before, end_inclusive=False)
+    exported = len(new['ts'])
+    if exported == 0:
+        return 0
+
+    path = archive_path(symbol, timeframe, directory)
+    if path.exists():
+        old = Archive(path).window()
+        new = merge_bars({k: np.array(v) for k, v in old.items()}, new)
+    write_archive(path, symbol, timeframe, new)
+
+    if delete:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM bars WHERE symbol = %s AND timeframe = %s AND ts < %s",
+                (symbol.upper(), timeframe, before),
+            )
+        conn.commit()
+    return exported
+
+
+def print_info(path):
+    archive = Archive(path)
+    first, last = archive.first_last()
+    fmt = lambda t: datetime.fromtimestamp(t / 1e9, timezone.utc).isoformat() if t is not None else '-'
+    print(f"📦 {path}")
+    print(f"   {archive.symbol} {archive.timeframe}: {archive.n:,} bars, {path.stat().st_size / 1e6:.1f} MB")
+    print(f"   {fmt(first)} → {fmt(last)}")
+
+
+if __name__ == '__main__':
+    import argparse
+    from pathlib import Path
+
+    from tradingbot.config import get_db_conn
+
+    parser = argparse.ArgumentParser(description='Binary archive for cold OHLCV history')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export_p = sub.add_parser('export', help='Move old rows from the bars table into archive files')
+    export_p.add_argument('--symbols', nargs='+', help='Symbols to export')
+    export_p.add_argument('--all', action='store_true', help='Every symbol present in the bars table')
+    export_p.add_argument('--timeframe', default='1m', help='Bar timeframe (default: 1m)')
+    export_p.add_argument('--before', required=True, help='Export bars before this date (YYYY-MM-DD)')
+    export_p.add_argument('--delete', action='store_true', help='Delete exported rows from the table')
+    export_p.add_argument('--dir', type=Path, default=ARCHIVE_DIR, help=f'Archive directory (default: {ARCHIVE_DIR})')
+
+    info_p = sub.add_parser('info', help='Describe archive files')
+    info_p.add_argument('paths', nargs='+', type=Path)
+
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        for p in args.paths:
+            print_info(p)
+    else:
+        if not args.symbols and not args.all:
+            parser.error('export needs --symbols or --all')
+        before = datetime.fromisoformat(args.before)
+        if before.tzinfo is None:
+            before = before.replace(tzinfo=timezone.utc)
+        conn = get_db_conn()
+        try:
+            symbols = args.symbols
+            if args.all:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT DISTINCT symbol FROM bars WHERE timeframe = %s ORDER BY symbol",
+                                (args.timeframe,))
+                    symbols = [r[0] for r in cur.fetchall()]
+            for sym in symbols:
+                count = export_symbol(conn, sym, args.timeframe, before, args.dir, args.delete)
+                if count:
+                    print(f"✅ {sym}: {count:,} bars in {archive_path(sym, args.timeframe, args.dir)}")
+                else:
+                    print(f"⏭️  {sym}: nothing before {args.before}")
+        finally:
+            conn.close()
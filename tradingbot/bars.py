@@ -0,0 +1,128 @@
+"""
+OHLCV bars at native resolution
+
+save_bars() bulk-upserts fetched bars into the bars table (migration 006).
+load_ohlcv() returns one contiguous series per symbol/timeframe: the cold
+part comes from the memory-mapped archive (tradingbot.archive), the rest
+from the table, so callers never care where the split currently is.
+
+Bars are passed around as dicts of aligned arrays: ts (epoch ns), open,
+high, low, close, volume, vwap.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from tradingbot.archive import ARCHIVE_DIR, open_archive
+from tradingbot.timeindex import to_epoch_ns
+
+BAR_FIELDS = ('ts', 'open', 'high', 'low', 'close', 'volume', 'vwap')
+
+
+def _num(value):
+    return np.nan if value is None else float(value)
+
+
+def empty_bars():
+    return {f: np.empty(0, dtype=np.int64 if f == 'ts' else float) for f in BAR_FIELDS}
+
+
+def save_bars(conn, symbol, timeframe, bars, source=None, page_size=1000):
+    """
+    Upsert bars (Alpaca-style dicts with t/o/h/l/c/v[/vw]) in one statement
+
+    Returns the number of rows sent; commit is left to the caller.
+    """
+    from psycopg2.extras import execute_values
+
+    if not bars:
+        return 0
+    rows = [
+        (symbol.upper(), timeframe, b['t'], b['o'], b['h'], b['l'], b['c'],
+         b.get('v'), b.get('vw'), source)
+        for b in bars
+    ]
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            """
+            INSERT INTO bars (symbol, timeframe, ts, open, high, low, close, volume, vwap, source)
+            VALUES %s
+            ON CONFLICT (symbol, timeframe, ts) DO UPDATE SET
+                open = EXCLUDED.open,
+                high = EXCLUDED.high,
+                low = EXCLUDED.low,
+                close = EXCLUDED.close,
+                volume = EXCLUDED.volume,
+                vwap = COALESCE(EXCLUDED.vwap, bars.vwap),
+                source = EXCLUDED.source
+            """,
+            rows,
+            page_size=page_size,
+        )
+    return len(rows)
+
+
+def fetch_bars(conn, symbol, timeframe, start=None, end=None, end_inclusive=True):
+    """Bars from the table only, as a dict of arrays sorted by ts"""
+    sql, params = "", [symbol.upper(), timeframe]
+    if start is not None:
+        sql += " AND ts >= %s"
+        params.append(start)
+    if end is not None:
+        sql += " AND ts <= %s" if end_inclusive else " AND ts < %s"
+        params.append(end)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT ts, open, high, low, close, volume, vwap
+            FROM bars
+            WHERE symbol = %s AND timeframe = %s{sql}
+            ORDER BY ts
+            """,
+            params,
+        )
+        rows = cur.fetchall()
+
+    if not rows:
+        return empty_bars()
+    bars = {'ts': to_epoch_ns([r[0] for r in rows])}
+    for i, name in enumerate(BAR_FIELDS[1:], start=1):
+        bars[name] = np.array([_num(r[i]) for r in rows], dtype=float)
+    return bars
+
+
+def _ns(dt):
+    return None if dt is None else round(dt.timestamp() * 1e6) * 1000
+
+
+def load_ohlcv(conn, symbol, timeframe, start=None, end=None, archive_dir=ARCHIVE_DIR):
+    """
+    Bars for [start, end] from the archive and the table combined
+
+    Archived rows are used up to the archive's last timestamp and the table
+    supplies everything after it. When only the archive is needed the
+    returned price columns are zero-copy views into the mapped file.
+    """
+    archive = open_archive(symbol, timeframe, archive_dir) if archive_dir is not None else None
+    if archive is None or archive.n == 0:
+        return fetch_bars(conn, symbol, timeframe, start, end)
+
+    _, last_ns = archive.first_last()
+    cold = archive.window(_ns(start), _ns(end))
+    if end is not None and _ns(end) <= last_ns:
+        return cold
+
+    hot_start = datetime.fromtimestamp(last_ns / 1e9, timezone.utc)
+    if start is not None and start > hot_start:
+        hot_start = start
+    hot = fetch_bars(conn, symbol, timeframe, hot_start, end)
+    hot_keep = hot['ts'] > last_ns
+    if not hot_keep.any():
+        return cold
+    return {
+        name: np.concatenate([np.asarray(cold[name], dtype=hot[name].dtype), hot[name][hot_keep]])
+        for name in BAR_FIELDS
+    }
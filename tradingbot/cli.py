@@ -0,0 +1,235 @@
+"""
+Single entry point for the TradingBot tools
+
+    python -m tradingbot [--env-file .env] [--db NAME] [--schema NAME] <command> [args...]
+
+Commands:
+  fetch      Daily bars from Alpaca into data/*.csv    (scripts/fetch_historical_data.py)
+  load       Yahoo bars into ema_snapshots + bars      (scripts/load_historical_data.py)
+  recalc     Recalculate stored EMAs                   (scripts/recalculate_ema_historical.py)
+  backtest   ema | golden-cross | weekly-ema | sentiment-v1 | sentiment-v2 [script args]
+  sweep      Grid of V2 executor backtests -> reports/sweep_<ts>/ + index
+  report     Rebuild the index of a report directory   (tradingbot.reports)
+  status     Latest portfolio snapshot from the DB     (no Alpaca calls)
+
+Everything after the command goes to that command (`<command> --help`
+prints its own options). This module only imports the standard library:
+numpy, pandas, psycopg2 and friends are imported by the command that runs,
+so --help and status start fast. Scripts run as __main__ exactly as if
+started directly.
+
+Shared setup happens before any command module is imported: the env file
+(default: .env in the repo root, if present) is loaded without overriding
+variables already set, --db sets POSTGRES_DB and --schema puts a schema
+first on the search_path (PGOPTIONS), so tradingbot.config.DB_CONFIG and
+the scripts' own connections all point at the same database.
+"""
+
+import argparse
+import math
+import os
+import runpy
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT_DIR / 'scripts'
+PROG = 'python -m tradingbot'
+
+BACKTESTS = {
+    'ema': 'backtest_ema_strategy.py',
+    'golden-cross': 'backtest_golden_cross.py',
+    'weekly-ema': 'backtest_weekly_ema.py',
+    'sentiment-v1': 'backtest_sentiment_v1.py',
+    'sentiment-v2': 'backtest_sentiment_v2.py',
+}
+
+
+def setup(args):
+    env_file = args.env_file or (ROOT_DIR / '.env' if (ROOT_DIR / '.env').exists() else None)
+    if env_file:
+        from dotenv import load_dotenv
+        load_dotenv(env_file, override=False)
+    if args.db:
+        os.environ['POSTGRES_DB'] = args.db
+    if args.schema:
+        os.environ['PGOPTIONS'] = f"{os.environ.get('PGOPTIONS', '')} -c search_path={args.schema},public".strip()
+
+
+def run_script(name, argv):
+    """Run scripts/<name> as __main__; its own argparse sees argv"""
+    sys.argv = [str(SCRIPTS_DIR / name), *argv]
+    runpy.run_path(str(SCRIPTS_DIR / name), run_name='__main__')
+
+
+def run_module(module, argv, prog):
+    sys.argv = [prog, *argv]
+    runpy.run_module(module, run_name='__main__')
+
+
+def import_script(name):
+    """Import scripts/<name>.py as a module (scripts/ is not a package)"""
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    return __import__(name)
+
+
+# ============================================================
+# Commands
+# ============================================================
+
+def cmd_fetch(argv):
+    run_script('fetch_historical_data.py', argv)
+
+
+def cmd_load(argv):
+    run_script('load_historical_data.py', argv)
+
+
+def cmd_recalc(argv):
+    run_script('recalculate_ema_historical.py', argv)
+
+
+def cmd_backtest(argv):
+    if not argv or argv[0] not in BACKTESTS:
+        print(f"usage: {PROG} backtest {{{','.join(BACKTESTS)}}} [args...]\n"
+              f"       {PROG} backtest <strategy> --help", file=sys.stderr)
+        return 0 if argv and argv[0] in ('-h', '--help') else 2
+    run_script(BACKTESTS[argv[0]], argv[1:])
+
+
+def cmd_report(argv):
+    run_module('tradingbot.reports', argv, f'{PROG} report')
+
+
+def cmd_status(argv):
+    parser = argparse.ArgumentParser(prog=f'{PROG} status',
+                                     description='Latest stored portfolio snapshot (see tradingbot.snapshots)')
+    parser.add_argument('--as-of', help='Time travel: HH:MM (today, market tz) or ISO datetime')
+    parser.add_argument('--orders', type=int, default=10, help='Recent orders to show (default: 10)')
+    parser.add_argument('--json', action='store_true', help='Print JSON')
+    args = parser.parse_args(argv)
+
+    import psycopg2
+
+    from tradingbot.config import get_db_conn
+    from tradingbot.snapshots import latest_snapshot, parse_as_of, print_snapshot
+
+    try:
+        conn = get_db_conn()
+    except psycopg2.OperationalError as e:
+        print(f"❌ Database unavailable: {str(e).strip()}")
+        return 1
+    try:
+        snapshot = latest_snapshot(conn, parse_as_of(args.as_of), args.orders)
+    finally:
+        conn.close()
+    if snapshot is None:
+        print("📭 No snapshots stored yet (run: python -m tradingbot.snapshots run)")
+    elif args.json:
+        import json
+        print(json.dumps(snapshot, indent=2))
+    else:
+        print_snapshot(snapshot)
+
+
+def _numbers(kind):
+    def parse(text):
+        return [kind(v) for v in text.split(',') if v.strip()]
+    return parse
+
+
+def _sharpe(run):
+    """Sort key: NaN Sharpe ranks last"""
+    value = run['metrics']['sharpe']
+    return -math.inf if math.isnan(value) else value
+
+
+def cmd_sweep(argv):
+    from datetime import date
+
+    parser = argparse.ArgumentParser(
+        prog=f'{PROG} sweep',
+        description='Grid of V2 executor backtests on one loaded market, rendered in parallel '
+                    'into one report directory with an index ranked by Sharpe',
+        epilog=f'Example: {PROG} sweep --stop-loss 1,2,3 --take-profit 2,4,6 --top-n 3,4',
+    )
+    parser.add_argument('--source', choices=['csv', 'db'], default='csv', help='Input data (default: csv)')
+    parser.add_argument('--symbols', nargs='+', help='Symbols (default: tracked symbols / CSV set)')
+    parser.add_argument('--start', type=date.fromisoformat, help='First trading day (default: after warmup)')
+    parser.add_argument('--end', type=date.fromisoformat, help='Last trading day')
+    parser.add_argument('--stop-loss', type=_numbers(float), default=[2.0], help='Percents, comma-separated (default: 2)')
+    parser.add_argument('--take-profit', type=_numbers(float), default=[4.0], help='Percents (default: 4)')
+    parser.add_argument('--top-n', type=_numbers(int), default=[4], help='Symbols held (default: 4)')
+    parser.add_argument('--lookback', type=_numbers(int), default=[2], help='Sentiment days (default: 2)')
+    parser.add_argument('--tif', choices=['day', 'gtc'], default='day', help='Bracket legs (default: day)')
+    parser.add_argument('--workers', type=int, help='Report render processes (default: CPU count)')
+    parser.add_argument('--out', type=Path, help='Report directory (default: reports/sweep_<timestamp>)')
+    parser.add_argument('--no-charts', action='store_true', help='Skip equity charts')
+    args = parser.parse_args(argv)
+
+    import itertools
+
+    from tradingbot.reports import render_reports
+
+    v2 = import_script('backtest_sentiment_v2')
+    if args.source == 'csv':
+        market = v2.load_csv_market(args.symbols or sorted(v2.SECTORS))
+    else:
+        from tradingbot.config import get_db_conn
+        conn = get_db_conn()
+        try:
+            market = v2.load_db_market(conn, args.start or date(2023, 1, 1), args.end or date.today(), args.symbols)
+        finally:
+            conn.close()
+
+    grid = list(itertools.product(args.stop_loss, args.take_profit, args.top_n, args.lookback))
+    print(f"🧮 {len(grid)} runs on {len(market['symbols'])} symbols x {len(market['dates'])} days")
+    results = []
+    for stop_loss, take_profit, top_n, lookback in grid:
+        config = dict(v2.CONFIG, stop_loss_percent=stop_loss / 100, take_profit_percent=take_profit / 100,
+                      top_n=top_n, sentiment_lookback_days=lookback, bracket_tif=args.tif)
+        run = v2.run_backtest(market, config, args.start, args.end)
+        if not len(run['equity']):
+            print("❌ No trading days in range")
+            return 1
+        result = v2.build_result(run, config)
+        result['title'] = f"SL {stop_loss:g}% / TP {take_profit:g}% / top {top_n} / {lookback}d sentiment"
+        results.append(result)
+
+    directory, runs = render_reports(results, args.out, args.workers, plot=not args.no_charts)
+    for r in sorted(runs, key=_sharpe, reverse=True)[:5]:
+        m = r['metrics']
+        print(f"   {r['title']:<48} Sharpe {m['sharpe']:5.2f}  return {m['total_return'] * 100:6.1f}%  "
+              f"max DD {m['max_drawdown'] * 100:5.1f}%")
+    print(f"📄 Index: {directory / 'index.md'} (+ index.html)")
+
+
+COMMANDS = {
+    'fetch': cmd_fetch,
+    'load': cmd_load,
+    'recalc': cmd_recalc,
+    'backtest': cmd_backtest,
+    'sweep': cmd_sweep,
+    'report': cmd_report,
+    'status': cmd_status,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog=PROG, description=__doc__.split('\n\n')[0].strip(),
+                                     epilog=__doc__[__doc__.index('Commands:'):__doc__.index('Everything')],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--env-file', type=Path, help='Environment file (default: .env in the repo root)')
+    parser.add_argument('--db', help='Database name (overrides POSTGRES_DB)')
+    parser.add_argument('--schema', help='Schema to put first on the search_path, e.g. a scratch schema')
+    parser.add_argument('command', choices=list(COMMANDS), metavar='command', help='One of the commands below')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    setup(args)
+    return COMMANDS[args.command](args.args)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,440 @@
+"""
+Incremental news and social collectors
+
+Replaces the fixed-window fetches of the news-collector / social-collector
+workflows. Each (source, symbol) feed keeps a high-water mark in
+collector_cursors (migration 007): the newest publish time already stored,
+plus the ids published at exactly that time. A cycle pages every feed
+newest-first only back to its mark, so a burst of any size is picked up and
+nothing already stored is fetched twice. All feeds run concurrently; each
+source has its own token-bucket limit, so adding symbols costs requests,
+not serial latency. New rows go in with one bulk INSERT and cursors with
+one upsert, in a single transaction.
+
+Article ids and field mapping match the workflows, so rows stay
+deduplicated against what n8n already stored.
+
+Usage:
+  python -m tradingbot.collectors                      # all sources, active symbols
+  python -m tradingbot.collectors --sources eodhd --symbols NVDA AAPL --dry-run
+  python -m tradingbot.collectors --interval 900       # loop every 15 minutes
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tradingbot.alpaca_client import RateLimiter, request_with_retry
+from tradingbot.config import NEWS_CONFIG
+
+COLLECTOR_CONFIG = {
+    'lookback_days': 3,      # First run of a feed (no cursor yet)
+    'max_pages': 20,         # Safety stop per feed and cycle
+    'workers': 16,
+    'timeout': 30.0,
+    'max_retries': 3,
+    'backoff': 0.5,
+}
+
+ARTICLE_FIELDS = ('article_id', 'symbol', 'title', 'content', 'url', 'published_at', 'source')
+
+
+class CollectorError(Exception):
+    """Non-2xx response from a news source"""
+
+    def __init__(self, status_code, body, url=None):
+        super().__init__(f"{status_code} {url or ''}: {body[:200]}")
+        self.status_code = status_code
+        self.body = body
+        self.url = url
+
+
+def parse_time(value):
+    """ISO string or epoch seconds -> aware UTC datetime (None if missing)"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class Cursor:
+    """High-water mark of one feed: newest publish time and the ids at that time"""
+
+    def __init__(self, published_at=None, ids=()):
+        self.published_at = published_at
+        self.ids = set(ids)
+
+    def is_new(self, row):
+        if self.published_at is None:
+            return True
+        return row['published_at'] > self.published_at or \
+            (row['published_at'] == self.published_at and row['article_id'] not in self.ids)
+
+    def advanced(self, rows):
+        """Cursor after storing rows (unchanged when rows is empty)"""
+        if not rows:
+            return self
+        newest = max(r['published_at'] for r in rows)
+        if self.published_at is not None and newest < self.published_at:
+            return self
+        ids = {r['article_id'] for r in rows if r['published_at'] == newest}
+        if newest == self.published_at:
+            ids |= self.ids
+        return Cursor(newest, ids)
+
+
+class Source:
+    """
+    One upstream API: its own session, rate limit and retry policy
+
+    Subclasses implement fetch(symbol, cursor) -> new rows, newest first,
+    calling self.get() for every HTTP request.
+    """
+
+    name = None
+    rate_limit_per_min = 60
+
+    def __init__(self, base_url, rate_limit_per_min=None, config=None):
+        self.base_url = base_url.rstrip('/')
+        self.config = dict(COLLECTOR_CONFIG, **(config or {}))
+        self.limiter = RateLimiter(rate_limit_per_min or self.rate_limit_per_min, burst=10)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.config['workers'])
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def get(self, path, params):
+        url = f"{self.base_url}{path}"
+        response = request_with_retry(self.session, 'GET', url, self.limiter, self.config['max_retries'],
+                                      self.config['backoff'], self._count_request, params=params,
+                                      timeout=self.config['timeout'])
+        if response.status_code >= 400:
+            raise CollectorError(response.status_code, response.text, url)
+        return response.json() if response.content else None
+
+    def _count_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def first_cutoff(self):
+        return Cursor(datetime.now(timezone.utc) - timedelta(days=self.config['lookback_days']))
+
+    def fetch(self, symbol, cursor):
+        raise NotImplementedError
+
+
+def _safe_id(text, length):
+    return re.sub(r'[^a-zA-Z0-9]', '_', text[:length])
+
+
+class EODHDSource(Source):
+    """EODHD /api/news: offset pagination, newest first"""
+
+    name = 'eodhd'
+    rate_limit_per_min = 120
+    page_size = 50
+
+    def __init__(self, base_url=None, api_key=None, **kwargs):
+        super().__init__(base_url or NEWS_CONFIG['eodhd_url'], **kwargs)
+        self.api_key = api_key or NEWS_CONFIG['eodhd_api_key'] or ''
+
+    @staticmethod
+    def to_row(symbol, article):
+        link = article.get('link') or ''
+        title = article.get('title') or ''
+        article_id = link.split('/')[-1] if link else f"{article.get('date')}_{_safe_id(title, 50)}"
+        return {
+            'article_id': article_id,
+            'symbol': symbol,
+            'title': title,
+            'content': article.get('content') or article.get('description') or '',
+            'url': link,
+            'published_at': parse_time(article.get('date')) or datetime.now(timezone.utc),
+            'source': article.get('source') or 'EODHD',
+        }
+
+    def fetch(self, symbol, cursor):
+        params = {'s': f'{symbol}.US', 'limit': self.page_size, 'fmt': 'json', 'api_token': self.api_key,
+                  'from': cursor.published_at.strftime('%Y-%m-%d')}
+        rows = []
+        for page in range(self.config['max_pages']):
+            params['offset'] = page * self.page_size
+            articles = self.get('/api/news', params) or []
+            batch = [self.to_row(symbol, a) for a in articles]
+            new = [r for r in batch if cursor.is_new(r)]
+            rows.extend(new)
+            if len(articles) < self.page_size or len(new) < len(batch):
+                break
+        return rows
+
+
+class FinnhubSource(Source):
+    """Finnhub /api/v1/company-news: one call per date range"""
+
+    name = 'finnhub'
+    rate_limit_per_min = 60  # Free tier
+
+    def __init__(self, base_url=None, api_key=None, **kwargs):
+        super().__init__(base_url or NEWS_CONFIG['finnhub_url'], **kwargs)
+        self.api_key = api_key or NEWS_CONFIG['finnhub_api_key'] or ''
+
+    @staticmethod
+    def to_row(symbol, article):
+        safe = _safe_id(article.get('url') or article.get('headline') or '', 200)
+        return {
+            'article_id': f"finnhub_{article.get('datetime') or 'na'}_{safe}",
+            'symbol': symbol,
+            'title': article.get('headline') or '',
+            'content': article.get('summary') or '',
+            'url': article.get('url') or '',
+            'published_at': parse_time(article.get('datetime') or None) or datetime.now(timezone.utc),
+            'source': article.get('source') or 'Finnhub',
+        }
+
+    def fetch(self, symbol, cursor):
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        articles = self.get('/api/v1/company-news', {
+            'symbol': symbol, 'from': cursor.published_at.strftime('%Y-%m-%d'), 'to': today,
+            'token': self.api_key,
+        }) or []
+        rows = [self.to_row(symbol, a) for a in articles if isinstance(a, dict)]
+        return sorted((r for r in rows if cursor.is_new(r)), key=lambda r: r['published_at'], reverse=True)
+
+
+class RedditSource(Source):
+    """Reddit search (sort=new): `after` token pagination"""
+
+    name = 'reddit'
+    rate_limit_per_min = 30  # Unauthenticated
+    page_size = 100
+
+    def __init__(self, base_url=None, user_agent=None, **kwargs):
+        super().__init__(base_url or NEWS_CONFIG['reddit_url'], **kwargs)
+        self.session.headers['User-Agent'] = user_agent or NEWS_CONFIG['reddit_user_agent']
+
+    @staticmethod
+    def to_row(symbol, post):
+        d = post.get('data') or {}
+        title = d.get('title') or ''
+        permalink = d.get('permalink')
+        return {
+            'article_id': f"reddit_{d.get('id')}",
+            'symbol': symbol,
+            'title': title[:120],
+            'content': f"{title}\n{d.get('selftext') or ''}"[:2000],
+            'url': f"https://www.reddit.com{permalink}" if permalink else (d.get('url') or ''),
+            'published_at': parse_time(d.get('created_utc')) or datetime.now(timezone.utc),
+            'source': 'Reddit',
+        }
+
+    def fetch(self, symbol, cursor):
+        params = {'q': f'{symbol} stock', 'sort': 'new', 'limit': self.page_size, 'raw_json': 1}
+        rows = []
+        for _ in range(self.config['max_pages']):
+            data = (self.get('/search.json', params) or {}).get('data') or {}
+            batch = [self.to_row(symbol, p) for p in data.get('children') or []]
+            new = [r for r in batch if cursor.is_new(r)]
+            rows.extend(new)
+            if not data.get('after') or len(new) < len(batch):
+                break
+            params['after'] = data['after']
+        return rows
+
+
+SOURCES = {'eodhd': EODHDSource, 'finnhub': FinnhubSource, 'reddit': RedditSource}
+NEWS_SOURCES = ('eodhd', 'finnhub')
+SOCIAL_SOURCES = ('reddit',)
+
+
+# --- Database ---
+
+def load_symbols(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT symbol FROM tracked_symbols WHERE active = true ORDER BY symbol")
+        return [r[0] for r in cur.fetchall()]
+
+
+def load_cursors(conn, sources, symbols):
+    """{(source, symbol): Cursor} in one query"""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT source, symbol, last_published_at, last_article_ids
+            FROM collector_cursors
+            WHERE source = ANY(%s) AND symbol = ANY(%s)
+            """,
+            (list(sources), list(symbols)),
+        )
+        return {(r[0], r[1]): Cursor(r[2], r[3] or ()) for r in cur.fetchall()}
+
+
+def save_articles(conn, rows, page_size=1000):
+    """Bulk insert; returns the number of rows actually inserted"""
+    from psycopg2.extras import execute_values
+
+    if not rows:
+        return 0
+    with conn.cursor() as cur:
+        inserted = execute_values(
+            cur,
+            f"""
+            INSERT INTO news_articles ({', '.join(ARTICLE_FIELDS)})
+            VALUES %s
+            ON CONFLICT (article_id) DO NOTHING
+            RETURNING 1
+            """,
+            [tuple(r[f] for f in ARTICLE_FIELDS) for r in rows],
+            page_size=page_size,
+            fetch=True,
+        )
+    return len(inserted)
+
+
+def save_cursors(conn, cursors):
+    from psycopg2.extras import execute_values
+
+    if not cursors:
+        return
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            """
+            INSERT INTO collector_cursors (source, symbol, last_published_at, last_article_ids, last_run_at)
+            VALUES %s
+            ON CONFLICT (source, symbol) DO UPDATE SET
+                last_published_at = EXCLUDED.last_published_at,
+                last_article_ids = EXCLUDED.last_article_ids,
+                last_run_at = EXCLUDED.last_run_at
+            """,
+            [(src, sym, c.published_at, sorted(c.ids), datetime.now(timezone.utc))
+             for (src, sym), c in cursors.items()],
+        )
+
+
+# --- Cycle ---
+
+def make_sources(names, config=None, **urls):
+    """Source instances by name; urls: {name}_url overrides (e.g. a stub)"""
+    return [SOURCES[n](base_url=urls.get(f'{n}_url'), config=config) for n in names]
+
+
+def fetch_all(sources, symbols, cursors, workers=None):
+    """
+    Fetch every (source, symbol) feed concurrently
+
+    Returns (rows, new_cursors, errors): rows deduplicated by article_id,
+    new_cursors only for feeds that returned something, errors as
+    {(source, symbol): exception}. A failed feed keeps its old cursor.
+    """
+    tasks = []
+    for source in sources:
+        for symbol in symbols:
+            cursor = cursors.get((source.name, symbol)) or source.first_cutoff()
+            tasks.append((source, symbol, cursor))
+
+    def run(task):
+        source, symbol, cursor = task
+        try:
+            return task, source.fetch(symbol, cursor), None
+        except (CollectorError, requests.RequestException, ValueError) as e:
+            return task, [], e
+
+    workers = workers or COLLECTOR_CONFIG['workers']
+    with ThreadPoolExecutor(max_workers=min(workers, len(tasks)) or 1) as pool:
+        results = list(pool.map(run, tasks))
+
+    rows, seen, new_cursors, errors = [], set(), {}, {}
+    for (source, symbol, cursor), fetched, error in results:
+        if error is not None:
+            errors[(source.name, symbol)] = error
+            continue
+        if fetched:
+            new_cursors[(source.name, symbol)] = cursor.advanced(fetched)
+        for r in fetched:
+            if r['article_id'] not in seen:
+                seen.add(r['article_id'])
+                rows.append(r)
+    return rows, new_cursors, errors
+
+
+def collect(conn, sources, symbols=None, workers=None, dry_run=False):
+    """One collection cycle; returns stats (requests, fetched, inserted, errors, seconds)"""
+    t0 = time.perf_counter()
+    symbols = symbols or load_symbols(conn)
+    cursors = load_cursors(conn, [s.name for s in sources], symbols)
+    before = {s.name: s.requests for s in sources}
+
+    rows, new_cursors, errors = fetch_all(sources, symbols, cursors, workers)
+    inserted = 0
+    if not dry_run:
+        try:
+            inserted = save_articles(conn, rows)
+            save_cursors(conn, new_cursors)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return {
+        'symbols': len(symbols),
+        'requests': {s.name: s.requests - before[s.name] for s in sources},
+        'fetched': len(rows),
+        'inserted': inserted,
+        'errors': errors,
+        'seconds': time.perf_counter() - t0,
+    }
+
+
+def print_stats(stats):
+    calls = ', '.join(f"{k}={v}" for k, v in stats['requests'].items())
+    print(f"📰 {stats['symbols']} symbols: {sum(stats['requests'].values())} requests ({calls}), "
+          f"{stats['fetched']} new, {stats['inserted']} inserted in {stats['seconds']:.1f}s")
+    for (source, symbol), e in sorted(stats['errors'].items()):
+        print(f"  ⚠️  {source}/{symbol}: {e}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from tradingbot.config import get_db_conn
+
+    parser = argparse.ArgumentParser(description='Incremental news and social collectors')
+    parser.add_argument('--sources', nargs='+', choices=sorted(SOURCES) + ['news', 'social'],
+                        default=['news', 'social'], help='Sources or groups (default: news social)')
+    parser.add_argument('--symbols', nargs='+', help='Symbols (default: active tracked_symbols)')
+    parser.add_argument('--workers', type=int, default=COLLECTOR_CONFIG['workers'])
+    parser.add_argument('--dry-run', action='store_true', help='Fetch but do not write rows or cursors')
+    parser.add_argument('--interval', type=float, help='Repeat every N seconds')
+    args = parser.parse_args()
+
+    names = []
+    for name in args.sources:
+        group = {'news': NEWS_SOURCES, 'social': SOCIAL_SOURCES}.get(name, (name,))
+        names += [n for n in group if n not in names]
+    sources = make_sources(names)
+
+    conn = get_db_conn()
+    try:
+        while True:
+            print_stats(collect(conn, sources, args.symbols, args.workers, args.dry_run))
+            if not args.interval:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+        for s in sources:
+            s.close()
@@ -0,0 +1,62 @@
+"""
+Shared configuration for TradingBot Python modules
+Reads the same environment variables as the standalone scripts and the n8n workflows
+"""
+
+import json
+import os
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SETTINGS_PATH = ROOT_DIR / 'config' / 'settings.json'
+
+# DB config
+DB_CONFIG = {
+    'host': os.environ.get('POSTGRES_HOST', 'localhost'),
+    'port': int(os.environ.get('POSTGRES_PORT', '5432')),
+    'dbname': os.environ.get('POSTGRES_DB', 'trading_bot'),
+    'user': os.environ.get('POSTGRES_USER'),
+    'password': os.environ.get('POSTGRES_PASSWORD'),
+}
+
+# Alpaca config (base URLs can point at a local stub)
+ALPACA_CONFIG = {
+    'api_key': os.environ.get('ALPACA_API_KEY'),
+    'api_secret': os.environ.get('ALPACA_SECRET_KEY'),
+    'base_url': os.environ.get('ALPACA_BASE_URL', 'https://paper-api.alpaca.markets'),
+    'data_url': os.environ.get('ALPACA_DATA_URL', 'https://data.alpaca.markets'),
+}
+
+# News / social sources for tradingbot.collectors (base URLs can point at
+# tradingbot.news_sim)
+NEWS_CONFIG = {
+    'eodhd_api_key': os.environ.get('EODHD_API_KEY'),
+    'eodhd_url': os.environ.get('EODHD_BASE_URL', 'https://eodhd.com'),
+    'finnhub_api_key': os.environ.get('FINNHUB_API_KEY'),
+    'finnhub_url': os.environ.get('FINNHUB_BASE_URL', 'https://finnhub.io'),
+    'reddit_url': os.environ.get('REDDIT_BASE_URL', 'https://www.reddit.com'),
+    'reddit_user_agent': os.environ.get('REDDIT_USER_AGENT', 'tradingbot-collector/1.0'),
+}
+
+# FinBERT batch scoring service (POST /batch {"texts": [...]})
+SENTIMENT_CONFIG = {
+    'finbert_url': os.environ.get('FINBERT_URL', 'http://192.168.1.3:8000'),
+}
+
+
+def load_settings(path=SETTINGS_PATH):
+    """Load config/settings.json"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_db_conn(db_config=None):
+    """Open a new PostgreSQL connection"""
+    import psycopg2
+    return psycopg2.connect(**(db_config or DB_CONFIG))
+
+
+def get_db_pool(maxconn, minconn=1, db_config=None):
+    """Thread-safe connection pool (getconn/putconn) for worker threads"""
+    from psycopg2.pool import ThreadedConnectionPool
+    return ThreadedConnectionPool(minconn, maxconn, **(db_config or DB_CONFIG))
@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+Sentiment Executor (V2) - Python port of strategy_v1/workflows/sentiment-executor.json
+
+Decision logic lives in pure functions (drawdown gate, macro gate, technical
+filters, top-N selection with sector cap, rebalance diff, bracket sizing) so it
+can be reused by backtests. The runner fetches account, positions and latest
+trades concurrently over one pooled session and submits sells and brackets in
+parallel. Client order ids are derived from (date, symbol, side), so a re-run on
+the same day cannot double-submit.
+
+Usage: python -m tradingbot.executor [--dry-run]
+Point ALPACA_BASE_URL / ALPACA_DATA_URL at a local stub to run it offline.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from tradingbot.alpaca_client import AlpacaClient, AlpacaError
+from tradingbot.config import get_db_conn
+
+MARKET_TZ = ZoneInfo('America/New_York')
+
+EXECUTOR_CONFIG = {
+    'top_n': 4,
+    'max_per_sector': 2,
+    'max_drawdown': 0.10,          # Skip trading at 10% drawdown from 30-day peak
+    'value_per_symbol': 500.0,     # Fixed notional per new position
+    'stop_loss_percent': 0.02,     # 2% SL
+    'take_profit_percent': 0.04,   # 4% TP (2:1)
+    'rsi_max': 70,
+    'sentiment_lookback_days': 2,
+    'macro_window_days': 1,
+    'fomc_dates': [],              # 'YYYY-MM-DD'
+    'earnings_by_symbol': {},      # {'NVDA': ['YYYY-MM-DD', ...]}
+    'client_order_prefix': 'sx',
+    'cancel_timeout': 5.0,         # Seconds to wait for bracket legs to cancel
+    'max_workers': 8,
+}
+
+
+# ============================================================
+# Pure decision logic
+# ============================================================
+
+def check_drawdown(equity, max_balance, max_drawdown=0.10):
+    """Drawdown kill switch (check_drawdown_limit node)"""
+    equity = float(equity or 0)
+    max_balance = float(max_balance or 0)
+    if not equity or not max_balance:
+        return {'skip_trading': False, 'drawdown': 0.0, 'equity': equity, 'max_balance': max_balance}
+
+    drawdown = (max_balance - equity) / max_balance
+    return {
+        'skip_trading': drawdown >= max_drawdown,
+        'drawdown': drawdown,
+        'equity': equity,
+        'max_balance': max_balance,
+    }
+
+
+def macro_event_gate(symbols, today, fomc_dates=(), earnings_by_symbol=None, window_days=1):
+    """Return a skip reason if today is within window_days of FOMC or a candidate's earnings"""
+    earnings_by_symbol = earnings_by_symbol or {}
+
+    def within_window(target):
+        if isinstance(target, str):
+            target = date.fromisoformat(target)
+        return abs((target - today).days) <= window_days
+
+    for d in fomc_dates:
+        if within_window(d):
+            return f"FOMC window around {d}"
+
+    for symbol in symbols:
+        for d in earnings_by_symbol.get(symbol, []):
+            if within_window(d):
+                return f"Earnings window for {symbol} around {d}"
+
+    return None
+
+
+def technical_filter_masks(close, ema9, ema21, ema200, rsi14, volume, volume_ma20, rsi_max=70):
+    """
+    The four technical filters, each True when it passes
+
+    Works on scalars and on NumPy arrays of any shape (the backtester passes
+    date x symbol matrices); NaN inputs fail every comparison.
+    """
+    return {
+        'trend': close > ema200,
+        'ema': ema9 > ema21,
+        'rsi': rsi14 < rsi_max,
+        'volume': volume > volume_ma20,
+    }
+
+
+def passes_technical_filters(ema, rsi_max=70):
+    """price > EMA200, EMA9 > EMA21, RSI14 < rsi_max, volume > volume_ma20"""
+    if not ema:
+        return False
+    fields = ('close_price', 'ema9', 'ema21', 'ema200', 'rsi14', 'volume', 'volume_ma20')
+    if any(ema.get(f) is None for f in fields):
+        return False
+
+    masks = technical_filter_masks(*(float(ema[f]) for f in fields), rsi_max=rsi_max)
+    return all(masks.values())
+
+
+def select_top_symbols(scores, ema_by_symbol, top_n=4, max_per_sector=2, rsi_max=70):
+    """
+    Pick top-N sentiment rows that pass the technical filters (filter_top_sentiment_score node)
+
+    scores: [{'symbol', 'score', 'sector', ...}], any order
+    Falls back to the unfiltered list when nothing passes, like the workflow.
+    """
+    filtered = [s for s in scores
+                if passes_technical_filters(ema_by_symbol.get(s['symbol']), rsi_max)]
+    base = filtered if filtered else list(scores)
+    ranked = sorted(base, key=lambda s: float(s['score']), reverse=True)
+
+    sector_counts = {}
+    selected = []
+    for row in ranked:
+        sector = row.get('sector') or 'Unknown'
+        if sector_counts.get(sector, 0) >= max_per_sector:
+            continue
+        selected.append(row)
+        sector_counts[sector] = sector_counts.get(sector, 0) + 1
+        if len(selected) >= top_n:
+            break
+
+    return selected
+
+
+def select_top_matrix(scores, passes, sector_ids, top_n=4, max_per_sector=2):
+    """
+    select_top_symbols for every row of a (dates x symbols) matrix at once
+
+    scores: float matrix, NaN where a symbol has no score that day
+    passes: bool matrix from technical_filter_masks (all four combined)
+    sector_ids: int per symbol column
+    Same rules: rank by score (ties keep column order), fall back to all
+    scored symbols on days where none passes, at most max_per_sector per
+    sector, top_n in total. Returns a bool matrix of selections.
+    """
+    import numpy as np
+
+    scores = np.asarray(scores, dtype=float)
+    scored = ~np.isnan(scores)
+    passes = np.asarray(passes, dtype=bool) & scored
+    eligible = np.where(passes.any(axis=1, keepdims=True), passes, scored)
+
+    ranked_scores = np.where(eligible, scores, -np.inf)
+    order = np.argsort(-ranked_scores, axis=1, kind='stable')
+    ranked_ok = np.take_along_axis(eligible, order, axis=1)
+
+    # Running count of each row's sector along the ranking
+    sectors = np.asarray(sector_ids, dtype=np.int64)[order]
+    onehot = (sectors[..., None] == np.arange(sectors.max() + 1 if sectors.size else 1)) & ranked_ok[..., None]
+    sector_rank = np.take_along_axis(np.cumsum(onehot, axis=1), sectors[..., None], axis=2)[..., 0]
+    take = ranked_ok & (sector_rank <= max_per_sector)
+    take &= np.cumsum(take, axis=1) <= top_n
+
+    selected = np.zeros_like(take)
+    np.put_along_axis(selected, order, take, axis=1)
+    return selected
+
+
+def plan_rebalance(open_positions, selected, config=None):
+    """
+    Diff open positions against the selection
+
+    Returns {'to_close': [position dicts], 'to_open': [{'symbol', 'notional', ...}]}
+    """
+    config = config or EXECUTOR_CONFIG
+    selected_symbols = {s['symbol'] for s in selected}
+    open_symbols = {p['symbol'] for p in open_positions if p.get('symbol')}
+
+    to_close = [
+        {
+            'symbol': p['symbol'],
+            'qty': p.get('qty'),
+            'market_value': float(p.get('market_value') or 0),
+            'asset_id': p.get('asset_id'),
+        }
+        for p in open_positions
+        if p.get('symbol') and p['symbol'] not in selected_symbols
+    ]
+
+    to_open = [
+        {
+            'symbol': s['symbol'],
+            'score': s.get('score'),
+            'notional': config['value_per_symbol'],
+            'stop_loss_percent': config['stop_loss_percent'],
+            'take_profit_percent': config['take_profit_percent'],
+        }
+        for s in selected
+        if s['symbol'] not in open_symbols
+    ]
+
+    return {'to_close': to_close, 'to_open': to_open}
+
+
+def extract_trade_price(latest_trade):
+    """Price from a /trades/latest payload"""
+    if not latest_trade:
+        return 0.0
+    trade = latest_trade.get('trade') or latest_trade.get('last') or latest_trade
+    return float(trade.get('p') or 0)
+
+
+def make_client_order_id(run_date, symbol, side, prefix='sx'):
+    """Deterministic client order id - Alpaca rejects duplicates, so re-runs are no-ops"""
+    return f"{prefix}-{run_date.strftime('%Y%m%d')}-{symbol}-{side}"
+
+
+def build_bracket_order(symbol, notional, price, stop_loss_percent=0.02,
+                        take_profit_percent=0.04, client_order_id=None):
+    """Whole-share market bracket order (Build_Bracket_Order node), None if qty would be 0"""
+    if not price or not notional:
+        return None
+
+    qty = int(notional // price)
+    if qty == 0:
+        return None
+
+    order = {
+        'symbol': symbol,
+        'qty': str(qty),
+        'side': 'buy',
+        'type': 'market',
+        'time_in_force': 'day',
+        'order_class': 'bracket',
+        'take_profit': {'limit_price': round(price * (1 + take_profit_percent), 2)},
+        'stop_loss': {'stop_price': round(price * (1 - stop_loss_percent), 2)},
+    }
+    if client_order_id:
+        order['client_order_id'] = client_order_id
+    return order
+
+
+def build_sell_order(position, client_order_id=None):
+    """Market order closing a long position"""
+    order = {
+        'symbol': position['symbol'],
+        'qty': str(position['qty']),
+        'side': 'sell',
+        'type': 'market',
+        'time_in_force': 'day',
+    }
+    if client_order_id:
+        order['client_order_id'] = client_order_id
+    return order
+
+
+# ============================================================
+# Database I/O
+# ============================================================
+
+def load_inputs(conn, lookback_days=2):
+    """30-day max balance, active sentiment scores and latest EMA snapshot per symbol"""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT MAX(balance)
+            FROM account_balance
+            WHERE date >= CURRENT_DATE - INTERVAL '30 days'
+            """
+        )
+        row = cur.fetchone()
+        max_balance = float(row[0]) if row and row[0] is not None else None
+
+        cur.execute(
+            """
+            SELECT ss.symbol,
+                   ROUND(AVG(ss.sentiment_score), 4) AS score,
+                   MAX(ss.rationale) FILTER (WHERE ss.date = CURRENT_DATE) AS rationale,
+                   ts.sector
+            FROM sentiment_scores ss
+            JOIN tracked_symbols ts ON ss.symbol = ts.symbol
+            WHERE ss.date >= CURRENT_DATE - %s
+              AND ts.active = true
+            GROUP BY ss.symbol, ts.sector
+            ORDER BY score DESC
+            """,
+            (lookback_days,),
+        )
+        scores = [
+            {'symbol': r[0], 'score': float(r[1]), 'rationale': r[2], 'sector': r[3]}
+            for r in cur.fetchall()
+        ]
+
+        cur.execute(
+            """
+            SELECT DISTINCT ON (symbol)
+                   symbol, close_price, ema9, ema21, ema200, rsi14, volume, volume_ma20
+            FROM ema_snapshots
+            WHERE symbol = ANY(%s)
+            ORDER BY symbol, timestamp DESC
+            """,
+            ([s['symbol'] for s in scores],),
+        )
+        cols = ('symbol', 'close_price', 'ema9', 'ema21', 'ema200', 'rsi14', 'volume', 'volume_ma20')
+        ema_by_symbol = {r[0]: dict(zip(cols, r)) for r in cur.fetchall()}
+
+    return max_balance, scores, ema_by_symbol
+
+
+def save_account_balance(conn, account):
+    equity = float(account.get('equity') or 0)
+    last_equity = float(account.get('last_equity') or 0)
+    change = (equity - last_equity) / last_equity if last_equity else None
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO account_balance (date, balance, change)
+            VALUES (CURRENT_DATE, %s, %s)
+            ON CONFLICT (date) DO UPDATE SET
+              balance = EXCLUDED.balance,
+              change = EXCLUDED.change
+            """,
+            (equity, change),
+        )
+    conn.commit()
+
+
+def save_positions(conn, results, run_id=None):
+    """Submitted orders -> positions; run_id links them to pipeline_runs (migration 012)"""
+    rows = [
+        (r['symbol'], r['side'], r['value'], r.get('score'))
+        for r in results if r['status'] == 'submitted'
+    ]
+    if not rows:
+        return
+    with conn.cursor() as cur:
+        if run_id is None:
+            cur.executemany(
+                """
+                INSERT INTO positions (date, symbol, order_type, value, sentiment_score)
+                VALUES (CURRENT_DATE, %s, %s, %s, %s)
+                """,
+                rows,
+            )
+        else:
+            cur.executemany(
+                """
+                INSERT INTO positions (date, symbol, order_type, value, sentiment_score, run_id)
+                VALUES (CURRENT_DATE, %s, %s, %s, %s, %s)
+                """,
+                [row + (run_id,) for row in rows],
+            )
+    conn.commit()
+
+
+# ============================================================
+# Order submission
+# ============================================================
+
+def fetch_price(client, symbol):
+    """Latest trade price, 0.0 if unavailable (the buy is then skipped)"""
+    try:
+        return extract_trade_price(client.get_latest_trade(symbol))
+    except (AlpacaError, OSError):
+        return 0.0
+
+
+def submit_idempotent(client, order):
+    """Submit an order; a duplicate client_order_id returns the existing order"""
+    try:
+        return client.submit_order(order), False
+    except AlpacaError as e:
+        if e.status_code == 422 and order.get('client_order_id') and 'client_order_id' in e.body:
+            return client.get_order_by_client_id(order['client_order_id']), True
+        raise
+
+
+def close_position(client, position, run_date, config):
+    """Cancel the symbol's open (bracket) orders, wait until they are gone, then sell"""
+    symbol = position['symbol']
+    try:
+        open_orders = client.get_orders(status='open', limit=500, symbols=[symbol])
+        for o in open_orders:
+            client.cancel_order(o['id'])
+
+        deadline = time.monotonic() + config['cancel_timeout']
+        while open_orders and time.monotonic() < deadline:
+            time.sleep(0.1)
+            open_orders = client.get_orders(status='open', limit=500, symbols=[symbol])
+
+        order = build_sell_order(
+            position,
+            make_client_order_id(run_date, symbol, 'sell', config['client_order_prefix']),
+        )
+        result, duplicate = submit_idempotent(client, order)
+        return {'symbol': symbol, 'side': 'sell', 'status': 'duplicate' if duplicate else 'submitted',
+                'value': position['market_value'], 'order': result}
+    except (AlpacaError, OSError) as e:
+        return {'symbol': symbol, 'side': 'sell', 'status': 'error', 'value': 0.0, 'error': str(e)}
+
+
+def open_position(client, target, price, run_date, config):
+    """Submit a bracket buy sized from the latest trade price"""
+    symbol = target['symbol']
+    order = build_bracket_order(
+        symbol, target['notional'], price,
+        target['stop_loss_percent'], target['take_profit_percent'],
+        make_client_order_id(run_date, symbol, 'buy', config['client_order_prefix']),
+    )
+    if order is None:
+        return {'symbol': symbol, 'side': 'buy', 'status': 'skipped', 'value': 0.0,
+                'error': f"qty=0 at price {price}"}
+    try:
+        result, duplicate = submit_idempotent(client, order)
+        return {'symbol': symbol, 'side': 'buy', 'status': 'duplicate' if duplicate else 'submitted',
+                'value': int(order['qty']) * price, 'score': target.get('score'), 'order': result}
+    except (AlpacaError, OSError) as e:
+        return {'symbol': symbol, 'side': 'buy', 'status': 'error', 'value': 0.0, 'error': str(e)}
+
+
+# ============================================================
+# Runner
+# ============================================================
+
+def execute_plan(client, plan, prices, run_date, config):
+    """Submit the plan's sells and brackets in parallel; returns per-order results"""
+    with ThreadPoolExecutor(max_workers=config['max_workers']) as pool:
+        futures = [pool.submit(close_position, client, p, run_date, config) for p in plan['to_close']]
+        futures += [pool.submit(open_position, client, t, prices.get(t['symbol'], 0.0), run_date, config)
+                    for t in plan['to_open']]
+        return [f.result() for f in futures]
+
+
+def run_executor(client, conn=None, inputs=None, config=None, run_date=None, dry_run=False, submit=True):
+    """
+    Run one rebalance
+
+    inputs: optional (max_balance, scores, ema_by_symbol) to bypass the DB
+    submit=False stops after planning (status 'planned'; the account balance
+    is still saved) so a caller can run execute_plan() as a separate step.
+    A plan with nothing to close or open ends with status 'no_orders'.
+    Returns a summary dict with the decision and per-order results.
+    """
+    config = config or EXECUTOR_CONFIG
+    run_date = run_date or datetime.now(MARKET_TZ).date()
+    timings = {}
+    t0 = time.perf_counter()
+
+    if inputs is None:
+        inputs = load_inputs(conn, config['sentiment_lookback_days'])
+    max_balance, scores, ema_by_symbol = inputs
+    timings['load_inputs'] = time.perf_counter() - t0
+
+    reason = macro_event_gate([s['symbol'] for s in scores], run_date, config['fomc_dates'],
+                              config['earnings_by_symbol'], config['macro_window_days'])
+    if reason:
+        return {'status': 'skipped', 'reason': reason, 'timings': timings}
+
+    selected = select_top_symbols(scores, ema_by_symbol, config['top_n'],
+                                  config['max_per_sector'], config['rsi_max'])
+
+    # Account, positions and latest trades for every candidate in one concurrent wave
+    t1 = time.perf_counter()
+    calls = {'account': (client.get_account,), 'positions': (client.get_positions,)}
+    calls.update({('price', s['symbol']): (fetch_price, client, s['symbol']) for s in selected})
+    fetched = client.fan_out(calls)
+    account = fetched['account']
+    positions = fetched['positions'] or []
+    prices = {s['symbol']: fetched[('price', s['symbol'])] for s in selected}
+    timings['fetch'] = time.perf_counter() - t1
+
+    if conn is not None and not dry_run:
+        save_account_balance(conn, account)
+
+    # Today's balance is part of the 30-day window
+    equity = float(account.get('equity') or account.get('last_equity') or 0)
+    peak = max(max_balance or 0, equity)
+    dd = check_drawdown(equity, peak, config['max_drawdown'])
+    if dd['skip_trading']:
+        return {'status': 'skipped', 'reason': f"Drawdown {dd['drawdown']:.2%} >= {config['max_drawdown']:.0%}",
+                'drawdown': dd, 'timings': timings}
+
+    plan = plan_rebalance(positions, selected, config)
+    if dry_run:
+        status = 'dry_run'
+    elif not plan['to_close'] and not plan['to_open']:
+        status = 'no_orders'
+    else:
+        status = 'executed' if submit else 'planned'
+    summary = {
+        'status': status,
+        'drawdown': dd,
+        'selected': [s['symbol'] for s in selected],
+        'plan': plan,
+        'prices': prices,
+        'results': [],
+        'timings': timings,
+    }
+    if status != 'executed':
+        return summary
+
+    t2 = time.perf_counter()
+    summary['results'] = execute_plan(client, plan, prices, run_date, config)
+    timings['orders'] = time.perf_counter() - t2
+
+    if conn is not None:
+        save_positions(conn, summary['results'])
+
+    timings['total'] = time.perf_counter() - t0
+    return summary
+
+
+def print_summary(summary):
+    print("=" * 70)
+    print(f"🤖 SENTIMENT EXECUTOR - {summary['status'].upper()}")
+    print("=" * 70)
+
+    if summary['status'] == 'skipped':
+        print(f"⏸️  Trading skipped: {summary['reason']}")
+    else:
+        dd = summary['drawdown']
+        print(f"💰 Equity: ${dd['equity']:,.2f}  (30d peak ${dd['max_balance']:,.2f}, drawdown {dd['drawdown']:.2%})")
+        print(f"🎯 Selected: {', '.join(summary['selected']) or 'none'}")
+        for p in summary['plan']['to_close']:
+            print(f"🔴 CLOSE {p['symbol']} x{p['qty']} (${p['market_value']:,.2f})")
+        for t in summary['plan']['to_open']:
+            price = summary['prices'].get(t['symbol'], 0.0)
+            print(f"🟢 OPEN  {t['symbol']} ${t['notional']:,.2f} @ ${price:.2f}")
+        for r in summary['results']:
+            status_emoji = "✅" if r['status'] == 'submitted' else "♻️" if r['status'] == 'duplicate' else "❌"
+            print(f"{status_emoji} {r['side'].upper()} {r['symbol']}: {r['status']} {r.get('error', '')}")
+
+    timings = ', '.join(f"{k}={v * 1000:.0f}ms" for k, v in summary['timings'].items())
+    print(f"⏱️  {timings}")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the V2 sentiment executor once')
+    parser.add_argument('--dry-run', action='store_true', help='Print the plan without submitting orders')
+    parser.add_argument('--force', action='store_true', help='Run on weekends too')
+    parser.add_argument('--value-per-symbol', type=float, default=EXECUTOR_CONFIG['value_per_symbol'],
+                        help='Notional per new position (default: 500)')
+    args = parser.parse_args()
+
+    config = EXECUTOR_CONFIG.copy()
+    config['value_per_symbol'] = args.value_per_symbol
+
+    today = datetime.now(MARKET_TZ).date()
+    if today.weekday() >= 5 and not args.force:
+        print("📭 Weekend - nothing to do (use --force to override)")
+        raise SystemExit(0)
+
+    conn = get_db_conn()
+    try:
+        with AlpacaClient(pool_size=config['max_workers']) as client:
+            summary = run_executor(client, conn, config=config, dry_run=args.dry_run)
+    finally:
+        conn.close()
+
+    print_summary(summary)
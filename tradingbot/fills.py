@@ -0,0 +1,220 @@
+"""
+Bracket order fill simulation
+
+The executor buys with a market bracket: a take-profit limit at
+entry * (1 + tp) and a stop at entry * (1 - sl), both rounded to cents
+(build_bracket_order). Here each bar is checked against every open
+bracket at once, with one NumPy pass per bar rather than per position:
+
+- gap through a level at the open: filled at the open (a stop becomes a
+  market order, a limit sell gets the better price)
+- only one level inside [low, high]: filled at that level
+- both levels inside the bar: the order is unknowable from OHLC alone.
+  Minute bars for that day decide when available (first touch wins);
+  otherwise the `ambiguous` policy does: 'stop' (conservative, default),
+  'target', or 'open' (the level closer to the open is assumed first).
+
+Stops pay `slippage` (fraction of price); limits never fill worse than
+their price. Prices are float arrays; NaN bars (no data) never fill.
+"""
+
+import numpy as np
+
+from tradingbot.executor import EXECUTOR_CONFIG
+
+NONE, STOP, TARGET, EXPIRED = 0, 1, 2, 3
+REASONS = {NONE: 'open', STOP: 'stop_loss', TARGET: 'take_profit', EXPIRED: 'expired'}
+
+
+def bracket_levels(entry_price, stop_loss_percent=None, take_profit_percent=None):
+    """(stop, target) price arrays, rounded to cents like build_bracket_order"""
+    sl = EXECUTOR_CONFIG['stop_loss_percent'] if stop_loss_percent is None else stop_loss_percent
+    tp = EXECUTOR_CONFIG['take_profit_percent'] if take_profit_percent is None else take_profit_percent
+    entry = np.asarray(entry_price, dtype=float)
+    return np.round(entry * (1 - sl), 2), np.round(entry * (1 + tp), 2)
+
+
+def first_touch(high, low, stop, target):
+    """
+    Which level minute bars reach first
+
+    high/low are (positions x minutes) matrices, NaN-padded. Returns the
+    reason per row (NONE when neither level is touched) and the minute
+    index of the fill (-1 for NONE). A minute that touches both levels
+    counts as a stop.
+    """
+    stop = np.asarray(stop, dtype=float)[:, None]
+    target = np.asarray(target, dtype=float)[:, None]
+    with np.errstate(invalid='ignore'):
+        hit_stop = low <= stop
+        hit_target = high >= target
+    m = high.shape[1]
+    i_stop = np.where(hit_stop.any(axis=1), hit_stop.argmax(axis=1), m)
+    i_target = np.where(hit_target.any(axis=1), hit_target.argmax(axis=1), m)
+
+    reason = np.full(len(stop), NONE, dtype=np.int8)
+    reason[(i_target < i_stop)] = TARGET
+    reason[(i_stop <= i_target) & (i_stop < m)] = STOP
+    index = np.where(reason == NONE, -1, np.minimum(i_stop, i_target))
+    return reason, index
+
+
+def check_brackets(open_, high, low, stop, target, ambiguous='stop', slippage=0.0,
+                   refine=None):
+    """
+    One bar against N brackets (all arguments are length-N arrays)
+
+    refine, if given, is called as refine(idx) for the positions whose bar
+    touched both levels and returns (minute_high, minute_low) matrices for
+    those rows; see first_touch(). Returns (reason, fill_price) arrays;
+    fill_price is NaN where reason is NONE.
+    """
+    open_, high, low = (np.asarray(a, dtype=float) for a in (open_, high, low))
+    stop = np.asarray(stop, dtype=float)
+    target = np.asarray(target, dtype=float)
+
+    with np.errstate(invalid='ignore'):
+        gap_stop = open_ <= stop
+        gap_target = open_ >= target
+        hit_stop = low <= stop
+        hit_target = high >= target
+
+    reason = np.full(len(stop), NONE, dtype=np.int8)
+    price = np.full(len(stop), np.nan)
+
+    reason[hit_target] = TARGET
+    price[hit_target] = target[hit_target]
+    reason[hit_stop] = STOP
+    price[hit_stop] = stop[hit_stop]
+
+    both = hit_stop & hit_target & ~gap_stop & ~gap_target
+    if both.any():
+        idx = np.flatnonzero(both)
+        if refine is not None:
+            decided, _ = first_touch(*refine(idx), stop[idx], target[idx])
+        else:
+            decided = np.full(len(idx), NONE, dtype=np.int8)
+        undecided = decided == NONE
+        if ambiguous == 'stop':
+            decided[undecided] = STOP
+        elif ambiguous == 'target':
+            decided[undecided] = TARGET
+        elif ambiguous == 'open':
+            closer_stop = (open_[idx] - stop[idx]) <= (target[idx] - open_[idx])
+            decided[undecided] = np.where(closer_stop, STOP, TARGET)[undecided]
+        else:
+            raise ValueError(f"Unknown ambiguous policy: {ambiguous}")
+        reason[idx] = decided
+        price[idx] = np.where(decided == STOP, stop[idx], target[idx])
+
+    # Gaps fill at the open, which decides the order by itself
+    reason[gap_target] = TARGET
+    price[gap_target] = open_[gap_target]
+    reason[gap_stop] = STOP
+    price[gap_stop] = open_[gap_stop]
+
+    is_stop = reason == STOP
+    price[is_stop] *= 1 - slippage
+    return reason, price
+
+
+def simulate_brackets(cols, start, entry_price, open_, high, low, close,
+                      stop_loss_percent=None, take_profit_percent=None,
+                      max_hold=None, ambiguous='stop', slippage=0.0, refine=None):
+    """
+    Walk N bracket positions through (bars x symbols) OHLC matrices
+
+    cols: symbol column per position; start: first bar whose range can
+    trigger the brackets (entry bar + 1 for fills at the close, the entry
+    bar itself for fills at the open). Brackets still open after max_hold
+    bars exit at that bar's close (EXPIRED) - max_hold=1 with start at the
+    entry bar models a day-TIF bracket bought at the open. Positions
+    still open at the last bar are marked NONE and valued at the last
+    close.
+
+    refine(bar, cols) -> (minute_high, minute_low) resolves bars that
+    touched both levels (rows follow cols).
+
+    Returns a dict of arrays: exit_bar, exit_price, reason, stop, target,
+    return (exit / entry - 1).
+    """
+    cols = np.asarray(cols, dtype=np.int64)
+    start = np.asarray(start, dtype=np.int64)
+    entry_price = np.asarray(entry_price, dtype=float)
+    stop, target = bracket_levels(entry_price, stop_loss_percent, take_profit_percent)
+    n_bars = open_.shape[0]
+    n = len(cols)
+
+    exit_bar = np.full(n, n_bars - 1, dtype=np.int64)
+    exit_price = np.full(n, np.nan)
+    reason = np.full(n, NONE, dtype=np.int8)
+    expires = start + max_hold - 1 if max_hold is not None else np.full(n, np.iinfo(np.int64).max)
+    alive = start < n_bars
+
+    for t in range(int(start.min()) if n else n_bars, n_bars):
+        live = np.flatnonzero(alive & (start <= t))
+        if len(live) == 0:
+            if not alive.any():
+                break
+            continue
+        c = cols[live]
+        sub_refine = None
+        if refine is not None:
+            sub_refine = lambda idx, t=t, c=c: refine(t, c[idx])
+        r, p = check_brackets(open_[t, c], high[t, c], low[t, c], stop[live], target[live],
+                              ambiguous, slippage, sub_refine)
+        filled = r != NONE
+        done = live[filled]
+        exit_bar[done] = t
+        exit_price[done] = p[filled]
+        reason[done] = r[filled]
+        alive[done] = False
+
+        expire = live[~filled & (expires[live] == t)]
+        exit_bar[expire] = t
+        exit_price[expire] = close[t, cols[expire]]
+        reason[expire] = EXPIRED
+        alive[expire] = False
+
+    still_open = reason == NONE
+    exit_price[still_open] = close[exit_bar[still_open], cols[still_open]]
+    return {
+        'exit_bar': exit_bar,
+        'exit_price': exit_price,
+        'reason': reason,
+        'stop': stop,
+        'target': target,
+        'return': exit_price / entry_price - 1,
+    }
+
+
+def minute_refiner(day_starts_ns, minute_bars):
+    """
+    refine() callback for simulate_brackets backed by minute bars
+
+    day_starts_ns: start of each daily bar (epoch ns, sorted); minute_bars:
+    per symbol column, a bars dict with ts/high/low (see tradingbot.bars).
+    Columns without minute data fall back to the ambiguous policy.
+    """
+    day_starts_ns = np.asarray(day_starts_ns, dtype=np.int64)
+
+    def refine(t, cols):
+        lo = day_starts_ns[t]
+        hi = day_starts_ns[t + 1] if t + 1 < len(day_starts_ns) else np.iinfo(np.int64).max
+        windows = []
+        for c in cols:
+            bars = minute_bars[c] if c < len(minute_bars) else None
+            if bars is None or len(bars['ts']) == 0:
+                windows.append((np.empty(0), np.empty(0)))
+                continue
+            i0, i1 = np.searchsorted(bars['ts'], [lo, hi], 'left')
+            windows.append((bars['high'][i0:i1], bars['low'][i0:i1]))
+        width = max((len(h) for h, _ in windows), default=0)
+        high = np.full((len(cols), max(width, 1)), np.nan)
+        low = np.full((len(cols), max(width, 1)), np.nan)
+        for i, (h, l) in enumerate(windows):
+            high[i, :len(h)] = h
+            low[i, :len(l)] = l
+        return high, low
+
+    return refine
@@ -0,0 +1,241 @@
+"""
+Indicator access for charts and APIs
+
+Stored ema_snapshots columns are read as-is; only periods that are not
+stored (or have NULL gaps in the requested window) are computed, through a
+process-wide cache that extends a cached series with new bars instead of
+recomputing it from scratch.
+
+Missing prices never shift the series: a NaN close yields a NaN EMA at the
+same index and the recursion continues from the last valid bar.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from tradingbot.timeindex import ema_warmup_bars, to_epoch_ns
+
+STORED_EMA_PERIODS = (5, 8, 9, 13, 20, 21, 34, 50, 100, 200)
+
+
+def _ema_run(values, period, state, out, offset=0):
+    """Advance an SMA-seeded EMA over values, writing into out[offset:]"""
+    alpha = 2.0 / (period + 1)
+    count, total, prev = state
+    for i, v in enumerate(values):
+        if v != v:  # NaN
+            continue
+        if count < period:
+            count += 1
+            total += v
+            if count == period:
+                prev = total / period
+                out[offset + i] = prev
+        else:
+            prev += alpha * (v - prev)
+            out[offset + i] = prev
+    return count, total, prev
+
+
+def ema(values, period):
+    """EMA aligned to values (NaN in, NaN out; first value at the period-th valid bar)"""
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    _ema_run(values.tolist(), period, (0, 0.0, float('nan')), out)
+    return out
+
+
+def ema_matrix(values, period):
+    """
+    ema() down each column of a (bars x symbols) matrix
+
+    Loops over bars only; every column gets its own SMA seed, so symbols
+    with shorter histories (leading NaNs) or gaps behave exactly like ema().
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    alpha = 2.0 / (period + 1)
+    count = np.zeros(values.shape[1], dtype=np.int64)
+    total = np.zeros(values.shape[1])
+    prev = np.full(values.shape[1], np.nan)
+    for t, row in enumerate(values):
+        valid = ~np.isnan(row)
+        seeding = valid & (count < period)
+        running = valid & ~seeding
+        count[seeding] += 1
+        total[seeding] += row[seeding]
+        seeded = seeding & (count == period)
+        prev[seeded] = total[seeded] / period
+        prev[running] += alpha * (row[running] - prev[running])
+        emit = seeded | running
+        out[t, emit] = prev[emit]
+    return out
+
+
+def rsi_matrix(values, period=14):
+    """
+    Wilder RSI down each column (same seeding as the ema-logger workflow)
+
+    The first value appears after `period` price changes: plain averages of
+    the first gains/losses, then Wilder smoothing. NaN prices are skipped.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[1]
+    out = np.full(values.shape, np.nan)
+    last = np.full(n, np.nan)
+    count = np.zeros(n, dtype=np.int64)
+    gain = np.zeros(n)
+    loss = np.zeros(n)
+    for t, row in enumerate(values):
+        valid = ~np.isnan(row)
+        has_prev = valid & ~np.isnan(last)
+        diff = np.where(has_prev, row - last, 0.0)
+        up, down = np.maximum(diff, 0.0), np.maximum(-diff, 0.0)
+
+        seeding = has_prev & (count < period)
+        running = has_prev & ~seeding
+        count[seeding] += 1
+        gain[seeding] += up[seeding] / period
+        loss[seeding] += down[seeding] / period
+        gain[running] = (gain[running] * (period - 1) + up[running]) / period
+        loss[running] = (loss[running] * (period - 1) + down[running]) / period
+
+        emit = has_prev & (count >= period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(loss > 0, 100.0 - 100.0 / (1.0 + gain / loss), 100.0)
+        out[t, emit] = rsi[emit]
+        last[valid] = row[valid]
+    return out
+
+
+def sma_matrix(values, period):
+    """Trailing simple mean down each column (NaN until `period` rows)"""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        csum = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), values]), axis=0)
+        out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+
+class IndicatorCache:
+    """
+    Thread-safe LRU of EMA series keyed by (symbol, period, first timestamp)
+
+    When a request covers a cached series plus newer bars, only the new bars
+    are processed. Assumes history is append-only, which holds for snapshots.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def ema(self, symbol, period, ts_ns, closes):
+        ts_ns = np.asarray(ts_ns, dtype=np.int64)
+        closes = np.asarray(closes, dtype=float)
+        if len(ts_ns) == 0:
+            return np.empty(0)
+        key = (symbol, period, int(ts_ns[0]))
+
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is not None:
+                self.data.move_to_end(key)
+
+        if entry is not None:
+            cached_ts, cached_out, state = entry
+            n = len(cached_ts)
+            if n <= len(ts_ns) and ts_ns[n - 1] == cached_ts[-1]:
+                self.hits += 1
+                if n == len(ts_ns):
+                    return cached_out
+                out = np.concatenate([cached_out, np.full(len(ts_ns) - n, np.nan)])
+                state = _ema_run(closes[n:].tolist(), period, state, out, n)
+                self._store(key, ts_ns, out, state)
+                return out
+
+        self.misses += 1
+        out = np.full(len(ts_ns), np.nan)
+        state = _ema_run(closes.tolist(), period, (0, 0.0, float('nan')), out)
+        self._store(key, ts_ns, out, state)
+        return out
+
+    def _store(self, key, ts_ns, out, state):
+        out.setflags(write=False)
+        with self.lock:
+            self.data[key] = (ts_ns, out, state)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+indicator_cache = IndicatorCache()
+
+
+def _floats(rows, col):
+    return np.array([np.nan if r[col] is None else float(r[col]) for r in rows], dtype=float)
+
+
+def load_ema_window(conn, symbol, start_dt, end_dt, periods, cache=indicator_cache):
+    """
+    Timestamps, closes and EMAs for [start_dt, end_dt]
+
+    Returns (timestamps, closes, {period: array}), arrays aligned to
+    timestamps. Stored columns are used when complete in the window;
+    otherwise exactly ema_warmup_bars(N) earlier rows are loaded and the
+    missing values come from the cache.
+    """
+    periods = sorted(set(periods))
+    stored = [p for p in periods if p in STORED_EMA_PERIODS]
+    columns = ''.join(f', ema{p}' for p in stored)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT timestamp, close_price{columns}
+            FROM ema_snapshots
+            WHERE symbol = %s AND timestamp >= %s AND timestamp <= %s
+            ORDER BY timestamp
+            """,
+            (symbol, start_dt, end_dt),
+        )
+        rows = cur.fetchall()
+
+        timestamps = [r[0] for r in rows]
+        closes = _floats(rows, 1)
+        emas = {p: _floats(rows, 2 + i) for i, p in enumerate(stored)}
+        missing = [p for p in periods if p not in emas or np.isnan(emas[p][~np.isnan(closes)]).any()]
+        if not rows or not missing:
+            return timestamps, closes, emas
+
+        cur.execute(
+            """
+            SELECT timestamp, close_price
+            FROM ema_snapshots
+            WHERE symbol = %s AND timestamp < %s
+            ORDER BY timestamp DESC
+            LIMIT %s
+            """,
+            (symbol, start_dt, ema_warmup_bars(max(missing))),
+        )
+        warmup = cur.fetchall()[::-1]
+
+    full_ts = to_epoch_ns([r[0] for r in warmup] + timestamps)
+    full_closes = np.concatenate([_floats(warmup, 1), closes])
+    for p in missing:
+        computed = cache.ema(symbol, p, full_ts, full_closes)[len(warmup):]
+        if p in emas:
+            # Keep stored values, fill only the gaps
+            emas[p] = np.where(np.isnan(emas[p]), computed, emas[p])
+        else:
+            emas[p] = computed
+    return timestamps, closes, emas
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+In-process metrics, query timing and sampling profiler
+
+Small enough not to need prometheus_client:
+  - Registry with histograms, counters and callback gauges, rendered in
+    the Prometheus text exposition format (version 0.0.4);
+  - timed_cursor(): a psycopg2 cursor class reporting every execute()
+    with its duration, so callers can time and log slow queries
+    (cursor.query holds the SQL with the parameters bound);
+  - sample_stacks(): samples every thread's stack for N seconds and
+    returns folded stacks ("a;b;c 42"), the input format of
+    flamegraph.pl, inferno and speedscope.
+
+Metrics are per process: under gunicorn every worker keeps its own, and a
+scrape sees whichever worker answers. Counters only grow, so rates stay
+correct on average.
+
+`scrape` is a stand-in for a local Prometheus. It polls /metrics, parses
+the exposition format (and fails on malformed lines), then prints request
+rates and p50/p90/p99 per series from the bucket deltas, the way
+histogram_quantile() computes them.
+
+Usage:
+  python -m tradingbot.instrumentation scrape http://127.0.0.1:5001/metrics --interval 15
+  python -m tradingbot.instrumentation scrape http://127.0.0.1:5001/metrics --count 1 --raw
+"""
+
+import collections
+import math
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+import psycopg2.extensions
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, registry, name, help, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        if not self.registry.enabled:
+            return
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def lines(self):
+        with self.lock:
+            series = sorted(self.series.items())
+        return [f"{self.name}_total{_labels(self.labelnames, k)} {_number(v)}" for k, v in series]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, *labels):
+        if not self.registry.enabled:
+            return
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.series.get(labels)
+            if counts is None:
+                counts = self.series[labels] = [0] * len(self.buckets) + [0.0]
+            counts[i] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def lines(self):
+        with self.lock:
+            series = sorted((k, list(v)) for k, v in self.series.items())
+        out = []
+        for labels, counts in series:
+            total = 0
+            for le, n in zip(self.buckets, counts):
+                total += n
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', _number(le))])} {total}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(counts[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, labels)} {total}")
+        return out
+
+
+class Gauge(Metric):
+    """Value read from fn() at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, registry, name, help, fn):
+        super().__init__(registry, name, help)
+        self.fn = fn
+
+    def lines(self):
+        return [f"{self.name} {_number(self.fn())}"]
+
+
+class Registry:
+    """Metrics of one process; a disabled registry ignores every observation"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(self, name, help, labelnames, buckets))
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(self, name, help, labelnames))
+
+    def gauge(self, name, help, fn):
+        return self._add(Gauge(self, name, help, fn))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.header() + metric.lines()
+        return '\n'.join(lines) + '\n'
+
+
+def timed_cursor(on_query):
+    """psycopg2 cursor class calling on_query(cursor, seconds) after each execute"""
+
+    class TimedCursor(psycopg2.extensions.cursor):
+        def execute(self, query, vars=None):
+            t0 = time.perf_counter()
+            try:
+                return super().execute(query, vars)
+            finally:
+                on_query(self, time.perf_counter() - t0)
+
+        def executemany(self, query, vars_list):
+            t0 = time.perf_counter()
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                on_query(self, time.perf_counter() - t0)
+
+    return TimedCursor
+
+
+# ============================================================
+# Sampling profiler
+# ============================================================
+
+def _frame_name(code):
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds, interval=0.005):
+    """
+    Sample every other thread's stack for `seconds`
+
+    Returns Counter {folded stack: samples}; the root frame is the thread
+    name, so request threads, the SSE hub and gunicorn's own threads stay
+    apart in the flamegraph.
+    """
+    me = threading.get_ident()
+    stacks = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            frames.append(names.get(ident, f"thread-{ident}"))
+            stacks[';'.join(reversed(frames))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def folded(stacks):
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+# ============================================================
+# Prometheus stand-in
+# ============================================================
+
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})?\s+(\S+)(\s+-?\d+)?$')
+LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"\s*(,|$)')
+
+
+def parse_metrics(text):
+    """Exposition text -> {(name, ((label, value), ...)): float}; ValueError on bad lines"""
+    samples = {}
+    for n, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        m = SAMPLE_RE.match(line)
+        if not m:
+            raise ValueError(f"line {n}: not a sample: {line!r}")
+        name, _, body, value = m.group(1), m.group(2), m.group(3), m.group(4)
+        labels, pos = [], 0
+        while body and pos < len(body):
+            lm = LABEL_RE.match(body, pos)
+            if not lm:
+                raise ValueError(f"line {n}: bad labels: {body!r}")
+            raw = lm.group(2)
+            labels.append((lm.group(1), raw.replace('\\n', '\n').replace('\\"', '"').replace('\\\\', '\\')))
+            pos = lm.end()
+        samples[(name, tuple(labels))] = float(value)
+    return samples
+
+
+def histogram_quantile(q, buckets):
+    """q-quantile from [(le, cumulative count)], linear within a bucket like PromQL"""
+    buckets = sorted(buckets)
+    total = buckets[-1][1] if buckets else 0
+    if total <= 0:
+        return None
+    rank = q * total
+    lower, below = 0.0, 0.0
+    for le, count in buckets:
+        if count >= rank:
+            if le == math.inf:
+                return lower
+            return lower + (le - lower) * (rank - below) / (count - below) if count > below else le
+        lower, below = le, count
+    return lower
+
+
+def histogram_deltas(current, previous=None):
+    """{(name, labels without le): [(le, count delta)]} for every *_bucket series"""
+    series = collections.defaultdict(list)
+    for (name, labels), value in current.items():
+        if not name.endswith('_bucket'):
+            continue
+        le = dict(labels)['le']
+        rest = tuple(kv for kv in labels if kv[0] != 'le')
+        before = (previous or {}).get((name, labels), 0.0)
+        series[(name[:-len('_bucket')], rest)].append((float(le), value - before))
+    return series
+
+
+def print_scrape(current, previous, elapsed):
+    for (name, labels), buckets in sorted(histogram_deltas(current, previous).items()):
+        count = max(c for _, c in buckets)
+        if not count:
+            continue
+        label = ','.join(f"{k}={v}" for k, v in labels)
+        qs = ' '.join(f"p{int(q * 100)} {histogram_quantile(q, buckets) * 1000:7.1f}ms" for q in (0.5, 0.9, 0.99))
+        rate = f"{count / elapsed:6.2f}/s" if elapsed else f"{count:6.0f}  "
+        print(f"   {name:<36} {label:<48} {rate} {qs}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import requests
+
+    parser = argparse.ArgumentParser(description='Metrics tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    scrape_p = sub.add_parser('scrape', help='Poll a /metrics endpoint like Prometheus would')
+    scrape_p.add_argument('url')
+    scrape_p.add_argument('--interval', type=float, default=15.0, help='Seconds between scrapes (default: 15)')
+    scrape_p.add_argument('--count', type=int, help='Stop after N scrapes (default: run until Ctrl-C)')
+    scrape_p.add_argument('--raw', action='store_true', help='Print the parsed samples as well')
+    args = parser.parse_args()
+
+    previous, last, n = None, None, 0
+    try:
+        while args.count is None or n < args.count:
+            if n:
+                time.sleep(args.interval)
+            t0 = time.monotonic()
+            response = requests.get(args.url, timeout=10)
+            response.raise_for_status()
+            current = parse_metrics(response.text)
+            n += 1
+            elapsed = t0 - last if last is not None else None
+            window = f"last {elapsed:.0f}s" if elapsed else 'since start'
+            print(f"📈 {time.strftime('%H:%M:%S')} {len(current)} samples ({window}), "
+                  f"{(time.monotonic() - t0) * 1000:.0f}ms")
+            if args.raw:
+                for (name, labels), value in sorted(current.items()):
+                    print(f"   {name}{dict(labels) or ''} {value:g}")
+            print_scrape(current, previous, elapsed)
+            previous, last = current, t0
+    except KeyboardInterrupt:
+        pass
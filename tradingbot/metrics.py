@@ -0,0 +1,220 @@
+"""
+Backtest performance metrics on NumPy arrays
+
+Every equity-curve function works along the last axis, so one call
+evaluates a single curve (1-D) or a whole sweep (2-D, one curve per row).
+Curves of different lengths can share a matrix by padding the end with
+NaN: statistics skip NaNs.
+
+Conventions: returns are simple per-bar returns; drawdowns are negative
+fractions (-0.12 = 12% below the running peak); annualization uses
+`periods_per_year` (252 for daily bars; periods_per_year('1w') etc.).
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from tradingbot.resample import BAR_MINUTES, normalize_timeframe
+
+TRADING_DAYS = 252
+
+
+def periods_per_year(timeframe):
+    """Bars per year for a timeframe (regular session, 252 days)"""
+    return TRADING_DAYS * BAR_MINUTES['1d'] / BAR_MINUTES[normalize_timeframe(timeframe)]
+
+
+def _last_valid(a):
+    """Last non-NaN value along the last axis"""
+    a = np.asarray(a, dtype=float)
+    valid = ~np.isnan(a)
+    idx = a.shape[-1] - 1 - np.argmax(valid[..., ::-1], axis=-1)
+    return np.take_along_axis(a, idx[..., None], axis=-1)[..., 0]
+
+
+def returns(equity):
+    """Per-bar simple returns (one shorter than equity)"""
+    equity = np.asarray(equity, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return equity[..., 1:] / equity[..., :-1] - 1
+
+
+def total_return(equity, initial=None):
+    """Final / initial - 1 (initial defaults to the first value)"""
+    equity = np.asarray(equity, dtype=float)
+    start = equity[..., 0] if initial is None else initial
+    return _last_valid(equity) / start - 1
+
+
+def cagr(equity, periods_per_year=TRADING_DAYS, initial=None):
+    """Compound annual growth rate over the curve's length"""
+    equity = np.asarray(equity, dtype=float)
+    n = np.sum(~np.isnan(equity), axis=-1) - (1 if initial is None else 0)
+    years = np.maximum(n, 1) / periods_per_year
+    with np.errstate(invalid='ignore'):
+        return (1 + total_return(equity, initial)) ** (1 / years) - 1
+
+
+def sharpe(rets, periods_per_year=TRADING_DAYS, risk_free=0.0):
+    """Annualized Sharpe ratio of per-bar returns (0 where volatility is 0)"""
+    excess = np.asarray(rets, dtype=float) - risk_free / periods_per_year
+    std = np.nanstd(excess, axis=-1, ddof=1) if excess.shape[-1] > 1 else np.zeros(excess.shape[:-1])
+    mean = np.nanmean(excess, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+
+
+def sortino(rets, periods_per_year=TRADING_DAYS, risk_free=0.0):
+    """Annualized Sortino ratio (downside deviation below the risk-free rate)"""
+    excess = np.asarray(rets, dtype=float) - risk_free / periods_per_year
+    downside = np.sqrt(np.nanmean(np.minimum(excess, 0.0) ** 2, axis=-1))
+    mean = np.nanmean(excess, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(downside > 0, mean / downside * np.sqrt(periods_per_year), 0.0)
+
+
+def drawdown(equity):
+    """Drawdown series: equity / running peak - 1 (NaN stays NaN)"""
+    equity = np.asarray(equity, dtype=float)
+    peak = np.fmax.accumulate(equity, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return equity / peak - 1
+
+
+def max_drawdown(equity):
+    """Deepest peak-to-trough decline (the trough always follows its peak)"""
+    return np.nanmin(drawdown(equity), axis=-1)
+
+
+def max_drawdown_point(equity):
+    """
+    Deepest trough of one curve: (dollars, fraction, index)
+
+    Both amounts are negative and measured at the same bar, from the
+    running peak before it.
+    """
+    equity = np.asarray(equity, dtype=float)
+    dd = drawdown(equity)
+    trough = int(np.nanargmin(dd))
+    return float(dd[trough] * np.nanmax(equity[:trough + 1])), float(dd[trough]), trough
+
+
+def drawdown_duration(equity):
+    """
+    Bars since the last peak, per bar
+
+    The maximum along the last axis is the longest time under water,
+    including a drawdown still open at the end.
+    """
+    equity = np.asarray(equity, dtype=float)
+    at_peak = ~(drawdown(equity) < 0)
+    idx = np.broadcast_to(np.arange(equity.shape[-1]), equity.shape)
+    last_peak = np.maximum.accumulate(np.where(at_peak, idx, 0), axis=-1)
+    return idx - last_peak
+
+
+def max_drawdown_duration(equity):
+    return drawdown_duration(equity).max(axis=-1)
+
+
+def win_rate(pnl):
+    """Share of trades with positive P&L (NaN-padded rows allowed)"""
+    pnl = np.asarray(pnl, dtype=float)
+    n = np.sum(~np.isnan(pnl), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, np.sum(pnl > 0, axis=-1) / np.maximum(n, 1), 0.0)
+
+
+def profit_factor(pnl):
+    """Gross profit / gross loss (inf without losing trades, 0 without trades)"""
+    pnl = np.asarray(pnl, dtype=float)
+    gains = np.nansum(np.where(pnl > 0, pnl, 0.0), axis=-1)
+    losses = -np.nansum(np.where(pnl < 0, pnl, 0.0), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(losses > 0, gains / losses, np.where(gains > 0, np.inf, 0.0))
+
+
+def exposure(gross, equity):
+    """Average share of equity held in positions"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nanmean(np.asarray(gross, dtype=float) / np.asarray(equity, dtype=float), axis=-1)
+
+
+def turnover(traded_value, equity, periods_per_year=TRADING_DAYS):
+    """
+    Annualized turnover: traded value (buys + sells) over average equity,
+    per year. 2.0 = the book was bought and sold once a year. traded_value
+    may be per bar or per trade; only its total matters.
+    """
+    traded_value = np.asarray(traded_value, dtype=float)
+    n = np.sum(~np.isnan(np.asarray(equity, dtype=float)), axis=-1)
+    years = np.maximum(n, 1) / periods_per_year
+    return np.nansum(traded_value, axis=-1) / np.nanmean(equity, axis=-1) / years
+
+
+# --- Rolling windows (result[..., i] covers bars i .. i + window - 1) ---
+
+def _windows(a, window):
+    return sliding_window_view(np.asarray(a, dtype=float), window, axis=-1)
+
+
+def rolling_return(equity, window):
+    w = _windows(equity, window)
+    return w[..., -1] / w[..., 0] - 1
+
+
+def rolling_volatility(rets, window, periods_per_year=TRADING_DAYS):
+    return np.nanstd(_windows(rets, window), axis=-1, ddof=1) * np.sqrt(periods_per_year)
+
+
+def rolling_sharpe(rets, window, periods_per_year=TRADING_DAYS):
+    return sharpe(_windows(rets, window), periods_per_year)
+
+
+def rolling_sortino(rets, window, periods_per_year=TRADING_DAYS):
+    return sortino(_windows(rets, window), periods_per_year)
+
+
+def rolling_max_drawdown(equity, window):
+    """Worst drawdown that starts and ends inside each window"""
+    return max_drawdown(_windows(equity, window))
+
+
+# --- Summary ---
+
+def summarize(equity, periods_per_year=TRADING_DAYS, initial=None, trade_pnl=None,
+              gross=None, traded_value=None):
+    """
+    All headline metrics as a dict (floats for one curve, arrays for a batch)
+
+    initial: starting capital when equity starts after the first bar;
+    trade_pnl: closed-trade P&L (rows NaN-padded for a batch); gross:
+    position value per bar; traded_value: buy + sell values (see turnover).
+    """
+    equity = np.asarray(equity, dtype=float)
+    curve = equity if initial is None else np.concatenate(
+        [np.broadcast_to(np.asarray(initial, dtype=float)[..., None], equity.shape[:-1] + (1,)), equity], axis=-1)
+    rets = returns(curve)
+    out = {
+        'total_return': total_return(curve),
+        'cagr': cagr(curve, periods_per_year),
+        'sharpe': sharpe(rets, periods_per_year),
+        'sortino': sortino(rets, periods_per_year),
+        'volatility': np.nanstd(rets, axis=-1, ddof=1) * np.sqrt(periods_per_year) if rets.shape[-1] > 1
+        else np.zeros(rets.shape[:-1]),
+        'max_drawdown': max_drawdown(curve),
+        'max_drawdown_duration': max_drawdown_duration(curve),
+        'bars': np.sum(~np.isnan(equity), axis=-1),
+    }
+    if trade_pnl is not None:
+        pnl = np.asarray(trade_pnl, dtype=float)
+        out['trades'] = np.sum(~np.isnan(pnl), axis=-1)
+        out['win_rate'] = win_rate(pnl)
+        out['profit_factor'] = profit_factor(pnl)
+    if gross is not None:
+        out['exposure'] = exposure(gross, equity)
+    if traded_value is not None:
+        out['turnover'] = turnover(traded_value, equity, periods_per_year)
+    if equity.ndim == 1:
+        out = {k: v.item() if isinstance(v, (np.ndarray, np.generic)) else v for k, v in out.items()}
+    return out
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Cold storage for old article content
+
+Once mark_articles_analyzed has run, an article's content is only read by
+backtests that want raw text. The archival job moves the content of
+analyzed articles older than N days into news_archive_chunks (migration
+010): up to `chunk_size` articles of one symbol, in publish order, packed as
+one JSON document and compressed together, which compresses far better than
+per-row TOAST (headlines and boilerplate repeat within a symbol). The
+news_articles row stays, slim: title, url (search results link to it),
+symbol, published_at, source and the article_id that collector dedup relies
+on, plus archive_chunk_id. Chunks still carry a copy of the url.
+
+Each chunk is written and its rows slimmed in one transaction, so a crash
+leaves every article either hot or archived. rehydrate_articles() returns
+full rows for a symbol/date range or ids, decompressing each chunk once.
+
+zlib (stdlib) is the codec; the codec column leaves room for another.
+
+Usage:
+  python -m tradingbot.news_archive run --days 30 --vacuum
+  python -m tradingbot.news_archive run --days 7 --symbols NVDA --dry-run
+  python -m tradingbot.news_archive stats
+  python -m tradingbot.news_archive show --symbol NVDA --from 2025-01-01 --to 2025-01-31
+"""
+
+import json
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from tradingbot.config import get_db_conn
+
+ARCHIVE_DAYS = 30
+CHUNK_SIZE = 500
+CODEC = 'zlib'
+
+
+def pack_chunk(articles, level=9):
+    """[{'id', 'content', 'url'}] -> (codec, raw size, compressed bytes)"""
+    raw = json.dumps({str(a['id']): [a['content'], a['url']] for a in articles},
+                     ensure_ascii=False, separators=(',', ':')).encode()
+    return CODEC, len(raw), zlib.compress(raw, level)
+
+
+def unpack_chunk(codec, payload):
+    """-> {id: (content, url)}"""
+    if codec != 'zlib':
+        raise ValueError(f"Unknown archive codec: {codec}")
+    data = json.loads(zlib.decompress(bytes(payload)))
+    return {int(k): tuple(v) for k, v in data.items()}
+
+
+def archive_symbol(conn, symbol, cutoff, chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Archive analyzed articles of one symbol published before cutoff
+
+    Returns (articles, raw bytes, compressed bytes). With dry_run the
+    chunks are built and measured but nothing is written.
+    """
+    articles = raw_total = packed_total = 0
+    after = (datetime.min.replace(tzinfo=timezone.utc), 0)
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, content, url, published_at
+                FROM news_articles
+                WHERE symbol = %s AND analyzed AND archive_chunk_id IS NULL
+                  AND published_at < %s AND (published_at, id) > (%s, %s)
+                ORDER BY published_at, id
+                LIMIT %s
+                """,
+                (symbol, cutoff, after[0], after[1], chunk_size),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                break
+            batch = [{'id': r[0], 'content': r[1], 'url': r[2]} for r in rows]
+            codec, raw_bytes, payload = pack_chunk(batch)
+            if not dry_run:
+                cur.execute(
+                    """
+                    INSERT INTO news_archive_chunks
+                        (symbol, first_published_at, last_published_at, article_count, codec, raw_bytes, payload)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    RETURNING id
+                    """,
+                    (symbol, rows[0][3], rows[-1][3], len(rows), codec, raw_bytes, payload),
+                )
+                chunk_id = cur.fetchone()[0]
+                cur.execute(
+                    "UPDATE news_articles SET content = NULL, archive_chunk_id = %s WHERE id = ANY(%s)",
+                    (chunk_id, [r[0] for r in rows]),
+                )
+        if not dry_run:
+            conn.commit()
+        articles += len(rows)
+        raw_total += raw_bytes
+        packed_total += len(payload)
+        after = (rows[-1][3], rows[-1][0])
+        if len(rows) < chunk_size:
+            break
+    if dry_run:
+        conn.rollback()
+    return articles, raw_total, packed_total
+
+
+def run_archive(conn, days=ARCHIVE_DAYS, symbols=None, chunk_size=CHUNK_SIZE, dry_run=False, vacuum=False):
+    """Archive every symbol; returns {symbol: (articles, raw bytes, compressed bytes)}"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    if not symbols:
+        with conn.cursor() as cur:
+            cur.execute("SELECT DISTINCT symbol FROM news_articles ORDER BY symbol")
+            symbols = [r[0] for r in cur.fetchall()]
+        conn.commit()
+
+    results = {}
+    for symbol in symbols:
+        results[symbol] = archive_symbol(conn, symbol.upper(), cutoff, chunk_size, dry_run)
+
+    if vacuum and not dry_run and any(r[0] for r in results.values()):
+        # Make the freed heap/TOAST space reusable and refresh planner stats
+        autocommit = conn.autocommit
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("VACUUM (ANALYZE) news_articles")
+        finally:
+            conn.autocommit = autocommit
+    return results
+
+
+def rehydrate_articles(conn, ids=None, symbol=None, start=None, end=None):
+    """
+    Full article rows (content and url restored) by ids or symbol/date range
+
+    start/end are aware datetimes, end exclusive. Rows come back in publish
+    order as dicts with the news_articles columns; hot rows are returned
+    as stored, archived ones read their chunk (one query, each chunk
+    decompressed once).
+    """
+    where, params = [], []
+    if ids is not None:
+        where.append("id = ANY(%s)")
+        params.append(list(ids))
+    if symbol:
+        where.append("symbol = %s")
+        params.append(symbol.upper())
+    if start:
+        where.append("published_at >= %s")
+        params.append(start)
+    if end:
+        where.append("published_at < %s")
+        params.append(end)
+    if not where:
+        raise ValueError("rehydrate_articles needs ids or a symbol/date range")
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT id, article_id, symbol, title, content, url, published_at, source, analyzed, archive_chunk_id
+            FROM news_articles
+            WHERE {' AND '.join(where)}
+            ORDER BY published_at, id
+            """,
+            params,
+        )
+        rows = cur.fetchall()
+
+        chunk_ids = sorted({r[9] for r in rows if r[9] is not None})
+        restored = {}
+        if chunk_ids:
+            cur.execute("SELECT codec, payload FROM news_archive_chunks WHERE id = ANY(%s)", (chunk_ids,))
+            for codec, payload in cur.fetchall():
+                restored.update(unpack_chunk(codec, payload))
+
+    articles = []
+    for r in rows:
+        content, url = restored.get(r[0], (r[4], r[5]))
+        articles.append({
+            'id': r[0],
+            'article_id': r[1],
+            'symbol': r[2],
+            'title': r[3],
+            'content': content,
+            'url': url,
+            'published_at': r[6],
+            'source': r[7],
+            'analyzed': r[8],
+            'archived': r[9] is not None,
+        })
+    return articles
+
+
+def print_stats(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE archive_chunk_id IS NOT NULL),
+                   pg_total_relation_size('news_articles')
+            FROM news_articles
+            """
+        )
+        total, archived, hot_size = cur.fetchone()
+        cur.execute(
+            """
+            SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(octet_length(payload)), 0),
+                   pg_total_relation_size('news_archive_chunks')
+            FROM news_archive_chunks
+            """
+        )
+        chunks, raw_bytes, packed, cold_size = cur.fetchone()
+    ratio = raw_bytes / packed if packed else 0
+    print(f"🗞️  news_articles: {total:,} rows ({archived:,} archived), {hot_size / 1e6:.1f} MB on disk")
+    print(f"📦 news_archive_chunks: {chunks:,} chunks, {raw_bytes / 1e6:.1f} MB raw -> "
+          f"{packed / 1e6:.1f} MB ({ratio:.1f}x), {cold_size / 1e6:.1f} MB on disk")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from tradingbot.news_search import parse_bound
+
+    parser = argparse.ArgumentParser(description='Archive old article content into compressed chunks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_p = sub.add_parser('run', help='Archive analyzed articles older than --days')
+    run_p.add_argument('--days', type=int, default=ARCHIVE_DAYS, help=f'Age threshold (default: {ARCHIVE_DAYS})')
+    run_p.add_argument('--symbols', nargs='+', help='Symbols (default: all in news_articles)')
+    run_p.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help=f'Articles per chunk (default: {CHUNK_SIZE})')
+    run_p.add_argument('--dry-run', action='store_true', help='Measure compression without writing')
+    run_p.add_argument('--vacuum', action='store_true', help='VACUUM (ANALYZE) news_articles afterwards')
+
+    sub.add_parser('stats', help='Hot vs archived rows and sizes')
+
+    show_p = sub.add_parser('show', help='Rehydrate articles and print them as JSON lines')
+    show_p.add_argument('--ids', nargs='+', type=int)
+    show_p.add_argument('--symbol')
+    show_p.add_argument('--from', dest='start', help='ISO date/datetime')
+    show_p.add_argument('--to', dest='end', help='ISO date/datetime, a date includes the whole day')
+
+    args = parser.parse_args()
+
+    conn = get_db_conn()
+    try:
+        if args.command == 'run':
+            t0 = time.perf_counter()
+            results = run_archive(conn, args.days, args.symbols, args.chunk_size, args.dry_run, args.vacuum)
+            for symbol, (count, raw_bytes, packed) in results.items():
+                if count:
+                    print(f"✅ {symbol}: {count:,} articles, {raw_bytes / 1e6:.2f} MB -> {packed / 1e6:.2f} MB")
+            total = sum(r[0] for r in results.values())
+            verb = 'would archive' if args.dry_run else 'archived'
+            print(f"📦 {verb} {total:,} articles in {time.perf_counter() - t0:.1f}s")
+        elif args.command == 'stats':
+            print_stats(conn)
+        else:
+            if not (args.ids or args.symbol or args.start or args.end):
+                parser.error('show needs --ids or --symbol/--from/--to')
+            articles = rehydrate_articles(conn, args.ids, args.symbol, parse_bound(args.start),
+                                          parse_bound(args.end, end=True))
+            for a in articles:
+                print(json.dumps(dict(a, published_at=a['published_at'].isoformat()), ensure_ascii=False))
+    finally:
+        conn.close()
@@ -0,0 +1,165 @@
+"""
+Full-text and recency search over news_articles
+
+Keyword matching uses the generated search_vector column and its GIN index
+(migration 009); queries go through websearch_to_tsquery, so the syntax is
+the familiar one: `guidance cut`, `"price target"`, `nvidia -gaming`,
+`earnings or revenue`. Results are newest first and paginated by keyset on
+(published_at, id): a page is an index range scan no matter how deep it is,
+and new articles arriving between pages do not shift or repeat rows.
+Highlights (ts_headline) are computed for the returned page only.
+
+Usage:
+  python -m tradingbot.news_search guidance cut --symbol NVDA
+  python -m tradingbot.news_search --symbol TSLA --from 2026-10-01 --to 2026-10-07 --limit 50
+"""
+
+import base64
+import time
+from datetime import datetime, timedelta
+
+from tradingbot.snapshots import MARKET_TZ
+
+MAX_LIMIT = 100
+HEADLINE_OPTIONS = 'MaxFragments=2, MaxWords=30, MinWords=10, FragmentDelimiter=" … "'
+SNIPPET_CHARS = 240
+
+
+def encode_cursor(published_at, article_pk):
+    raw = f"{published_at.isoformat()}|{article_pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Opaque cursor -> (published_at, id); ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        published_at, article_pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(published_at), int(article_pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def parse_bound(value, end=False, tz=MARKET_TZ):
+    """
+    ISO date or datetime -> aware datetime (naive = market tz)
+
+    A bare date as the end bound covers that whole day (exclusive next midnight).
+    """
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if end and len(value) == 10:
+        dt += timedelta(days=1)
+    return dt if dt.tzinfo else dt.replace(tzinfo=tz)
+
+
+def search_news(conn, query=None, symbol=None, start=None, end=None, limit=20, cursor=None,
+                highlight=('<mark>', '</mark>')):
+    """
+    One page of matching articles, newest first
+
+    start/end: aware datetimes (end exclusive); cursor: next_cursor of the
+    previous page. Returns {'articles': [...], 'next_cursor': str | None};
+    title_highlight / snippet wrap matched terms in the highlight markers and
+    are plain (unescaped) text otherwise.
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    query = (query or '').strip() or None
+    where = ["published_at IS NOT NULL"]
+    params = {'q': query, 'limit': limit + 1}
+    if query:
+        where.append("search_vector @@ websearch_to_tsquery('english', %(q)s)")
+    if symbol:
+        where.append("symbol = %(symbol)s")
+        params['symbol'] = symbol.upper()
+    if start:
+        where.append("published_at >= %(start)s")
+        params['start'] = start
+    if end:
+        where.append("published_at < %(end)s")
+        params['end'] = end
+    if cursor:
+        params['after_ts'], params['after_id'] = decode_cursor(cursor)
+        where.append("(published_at, id) < (%(after_ts)s, %(after_id)s)")
+
+    if query:
+        start_sel, stop_sel = highlight
+        params['title_opts'] = f'HighlightAll=true, StartSel="{start_sel}", StopSel="{stop_sel}"'
+        params['snippet_opts'] = f'{HEADLINE_OPTIONS}, StartSel="{start_sel}", StopSel="{stop_sel}"'
+        highlights = """
+            ts_headline('english', title, websearch_to_tsquery('english', %(q)s), %(title_opts)s),
+            ts_headline('english', coalesce(content, ''), websearch_to_tsquery('english', %(q)s), %(snippet_opts)s)
+        """
+    else:
+        params['snippet_chars'] = SNIPPET_CHARS
+        highlights = "title, left(coalesce(content, ''), %(snippet_chars)s)"
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            WITH page AS (
+                SELECT id, article_id, symbol, title, content, url, published_at, source, analyzed
+                FROM news_articles
+                WHERE {' AND '.join(where)}
+                ORDER BY published_at DESC, id DESC
+                LIMIT %(limit)s
+            )
+            SELECT id, article_id, symbol, title, url, published_at, source, analyzed, {highlights}
+            FROM page
+            ORDER BY published_at DESC, id DESC
+            """,
+            params,
+        )
+        rows = cur.fetchall()
+
+    next_cursor = encode_cursor(rows[limit - 1][5], rows[limit - 1][0]) if len(rows) > limit else None
+    return {
+        'articles': [{
+            'id': r[0],
+            'article_id': r[1],
+            'symbol': r[2],
+            'title': r[3],
+            'url': r[4],
+            'published_at': r[5].isoformat(),
+            'source': r[6],
+            'analyzed': r[7],
+            'title_highlight': r[8],
+            'snippet': r[9],
+        } for r in rows[:limit]],
+        'next_cursor': next_cursor,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from tradingbot.config import get_db_conn
+
+    parser = argparse.ArgumentParser(description='Search stored news articles')
+    parser.add_argument('query', nargs='*', help='Keywords (websearch syntax: "phrase", -word, or)')
+    parser.add_argument('--symbol')
+    parser.add_argument('--from', dest='start', help='ISO date/datetime (market tz if naive)')
+    parser.add_argument('--to', dest='end', help='ISO date/datetime, a date includes the whole day')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--cursor', help='next_cursor from a previous page')
+    args = parser.parse_args()
+
+    conn = get_db_conn()
+    try:
+        t0 = time.perf_counter()
+        result = search_news(conn, ' '.join(args.query), args.symbol, parse_bound(args.start),
+                             parse_bound(args.end, end=True), args.limit, args.cursor, highlight=('**', '**'))
+        took = (time.perf_counter() - t0) * 1000
+    finally:
+        conn.close()
+
+    for a in result['articles']:
+        flag = '✅' if a['analyzed'] else '🆕'
+        print(f"{flag} {a['published_at'][:16]} {a['symbol']:<6} {a['title_highlight']}")
+        print(f"   {a['snippet'][:300]}")
+        if a['url']:
+            print(f"   {a['url']}")
+    print(f"\n🔎 {len(result['articles'])} articles in {took:.0f}ms")
+    if result['next_cursor']:
+        print(f"   next page: --cursor {result['next_cursor']}")
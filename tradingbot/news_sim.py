@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Local stub of the news / social APIs used by tradingbot.collectors
+
+Serves synthetic articles, newest first, in each upstream's shape:
+  GET  /api/news                  EODHD (s=SYM.US, offset, limit, from, to)
+  GET  /api/v1/company-news       Finnhub (symbol, from, to)
+  GET  /search.json               Reddit search (q="SYM stock", limit, after)
+  POST /sim/publish               {"symbol", "count", "sources"?}: new items now
+  GET  /sim/state                 item and request counts per endpoint
+
+Latency, a per-minute rate limit (429) and faults work as in alpaca_sim.
+
+Usage:
+  python -m tradingbot.news_sim --symbols NVDA AAPL --history 500 --port 5056
+  export EODHD_BASE_URL=http://127.0.0.1:5056 FINNHUB_BASE_URL=http://127.0.0.1:5056 \\
+         REDDIT_BASE_URL=http://127.0.0.1:5056
+"""
+
+import bisect
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from tradingbot.alpaca_sim import FaultInjector, RateLimiter
+
+NEWS_SIM_CONFIG = {
+    'latency_ms': 0.0,
+    'rate_limit_per_min': 0,     # 0 disables
+    'error_rate': 0.0,
+    'seed': 42,
+}
+SOURCES = ('eodhd', 'finnhub', 'reddit')
+
+
+class NewsFeed:
+    """Per-(source, symbol) item lists, kept sorted by publish time"""
+
+    def __init__(self, seed=42):
+        self.items = {}      # (source, symbol) -> [(ts, seq, item)]
+        self.seq = 0
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def publish(self, symbol, count=1, sources=SOURCES, at=None, spread_seconds=0):
+        """Add count items per source, ending at `at` (default now)"""
+        end = (at or datetime.now(timezone.utc)).timestamp()
+        with self.lock:
+            for source in sources:
+                feed = self.items.setdefault((source, symbol), [])
+                for k in range(count):
+                    self.seq += 1
+                    ts = int(end - (count - 1 - k) * spread_seconds / max(count, 1))
+                    bisect.insort(feed, (ts, self.seq, self._item(source, symbol, ts, self.seq)))
+
+    def _item(self, source, symbol, ts, seq):
+        words = self.random.choice(['beats estimates', 'cuts guidance', 'announces buyback',
+                                    'faces probe', 'launches product', 'upgraded', 'downgraded'])
+        title = f"{symbol} {words} #{seq}"
+        return {'id': f"{source}{seq}", 'ts': ts, 'title': title, 'body': f"{title}. Synthetic story {seq}."}
+
+    def newest_first(self, source, symbol, since=None, until=None):
+        with self.lock:
+            feed = list(self.items.get((source, symbol), ()))
+        lo = bisect.bisect_left(feed, (since,)) if since is not None else 0
+        hi = bisect.bisect_right(feed, (until, float('inf'))) if until is not None else len(feed)
+        return [entry[2] for entry in reversed(feed[lo:hi])]
+
+    def counts(self):
+        with self.lock:
+            return {f"{src}/{sym}": len(v) for (src, sym), v in sorted(self.items.items())}
+
+
+def _day_start(value):
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()) if value else None
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class NewsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'NewsSim/1.0'
+
+    ROUTES = [
+        ('GET', r'^/api/news$', 'h_eodhd'),
+        ('GET', r'^/api/v1/company-news$', 'h_finnhub'),
+        ('GET', r'^/search\.json$', 'h_reddit'),
+        ('GET', r'^/sim/state$', 'h_sim_state'),
+        ('POST', r'^/sim/publish$', 'h_sim_publish'),
+    ]
+    COMPILED = [(m, re.compile(p), h) for m, p, h in ROUTES]
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status, payload=None):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        self.query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        server = self.server
+
+        if server.config['latency_ms']:
+            time.sleep(server.config['latency_ms'] / 1000.0)
+        if not path.startswith('/sim/'):
+            server.calls[path] += 1
+            if not server.limiter.allow():
+                return self._send(429, {'error': 'rate limit exceeded'})
+            fault = server.faults.check(method, path)
+            if fault:
+                return self._send(fault, {'error': 'injected fault'})
+
+        for route_method, regex, handler in self.COMPILED:
+            if route_method == method and regex.match(path):
+                try:
+                    return getattr(self, handler)()
+                except (ValueError, KeyError, TypeError) as e:
+                    return self._send(422, {'error': str(e)})
+        return self._send(404, {'error': 'endpoint not found'})
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    # --- Upstream shapes ---
+
+    def h_eodhd(self):
+        symbol = self.query['s'].split('.')[0].upper()
+        offset, limit = int(self.query.get('offset', 0)), int(self.query.get('limit', 50))
+        until = _day_start(self.query.get('to'))
+        items = self.server.feed.newest_first('eodhd', symbol, _day_start(self.query.get('from')),
+                                              until + 86399 if until is not None else None)
+        self._send(200, [{
+            'date': _iso(it['ts']), 'title': it['title'], 'content': it['body'],
+            'link': f"https://eodhd.com/financial-news/{it['id']}", 'symbols': [f'{symbol}.US'],
+            'tags': [], 'sentiment': {},
+        } for it in items[offset:offset + limit]])
+
+    def h_finnhub(self):
+        symbol = self.query['symbol'].upper()
+        until = _day_start(self.query.get('to'))
+        items = self.server.feed.newest_first('finnhub', symbol, _day_start(self.query.get('from')),
+                                              until + 86399 if until is not None else None)
+        self._send(200, [{
+            'category': 'company', 'datetime': it['ts'], 'headline': it['title'], 'id': int(it['id'][7:]),
+            'related': symbol, 'source': 'SimWire', 'summary': it['body'],
+            'url': f"https://finnhub.io/sim/{it['id']}",
+        } for it in items])
+
+    def h_reddit(self):
+        symbol = self.query['q'].split()[0].upper()
+        limit = int(self.query.get('limit', 25))
+        items = self.server.feed.newest_first('reddit', symbol)
+        start = 0
+        if self.query.get('after'):
+            ids = [f"t3_{it['id']}" for it in items]
+            start = ids.index(self.query['after']) + 1 if self.query['after'] in ids else len(items)
+        page = items[start:start + limit]
+        after = f"t3_{page[-1]['id']}" if page and start + limit < len(items) else None
+        self._send(200, {'kind': 'Listing', 'data': {'after': after, 'children': [{'kind': 't3', 'data': {
+            'id': it['id'], 'title': it['title'], 'selftext': it['body'], 'created_utc': float(it['ts']),
+            'permalink': f"/r/stocks/comments/{it['id']}/", 'subreddit': 'stocks',
+        }} for it in page]}})
+
+    # --- Control ---
+
+    def h_sim_state(self):
+        self._send(200, {'items': self.server.feed.counts(), 'requests': dict(self.server.calls)})
+
+    def h_sim_publish(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+        self.server.feed.publish(body['symbol'].upper(), int(body.get('count', 1)),
+                                 tuple(body.get('sources') or SOURCES))
+        self._send(200, {'items': self.server.feed.counts()})
+
+
+class NewsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, feed, config=None, verbose=False):
+        super().__init__(address, NewsHandler)
+        self.feed = feed
+        self.config = dict(NEWS_SIM_CONFIG, **(config or {}))
+        self.verbose = verbose
+        self.calls = Counter()
+        self.limiter = RateLimiter(self.config['rate_limit_per_min'])
+        self.faults = FaultInjector(self.config['error_rate'], self.config['seed'])
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_news_sim(symbols=(), history=0, days=3, config=None, host='127.0.0.1', port=0, verbose=False):
+    """
+    Start the stub on a background thread; returns the server
+
+    history items per (source, symbol) are spread over the last `days`
+    days. Add more with server.feed.publish() or POST /sim/publish.
+    """
+    config = dict(NEWS_SIM_CONFIG, **(config or {}))
+    feed = NewsFeed(config['seed'])
+    for symbol in symbols:
+        if history:
+            feed.publish(symbol, history, spread_seconds=days * 86400,
+                         at=datetime.now(timezone.utc) - timedelta(minutes=1))
+    server = NewsServer((host, port), feed, config, verbose)
+    threading.Thread(target=server.serve_forever, name='news-sim', daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local news / social API stub')
+    parser.add_argument('--symbols', nargs='+', default=['NVDA', 'AAPL', 'TSLA', 'GOOGL', 'MSFT', 'AMZN', 'META'])
+    parser.add_argument('--history', type=int, default=100, help='Items per source and symbol (default: 100)')
+    parser.add_argument('--days', type=float, default=3, help='History spread in days (default: 3)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=0, help='Requests per minute, 0 to disable')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = start_news_sim(args.symbols, args.history, args.days, {
+        'latency_ms': args.latency_ms, 'rate_limit_per_min': args.rate_limit, 'error_rate': args.error_rate,
+    }, args.host, args.port, args.verbose)
+    print(f"📰 News stub on {server.url} ({len(args.symbols)} symbols x {args.history} items per source)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
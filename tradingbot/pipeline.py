@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+Dependency-driven sentiment pipeline
+
+Replaces the fixed timers between the collectors (every 4 h), the
+sentiment-analysis workflow (15:00) and the executor (18:00) with one DAG:
+
+  collect -> dedupe -> score -> aggregate      one chain per symbol
+                                    |
+                                 decide -> execute   once, over all symbols
+
+A node is submitted the moment its last input completes, so a symbol whose
+news arrived first is scored while others are still fetching, and decide
+starts as soon as the last aggregate lands. A failed symbol skips only its
+own chain; decide works from every symbol that succeeded (and from the
+sentiment already stored). Every node records its start and duration.
+
+Triggers: `run --interval N` collects every N seconds. In between, the
+scheduler blocks on LISTEN news_articles (migration 011). When any collector,
+including the n8n ones, stores articles, the notified symbols go through
+score -> aggregate -> decide -> execute within seconds, with no polling.
+
+Scoring ports the sentiment-analysis workflow: unanalyzed articles per
+symbol go to the FinBERT /batch service newest first, score_batch at a time
+until the backlog is empty or score_seconds have passed (the rest waits for
+the next run), and one retry follows a backoff. The average is merged
+into today's sentiment_scores row, weighted by article count, so several
+runs a day add up instead of overwriting each other. Only the scored article ids are marked analyzed.
+Deciding and executing reuse tradingbot.executor (idempotent client order
+ids per day). Each run is traced into pipeline_runs (tradingbot.tracing).
+
+Usage:
+  python -m tradingbot.pipeline run --once --dry-run
+  python -m tradingbot.pipeline run --interval 900            # collect every 15 min + LISTEN
+  python -m tradingbot.pipeline run --once --from score --until aggregate --symbols NVDA AAPL
+"""
+
+import select
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import requests
+
+from tradingbot.collectors import fetch_all, load_cursors, save_articles, save_cursors
+from tradingbot.config import SENTIMENT_CONFIG
+from tradingbot.executor import (EXECUTOR_CONFIG, MARKET_TZ, execute_plan, print_summary,
+                                 run_executor, save_positions)
+from tradingbot.tracing import save_trace, trace_rows
+
+PIPELINE_CONFIG = {
+    'workers': 8,
+    'score_batch': 10,           # Articles per FinBERT request (as the workflow)
+    'score_max': 500,            # Unanalyzed articles per symbol considered in one run
+    'score_seconds': 300.0,      # Stop starting new batches for a symbol after this
+    'content_chars': 500,        # Per article text sent to FinBERT
+    'finbert_timeout': 60.0,
+    'finbert_retries': 1,
+    'finbert_backoff': 120.0,    # Seconds before a retry (workflow's Wait_Backoff)
+    'debounce': 2.0,             # Seconds to gather NOTIFYs from one collector run
+    'trade_on_weekends': False,
+}
+
+STAGES = ('collect', 'dedupe', 'score', 'aggregate', 'decide', 'execute')
+
+
+class PipelineError(Exception):
+    """A stage could not produce its output"""
+
+
+class Stage:
+    def __init__(self, name, fn, deps=(), per_symbol=True):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.per_symbol = per_symbol
+
+
+class DagRunner:
+    """
+    Run stages as a DAG over a set of symbols
+
+    Per-symbol stages get one node per symbol, wired to the same symbol's
+    upstream node; a global stage waits for all upstream nodes and receives
+    {symbol: result} of those that succeeded. stage.fn(ctx, symbol, inputs)
+    gets {dep_name: result}; symbol is None for global stages. Stages outside
+    the selected range are left out and their inputs are missing.
+    """
+
+    def __init__(self, stages, workers=PIPELINE_CONFIG['workers']):
+        self.stages = {s.name: s for s in stages}
+        self.order = [s.name for s in stages]
+        self.workers = workers
+
+    def _graph(self, names, symbols):
+        nodes = {}
+        for name in names:
+            stage = self.stages[name]
+            for symbol in (symbols if stage.per_symbol else [None]):
+                deps = []
+                for d in stage.deps:
+                    if d not in names:
+                        continue
+                    if not self.stages[d].per_symbol:
+                        deps.append((d, None))
+                    elif stage.per_symbol:
+                        deps.append((d, symbol))
+                    else:
+                        deps += [(d, s) for s in symbols]
+                nodes[(name, symbol)] = deps
+        return nodes
+
+    def run(self, ctx, symbols, start=None, until=None):
+        """Returns {'results': {(stage, symbol): result}, 'records': [...], 'seconds': float}"""
+        lo = self.order.index(start) if start else 0
+        hi = self.order.index(until) + 1 if until else len(self.order)
+        nodes = self._graph(self.order[lo:hi], list(symbols))
+        waiting = {node: len(deps) for node, deps in nodes.items()}
+        dependents = defaultdict(list)
+        for node, deps in nodes.items():
+            for d in deps:
+                dependents[d].append(node)
+
+        results, status, records = {}, {}, []
+        started_at = datetime.now(timezone.utc)
+        t0 = time.perf_counter()
+
+        def call(node, inputs):
+            started = time.perf_counter()
+            try:
+                result, error = self.stages[node[0]].fn(ctx, node[1], inputs), None
+            except Exception as e:  # One node failing must not stop the others
+                result, error = None, e
+            return result, error, started, time.perf_counter()
+
+        def inputs_for(node):
+            inputs = {}
+            for d in nodes[node]:
+                if status.get(d) != 'ok':
+                    continue
+                if d[1] is not None and node[1] is None:
+                    inputs.setdefault(d[0], {})[d[1]] = results[d]
+                else:
+                    inputs[d[0]] = results[d]
+            return inputs
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+
+            def settle(node, state, result=None, error=None, started=None, ended=None):
+                status[node] = state
+                results[node] = result
+                records.append({
+                    'stage': node[0], 'symbol': node[1], 'status': state,
+                    'start': started - t0 if started else None,
+                    'seconds': ended - started if started else 0.0,
+                    'error': str(error) if error else None,
+                })
+                for child in dependents[node]:
+                    waiting[child] -= 1
+                    if waiting[child]:
+                        continue
+                    dep_states = [status[d] for d in nodes[child]]
+                    if (child[1] is not None and any(s != 'ok' for s in dep_states)) or \
+                            (child[1] is None and 'ok' not in dep_states):
+                        settle(child, 'skipped')
+                    else:
+                        running[pool.submit(call, child, inputs_for(child))] = child
+
+            for node, count in waiting.items():
+                if count == 0:
+                    running[pool.submit(call, node, {})] = node
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    result, error, started, ended = future.result()
+                    settle(node, 'failed' if error else 'ok', result, error, started, ended)
+
+        return {'results': results, 'records': records, 'started_at': started_at,
+                'seconds': time.perf_counter() - t0}
+
+
+class PipelineContext:
+    """What the stages share: DB pool, sources, Alpaca client, settings"""
+
+    def __init__(self, db_pool, sources=(), client=None, config=None, executor_config=None,
+                 dry_run=False, force=False, finbert_url=None):
+        self.db_pool = db_pool
+        self.sources = list(sources)
+        self.client = client
+        self.config = dict(PIPELINE_CONFIG, **(config or {}))
+        self.executor_config = executor_config or EXECUTOR_CONFIG
+        self.dry_run = dry_run
+        self.force = force
+        self.finbert_url = (finbert_url or SENTIMENT_CONFIG['finbert_url']).rstrip('/')
+        self.http = requests.Session()
+        self.run_id = None           # Set per traced run; stored with scores and orders
+
+    @contextmanager
+    def db(self):
+        conn = self.db_pool.getconn()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.db_pool.putconn(conn)
+
+
+# ============================================================
+# Stages
+# ============================================================
+
+def collect_stage(ctx, symbol, inputs):
+    """New rows for one symbol from every source, from its cursors"""
+    with ctx.db() as conn:
+        cursors = load_cursors(conn, [s.name for s in ctx.sources], [symbol])
+        conn.commit()
+    rows, new_cursors, errors = fetch_all(ctx.sources, [symbol], cursors, workers=len(ctx.sources))
+    if errors and len(errors) == len(ctx.sources):
+        raise PipelineError(f"all sources failed: {'; '.join(str(e) for e in errors.values())}")
+    return {'rows': rows, 'cursors': new_cursors, 'errors': errors}
+
+
+def dedupe_stage(ctx, symbol, inputs):
+    """Insert only unseen article ids and advance the cursors (one transaction)"""
+    collected = inputs.get('collect')
+    if not collected:
+        return {'fetched': 0, 'inserted': 0}
+    with ctx.db() as conn:
+        inserted = save_articles(conn, collected['rows'])
+        save_cursors(conn, collected['cursors'])
+        conn.commit()
+    return {'fetched': len(collected['rows']), 'inserted': inserted}
+
+
+def score_texts(ctx, texts):
+    """FinBERT /batch with the workflow's retry; list of {'sentiment', ...}"""
+    attempts = ctx.config['finbert_retries'] + 1
+    for attempt in range(attempts):
+        try:
+            response = ctx.http.post(f"{ctx.finbert_url}/batch", json={'texts': texts},
+                                     timeout=ctx.config['finbert_timeout'])
+            results = response.json().get('results') if response.ok else None
+        except (requests.RequestException, ValueError):
+            results = None
+        if results:
+            return results
+        if attempt < attempts - 1:
+            time.sleep(ctx.config['finbert_backoff'])
+    raise PipelineError(f"FinBERT returned no results after {attempts} attempts")
+
+
+def score_stage(ctx, symbol, inputs):
+    """Unanalyzed articles -> FinBERT in batches, newest first; None when there is nothing new"""
+    with ctx.db() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, title, content, published_at, fetched_at
+                FROM news_articles
+                WHERE symbol = %s AND analyzed = false
+                ORDER BY published_at DESC
+                LIMIT %s
+                """,
+                (symbol, ctx.config['score_max']),
+            )
+            rows = cur.fetchall()
+        conn.commit()
+    if not rows:
+        return None
+    chars = ctx.config['content_chars']
+    batch = ctx.config['score_batch']
+    t0 = time.perf_counter()
+    deadline = t0 + ctx.config['score_seconds']
+    scored, results = [], []
+    for i in range(0, len(rows), batch):
+        if scored and time.perf_counter() >= deadline:
+            break
+        chunk = rows[i:i + batch]
+        try:
+            results += score_texts(ctx, [f"Title: {r[1] or 'N/A'}\nContent: {(r[2] or '')[:chars]}" for r in chunk])
+        except PipelineError:
+            if not scored:
+                raise
+            break  # Keep the batches already scored; the rest stays unanalyzed
+        scored += chunk
+    published = [r[3] for r in scored if r[3] is not None]
+    return {
+        'ids': [r[0] for r in scored],
+        'results': results,
+        'finbert_seconds': time.perf_counter() - t0,
+        'newest_published_at': max(published, default=None),
+        'oldest_published_at': min(published, default=None),
+        'fetched_at': max((r[4] for r in scored if r[4] is not None), default=None),
+    }
+
+
+def aggregate_stage(ctx, symbol, inputs):
+    """Merge the batch average into today's score and mark the batch analyzed"""
+    scored = inputs.get('score')
+    if not scored:
+        return None
+    values = [float(r.get('sentiment') or 0) for r in scored['results']]
+    score = sum(values) / len(values)
+    with ctx.db() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO sentiment_scores (date, symbol, sentiment_score, rationale, article_count, run_id)
+                VALUES (CURRENT_DATE, %s, ROUND(%s::numeric, 4), %s, %s, %s)
+                ON CONFLICT (date, symbol) DO UPDATE SET
+                    sentiment_score = ROUND(
+                        (sentiment_scores.sentiment_score * sentiment_scores.article_count
+                         + EXCLUDED.sentiment_score * EXCLUDED.article_count)
+                        / (sentiment_scores.article_count + EXCLUDED.article_count), 4),
+                    rationale = EXCLUDED.rationale,
+                    article_count = sentiment_scores.article_count + EXCLUDED.article_count,
+                    run_id = EXCLUDED.run_id
+                """,
+                (symbol, score, f"FinBERT avg sentiment: {score:.4f} across {len(values)} articles", len(values),
+                 ctx.run_id),
+            )
+            cur.execute("UPDATE news_articles SET analyzed = true WHERE id = ANY(%s)", (scored['ids'],))
+        conn.commit()
+    return {'score': score, 'articles': len(values)}
+
+
+def decide_stage(ctx, symbol, inputs):
+    """Executor plan when any symbol has new sentiment (or --force)"""
+    if not ctx.force:
+        if not any((inputs.get('aggregate') or {}).values()):
+            return None
+        if datetime.now(MARKET_TZ).weekday() >= 5 and not ctx.config['trade_on_weekends']:
+            return None
+    with ctx.db() as conn:
+        return run_executor(ctx.client, conn, config=ctx.executor_config, dry_run=ctx.dry_run, submit=False)
+
+
+def execute_stage(ctx, symbol, inputs):
+    summary = inputs.get('decide')
+    if not summary or summary['status'] != 'planned':
+        return summary
+    plan = summary['plan']
+    t0 = time.perf_counter()
+    run_date = datetime.now(MARKET_TZ).date()
+    summary['results'] = execute_plan(ctx.client, plan, summary['prices'], run_date, ctx.executor_config)
+    summary['timings']['orders'] = time.perf_counter() - t0
+    with ctx.db() as conn:
+        save_positions(conn, summary['results'], ctx.run_id)
+    summary['status'] = 'executed'
+    return summary
+
+
+def make_runner(workers=PIPELINE_CONFIG['workers']):
+    return DagRunner([
+        Stage('collect', collect_stage),
+        Stage('dedupe', dedupe_stage, ['collect']),
+        Stage('score', score_stage, ['dedupe']),
+        Stage('aggregate', aggregate_stage, ['score']),
+        Stage('decide', decide_stage, ['aggregate'], per_symbol=False),
+        Stage('execute', execute_stage, ['decide'], per_symbol=False),
+    ], workers)
+
+
+# ============================================================
+# Scheduler
+# ============================================================
+
+def print_run(run, trigger):
+    records = run['records']
+    run_id = f" (run {run['run_id']})" if run.get('run_id') else ''
+    print(f"🔁 {trigger}: {len({r['symbol'] for r in records if r['symbol']})} symbols in {run['seconds']:.1f}s{run_id}")
+    for stage in STAGES:
+        rows = [r for r in records if r['stage'] == stage]
+        if not rows:
+            continue
+        counts = defaultdict(int)
+        for r in rows:
+            counts[r['status']] += 1
+        secs = np.array([r['seconds'] for r in rows if r['status'] != 'skipped']) * 1000
+        timing = f"p50 {np.median(secs):.0f}ms, max {secs.max():.0f}ms" if len(secs) else '-'
+        state = ', '.join(f"{k}={v}" for k, v in sorted(counts.items()))
+        print(f"   {stage:<10} {state:<28} {timing}")
+    for r in records:
+        if r['status'] == 'failed':
+            print(f"   ⚠️  {r['stage']}/{r['symbol'] or '-'}: {r['error']}")
+    summary = run['results'].get(('execute', None)) or run['results'].get(('decide', None))
+    if summary:
+        print_summary(summary)
+
+
+def run_traced(ctx, runner, symbols, trigger, start=None, until=None):
+    """One run under a fresh run_id, traced into pipeline_runs (migration 012)"""
+    ctx.run_id = str(uuid.uuid4())
+    try:
+        run = runner.run(ctx, symbols, start, until)
+    finally:
+        run_id, ctx.run_id = ctx.run_id, None
+    run['run_id'] = run_id
+    try:
+        with ctx.db() as conn:
+            save_trace(conn, trace_rows(run_id, trigger, run))
+    except Exception as e:  # Tracing must never stop trading
+        print(f"⚠️  Could not save trace {run_id}: {e}")
+    return run
+
+
+def notified_symbols(listen_conn):
+    """Symbols named by the news_articles NOTIFYs received so far"""
+    listen_conn.poll()
+    symbols = set()
+    while listen_conn.notifies:
+        symbols.update(s for s in listen_conn.notifies.pop(0).payload.split(',') if s)
+    return symbols
+
+
+def serve(ctx, runner, symbols_fn, interval, listen_conn=None, until=None):
+    """
+    Collect every `interval` seconds; in between, run score onwards for the
+    symbols named by news_articles NOTIFYs as they arrive
+    """
+    scores = until is None or STAGES.index(until) >= STAGES.index('score')
+    next_collect = time.monotonic()
+    pending = set()
+    while True:
+        if time.monotonic() >= next_collect:
+            symbols = symbols_fn()
+            print_run(run_traced(ctx, runner, symbols, 'collect', until=until), 'collect')
+            if listen_conn is not None:
+                # Our own dedupe inserts fire the trigger too; those symbols were just scored
+                pending |= notified_symbols(listen_conn) - (set(symbols) if scores else set())
+            next_collect = time.monotonic() + interval
+            continue
+        timeout = max(0.0, next_collect - time.monotonic())
+        if listen_conn is None:
+            time.sleep(timeout)
+            continue
+        if not pending:
+            if select.select([listen_conn], [], [], timeout) == ([], [], []):
+                continue
+            # One collector run inserts per source; gather the burst into one run
+            time.sleep(ctx.config['debounce'])
+        pending |= notified_symbols(listen_conn)
+        if pending:
+            symbols, pending = sorted(pending), set()
+            run = run_traced(ctx, runner, symbols, 'news', 'score', until)
+            print_run(run, f"news ({', '.join(symbols)})")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from tradingbot.alpaca_client import AlpacaClient
+    from tradingbot.collectors import NEWS_SOURCES, SOCIAL_SOURCES, load_symbols, make_sources
+    from tradingbot.config import get_db_conn, get_db_pool
+
+    parser = argparse.ArgumentParser(description='Run the collect -> ... -> execute pipeline as a DAG')
+    sub = parser.add_subparsers(dest='command', required=True)
+    run_p = sub.add_parser('run', help='Run once or keep running')
+    when = run_p.add_mutually_exclusive_group(required=True)
+    when.add_argument('--once', action='store_true', help='One full run, then exit')
+    when.add_argument('--interval', type=float, help='Collect every N seconds, score on NOTIFY in between')
+    run_p.add_argument('--symbols', nargs='+', help='Symbols (default: active tracked_symbols)')
+    run_p.add_argument('--sources', nargs='+', default=['news', 'social'], help='Collector sources or groups')
+    run_p.add_argument('--from', dest='start', choices=STAGES, help='First stage (default: collect)')
+    run_p.add_argument('--until', choices=STAGES, help='Last stage (default: execute)')
+    run_p.add_argument('--workers', type=int, default=PIPELINE_CONFIG['workers'])
+    run_p.add_argument('--dry-run', action='store_true', help='Plan but do not submit orders')
+    run_p.add_argument('--force', action='store_true', help='Decide even without new sentiment / on weekends')
+    args = parser.parse_args()
+
+    names = []
+    for name in args.sources:
+        group = {'news': NEWS_SOURCES, 'social': SOCIAL_SOURCES}.get(name, (name,))
+        names += [n for n in group if n not in names]
+
+    db_pool = get_db_pool(args.workers + 2)
+    sources = make_sources(names, config={'workers': args.workers})
+    client = AlpacaClient(pool_size=EXECUTOR_CONFIG['max_workers'])
+    ctx = PipelineContext(db_pool, sources, client, {'workers': args.workers}, dry_run=args.dry_run,
+                          force=args.force)
+    runner = make_runner(args.workers)
+
+    def active_symbols():
+        if args.symbols:
+            return [s.upper() for s in args.symbols]
+        with ctx.db() as conn:
+            symbols = load_symbols(conn)
+            conn.commit()
+        return symbols
+
+    listen_conn = None
+    try:
+        if args.once:
+            print_run(run_traced(ctx, runner, active_symbols(), 'manual', args.start, args.until), 'manual')
+        else:
+            listen_conn = get_db_conn()
+            listen_conn.set_session(autocommit=True)
+            with listen_conn.cursor() as cur:
+                cur.execute("LISTEN news_articles")
+            serve(ctx, runner, active_symbols, args.interval, listen_conn, args.until)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if listen_conn is not None:
+            listen_conn.close()
+        client.close()
+        for s in sources:
+            s.close()
+        db_pool.closeall()
@@ -0,0 +1,269 @@
+"""
+Portfolio-level simulation with shared capital
+
+Many symbols trade against one cash account. Inputs are (bars x symbols)
+matrices on a merged, time-ordered axis (align_series), with boolean entry
+and exit signals. The simulation steps only through rows where some
+signal fires. At each such row, exits settle first, then entries are
+ranked (by `priority` when given) and admitted while position slots and
+cash last. Between events the holdings are constant, so the equity curve
+for the whole stretch is one matrix-vector product. Position state is kept
+in per-symbol arrays; no Python code runs per symbol.
+
+Sizing rules (target value of a new position):
+  equal    equity / max_positions (one slot each)
+  percent  position_size_percent of current equity
+  cash     position_size_percent of the cash left (the single-symbol
+           backtests' rule: 100% = all in)
+"""
+
+import numpy as np
+
+from tradingbot.indicators import ema_matrix
+from tradingbot.metrics import TRADING_DAYS, drawdown, summarize
+from tradingbot.timeindex import from_epoch_ns
+
+SIZING = ('equal', 'percent', 'cash')
+
+
+def align_series(series, fields=('close',)):
+    """
+    Merge per-symbol arrays onto one sorted time axis
+
+    series: list of dicts with 'ts' (sorted epoch ns) and the fields.
+    Returns (ts, {field: matrix}); cells without a bar are NaN.
+    """
+    ts = np.unique(np.concatenate([np.asarray(s['ts'], dtype=np.int64) for s in series])) \
+        if series else np.empty(0, dtype=np.int64)
+    out = {f: np.full((len(ts), len(series)), np.nan) for f in fields}
+    for j, s in enumerate(series):
+        rows = np.searchsorted(ts, np.asarray(s['ts'], dtype=np.int64))
+        for f in fields:
+            out[f][rows, j] = s[f]
+    return ts, out
+
+
+def ffill(matrix):
+    """Forward-fill NaNs down each column"""
+    valid = ~np.isnan(matrix)
+    idx = np.where(valid, np.arange(len(matrix))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    out = matrix[idx, np.arange(matrix.shape[1])]
+    out[~np.maximum.accumulate(valid, axis=0)] = np.nan
+    return out
+
+
+def ema_crossovers(close, short, long):
+    """
+    EMA short/long crossovers per column, on each symbol's own bars
+
+    Returns dict: ema_short, ema_long, bullish, bearish (bool matrices) and
+    cross_price, the close linearly interpolated to the bar fraction where
+    the EMAs met (as backtest_ema_strategy.py prices its fills).
+    """
+    has_bar = ~np.isnan(close)
+    es, el = ema_matrix(close, short), ema_matrix(close, long)
+    # Previous value on the symbol's previous bar, not the previous row
+    prev = {}
+    for name, m in (('es', es), ('el', el), ('close', close)):
+        shifted = np.full(m.shape, np.nan)
+        shifted[1:] = ffill(m)[:-1]
+        prev[name] = shifted
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ready = has_bar & ~np.isnan(es) & ~np.isnan(el) & ~np.isnan(prev['es']) & ~np.isnan(prev['el'])
+        bullish = ready & (prev['es'] <= prev['el']) & (es > el)
+        bearish = ready & (prev['es'] >= prev['el']) & (es < el)
+        denom = (es - prev['es']) - (el - prev['el'])
+        ratio = np.clip(np.where(denom != 0, (prev['el'] - prev['es']) / denom, 1.0), 0, 1)
+        cross_price = np.where(np.isnan(prev['close']), close, prev['close'] + ratio * (close - prev['close']))
+    return {'ema_short': es, 'ema_long': el, 'bullish': bullish, 'bearish': bearish,
+            'cross_price': cross_price}
+
+
+def simulate_portfolio(ts, close, entries, exits, fill_price=None, priority=None,
+                       initial_capital=10000.0, max_positions=None, sizing='equal',
+                       position_size_percent=100.0, commission_percent=0.0):
+    """
+    Run entry/exit signal matrices against one cash account
+
+    Long-only, whole shares, one position per symbol. fill_price defaults
+    to close. Returns a dict with the equity curve and portfolio series
+    (cash, gross exposure, open positions, drawdown), the closed trades as
+    arrays and counts of entries skipped for lack of slots or cash.
+    """
+    if sizing not in SIZING:
+        raise ValueError(f"Unknown sizing rule: {sizing} (use one of {', '.join(SIZING)})")
+    close = np.asarray(close, dtype=float)
+    n_rows, n_sym = close.shape
+    has_bar = ~np.isnan(close)
+    fill = close if fill_price is None else np.where(has_bar, fill_price, np.nan)
+    entries = np.asarray(entries, dtype=bool) & has_bar & ~np.isnan(fill)
+    exits = np.asarray(exits, dtype=bool) & has_bar & ~np.isnan(fill)
+    mark = np.nan_to_num(ffill(close))
+    fee = commission_percent / 100
+    slots_total = max_positions or n_sym
+
+    cash = float(initial_capital)
+    shares = np.zeros(n_sym, dtype=np.int64)
+    entry_price = np.zeros(n_sym)
+    entry_row = np.full(n_sym, -1, dtype=np.int64)
+
+    equity = np.empty(n_rows)
+    cash_curve = np.empty(n_rows)
+    gross = np.empty(n_rows)
+    open_count = np.empty(n_rows, dtype=np.int64)
+    closed = []
+    skipped = {'slots': 0, 'cash': 0}
+
+    def settle(a, b):
+        value = mark[a:b] @ shares
+        gross[a:b] = value
+        equity[a:b] = cash + value
+        cash_curve[a:b] = cash
+        open_count[a:b] = np.count_nonzero(shares)
+
+    def close_out(cols, row, price):
+        nonlocal cash
+        proceeds = shares[cols] * price
+        cost = shares[cols] * entry_price[cols]
+        cash += float(np.sum(proceeds * (1 - fee)))
+        closed.append((cols, entry_row[cols], np.full(len(cols), row), shares[cols].copy(),
+                       entry_price[cols].copy(), price, proceeds * (1 - fee) - cost * (1 + fee)))
+        shares[cols] = 0
+        entry_row[cols] = -1
+
+    prev = 0
+    for r in np.flatnonzero(entries.any(axis=1) | exits.any(axis=1)):
+        settle(prev, r)
+        prev = r
+
+        out = np.flatnonzero(exits[r] & (shares > 0))
+        if len(out):
+            close_out(out, r, fill[r, out])
+
+        cand = np.flatnonzero(entries[r] & (shares == 0) & ~exits[r])
+        if not len(cand):
+            continue
+        if priority is not None:
+            cand = cand[np.argsort(-np.nan_to_num(priority[r, cand], nan=-np.inf), kind='stable')]
+        free = slots_total - int(np.count_nonzero(shares))
+        skipped['slots'] += max(len(cand) - max(free, 0), 0)
+        cand = cand[:max(free, 0)]
+        if not len(cand):
+            continue
+
+        if sizing == 'equal':
+            budget = (cash + float(mark[r] @ shares)) / slots_total
+        elif sizing == 'percent':
+            budget = (cash + float(mark[r] @ shares)) * position_size_percent / 100
+        else:
+            budget = cash * position_size_percent / 100
+        price = fill[r, cand]
+        qty = np.floor(budget / (price * (1 + fee))).astype(np.int64)
+        cost = qty * price * (1 + fee)
+        ok = (qty > 0) & (np.cumsum(np.where(qty > 0, cost, 0.0)) <= cash + 1e-9)
+        skipped['cash'] += int(np.count_nonzero(~ok))
+        cand, qty, cost, price = cand[ok], qty[ok], cost[ok], price[ok]
+        cash -= float(cost.sum())
+        shares[cand] = qty
+        entry_price[cand] = price
+        entry_row[cand] = r
+    settle(prev, n_rows)
+
+    # Still open at the end: marked at the last price (not added to cash)
+    still_open = np.flatnonzero(shares > 0)
+    open_value = mark[-1, still_open] if n_rows else np.empty(0)
+    open_trades = {
+        'col': still_open, 'entry_row': entry_row[still_open], 'shares': shares[still_open].copy(),
+        'entry_price': entry_price[still_open].copy(), 'last_price': open_value,
+        'pnl': shares[still_open] * (open_value - entry_price[still_open] * (1 + fee)),
+    }
+
+    names = ('col', 'entry_row', 'exit_row', 'shares', 'entry_price', 'exit_price', 'pnl')
+    if closed:
+        trades = {n: np.concatenate([c[i] for c in closed]) for i, n in enumerate(names)}
+    else:
+        trades = {n: np.empty(0, dtype=float if n in ('entry_price', 'exit_price', 'pnl') else np.int64)
+                  for n in names}
+
+    return {
+        'ts': np.asarray(ts),
+        'equity': equity,
+        'cash': cash_curve,
+        'gross': gross,
+        'exposure': np.divide(gross, equity, out=np.zeros(n_rows), where=equity > 0),
+        'positions': open_count,
+        'drawdown': drawdown(np.concatenate([[initial_capital], equity]))[1:],
+        'trades': trades,
+        'open': open_trades,
+        'skipped': skipped,
+        'initial_capital': float(initial_capital),
+        'max_positions': max_positions,
+    }
+
+
+def portfolio_summary(result, symbols, periods_per_year=TRADING_DAYS):
+    """Headline numbers plus per-symbol P&L (closed + open) for printing"""
+    equity = result['equity']
+    trades, still_open = result['trades'], result['open']
+    traded = np.concatenate([trades['shares'] * (trades['entry_price'] + trades['exit_price']),
+                             still_open['shares'] * still_open['entry_price']])
+    stats = summarize(equity, periods_per_year, initial=result['initial_capital'],
+                      trade_pnl=trades['pnl'], gross=result['gross'], traded_value=traded) \
+        if len(equity) else {}
+    pnl_by_symbol = np.bincount(trades['col'], weights=trades['pnl'], minlength=len(symbols)) + \
+        np.bincount(still_open['col'], weights=still_open['pnl'], minlength=len(symbols))
+    trades_by_symbol = np.bincount(trades['col'], minlength=len(symbols))
+    final = float(equity[-1]) if len(equity) else result['initial_capital']
+    dd = result['drawdown']
+    return {
+        'initial_capital': result['initial_capital'],
+        'final_equity': final,
+        'total_return_pct': (final / result['initial_capital'] - 1) * 100,
+        'max_drawdown_pct': float(dd.min() * 100) if len(dd) else 0.0,
+        'max_drawdown_at': int(np.argmin(dd)) if len(dd) else None,
+        'max_drawdown_bars': stats.get('max_drawdown_duration', 0),
+        'cagr_pct': stats.get('cagr', 0.0) * 100,
+        'sharpe_ratio': stats.get('sharpe', 0.0),
+        'sortino_ratio': stats.get('sortino', 0.0),
+        'profit_factor': stats.get('profit_factor', 0.0),
+        'turnover': stats.get('turnover', 0.0),
+        'avg_exposure_pct': float(result['exposure'].mean() * 100) if len(equity) else 0.0,
+        'max_exposure_pct': float(result['exposure'].max() * 100) if len(equity) else 0.0,
+        'max_positions_held': int(result['positions'].max()) if len(equity) else 0,
+        'trades': int(len(trades['pnl'])),
+        'open_positions': int(len(still_open['col'])),
+        'win_rate': stats.get('win_rate', 0.0) * 100,
+        'skipped': result['skipped'],
+        'by_symbol': {s: (float(pnl_by_symbol[j]), int(trades_by_symbol[j])) for j, s in enumerate(symbols)},
+    }
+
+
+def print_portfolio(result, symbols, title='PORTFOLIO', periods_per_year=TRADING_DAYS):
+    s = portfolio_summary(result, symbols, periods_per_year)
+    ts = result['ts']
+    print(f"\n{'='*70}")
+    print(f"{title} (shared capital)")
+    print(f"{'='*70}")
+    if len(ts):
+        first, last = from_epoch_ns([ts[0], ts[-1]])
+        print(f"Period:           {first:%Y-%m-%d} → {last:%Y-%m-%d} ({len(ts)} bars, {len(symbols)} symbols)")
+    print(f"Initial Capital:  ${s['initial_capital']:,.2f}")
+    print(f"Final Equity:     ${s['final_equity']:,.2f}")
+    print(f"Total Return:     {s['total_return_pct']:+.2f}%")
+    dd_at = f" on {from_epoch_ns([ts[s['max_drawdown_at']]])[0]:%Y-%m-%d}" if s['max_drawdown_at'] is not None else ''
+    print(f"Max Drawdown:     {s['max_drawdown_pct']:.2f}%{dd_at} ({s['max_drawdown_bars']} bars under water)")
+    print(f"Sharpe / Sortino: {s['sharpe_ratio']:.2f} / {s['sortino_ratio']:.2f}")
+    print(f"Exposure:         avg {s['avg_exposure_pct']:.1f}%, max {s['max_exposure_pct']:.1f}%")
+    print(f"Turnover:         {s['turnover']:.1f}x / year")
+    limit = result['max_positions'] or 'no limit'
+    print(f"Positions:        max {s['max_positions_held']} held ({limit}), {s['open_positions']} open at end")
+    print(f"Closed Trades:    {s['trades']} ({s['win_rate']:.1f}% winners, profit factor {s['profit_factor']:.2f})")
+    if s['skipped']['slots'] or s['skipped']['cash']:
+        print(f"Skipped Entries:  {s['skipped']['slots']} (no slot), {s['skipped']['cash']} (no cash)")
+    print(f"\n{'Symbol':<8} {'P&L':>12} {'Trades':>7}")
+    for symbol, (pnl, n) in sorted(s['by_symbol'].items(), key=lambda kv: -kv[1][0]):
+        print(f"{symbol:<8} ${pnl:>11,.2f} {n:>7}")
+    print(f"{'='*70}\n")
+    return s
@@ -0,0 +1,342 @@
+"""
+Backtest reports: Markdown and standalone HTML from one results object
+
+A backtest hands over a results dict (backtest_result()). aggregate()
+precomputes everything a report shows with NumPy: metrics, monthly
+returns, drawdown, the trade-log tail and selection statistics. The
+templates in tradingbot/templates/ only lay those values out. All
+artifacts of one run share a stem, so the report always links the chart
+it was rendered with:
+
+    reports/<name>_<run_id>.md / .html / .json / _equity.png
+
+render_reports() renders many runs (a parameter sweep) in worker
+processes into one directory (run ids 0000, 0001, ...) plus an index
+ranked by Sharpe ratio.
+
+    python -m tradingbot.reports reports/sweep_20260101_120000   # rebuild the index
+"""
+
+import base64
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from tradingbot.config import ROOT_DIR
+from tradingbot.metrics import TRADING_DAYS, drawdown, summarize
+
+REPORTS_DIR = ROOT_DIR / 'reports'
+TEMPLATES_DIR = Path(__file__).resolve().parent / 'templates'
+TRADE_FIELDS = ('date', 'action', 'symbol', 'shares', 'price', 'value')
+GO_SHARPE = 0.5  # Phase 1 gate
+
+_env = None
+
+
+def _environment():
+    global _env
+    if _env is None:
+        _env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)),
+                           autoescape=select_autoescape(['html']),
+                           trim_blocks=True, lstrip_blocks=True, keep_trailing_newline=True)
+        _env.filters['money'] = lambda v: f"${v:,.2f}"
+        _env.filters['pct'] = lambda v: f"{v:+.2f}%"
+    return _env
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '_', str(text).lower()).strip('_') or 'backtest'
+
+
+def _days(values):
+    arr = np.asarray(values)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype('datetime64[D]')
+    return np.array([str(v)[:10] for v in values], dtype='datetime64[D]')
+
+
+def backtest_result(name, dates, equity, initial_capital, trades=(), title=None, settings=None,
+                    positions=None, exposure=None, selection=None, run_id=None,
+                    periods_per_year=TRADING_DAYS):
+    """
+    The standard results object reports consume
+
+    dates: one per equity value (dates, timestamps or ISO strings);
+    trades: list of dicts or a columnar dict with TRADE_FIELDS; settings:
+    display label -> value; selection: for ranking strategies, a dict with
+    'dates', 'symbols' and (days x symbols) 'scores' / 'selected'
+    matrices, plus optional 'examples' (dates to show the ranking for).
+    """
+    if isinstance(trades, dict):
+        cols = trades
+    else:
+        cols = {f: [t[f] for t in trades] for f in TRADE_FIELDS}
+    return {
+        'name': name,
+        'title': title or name,
+        'run_id': run_id or datetime.now().strftime('%Y%m%d_%H%M%S'),
+        'settings': dict(settings or {}),
+        'dates': _days(dates),
+        'equity': np.asarray(equity, dtype=float),
+        'initial_capital': float(initial_capital),
+        'positions': None if positions is None else np.asarray(positions, dtype=float),
+        'exposure': None if exposure is None else np.asarray(exposure, dtype=float),
+        'trades': {
+            'date': _days(cols['date']),
+            'action': np.asarray(cols['action'], dtype=str),
+            'symbol': np.asarray(cols['symbol'], dtype=str),
+            'shares': np.asarray(cols['shares'], dtype=np.int64),
+            'price': np.asarray(cols['price'], dtype=float),
+            'value': np.asarray(cols['value'], dtype=float),
+        },
+        'selection': selection,
+        'periods_per_year': periods_per_year,
+    }
+
+
+def artifact_stem(result):
+    return f"{_slug(result['name'])}_{result['run_id']}"
+
+
+def _selection_stats(selection):
+    scores = np.asarray(selection['scores'], dtype=float)
+    selected = np.asarray(selection['selected'], dtype=bool)
+    dates = _days(selection['dates'])
+    symbols = list(selection['symbols'])
+    scored = ~np.isnan(scores).all(axis=1)
+    picks = selected[scored]
+    days = int(scored.sum())
+    if not days:
+        return None
+    changes = int(np.any(picks[1:] != picks[:-1], axis=1).sum())
+    span = dates[scored]
+    years = max(int((span[-1] - span[0]).astype(int)) + 1, 1) / 365.25
+
+    held = picks.sum(axis=0)
+    order = np.argsort(-held, kind='stable')
+    frequency = [{'symbol': symbols[j], 'days': int(held[j]), 'pct': held[j] / days * 100,
+                  'per_year': held[j] / years} for j in order if held[j]]
+
+    examples = []
+    for day in _days(selection.get('examples', ())):
+        i = int(np.searchsorted(dates, day))
+        if i >= len(dates) or dates[i] != day or not scored[i]:
+            continue
+        ranked = [j for j in np.argsort(-np.nan_to_num(scores[i], nan=-np.inf), kind='stable')
+                  if not np.isnan(scores[i, j])]
+        examples.append({
+            'date': str(day),
+            'rows': [{'rank': k + 1, 'symbol': symbols[j], 'score': scores[i, j], 'selected': bool(selected[i, j])}
+                     for k, j in enumerate(ranked)],
+            'portfolio': [symbols[j] for j in ranked if selected[i, j]],
+        })
+
+    per_day = picks.sum(axis=1)
+    return {
+        'days': days,
+        'changes': changes,
+        'change_pct': changes / days * 100,
+        'avg_days_between': days / changes if changes else 0.0,
+        'picks_min': int(per_day.min()),
+        'picks_max': int(per_day.max()),
+        'frequency': frequency,
+        'examples': examples,
+    }
+
+
+def aggregate(result, trade_log=50):
+    """Everything the templates show, precomputed (one NumPy pass per table)"""
+    dates, equity = result['dates'], result['equity']
+    initial = result['initial_capital']
+    trades = result['trades']
+    gross = None if result['exposure'] is None else result['exposure'] * equity
+    stats = summarize(equity, result['periods_per_year'], initial=initial, gross=gross,
+                      traded_value=trades['value'] if len(trades['value']) else [0.0])
+    dd = drawdown(np.concatenate([[initial], equity]))[1:]
+
+    # Month returns chain from the previous month's last close
+    months = dates.astype('datetime64[M]')
+    last = np.flatnonzero(np.append(months[1:] != months[:-1], True))
+    month_end = equity[last]
+    month_start = np.concatenate([[initial], month_end[:-1]])
+    monthly = [{'month': str(m), 'start': s, 'end': e, 'change': (e / s - 1) * 100}
+               for m, s, e in zip(months[last], month_start, month_end)]
+
+    actions, counts = np.unique(trades['action'], return_counts=True)
+    first = max(len(trades['action']) - trade_log, 0)
+    trade_rows = [{'date': str(trades['date'][i]), 'action': trades['action'][i], 'symbol': trades['symbol'][i],
+                   'shares': int(trades['shares'][i]), 'price': trades['price'][i], 'value': trades['value'][i]}
+                  for i in range(first, len(trades['action']))]
+
+    i_dd = int(np.argmin(dd))
+    summary = [
+        ('Initial Capital', f"${initial:,.2f}"),
+        ('Final Equity', f"${equity[-1]:,.2f}"),
+        ('Total Return', f"{stats['total_return'] * 100:.2f}%"),
+        ('CAGR', f"{stats['cagr'] * 100:.2f}%"),
+        ('Sharpe Ratio', f"{stats['sharpe']:.2f}"),
+        ('Sortino Ratio', f"{stats['sortino']:.2f}"),
+        ('Volatility', f"{stats['volatility'] * 100:.2f}%"),
+        ('Max Drawdown', f"{stats['max_drawdown'] * 100:.2f}% on {dates[i_dd]}"),
+        ('Longest Drawdown', f"{stats['max_drawdown_duration']} bars"),
+        ('Total Trades', str(len(trades['action']))),
+    ]
+    summary += [(f"{a.title()} Orders", str(int(c))) for a, c in zip(actions, counts)]
+    summary.append(('Turnover', f"{stats['turnover']:.1f}x / year"))
+    if result['exposure'] is not None:
+        summary.append(('Avg Exposure', f"{stats['exposure'] * 100:.1f}%"))
+    if result['positions'] is not None:
+        summary.append(('Avg Positions', f"{np.mean(result['positions']):.1f}"))
+    summary.append(('Trading Days', str(len(equity))))
+
+    return {
+        'name': result['name'],
+        'title': result['title'],
+        'run_id': result['run_id'],
+        'stem': artifact_stem(result),
+        'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'period': (str(dates[0]), str(dates[-1])),
+        'settings': result['settings'],
+        'metrics': stats,
+        'summary': summary,
+        'go': stats['sharpe'] >= GO_SHARPE,
+        'go_sharpe': GO_SHARPE,
+        'monthly': monthly,
+        'trades': trade_rows,
+        'trade_count': len(trades['action']),
+        'selection': _selection_stats(result['selection']) if result['selection'] else None,
+        'drawdown': dd,
+    }
+
+
+def plot_equity(result, agg, path, dpi=150):
+    """Equity and drawdown chart (Agg canvas, no pyplot state: safe in workers)"""
+    from matplotlib.figure import Figure
+
+    x = result['dates']
+    fig = Figure(figsize=(14, 10))
+    ax1, ax2 = fig.subplots(2, 1)
+    ax1.plot(x, result['equity'], linewidth=2, label='Portfolio Equity')
+    ax1.axhline(y=result['initial_capital'], color='gray', linestyle='--', alpha=0.5, label='Initial Capital')
+    ax1.set_title('Portfolio Equity Over Time', fontsize=16, fontweight='bold')
+    ax1.set_xlabel('Date')
+    ax1.set_ylabel('Equity ($)')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+    ax1.set_ylim(bottom=0)
+
+    ax2.fill_between(x, agg['drawdown'] * 100, 0, alpha=0.3, color='red')
+    ax2.plot(x, agg['drawdown'] * 100, linewidth=1, color='darkred')
+    ax2.set_title('Drawdown (%)', fontsize=16, fontweight='bold')
+    ax2.set_xlabel('Date')
+    ax2.set_ylabel('Drawdown (%)')
+    ax2.grid(True, alpha=0.3)
+
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+
+
+def _json_default(value):
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def render_report(result, directory=None, formats=('md', 'html'), plot=True, trade_log=50, dpi=150):
+    """
+    Write one run's artifacts; returns {kind: path} plus the metrics
+
+    kinds: 'md', 'html', 'json' (metrics + settings) and 'png' (chart).
+    """
+    directory = Path(directory or REPORTS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    agg = aggregate(result, trade_log)
+    stem = agg['stem']
+    paths = {}
+
+    image = None
+    if plot:
+        paths['png'] = directory / f'{stem}_equity.png'
+        plot_equity(result, agg, paths['png'], dpi)
+        image = base64.b64encode(paths['png'].read_bytes()).decode('ascii')
+
+    env = _environment()
+    for kind in formats:
+        paths[kind] = directory / f'{stem}.{kind}'
+        html = env.get_template(f'report.{kind}').render(r=agg, chart=paths.get('png'), image=image)
+        paths[kind].write_text(html)
+
+    paths['json'] = directory / f'{stem}.json'
+    paths['json'].write_text(json.dumps({
+        'name': agg['name'], 'run_id': agg['run_id'], 'title': agg['title'], 'period': agg['period'],
+        'settings': agg['settings'], 'metrics': agg['metrics'],
+    }, indent=2, default=_json_default))
+    return {'stem': stem, 'name': agg['name'], 'title': agg['title'], 'metrics': agg['metrics'],
+            'paths': {k: str(p) for k, p in paths.items()}}
+
+
+def _render_job(job):
+    return render_report(*job)
+
+
+def write_index(runs, directory, title='Backtest sweep'):
+    """index.md / index.html: one row per run, best Sharpe first"""
+    runs = sorted(runs, key=lambda r: -np.nan_to_num(r['metrics']['sharpe'], nan=-np.inf))
+    env = _environment()
+    out = {}
+    for kind in ('md', 'html'):
+        out[kind] = Path(directory) / f'index.{kind}'
+        out[kind].write_text(env.get_template(f'index.{kind}').render(
+            title=title, runs=runs, generated=datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    return out
+
+
+def render_reports(results, directory=None, workers=None, formats=('md', 'html'), plot=True,
+                   title='Backtest sweep', dpi=80):
+    """
+    Render many runs in parallel into one directory, plus index.md/.html
+
+    directory defaults to reports/sweep_<timestamp>/; run ids are reset to
+    the run's position (0000, 0001, ...) so every artifact name is stable
+    for a given sweep. Charts dominate the cost, so sweeps default to a
+    lower dpi. workers=1 renders in-process.
+    """
+    directory = Path(directory or REPORTS_DIR / f"sweep_{datetime.now():%Y%m%d_%H%M%S}")
+    directory.mkdir(parents=True, exist_ok=True)
+    jobs = [(dict(r, run_id=f'{i:04d}'), directory, formats, plot, 50, dpi) for i, r in enumerate(results)]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        runs = [_render_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(_render_job, jobs, chunksize=max(len(jobs) // (workers * 4), 1)))
+    write_index(runs, directory, title)
+    return directory, runs
+
+
+def _load_runs(directory):
+    runs = []
+    for path in sorted(Path(directory).glob('*.json')):
+        data = json.loads(path.read_text())
+        stem = path.stem
+        runs.append({'stem': stem, 'name': data['name'], 'title': data['title'], 'metrics': data['metrics'],
+                     'paths': {k: str(path.with_suffix(f'.{k}')) for k in ('md', 'html', 'json')
+                               if path.with_suffix(f'.{k}').exists()}})
+    return runs
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rebuild the index of a rendered report directory')
+    parser.add_argument('directory', type=Path, help='Directory with <stem>.json run files')
+    parser.add_argument('--title', help='Index title (default: directory name)')
+    args = parser.parse_args()
+
+    runs = _load_runs(args.directory)
+    paths = write_index(runs, args.directory, args.title or args.directory.name)
+    print(f"📄 Index of {len(runs)} runs: {paths['md']}, {paths['html']}")
@@ -0,0 +1,233 @@
+"""
+Multi-timeframe resampling of minute snapshots
+
+resample() turns sorted minute closes (plus OHLCV columns when available)
+into higher-timeframe bars with NumPy only: bucket keys are computed for
+all bars at once and aggregated with ufunc.reduceat. Buckets are aligned
+to the NYSE session, not the clock: 1h bars start at 09:30, 10:30, ...,
+daily bars are one session (early closes included) and weekly bars group
+the sessions of a Monday-based week.
+
+load_bars() reads ema_snapshots for a symbol and caches the aggregated
+arrays in memory and under data/cache/bars/, keyed by a cheap
+(count, max timestamp) fingerprint of the source rows, so repeated daily or
+weekly runs load a few hundred pre-aggregated bars instead of every minute.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from tradingbot.config import ROOT_DIR
+from tradingbot.timeindex import MARKET_TZ, in_session_mask, session_table_for, to_epoch_ns
+
+CACHE_DIR = ROOT_DIR / 'data' / 'cache' / 'bars'
+
+TIMEFRAME_ALIASES = {
+    '1min': '1m', '5min': '5m', '15min': '15m', '30min': '30m',
+    '1hour': '1h', '60m': '1h', '1day': '1d', '1week': '1w', '1wk': '1w',
+}
+INTRADAY_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '30m': 30, '1h': 60}
+# Approximate regular-session minutes per bar (for warmup sizing)
+BAR_MINUTES = dict(INTRADAY_MINUTES, **{'1d': 390, '1w': 1950})
+
+FIELDS = ('start', 'end', 'open', 'high', 'low', 'close', 'volume', 'count')
+# Part of every cache key; bump when resample() output changes
+CACHE_VERSION = 2
+# Median source spacing from which bars count as daily (or coarser)
+DAILY_SPACING_NS = 20 * 3600 * 10**9
+
+
+def normalize_timeframe(timeframe):
+    """'1Hour' / '1wk' / '5Min' -> '1h' / '1w' / '5m'"""
+    tf = TIMEFRAME_ALIASES.get(timeframe.lower(), timeframe.lower())
+    if tf not in BAR_MINUTES:
+        raise ValueError(f"Unsupported timeframe: {timeframe} (use one of {', '.join(BAR_MINUTES)})")
+    return tf
+
+
+def _empty():
+    return {f: np.empty(0, dtype=np.int64 if f in ('start', 'end', 'count') else float) for f in FIELDS}
+
+
+def _is_daily(ts_ns):
+    if len(ts_ns) < 2:
+        return len(ts_ns) == 1 and not in_session_mask(ts_ns)[0]
+    return np.median(np.diff(ts_ns)) >= DAILY_SPACING_NS
+
+
+def resample(ts_ns, close, timeframe, open_=None, high=None, low=None, volume=None,
+             regular_only=True):
+    """
+    Aggregate sorted bars into `timeframe` buckets
+
+    Returns a dict of aligned arrays: start (bucket open, epoch ns),
+    end (timestamp of the last source bar), open, high, low, close,
+    volume (NaN when not given) and count (source bars per bucket).
+    Without open/high/low columns they are derived from the closes.
+
+    Daily source bars (e.g. Yahoo 1d bars stamped at midnight ET) are
+    assigned to the session of their market-tz date and never dropped by
+    the regular_only session filter.
+    """
+    tf = normalize_timeframe(timeframe)
+    ts_ns = np.asarray(ts_ns, dtype=np.int64)
+    close = np.asarray(close, dtype=float)
+
+    keep = ~np.isnan(close)
+    daily_source = tf in ('1d', '1w') and _is_daily(ts_ns[keep])
+    if regular_only and len(ts_ns) and not daily_source:
+        keep &= in_session_mask(ts_ns)
+    ts_ns, close = ts_ns[keep], close[keep]
+    cols = {
+        'open': close if open_ is None else np.asarray(open_, dtype=float)[keep],
+        'high': close if high is None else np.asarray(high, dtype=float)[keep],
+        'low': close if low is None else np.asarray(low, dtype=float)[keep],
+    }
+    vol = None if volume is None else np.nan_to_num(np.asarray(volume, dtype=float)[keep])
+    n = len(ts_ns)
+    if n == 0:
+        return _empty()
+
+    days, opens, _ = session_table_for(ts_ns)
+    if daily_source:
+        ordinals = np.array([d.toordinal() for d in days])
+        dates = [datetime.fromtimestamp(t / 1e9, MARKET_TZ).date().toordinal() for t in ts_ns.tolist()]
+        sid = np.maximum(np.searchsorted(ordinals, dates, 'right') - 1, 0)
+    else:
+        sid = np.maximum(np.searchsorted(opens, ts_ns, 'right') - 1, 0)
+    session_open = opens[sid]
+
+    if tf in INTRADAY_MINUTES:
+        width = INTRADAY_MINUTES[tf] * 60 * 10**9
+        k = (ts_ns - session_open) // width
+        key = sid * 10_000 + k
+        bucket_start = session_open + k * width
+    elif tf == '1d':
+        key = sid
+        bucket_start = session_open
+    else:
+        week = np.array([d.toordinal() - d.weekday() for d in days], dtype=np.int64)
+        key = week[sid]
+        bucket_start = session_open
+
+    change = np.flatnonzero(key[1:] != key[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change - 1, [n - 1]))
+
+    return {
+        'start': bucket_start[starts],
+        'end': ts_ns[ends],
+        'open': cols['open'][starts],
+        'high': np.maximum.reduceat(cols['high'], starts),
+        'low': np.minimum.reduceat(cols['low'], starts),
+        'close': close[ends],
+        'volume': np.add.reduceat(vol, starts) if vol is not None else np.full(len(starts), np.nan),
+        'count': np.diff(np.concatenate((starts, [n]))),
+    }
+
+
+class BarCache:
+    """LRU of resampled arrays, backed by .npz files when a directory is given"""
+
+    def __init__(self, maxsize=64, directory=CACHE_DIR):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return self.directory / f"{key[0]}_{key[1]}_{digest}.npz"
+
+    def get(self, key):
+        with self.lock:
+            if key in self.data:
+                self.data.move_to_end(key)
+                return self.data[key]
+        if self.directory is not None:
+            path = self._path(key)
+            if path.exists():
+                with np.load(path) as f:
+                    bars = {name: f[name] for name in FIELDS}
+                self._remember(key, bars)
+                return bars
+        return None
+
+    def set(self, key, bars):
+        self._remember(key, bars)
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp = path.with_suffix('.tmp.npz')
+            np.savez(tmp, **bars)
+            tmp.replace(path)
+
+    def _remember(self, key, bars):
+        with self.lock:
+            self.data[key] = bars
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+
+bar_cache = BarCache()
+
+
+def _range_sql(start, end):
+    sql, params = "", []
+    if start is not None:
+        sql += " AND timestamp >= %s"
+        params.append(start)
+    if end is not None:
+        sql += " AND timestamp <= %s"
+        params.append(end)
+    return sql, params
+
+
+def load_bars(conn, symbol, timeframe, start=None, end=None, regular_only=True, cache=bar_cache):
+    """Resampled bars for a symbol from ema_snapshots (see resample())"""
+    tf = normalize_timeframe(timeframe)
+    symbol = symbol.upper()
+    range_sql, range_params = _range_sql(start, end)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT COUNT(*), MAX(timestamp)
+            FROM ema_snapshots
+            WHERE symbol = %s AND close_price IS NOT NULL{range_sql}
+            """,
+            [symbol] + range_params,
+        )
+        count, last_ts = cur.fetchone()
+        key = (symbol, tf, str(start), str(end), regular_only, count, str(last_ts), CACHE_VERSION)
+        if cache is not None:
+            bars = cache.get(key)
+            if bars is not None:
+                return bars
+
+        cur.execute(
+            f"""
+            SELECT timestamp, close_price, volume
+            FROM ema_snapshots
+            WHERE symbol = %s AND close_price IS NOT NULL{range_sql}
+            ORDER BY timestamp
+            """,
+            [symbol] + range_params,
+        )
+        rows = cur.fetchall()
+
+    bars = resample(
+        to_epoch_ns([r[0] for r in rows]),
+        [float(r[1]) for r in rows],
+        tf,
+        volume=[np.nan if r[2] is None else float(r[2]) for r in rows],
+        regular_only=regular_only,
+    )
+    if cache is not None:
+        cache.set(key, bars)
+    return bars
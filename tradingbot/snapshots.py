@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Portfolio snapshot service
+
+The snapshotter polls Alpaca (account + positions + orders in one concurrent
+wave) and stores the result in account_snapshots / position_snapshots /
+alpaca_orders, upserting the daily account_balance row on the way. Status
+checks then read the DB instead of competing with trading for rate limit.
+
+Usage:
+  python -m tradingbot.snapshots run --interval 60     # periodic snapshotter
+  python -m tradingbot.snapshots show                  # latest snapshot from DB
+  python -m tradingbot.snapshots show --as-of 14:30    # time travel (market tz)
+"""
+
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from tradingbot.config import get_db_conn
+
+MARKET_TZ = ZoneInfo('America/New_York')
+
+
+def _num(value):
+    return None if value in (None, '') else float(value)
+
+
+def take_snapshot(client, orders_limit=100):
+    """Fetch account, positions and recent orders concurrently"""
+    status = client.fetch_status(orders_limit=orders_limit)
+    status['taken_at'] = datetime.now(timezone.utc)
+    return status
+
+
+def save_snapshot(conn, snapshot):
+    """Write one snapshot in a single transaction"""
+    from psycopg2.extras import execute_values
+
+    taken_at = snapshot['taken_at']
+    account = snapshot['account']
+    positions = snapshot['positions'] or []
+    orders = snapshot.get('orders') or []
+
+    equity = float(account['equity'])
+    last_equity = _num(account.get('last_equity'))
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO account_snapshots
+                (snapshot_at, equity, last_equity, cash, buying_power, long_market_value, position_count)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (snapshot_at) DO NOTHING
+            """,
+            (taken_at, equity, last_equity, _num(account.get('cash')),
+             _num(account.get('buying_power')), _num(account.get('long_market_value')), len(positions)),
+        )
+
+        if positions:
+            execute_values(
+                cur,
+                """
+                INSERT INTO position_snapshots
+                    (snapshot_at, symbol, qty, avg_entry_price, current_price,
+                     market_value, unrealized_pl, unrealized_plpc)
+                VALUES %s
+                ON CONFLICT (snapshot_at, symbol) DO NOTHING
+                """,
+                [(taken_at, p['symbol'], float(p['qty']), _num(p.get('avg_entry_price')),
+                  _num(p.get('current_price')), _num(p.get('market_value')),
+                  _num(p.get('unrealized_pl')), _num(p.get('unrealized_plpc')))
+                 for p in positions],
+            )
+
+        if orders:
+            execute_values(
+                cur,
+                """
+                INSERT INTO alpaca_orders
+                    (id, client_order_id, symbol, side, qty, order_type, order_class, status,
+                     filled_qty, filled_avg_price, limit_price, stop_price,
+                     created_at, filled_at, updated_at)
+                VALUES %s
+                ON CONFLICT (id) DO UPDATE SET
+                    status = EXCLUDED.status,
+                    filled_qty = EXCLUDED.filled_qty,
+                    filled_avg_price = EXCLUDED.filled_avg_price,
+                    filled_at = EXCLUDED.filled_at,
+                    updated_at = EXCLUDED.updated_at
+                """,
+                [(o['id'], o.get('client_order_id'), o['symbol'], o['side'], _num(o.get('qty')),
+                  o.get('type') or o.get('order_type'), o.get('order_class') or 'simple', o['status'],
+                  _num(o.get('filled_qty')), _num(o.get('filled_avg_price')),
+                  _num(o.get('limit_price')), _num(o.get('stop_price')),
+                  o.get('created_at'), o.get('filled_at'), o.get('updated_at'))
+                 for o in orders],
+            )
+
+        # Daily rollup keeps the latest intraday value (same upsert as the executor)
+        cur.execute(
+            """
+            INSERT INTO account_balance (date, balance, change)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (date) DO UPDATE SET
+              balance = EXCLUDED.balance,
+              change = EXCLUDED.change
+            """,
+            (taken_at.astimezone(MARKET_TZ).date(), equity,
+             (equity - last_equity) / last_equity if last_equity else None),
+        )
+    conn.commit()
+
+
+def latest_snapshot(conn, as_of=None, orders_limit=20):
+    """
+    Latest stored snapshot at or before as_of (default: now)
+
+    Returns None when nothing has been stored yet.
+    """
+    as_of = as_of or datetime.now(timezone.utc)
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT snapshot_at, equity, last_equity, cash, buying_power, long_market_value
+            FROM account_snapshots
+            WHERE snapshot_at <= %s
+            ORDER BY snapshot_at DESC
+            LIMIT 1
+            """,
+            (as_of,),
+        )
+        row = cur.fetchone()
+        if row is None:
+            return None
+        snapshot_at = row[0]
+        account = {
+            'equity': _num(row[1]),
+            'last_equity': _num(row[2]),
+            'cash': _num(row[3]),
+            'buying_power': _num(row[4]),
+            'long_market_value': _num(row[5]),
+        }
+
+        cur.execute(
+            """
+            SELECT symbol, qty, avg_entry_price, current_price, market_value, unrealized_pl, unrealized_plpc
+            FROM position_snapshots
+            WHERE snapshot_at = %s
+            ORDER BY unrealized_pl DESC
+            """,
+            (snapshot_at,),
+        )
+        cols = ('symbol', 'qty', 'avg_entry_price', 'current_price', 'market_value',
+                'unrealized_pl', 'unrealized_plpc')
+        positions = [
+            {c: (v if c == 'symbol' else _num(v)) for c, v in zip(cols, r)}
+            for r in cur.fetchall()
+        ]
+
+        cur.execute(
+            """
+            SELECT symbol, side, qty, order_type, order_class, status, filled_avg_price, created_at, filled_at
+            FROM alpaca_orders
+            WHERE created_at <= %s
+            ORDER BY created_at DESC
+            LIMIT %s
+            """,
+            (as_of, orders_limit),
+        )
+        orders = [
+            {
+                'symbol': r[0], 'side': r[1], 'qty': _num(r[2]), 'type': r[3], 'order_class': r[4],
+                'status': r[5], 'filled_avg_price': _num(r[6]),
+                'created_at': r[7].isoformat() if r[7] else None,
+                'filled_at': r[8].isoformat() if r[8] else None,
+            }
+            for r in cur.fetchall()
+        ]
+
+    return {'snapshot_at': snapshot_at.isoformat(), 'account': account,
+            'positions': positions, 'orders': orders}
+
+
+def parse_as_of(value, tz=MARKET_TZ):
+    """'14:30' -> today 14:30 in tz; otherwise ISO date/datetime (naive = tz)"""
+    if value is None:
+        return None
+    if len(value) <= 5 and ':' in value:
+        hour, minute = (int(x) for x in value.split(':'))
+        return datetime.now(tz).replace(hour=hour, minute=minute, second=59, microsecond=999999)
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return dt if dt.tzinfo else dt.replace(tzinfo=tz)
+
+
+def run_snapshotter(client, interval=60, once=False):
+    """Snapshot every `interval` seconds (reconnecting to the DB on failure)"""
+    conn = None
+    while True:
+        started = time.monotonic()
+        try:
+            if conn is None or conn.closed:
+                conn = get_db_conn()
+            snapshot = take_snapshot(client)
+            save_snapshot(conn, snapshot)
+            print(f"📸 {snapshot['taken_at'].isoformat()} equity ${float(snapshot['account']['equity']):,.2f}, "
+                  f"{len(snapshot['positions'] or [])} positions ({(time.monotonic() - started) * 1000:.0f}ms)")
+        except Exception as e:
+            print(f"❌ Snapshot failed: {e}")
+            if conn is not None and not conn.closed:
+                conn.rollback()
+        if once:
+            break
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    if conn is not None:
+        conn.close()
+
+
+def print_snapshot(snapshot):
+    print("=" * 80)
+    print(f"📊 PORTFOLIO SNAPSHOT @ {snapshot['snapshot_at']}")
+    print("=" * 80)
+
+    account = snapshot['account']
+    equity = account['equity'] or 0
+    last_equity = account['last_equity'] or 0
+    daily_pnl = equity - last_equity
+    daily_pnl_pct = (daily_pnl / last_equity * 100) if last_equity > 0 else 0
+    print(f"💰 Total Equity: ${equity:,.2f}")
+    print(f"📈 Daily P&L: ${daily_pnl:+,.2f} ({daily_pnl_pct:+.2f}%)")
+    print(f"💵 Cash: ${account['cash'] or 0:,.2f}")
+    print()
+
+    if snapshot['positions']:
+        print(f"📍 OPEN POSITIONS ({len(snapshot['positions'])})")
+        for pos in snapshot['positions']:
+            emoji = "🟢" if (pos['unrealized_pl'] or 0) >= 0 else "🔴"
+            print(f"{emoji} {pos['symbol']:6} {pos['qty']:>8g} @ ${pos['avg_entry_price'] or 0:.2f} → "
+                  f"${pos['current_price'] or 0:.2f}  P&L ${pos['unrealized_pl'] or 0:+,.2f} "
+                  f"({(pos['unrealized_plpc'] or 0) * 100:+.2f}%)")
+    else:
+        print("📭 No open positions")
+
+    if snapshot['orders']:
+        print()
+        print(f"📋 RECENT ORDERS ({len(snapshot['orders'])})")
+        for o in snapshot['orders']:
+            emoji = "🟢" if o['side'] == 'buy' else "🔴"
+            print(f"{emoji} {o['symbol']} {o['side'].upper()} {o['qty'] or 0:g} ({o['type']}) - {o['status']} @ {o['created_at']}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Portfolio snapshot service')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_p = sub.add_parser('run', help='Store snapshots periodically')
+    run_p.add_argument('--interval', type=int, default=60, help='Seconds between snapshots (default: 60)')
+    run_p.add_argument('--once', action='store_true', help='Take one snapshot and exit')
+
+    show_p = sub.add_parser('show', help='Print the latest stored snapshot')
+    show_p.add_argument('--as-of', help='Time travel: HH:MM (today, market tz) or ISO datetime')
+    show_p.add_argument('--orders', type=int, default=10, help='Recent orders to show (default: 10)')
+    show_p.add_argument('--json', action='store_true', help='Print JSON')
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        from tradingbot.alpaca_client import AlpacaClient
+        with AlpacaClient(cache_ttl=0) as client:
+            try:
+                run_snapshotter(client, args.interval, args.once)
+            except KeyboardInterrupt:
+                print("\n⏹️  Stopped")
+    else:
+        conn = get_db_conn()
+        try:
+            snapshot = latest_snapshot(conn, parse_as_of(args.as_of), args.orders)
+        finally:
+            conn.close()
+        if snapshot is None:
+            print("📭 No snapshots stored yet (run: python -m tradingbot.snapshots run)")
+        elif args.json:
+            print(json.dumps(snapshot, indent=2))
+        else:
+            print_snapshot(snapshot)
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Synthetic market and sentiment data for benchmarks and load tests
+
+No vendor API involved. Everything is vectorized with NumPy and streamed
+in chunks, so thousands of symbols and years of minute bars only ever
+hold one chunk in memory:
+  - prices: GBM with Merton jumps. Returns are correlated through a
+    market factor and a sector factor (O(symbols) loadings, no covariance
+    matrix), each session opens with an overnight gap, and high/low are
+    drawn from the exact Brownian-bridge extremes between open and close.
+    Bars are session-aligned at any timeframe like tradingbot.resample
+    (1m..1h, 1d, 1w, early closes included); intraday volatility and
+    volume follow a U-shaped profile.
+  - regimes: a market-wide bull/flat/bear Markov chain over sessions
+    shifts drift and volatility, and the sentiment level with them;
+  - sentiment: daily AR(1) around a per-symbol bias plus the regime shift,
+    tanh-squashed to -1..1 like sentiment_scores.
+
+Output is reproducible: random draws are keyed by (seed, calendar month,
+block of BLOCK symbols), so the chunk size and the sink do not change the
+numbers, and symbol SYN00042 is the same whether 100 or 5000 are generated.
+
+Sinks: Parquet (needs pyarrow), CSV (.csv / .csv.gz) or Postgres COPY into
+bars, ema_snapshots or sentiment_scores. COPY does not upsert: load into
+empty tables, e.g. a scratch schema via PGOPTIONS='-c search_path=synth'.
+
+Usage:
+  python -m tradingbot.synthetic bars --symbols 2000 --years 5 --timeframe 1m --out data/synthetic/bars_1m.parquet
+  python -m tradingbot.synthetic bars --symbols 500 --years 10 --timeframe 1d --copy bars --register
+  python -m tradingbot.synthetic sentiment --symbols 2000 --years 5 --out data/synthetic/sentiment.csv.gz
+"""
+
+import gzip
+import io
+import itertools
+import time
+
+import numpy as np
+
+from tradingbot.resample import INTRADAY_MINUTES, normalize_timeframe
+from tradingbot.timeindex import session_table
+
+BLOCK = 256
+CHUNK_ROWS = 2_000_000
+YEAR_MINUTES = 252 * 390
+OVERNIGHT_SHARE = 0.2   # share of daily variance in the open gap
+SOURCE = 'synthetic'
+SECTORS = ('Technology', 'Financials', 'Health Care', 'Energy', 'Consumer Discretionary',
+           'Communication Services', 'Industrials', 'Consumer Staples', 'Utilities', 'Materials',
+           'Real Estate')
+# Market regimes: annual drift, volatility multiplier, sentiment shift, mean length in sessions
+REGIMES = {
+    'bull': (0.15, 0.8, 0.25, 120),
+    'flat': (0.0, 1.0, 0.0, 60),
+    'bear': (-0.25, 1.6, -0.35, 40),
+}
+REGIME_DRIFT, REGIME_VOL, REGIME_SENTIMENT, REGIME_LENGTH = (np.array(v, dtype=float)
+                                                             for v in zip(*REGIMES.values()))
+
+# Columns per target table, in COPY order
+TABLE_COLUMNS = {
+    'bars': ('symbol', 'timeframe', 'ts', 'open', 'high', 'low', 'close', 'volume', 'source'),
+    'ema_snapshots': ('timestamp', 'symbol', 'close_price', 'volume'),
+    'sentiment_scores': ('date', 'symbol', 'sentiment_score', 'rationale', 'article_count'),
+}
+
+
+def symbol_names(n_symbols):
+    return np.array([f"SYN{j:05d}" for j in range(n_symbols)])
+
+
+def block_params(b, seed=42):
+    """Parameters of the BLOCK symbols of block b (symbols b*BLOCK ...)"""
+    rng = np.random.default_rng([seed, 0, b])
+    return {
+        'sector': rng.integers(len(SECTORS), size=BLOCK),
+        'beta': rng.uniform(0.3, 0.7, BLOCK),                 # market factor loading
+        'gamma': rng.uniform(0.2, 0.5, BLOCK),                # sector factor loading
+        'vol': rng.lognormal(np.log(0.3), 0.35, BLOCK),       # annual volatility
+        'drift': rng.normal(0.05, 0.08, BLOCK),
+        'price': np.exp(rng.uniform(np.log(5), np.log(500), BLOCK)),
+        'jumps': rng.uniform(2, 12, BLOCK),                   # jumps per year
+        'jump_size': rng.uniform(0.02, 0.08, BLOCK),
+        'volume': rng.lognormal(np.log(2000), 1.0, BLOCK),    # shares per minute
+        'bias': rng.normal(0.05, 0.2, BLOCK),                 # sentiment level
+        'phi': rng.uniform(0.6, 0.9, BLOCK),                  # sentiment persistence
+        'noise': rng.uniform(0.15, 0.35, BLOCK),
+        'articles': rng.lognormal(np.log(4), 0.8, BLOCK),     # articles per day
+    }
+
+
+def symbol_params(n_symbols, seed=42):
+    """Per-symbol parameters of the first n_symbols symbols"""
+    parts = [block_params(b, seed) for b in range(-(-n_symbols // BLOCK))]
+    return {k: np.concatenate([p[k] for p in parts])[:n_symbols] for k in parts[0]} if parts else {}
+
+
+def market_regimes(n_sessions, seed=42):
+    """Regime index (into REGIMES) of each session: Markov chain with geometric run lengths"""
+    rng = np.random.default_rng([seed, 3])
+    states, lengths = [], []
+    state = int(rng.integers(len(REGIMES)))
+    while sum(lengths) < n_sessions:
+        states.append(state)
+        lengths.append(int(rng.geometric(1 / REGIME_LENGTH[state])))
+        state = int(rng.choice([s for s in range(len(REGIMES)) if s != state]))
+    return np.repeat(states, lengths)[:n_sessions]
+
+
+def bar_calendar(first, last, timeframe):
+    """
+    Session-aligned bars of the trading days first..last
+
+    Returns ({'ts': bar open ns, 'session': session index, 'minutes': bar
+    length, 'gaps': overnight gaps before the bar, 'shape': intraday
+    activity}, days).
+    """
+    tf = normalize_timeframe(timeframe)
+    days, opens, closes = session_table(first, last)
+    minutes = (closes - opens) // 60_000_000_000
+    if tf in INTRADAY_MINUTES:
+        step = INTRADAY_MINUTES[tf]
+        per = -(-minutes // step)
+        session = np.repeat(np.arange(len(days)), per)
+        k = np.arange(len(session)) - np.repeat(np.cumsum(per) - per, per)
+        ts = opens[session] + k * step * 60_000_000_000
+        length = np.minimum(step, minutes[session] - k * step)
+        gaps = (k == 0).astype(float)
+        # U-shaped activity over the session, mean ~1
+        position = (k * step + length / 2) / minutes[session]
+        shape = 0.7 + 0.9 * (2 * position - 1) ** 2
+    elif tf == '1d':
+        session, ts, length = np.arange(len(days)), opens, minutes
+        gaps = shape = np.ones(len(days))
+    else:
+        week = np.array([d.toordinal() - d.weekday() for d in days])
+        session = np.flatnonzero(np.r_[True, week[1:] != week[:-1]]) if len(days) else np.empty(0, int)
+        ts = opens[session]
+        length = np.add.reduceat(minutes, session) if len(days) else minutes
+        gaps = np.diff(np.r_[session, len(days)]).astype(float)
+        shape = np.ones(len(session))
+    return {'ts': ts, 'session': session, 'minutes': length.astype(float), 'gaps': gaps, 'shape': shape}, days
+
+
+def _months(days):
+    return np.array([d.year * 12 + d.month - 1 for d in days], dtype=np.int64)
+
+
+def _month_groups(month, width, chunk_rows):
+    """[(lo, hi, month)] runs of whole months, grouped to about chunk_rows rows of `width` symbols"""
+    edges = np.flatnonzero(np.r_[True, month[1:] != month[:-1], True]) if len(month) else []
+    groups, group, rows = [], [], 0
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        group.append((int(lo), int(hi), int(month[lo])))
+        rows += (hi - lo) * width
+        if rows >= chunk_rows:
+            groups.append(group)
+            group, rows = [], 0
+    if group:
+        groups.append(group)
+    return groups
+
+
+def _period(group):
+    first, last = group[0][2], group[-1][2]
+    label = lambda m: f"{m // 12}-{m % 12 + 1:02d}"
+    return label(first) if first == last else f"{label(first)}..{label(last)}"
+
+
+def _bar_block(rng, cal, lo, hi, p, factors, regime, close):
+    """
+    Bars lo..hi of one month for a full block of BLOCK symbols, continuing
+    from `close`. Always simulated BLOCK wide (callers slice off unused
+    symbols), so every symbol's draws are the same however many are kept.
+    """
+    n = hi - lo
+    draw = lambda: rng.standard_normal((n, BLOCK))
+    market, sector = factors
+    minutes = cal['minutes'][lo:hi, None]
+    shape = cal['shape'][lo:hi, None]
+    dt = minutes / YEAR_MINUTES
+    state = regime[cal['session'][lo:hi]]
+
+    sigma = p['vol'] * REGIME_VOL[state][:, None]
+    beta, gamma = p['beta'], p['gamma']
+    z = beta * market[:, None] + gamma * sector[:, p['sector']] + np.sqrt(1 - beta ** 2 - gamma ** 2) * draw()
+    diffusion = sigma * np.sqrt(dt * shape * (1 - OVERNIGHT_SHARE))
+    gap = sigma * np.sqrt(cal['gaps'][lo:hi, None] * OVERNIGHT_SHARE / 252) * draw()
+    n_jumps = rng.poisson(np.broadcast_to(p['jumps'] * dt, (n, BLOCK)))
+    jump = n_jumps * -0.005 + np.sqrt(n_jumps) * p['jump_size'] * draw()
+    ret = (p['drift'] + REGIME_DRIFT[state][:, None] - 0.5 * sigma ** 2) * dt + diffusion * z + jump
+
+    log_close = np.log(close) + np.cumsum(gap + ret, axis=0)
+    log_open = log_close - ret
+    # Extremes of a Brownian bridge from 0 to ret with variance diffusion^2
+    var = diffusion ** 2
+    u_high, u_low = rng.random((n, BLOCK)), rng.random((n, BLOCK))
+    high = log_open + (ret + np.sqrt(ret ** 2 - 2 * var * np.log(u_high))) / 2
+    low = log_open + (ret - np.sqrt(ret ** 2 - 2 * var * np.log(u_low))) / 2
+    volume = p['volume'] * minutes * shape * REGIME_VOL[state][:, None] * (1 + np.abs(z)) \
+        * rng.lognormal(-0.125, 0.5, (n, BLOCK))
+    return {
+        'open': np.exp(log_open), 'high': np.exp(high), 'low': np.exp(low), 'close': np.exp(log_close),
+        'volume': np.rint(volume).astype(np.int64),
+    }
+
+
+def _long(names, times, columns, time_key):
+    """(n, m) arrays -> time-major long columns"""
+    n, m = len(times), len(names)
+    out = {'symbol': np.tile(names, n), time_key: np.repeat(times, m)}
+    out.update({k: v.ravel() for k, v in columns.items()})
+    return out
+
+
+def generate_bars(n_symbols, first, last, timeframe='1m', seed=42, chunk_rows=CHUNK_ROWS):
+    """
+    Yield OHLCV chunks for n_symbols synthetic symbols over the trading days
+    first..last: dicts of long columns (symbol, ts as epoch ns, open, high,
+    low, close, volume) plus 'period', one block of symbols over whole months
+    """
+    cal, days = bar_calendar(first, last, timeframe)
+    blocks = [block_params(b, seed) for b in range(-(-n_symbols // BLOCK))]
+    names = symbol_names(n_symbols)
+    regime = market_regimes(len(days), seed)
+    month = _months(days)[cal['session']] if len(days) else np.empty(0, np.int64)
+    closes = [p['price'].copy() for p in blocks]
+
+    for group in _month_groups(month, min(BLOCK, n_symbols), chunk_rows):
+        factors = {}
+        for lo, hi, m in group:
+            rng = np.random.default_rng([seed, 1, m])
+            factors[m] = (rng.standard_normal(hi - lo), rng.standard_normal((hi - lo, len(SECTORS))))
+        for b, p in enumerate(blocks):
+            j0, j1 = b * BLOCK, min((b + 1) * BLOCK, n_symbols)
+            parts = []
+            for lo, hi, m in group:
+                rng = np.random.default_rng([seed, 2, m, b])
+                part = _bar_block(rng, cal, lo, hi, p, factors[m], regime, closes[b])
+                closes[b] = part['close'][-1]
+                parts.append(part)
+            columns = {k: np.concatenate([part[k] for part in parts])[:, :j1 - j0] for k in parts[0]}
+            chunk = _long(names[j0:j1], cal['ts'][group[0][0]:group[-1][1]], columns, 'ts')
+            chunk['period'] = _period(group)
+            yield chunk
+
+
+def generate_sentiment(n_symbols, first, last, seed=42, chunk_rows=CHUNK_ROWS):
+    """
+    Yield daily sentiment chunks for the trading days first..last: long
+    columns (symbol, date, sentiment_score, article_count) plus 'period'
+
+    x[t] = phi * x[t-1] + (1 - phi) * (bias + regime shift) + noise * e[t];
+    the recursion steps over days with every symbol of a block at once
+(always the full BLOCK, like the bars).
+    """
+    days = session_table(first, last)[0]
+    blocks = [block_params(b, seed) for b in range(-(-n_symbols // BLOCK))]
+    names = symbol_names(n_symbols)
+    regime = market_regimes(len(days), seed)
+    dates = np.array(days, dtype='datetime64[D]')
+    states = [p['bias'].copy() for p in blocks]
+
+    for group in _month_groups(_months(days), min(BLOCK, n_symbols), chunk_rows):
+        for b, p in enumerate(blocks):
+            j0, j1 = b * BLOCK, min((b + 1) * BLOCK, n_symbols)
+            phi, bias, noise = p['phi'], p['bias'], p['noise']
+            scores, articles = [], []
+            for lo, hi, m in group:
+                rng = np.random.default_rng([seed, 4, m, b])
+                level = (1 - phi) * (bias + REGIME_SENTIMENT[regime[lo:hi]][:, None])
+                shocks = level + noise * rng.standard_normal((hi - lo, BLOCK))
+                x = np.empty_like(shocks)
+                for t in range(hi - lo):
+                    states[b] = phi * states[b] + shocks[t]
+                    x[t] = states[b]
+                scores.append(np.tanh(x).round(4))
+                articles.append(1 + rng.poisson(p['articles'] * (1 + np.abs(x))))
+            columns = {'sentiment_score': np.concatenate(scores)[:, :j1 - j0],
+                       'article_count': np.concatenate(articles)[:, :j1 - j0]}
+            chunk = _long(names[j0:j1], dates[group[0][0]:group[-1][1]], columns, 'date')
+            chunk['period'] = _period(group)
+            yield chunk
+
+
+# ============================================================
+# Sinks
+# ============================================================
+
+TIME_COLUMNS = ('ts', 'timestamp')
+
+
+def table_columns(chunk, table, timeframe=None):
+    """Chunk -> {column: array or constant string} in the COPY order of `table`"""
+    if table == 'sentiment_scores':
+        values = dict(chunk, rationale=SOURCE)
+    elif table == 'ema_snapshots':
+        values = {'timestamp': chunk['ts'], 'symbol': chunk['symbol'],
+                  'close_price': chunk['close'].round(4), 'volume': chunk['volume']}
+    else:
+        values = dict(chunk, timeframe=timeframe, source=SOURCE,
+                      **{k: chunk[k].round(4) for k in ('open', 'high', 'low', 'close')})
+    return {c: values[c] for c in TABLE_COLUMNS[table]}
+
+
+def _rows(columns):
+    return next(len(v) for v in columns.values() if not isinstance(v, str))
+
+
+def _text(name, values, n):
+    if isinstance(values, str):
+        return itertools.repeat(values, n)
+    if name in TIME_COLUMNS:
+        # Format each distinct bar time once
+        stamps, inverse = np.unique(values, return_inverse=True)
+        return np.char.add(np.datetime_as_string(stamps.view('datetime64[ns]'), unit='s'), '+00')[inverse].tolist()
+    if values.dtype.kind == 'f':
+        return map(repr, values.tolist())
+    return map(str, values.tolist())
+
+
+def csv_text(columns):
+    """
+    CSV lines (no header) for table_columns() output; several times faster
+    than DataFrame.to_csv on millions of rows
+    """
+    n = _rows(columns)
+    return '\n'.join(map(','.join, zip(*(_text(k, v, n) for k, v in columns.items())))) + '\n'
+
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow); "
+                               "write a .csv/.csv.gz file or use --copy instead") from None
+        self.pa, self.pq = pyarrow, pyarrow.parquet
+        self.path = path
+        self.writer = None
+
+    def write(self, columns):
+        pa, n = self.pa, _rows(columns)
+        arrays = {}
+        for name, values in columns.items():
+            if isinstance(values, str):
+                arrays[name] = pa.repeat(values, n).dictionary_encode()
+            elif name in TIME_COLUMNS:
+                arrays[name] = pa.array(values.view('datetime64[ns]'), type=pa.timestamp('ns', tz='UTC'))
+            elif name == 'symbol':
+                arrays[name] = pa.array(values).dictionary_encode()
+            else:
+                arrays[name] = pa.array(values)
+        table = pa.table(arrays)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(str(self.path), table.schema, compression='zstd')
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.fh = gzip.open(path, 'wt', compresslevel=1) if str(path).endswith('.gz') else open(path, 'w')
+        self.header = True
+
+    def write(self, columns):
+        if self.header:
+            self.fh.write(','.join(columns) + '\n')
+            self.header = False
+        self.fh.write(csv_text(columns))
+
+    def close(self):
+        self.fh.close()
+
+
+class CopySink:
+    """COPY FROM STDIN per chunk, committed per chunk"""
+
+    def __init__(self, conn, table):
+        self.conn = conn
+        self.sql = f"COPY {table} ({', '.join(TABLE_COLUMNS[table])}) FROM STDIN WITH (FORMAT csv)"
+
+    def write(self, columns):
+        with self.conn.cursor() as cur:
+            cur.copy_expert(self.sql, io.StringIO(csv_text(columns)))
+        self.conn.commit()
+
+    def close(self):
+        pass
+
+
+def open_sink(out=None, conn=None, table=None):
+    if conn is not None:
+        return CopySink(conn, table)
+    if str(out).endswith('.parquet'):
+        return ParquetSink(out)
+    return CsvSink(out)
+
+
+def write_chunks(chunks, sink, table, timeframe=None):
+    """Stream chunks into sink; returns rows written"""
+    rows, t0 = 0, time.perf_counter()
+    try:
+        for chunk in chunks:
+            period = chunk.pop('period')
+            columns = table_columns(chunk, table, timeframe)
+            sink.write(columns)
+            n = _rows(columns)
+            rows += n
+            print(f"   ✓ {period:<17} {chunk['symbol'][0]}.. {n:>10,} rows "
+                  f"({rows:,} total, {rows / (time.perf_counter() - t0):,.0f} rows/s)")
+    finally:
+        sink.close()
+    return rows
+
+
+def register_symbols(conn, n_symbols, seed=42):
+    """Add the synthetic symbols to tracked_symbols (with their sector)"""
+    from psycopg2.extras import execute_values
+
+    sectors = symbol_params(n_symbols, seed).get('sector', [])
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            "INSERT INTO tracked_symbols (symbol, name, sector) VALUES %s ON CONFLICT (symbol) DO NOTHING",
+            [(s, f"Synthetic {s}", SECTORS[k]) for s, k in zip(symbol_names(n_symbols), sectors)],
+        )
+    conn.commit()
+
+
+if __name__ == '__main__':
+    import argparse
+    from datetime import date, datetime, timedelta
+    from pathlib import Path
+
+    from tradingbot.config import get_db_conn
+    from tradingbot.timeindex import MARKET_TZ, previous_trading_day
+
+    parser = argparse.ArgumentParser(description='Generate synthetic bars or sentiment')
+    parser.add_argument('command', choices=['bars', 'sentiment'])
+    parser.add_argument('--symbols', type=int, default=100, help='Number of symbols (default: 100)')
+    parser.add_argument('--years', type=float, default=1.0, help='History length (default: 1)')
+    parser.add_argument('--end', type=date.fromisoformat, help='Last day (default: last completed session)')
+    parser.add_argument('--timeframe', default='1m', help='Bar timeframe: 1m..1h, 1d, 1w (default: 1m)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help=f'Rows per written chunk, roughly (default: {CHUNK_ROWS:,})')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--out', type=Path, help='Output file: .parquet, .csv or .csv.gz')
+    target.add_argument('--copy', choices=list(TABLE_COLUMNS), help='COPY into this table')
+    parser.add_argument('--register', action='store_true', help='Also add the symbols to tracked_symbols')
+    args = parser.parse_args()
+
+    table = args.copy or ('bars' if args.command == 'bars' else 'sentiment_scores')
+    if (table == 'sentiment_scores') != (args.command == 'sentiment'):
+        parser.error(f"{args.command} cannot be copied into {table}")
+    timeframe = normalize_timeframe(args.timeframe)
+    last = args.end or previous_trading_day(datetime.now(MARKET_TZ).date())
+    first = last - timedelta(days=round(365.25 * args.years))
+
+    if args.command == 'bars':
+        chunks = generate_bars(args.symbols, first, last, timeframe, args.seed, args.chunk_rows)
+        what = f"{timeframe} bars"
+    else:
+        chunks = generate_sentiment(args.symbols, first, last, args.seed, args.chunk_rows)
+        what = 'daily sentiment'
+    print(f"🧪 {what} for {args.symbols} symbols, {first} .. {last}, seed {args.seed} "
+          f"-> {args.out or table}")
+
+    conn = get_db_conn() if args.copy or args.register else None
+    try:
+        if args.out:
+            args.out.parent.mkdir(parents=True, exist_ok=True)
+        sink = open_sink(args.out, conn if args.copy else None, table)
+        t0 = time.perf_counter()
+        rows = write_chunks(chunks, sink, table, timeframe)
+        if args.register:
+            register_symbols(conn, args.symbols, args.seed)
+    except RuntimeError as e:
+        raise SystemExit(f"❌ {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+    print(f"✅ {rows:,} rows in {time.perf_counter() - t0:.1f}s")
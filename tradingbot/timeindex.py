@@ -0,0 +1,255 @@
+"""
+Market time index helpers
+
+- NYSE session calendar (full holidays, 13:00 early closes)
+- Warmup sizing for EMA-N in bars, and the session-aware start time that
+  covers them
+- Window boundaries by binary search over sorted epoch-ns timestamps
+- Vectorized session ids / session-break masks for gap handling
+
+Timestamps passed to the array helpers are sorted int64 epoch nanoseconds
+(see to_epoch_ns); datetimes returned are timezone-aware.
+"""
+
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+MARKET_TZ = ZoneInfo('America/New_York')
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# One-off closures not covered by the rules below
+SPECIAL_CLOSURES = {
+    date(2018, 12, 5),   # National day of mourning (G.H.W. Bush)
+    date(2025, 1, 9),    # National day of mourning (J. Carter)
+}
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th weekday (Mon=0) of a month; n=-1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(d):
+    """Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def holidays(year):
+    """NYSE full-day holidays for a year"""
+    days = {
+        _nth_weekday(year, 1, 0, 3),          # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),          # Washington's Birthday
+        _easter(year) - timedelta(days=2),    # Good Friday
+        _nth_weekday(year, 5, 0, -1),         # Memorial Day
+        _observed(date(year, 7, 4)),          # Independence Day
+        _nth_weekday(year, 9, 0, 1),          # Labor Day
+        _nth_weekday(year, 11, 3, 4),         # Thanksgiving
+        _observed(date(year, 12, 25)),        # Christmas
+    }
+    # New Year's Day: a Saturday holiday is not moved back into December
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    days |= {d for d in SPECIAL_CLOSURES if d.year == year}
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def early_closes(year):
+    """13:00 ET closes: July 3rd, Black Friday, Christmas Eve (when trading days)"""
+    candidates = {
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    }
+    return frozenset(d for d in candidates if is_trading_day(d))
+
+
+def is_trading_day(d):
+    return d.weekday() < 5 and d not in holidays(d.year)
+
+
+def session_bounds(d):
+    """(open, close) of a trading day as aware datetimes in MARKET_TZ"""
+    close = EARLY_CLOSE if d in early_closes(d.year) else REGULAR_CLOSE
+    return (datetime.combine(d, REGULAR_OPEN, MARKET_TZ),
+            datetime.combine(d, close, MARKET_TZ))
+
+
+def trading_days(start, end):
+    """Trading days between two dates, inclusive"""
+    days = []
+    d = start
+    while d <= end:
+        if is_trading_day(d):
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def previous_trading_day(d):
+    d -= timedelta(days=1)
+    while not is_trading_day(d):
+        d -= timedelta(days=1)
+    return d
+
+
+def last_sessions_start(now, n):
+    """
+    Open of the n-th most recent session as of `now`
+
+    The session in progress (or the one that closed last) counts as 1, so
+    n=1 on a Monday morning still shows Friday instead of an empty weekend.
+    """
+    d = now.astimezone(MARKET_TZ).date()
+    if not is_trading_day(d) or now < session_bounds(d)[0]:
+        d = previous_trading_day(d)
+    for _ in range(n - 1):
+        d = previous_trading_day(d)
+    return session_bounds(d)[0]
+
+
+# --- Warmup ---
+
+def ema_warmup_bars(period, tolerance=0.01):
+    """
+    Bars needed before the first output bar of an SMA-seeded EMA-N
+
+    period - 1 bars produce the first value; the extra bars let the seed's
+    residual weight (1 - 2/(N+1))^k decay below `tolerance` so the first
+    displayed value matches a long-history EMA. tolerance=None gives the
+    bare minimum.
+    """
+    bars = period - 1
+    if tolerance:
+        alpha = 2.0 / (period + 1)
+        bars += math.ceil(math.log(tolerance) / math.log(1.0 - alpha))
+    return bars
+
+
+def warmup_start(start, bars, bar_minutes=1):
+    """
+    Earliest time to load so `bars` regular-session bars precede `start`
+
+    Walks back through the calendar, so weekends and holidays contribute no
+    bars (a Monday start reaches back into Friday, not into Sunday).
+    """
+    needed = timedelta(minutes=bars * bar_minutes)
+    start = start.astimezone(MARKET_TZ)
+    d = start.date()
+    while True:
+        if is_trading_day(d):
+            open_dt, close_dt = session_bounds(d)
+            available = min(start, close_dt) - open_dt
+            if available > timedelta(0):
+                if available >= needed:
+                    return min(start, close_dt) - needed
+                needed -= available
+        d = previous_trading_day(d)
+        start = session_bounds(d)[1]
+
+
+# --- Array helpers ---
+
+def to_epoch_ns(timestamps):
+    """Aware datetimes (or datetime64) -> int64 epoch nanoseconds"""
+    if isinstance(timestamps, np.ndarray) and np.issubdtype(timestamps.dtype, np.datetime64):
+        return timestamps.astype('datetime64[ns]').astype(np.int64)
+    return np.fromiter(
+        (round(ts.timestamp() * 1e6) * 1000 for ts in timestamps),
+        dtype=np.int64, count=len(timestamps),
+    )
+
+
+def from_epoch_ns(ts_ns, tz=timezone.utc):
+    """int64 epoch nanoseconds -> list of aware datetimes"""
+    return [datetime.fromtimestamp(int(t) // 1000 / 1e6, tz) for t in ts_ns]
+
+
+def _ns(dt):
+    return round(dt.timestamp() * 1e6) * 1000
+
+
+def window_bounds(ts_ns, start=None, end=None):
+    """Slice indices [i0, i1) of sorted timestamps within [start, end]"""
+    i0 = int(np.searchsorted(ts_ns, _ns(start), 'left')) if start is not None else 0
+    i1 = int(np.searchsorted(ts_ns, _ns(end), 'right')) if end is not None else len(ts_ns)
+    return i0, i1
+
+
+@lru_cache(maxsize=64)
+def session_table(first, last):
+    """(days, opens_ns, closes_ns) for trading days first..last"""
+    days = tuple(trading_days(first, last))
+    opens = np.array([_ns(session_bounds(d)[0]) for d in days], dtype=np.int64)
+    closes = np.array([_ns(session_bounds(d)[1]) for d in days], dtype=np.int64)
+    return days, opens, closes
+
+
+def session_table_for(ts_ns):
+    """session_table covering sorted timestamps (plus a week before the first)"""
+    first = datetime.fromtimestamp(int(ts_ns[0]) / 1e9, timezone.utc).astimezone(MARKET_TZ).date()
+    last = datetime.fromtimestamp(int(ts_ns[-1]) / 1e9, timezone.utc).astimezone(MARKET_TZ).date()
+    return session_table(first - timedelta(days=7), last)
+
+
+def session_ids(ts_ns):
+    """
+    Session number of each bar (-1 before the first session)
+
+    A bar belongs to the latest session that opened at or before it, so
+    after-hours bars stay with their day and pre-market bars with the prior one.
+    """
+    if len(ts_ns) == 0:
+        return np.empty(0, dtype=np.int64)
+    _, opens, _ = session_table_for(ts_ns)
+    return np.searchsorted(opens, ts_ns, 'right') - 1
+
+
+def in_session_mask(ts_ns):
+    """True for bars inside regular trading hours"""
+    if len(ts_ns) == 0:
+        return np.empty(0, dtype=bool)
+    _, opens, closes = session_table_for(ts_ns)
+    ids = np.searchsorted(opens, ts_ns, 'right') - 1
+    return (ids >= 0) & (ts_ns < closes[np.maximum(ids, 0)])
+
+
+def session_breaks(ts_ns):
+    """True where a bar is the first of a new session (never at index 0)"""
+    ids = session_ids(ts_ns)
+    mask = np.zeros(len(ids), dtype=bool)
+    mask[1:] = ids[1:] != ids[:-1]
+    return mask
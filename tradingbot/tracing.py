@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Latency tracing for tradingbot.pipeline, from article publish to order
+
+Every traced run gets a run_id (also written to sentiment_scores and
+positions) and leaves pipeline_runs rows (migration 012): one per symbol
+with the publish/fetch time of the articles it scored and the wall-clock
+time each stage finished, and one run-level row (symbol NULL) for
+decide/execute. Stage durations go into the timings column, with the
+FinBERT call split out of score and the executor's DB load, Alpaca price
+fetch and order submission split out of decide/execute.
+
+The report shows where the time goes:
+  - stage durations (p50/p90/p99/max) per stage, and per external call
+    (fetch API, FinBERT, DB, Alpaca);
+  - data age along the chain, measured from the newest scored article:
+    publish -> fetch -> score -> decision -> order;
+  - the symbols with the slowest per-symbol chains.
+
+Usage:
+  python -m tradingbot.tracing report --days 7 --top 10
+  python -m tradingbot.tracing show --run <run_id>
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from psycopg2.extras import Json, execute_values
+
+from tradingbot.config import get_db_conn
+
+SYMBOL_STAGES = ('collect', 'dedupe', 'score', 'aggregate')
+STAGE_COLUMNS = {
+    'collect': 'collected_at',
+    'dedupe': 'deduped_at',
+    'score': 'scored_at',
+    'aggregate': 'aggregated_at',
+    'decide': 'decided_at',
+    'execute': 'ordered_at',
+}
+# Breakdown by what the time is spent on
+STEP_SOURCES = {
+    'collect': 'news/social APIs',
+    'dedupe': 'DB',
+    'finbert': 'FinBERT',
+    'aggregate': 'DB',
+    'load_inputs': 'DB',
+    'fetch': 'Alpaca',
+    'orders': 'Alpaca',
+}
+SEGMENTS = (
+    ('publish -> fetch', 'newest_published_at', 'fetched_at'),
+    ('fetch -> score', 'fetched_at', 'scored_at'),
+    ('score -> decision', 'scored_at', 'decided_at'),
+    ('decision -> order', 'decided_at', 'ordered_at'),
+    ('publish -> order', 'newest_published_at', 'ordered_at'),
+)
+COLUMNS = ('run_id', 'symbol', 'trigger', 'status', 'error', 'articles', 'newest_published_at',
+           'oldest_published_at', 'fetched_at', 'started_at') + tuple(STAGE_COLUMNS.values()) + ('timings',)
+
+
+def _status(records):
+    states = {r['status'] for r in records}
+    for state in ('failed', 'skipped'):
+        if state in states:
+            return state
+    return 'ok'
+
+
+def trace_rows(run_id, trigger, run):
+    """DagRunner.run() output -> pipeline_runs rows (dicts keyed by COLUMNS)"""
+    started_at = run['started_at']
+    results = run['results']
+    by_node = defaultdict(list)
+    for r in run['records']:
+        by_node[r['symbol']].append(r)
+
+    rows = []
+    for symbol, records in by_node.items():
+        row = dict.fromkeys(COLUMNS)
+        row.update(run_id=run_id, symbol=symbol, trigger=trigger, status=_status(records), articles=0)
+        timings = {}
+        for r in records:
+            if r['start'] is None:
+                continue
+            row[STAGE_COLUMNS[r['stage']]] = started_at + timedelta(seconds=r['start'] + r['seconds'])
+            timings[r['stage']] = round(r['seconds'], 4)
+        row['started_at'] = min((started_at + timedelta(seconds=r['start']) for r in records
+                                 if r['start'] is not None), default=started_at)
+        row['error'] = '; '.join(f"{r['stage']}: {r['error']}" for r in records if r['error']) or None
+
+        if symbol is not None:
+            scored = results.get(('score', symbol))
+            if scored:
+                row.update(articles=len(scored['ids']), newest_published_at=scored['newest_published_at'],
+                           oldest_published_at=scored['oldest_published_at'], fetched_at=scored['fetched_at'])
+                timings['finbert'] = round(scored['finbert_seconds'], 4)
+            elif row['status'] == 'ok' and ('score', symbol) in results:
+                row['status'] = 'idle'
+        else:
+            summary = results.get(('execute', None)) or results.get(('decide', None))
+            if summary:
+                timings.update({k: round(v, 4) for k, v in summary.get('timings', {}).items() if k != 'total'})
+                row['articles'] = sum(len(s['ids']) for (stage, _), s in results.items() if stage == 'score' and s)
+            elif row['status'] == 'ok':
+                row['status'] = 'idle'
+            if not summary or summary.get('status') != 'executed':
+                row['ordered_at'] = None
+        row['timings'] = timings
+        rows.append(row)
+    return rows
+
+
+def save_trace(conn, rows):
+    if not rows:
+        return
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            f"INSERT INTO pipeline_runs ({', '.join(COLUMNS)}) VALUES %s",
+            [tuple(Json(row[c]) if c == 'timings' else row[c] for c in COLUMNS) for row in rows],
+        )
+    conn.commit()
+
+
+def load_trace(conn, days=7, symbols=None, run_id=None):
+    """pipeline_runs rows of the last `days` (or one run) as dicts"""
+    where, params = [], []
+    if run_id:
+        where.append("run_id = %s")
+        params.append(run_id)
+    else:
+        where.append("started_at >= %s")
+        params.append(datetime.now(timezone.utc) - timedelta(days=days))
+    if symbols:
+        where.append("(symbol IS NULL OR symbol = ANY(%s))")
+        params.append([s.upper() for s in symbols])
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT {', '.join(COLUMNS)}
+            FROM pipeline_runs
+            WHERE {' AND '.join(where)}
+            ORDER BY started_at, symbol NULLS LAST
+            """,
+            params,
+        )
+        rows = [dict(zip(COLUMNS, r)) for r in cur.fetchall()]
+    conn.commit()
+    for row in rows:
+        row['run_id'] = str(row['run_id'])
+    return rows
+
+
+def _dist(values):
+    a = np.asarray(values, dtype=float)
+    return {
+        'count': len(a),
+        'p50': float(np.percentile(a, 50)),
+        'p90': float(np.percentile(a, 90)),
+        'p99': float(np.percentile(a, 99)),
+        'max': float(a.max()),
+    }
+
+
+def latency_report(rows, top=10):
+    """
+    Distributions (seconds) of stage durations, external-call steps and the
+    publish -> order segments, plus the `top` slowest symbols by p90 chain time
+    """
+    run_rows = {r['run_id']: r for r in rows if r['symbol'] is None}
+    stages, steps, segments = defaultdict(list), defaultdict(list), defaultdict(list)
+    chains = defaultdict(list)
+    ages = defaultdict(list)
+
+    for row in rows:
+        for name, seconds in row['timings'].items():
+            if name in STAGE_COLUMNS:
+                stages[name].append(seconds)
+            if name in STEP_SOURCES:
+                steps[name].append(seconds)
+        if row['symbol'] is None or row['status'] in ('idle', 'skipped'):
+            continue
+        chains[row['symbol']].append(sum(row['timings'].get(s, 0.0) for s in SYMBOL_STAGES))
+        # Symbol rows carry publish -> score; decision/order come from the run row
+        points = dict(row)
+        run_row = run_rows.get(row['run_id'])
+        if run_row:
+            points.update(decided_at=run_row['decided_at'], ordered_at=run_row['ordered_at'])
+        for name, since, until in SEGMENTS:
+            if points[since] and points[until]:
+                segments[name].append((points[until] - points[since]).total_seconds())
+        if points['newest_published_at'] and points['scored_at']:
+            ages[row['symbol']].append((points['scored_at'] - points['newest_published_at']).total_seconds())
+
+    slowest = sorted(
+        ({'symbol': symbol, 'runs': len(secs), 'chain_p50': float(np.median(secs)),
+          'chain_p90': float(np.percentile(secs, 90)),
+          'age_p50': float(np.median(ages[symbol])) if ages[symbol] else None}
+         for symbol, secs in chains.items()),
+        key=lambda s: s['chain_p90'], reverse=True,
+    )[:top]
+    return {
+        'runs': len({r['run_id'] for r in rows}),
+        'stages': {s: _dist(stages[s]) for s in STAGE_COLUMNS if stages[s]},
+        'steps': {s: dict(_dist(steps[s]), source=STEP_SOURCES[s]) for s in STEP_SOURCES if steps[s]},
+        'segments': {name: _dist(segments[name]) for name, _, _ in SEGMENTS if segments[name]},
+        'slowest': slowest,
+    }
+
+
+def _fmt(seconds):
+    if seconds is None:
+        return '-'
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    if seconds < 120:
+        return f"{seconds:.1f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def print_report(report, days):
+    print(f"⏱️  Pipeline latency, last {days} days: {report['runs']} runs")
+    header = f"   {'':<28} {'n':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"
+
+    def table(title, dists, label=lambda name, d: name):
+        if not dists:
+            return
+        print(f"\n{title}\n{header}")
+        for name, d in dists.items():
+            print(f"   {label(name, d):<28} {d['count']:>6} {_fmt(d['p50']):>8} {_fmt(d['p90']):>8} "
+                  f"{_fmt(d['p99']):>8} {_fmt(d['max']):>8}")
+
+    table('📊 Stages', report['stages'])
+    table('🔌 Where stage time goes', report['steps'], lambda name, d: f"{name} ({d['source']})")
+    table('🕐 Data age (newest scored article)', report['segments'])
+    if report['slowest']:
+        print(f"\n🐢 Slowest symbols (collect..aggregate)\n   {'':<8} {'runs':>6} {'p50':>8} {'p90':>8} {'age p50':>9}")
+        for s in report['slowest']:
+            print(f"   {s['symbol']:<8} {s['runs']:>6} {_fmt(s['chain_p50']):>8} {_fmt(s['chain_p90']):>8} "
+                  f"{_fmt(s['age_p50']):>9}")
+
+
+def print_run_trace(rows):
+    for row in rows:
+        stamps = ' '.join(f"{stage}+{_fmt((row[col] - row['started_at']).total_seconds())}"
+                          for stage, col in STAGE_COLUMNS.items() if row[col])
+        age = (row['scored_at'] - row['newest_published_at']).total_seconds() \
+            if row['newest_published_at'] and row['scored_at'] else None
+        print(f"   {row['symbol'] or '(run)':<8} {row['status']:<8} {row['articles']:>4} articles, "
+              f"age at score {_fmt(age):>7}  {stamps}")
+        if row['error']:
+            print(f"      ⚠️  {row['error']}")
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Pipeline latency report from pipeline_runs')
+    sub = parser.add_subparsers(dest='command', required=True)
+    report_p = sub.add_parser('report', help='Stage/segment latency distributions and slowest symbols')
+    report_p.add_argument('--days', type=int, default=7)
+    report_p.add_argument('--symbols', nargs='+')
+    report_p.add_argument('--top', type=int, default=10, help='Slowest symbols to list (default: 10)')
+    report_p.add_argument('--json', action='store_true', help='Print the report as JSON')
+    show_p = sub.add_parser('show', help='Stage timestamps of one run')
+    show_p.add_argument('--run', required=True, help='run_id')
+    args = parser.parse_args()
+
+    conn = get_db_conn()
+    try:
+        if args.command == 'report':
+            rows = load_trace(conn, args.days, args.symbols)
+        else:
+            rows = load_trace(conn, run_id=args.run)
+    finally:
+        conn.close()
+
+    if not rows:
+        print("⚠️  No pipeline_runs rows")
+    elif args.command == 'show':
+        print(f"🔎 run {args.run} ({rows[0]['trigger']}), started {rows[0]['started_at']:%Y-%m-%d %H:%M:%S}")
+        print_run_trace(rows)
+    else:
+        report = latency_report(rows, args.top)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report, args.days)
@@ -5,14 +5,32 @@ Runs on localhost:5001 (nginx will proxy treddy.acebox.eu to this port)
 """
 
 import os
-from flask import Flask, render_template, jsonify, send_file, request
-from datetime import datetime, timedelta
+import sys
+import gzip
+import hmac
+import json
+import queue
+import select
+import threading
+import time
+from pathlib import Path
+from flask import Flask, Response, render_template, jsonify, send_file, request, g, has_request_context
+from datetime import datetime, timedelta, timezone
+import numpy as np
 import psycopg2
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
 import matplotlib.pyplot as plt
 import io
 
+# Shared package lives next to web/ (deploy.sh syncs both)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tradingbot.instrumentation import CONTENT_TYPE, Registry, folded, sample_stacks, timed_cursor
+from tradingbot.snapshots import latest_snapshot, parse_as_of
+from tradingbot.indicators import load_ema_window
+from tradingbot.news_search import parse_bound, search_news
+from tradingbot.timeindex import last_sessions_start, session_breaks, to_epoch_ns
+
 app = Flask(__name__)
 
 # Database config
@@ -25,8 +43,86 @@ DB_CONFIG = {
 }
 
 
+# Opt-in instrumentation (TREDDY_METRICS=1): route and query histograms,
+# slow-query log and /metrics. The profiler needs TREDDY_PROFILE_TOKEN.
+METRICS_CONFIG = {
+    'enabled': os.environ.get('TREDDY_METRICS') == '1',
+    'slow_query_ms': float(os.environ.get('TREDDY_SLOW_QUERY_MS', '200')),
+    'profile_token': os.environ.get('TREDDY_PROFILE_TOKEN'),
+    'profile_max_seconds': 60,
+}
+
+metrics = Registry(enabled=METRICS_CONFIG['enabled'])
+REQUEST_SECONDS = metrics.histogram('treddy_http_request_duration_seconds', 'Request latency by route',
+                                    ('route', 'method', 'status'))
+CONNECT_SECONDS = metrics.histogram('treddy_db_connect_seconds', 'psycopg2.connect() time')
+QUERY_SECONDS = metrics.histogram('treddy_db_query_seconds', 'Query execution time by route', ('route',))
+SLOW_QUERIES = metrics.counter('treddy_db_slow_queries', 'Queries over the slow-query threshold', ('route',))
+CHART_SECONDS = metrics.histogram('treddy_chart_phase_seconds', 'chart_png time by phase', ('phase',))
+metrics.gauge('treddy_sse_subscribers', 'Open /api/stream connections in this worker',
+              lambda: len(hub.subscribers))
+_started = time.time()
+metrics.gauge('treddy_process_start_time_seconds', 'Worker start time (unix)', lambda: _started)
+
+
+def current_route():
+    if has_request_context() and request.url_rule is not None:
+        return request.url_rule.rule
+    return 'background'
+
+
+def record_query(cur, seconds):
+    route = current_route()
+    QUERY_SECONDS.observe(seconds, route)
+    if has_request_context():
+        g.db_seconds = g.get('db_seconds', 0.0) + seconds
+    if seconds * 1000 >= METRICS_CONFIG['slow_query_ms']:
+        SLOW_QUERIES.inc(route)
+        sql = cur.query.decode(errors='replace') if cur.query else '?'
+        app.logger.warning("slow query %.0fms on %s: %s", seconds * 1000, route, ' '.join(sql.split()))
+
+
+TimedCursor = timed_cursor(record_query)
+
+
 def get_db_conn():
-    return psycopg2.connect(**DB_CONFIG)
+    if not METRICS_CONFIG['enabled']:
+        return psycopg2.connect(**DB_CONFIG)
+    t0 = time.perf_counter()
+    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=TimedCursor)
+    seconds = time.perf_counter() - t0
+    CONNECT_SECONDS.observe(seconds)
+    if has_request_context():
+        g.connect_seconds = g.get('connect_seconds', 0.0) + seconds
+    return conn
+
+
+if METRICS_CONFIG['enabled']:
+    @app.before_request
+    def start_timer():
+        g.request_t0 = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        seconds = time.perf_counter() - g.request_t0
+        REQUEST_SECONDS.observe(seconds, current_route(), request.method, str(response.status_code))
+        # Shows up in the browser's network panel next to each request
+        response.headers['Server-Timing'] = ', '.join([
+            f"connect;dur={g.get('connect_seconds', 0.0) * 1000:.1f}",
+            f"db;dur={g.get('db_seconds', 0.0) * 1000:.1f}",
+            f"total;dur={seconds * 1000:.1f}",
+        ])
+        return response
+
+    @app.teardown_request
+    def record_failure(exc):
+        # after_request is skipped for unhandled exceptions
+        if exc is not None and 'request_t0' in g:
+            REQUEST_SECONDS.observe(time.perf_counter() - g.request_t0, current_route(), request.method, '500')
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return Response(metrics.render(), content_type=CONTENT_TYPE)
 
 
 @app.route('/')
@@ -68,53 +164,49 @@ def get_data(symbol):
     return jsonify(data)
 
 
-@app.route('/api/summary')
-def get_summary():
-    conn = get_db_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT date, balance, change
-                FROM account_balance
-                ORDER BY date DESC
-                LIMIT 1
-                """
-            )
-            balance_row = cur.fetchone()
-
-            cur.execute(
-                """
-                SELECT MAX(balance) AS max_balance
-                FROM account_balance
-                WHERE date >= CURRENT_DATE - INTERVAL '30 days'
-                """
-            )
-            max_balance_row = cur.fetchone()
-
-            cur.execute(
-                """
-                SELECT symbol, sentiment_score
-                FROM sentiment_scores
-                WHERE date = CURRENT_DATE
-                ORDER BY sentiment_score DESC
-                LIMIT 4
-                """
-            )
-            top_sentiment = cur.fetchall()
-
-            cur.execute(
-                """
-                SELECT symbol, order_type, value, created_at
-                FROM positions
-                WHERE date = CURRENT_DATE
-                ORDER BY created_at DESC
-                LIMIT 10
-                """
-            )
-            recent_orders = cur.fetchall()
-    finally:
-        conn.close()
+def load_summary(conn):
+    """Balance, 30d drawdown, today's top sentiment and orders"""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT date, balance, change
+            FROM account_balance
+            ORDER BY date DESC
+            LIMIT 1
+            """
+        )
+        balance_row = cur.fetchone()
+
+        cur.execute(
+            """
+            SELECT MAX(balance) AS max_balance
+            FROM account_balance
+            WHERE date >= CURRENT_DATE - INTERVAL '30 days'
+            """
+        )
+        max_balance_row = cur.fetchone()
+
+        cur.execute(
+            """
+            SELECT symbol, sentiment_score
+            FROM sentiment_scores
+            WHERE date = CURRENT_DATE
+            ORDER BY sentiment_score DESC
+            LIMIT 4
+            """
+        )
+        top_sentiment = cur.fetchall()
+
+        cur.execute(
+            """
+            SELECT symbol, order_type, value, created_at
+            FROM positions
+            WHERE date = CURRENT_DATE
+            ORDER BY created_at DESC
+            LIMIT 10
+            """
+        )
+        recent_orders = cur.fetchall()
 
     balance = float(balance_row[1]) if balance_row and balance_row[1] is not None else None
     change = float(balance_row[2]) if balance_row and balance_row[2] is not None else None
@@ -124,7 +216,7 @@ def get_summary():
     if balance is not None and max_balance:
         drawdown = (max_balance - balance) / max_balance
 
-    return jsonify({
+    return {
         "balance": balance,
         "change": change,
         "max_balance_30d": max_balance,
@@ -140,7 +232,358 @@ def get_summary():
                 "created_at": r[3].isoformat()
             } for r in recent_orders
         ]
-    })
+    }
+
+
+@app.route('/api/summary')
+def get_summary():
+    conn = get_db_conn()
+    try:
+        summary = load_summary(conn)
+    finally:
+        conn.close()
+    return jsonify(summary)
+
+
+OVERVIEW_TTL = 5  # seconds; every tab within the window shares one query
+OVERVIEW_MAX_POINTS = 500
+
+# Summary + every active symbol (latest indicators, sentiment, sparkline) as one
+# JSON document built by Postgres in a single round trip
+OVERVIEW_SQL = """
+WITH syms AS (
+    SELECT symbol, name, sector
+    FROM tracked_symbols
+    WHERE active
+),
+latest AS (
+    SELECT s.symbol, s.name, s.sector, l.*
+    FROM syms s
+    LEFT JOIN LATERAL (
+        SELECT timestamp, close_price, ema9, ema21, ema200, rsi14, volume, volume_ma20, action, crossover
+        FROM ema_snapshots e
+        WHERE e.symbol = s.symbol
+        ORDER BY e.timestamp DESC
+        LIMIT 1
+    ) l ON TRUE
+),
+spark AS (
+    SELECT s.symbol, array_agg(x.close_price ORDER BY x.timestamp) AS closes
+    FROM syms s
+    CROSS JOIN LATERAL (
+        SELECT timestamp, close_price
+        FROM ema_snapshots e
+        WHERE e.symbol = s.symbol
+          AND e.timestamp >= NOW() - make_interval(days => %(days)s)
+        ORDER BY e.timestamp DESC
+        LIMIT %(points)s
+    ) x
+    GROUP BY s.symbol
+),
+sentiment AS (
+    SELECT symbol, sentiment_score
+    FROM sentiment_scores
+    WHERE date = CURRENT_DATE
+),
+balance AS (
+    SELECT balance, change
+    FROM account_balance
+    ORDER BY date DESC
+    LIMIT 1
+),
+orders AS (
+    SELECT symbol, order_type, value, created_at
+    FROM positions
+    WHERE date = CURRENT_DATE
+    ORDER BY created_at DESC
+    LIMIT 10
+)
+SELECT json_build_object(
+    'balance', (SELECT balance FROM balance),
+    'change', (SELECT change FROM balance),
+    'max_balance_30d', (
+        SELECT MAX(balance) FROM account_balance
+        WHERE date >= CURRENT_DATE - INTERVAL '30 days'
+    ),
+    'top_sentiment', (
+        SELECT COALESCE(json_agg(json_build_object('symbol', symbol, 'score', sentiment_score)
+                                 ORDER BY sentiment_score DESC), '[]')
+        FROM (SELECT * FROM sentiment ORDER BY sentiment_score DESC LIMIT 4) t
+    ),
+    'recent_orders', (
+        SELECT COALESCE(json_agg(json_build_object('symbol', symbol, 'side', order_type,
+                                                   'value', value, 'created_at', created_at)
+                                 ORDER BY created_at DESC), '[]')
+        FROM orders
+    ),
+    'symbols', (
+        SELECT COALESCE(json_agg(json_build_object(
+            'symbol', l.symbol,
+            'name', l.name,
+            'sector', l.sector,
+            'timestamp', l.timestamp,
+            'close', l.close_price,
+            'ema9', l.ema9,
+            'ema21', l.ema21,
+            'ema200', l.ema200,
+            'rsi14', l.rsi14,
+            'volume', l.volume,
+            'volume_ma20', l.volume_ma20,
+            'action', l.action,
+            'crossover', l.crossover,
+            'sentiment', se.sentiment_score,
+            'sparkline', COALESCE(sp.closes, '{}')
+        ) ORDER BY l.symbol), '[]')
+        FROM latest l
+        LEFT JOIN spark sp ON sp.symbol = l.symbol
+        LEFT JOIN sentiment se ON se.symbol = l.symbol
+    )
+)
+"""
+
+_overview_cache = {}
+_overview_lock = threading.Lock()
+
+
+def load_overview(days=1, points=100):
+    conn = get_db_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(OVERVIEW_SQL, {'days': days, 'points': points})
+            overview = cur.fetchone()[0]
+    finally:
+        conn.close()
+
+    balance, max_balance = overview['balance'], overview['max_balance_30d']
+    overview['drawdown'] = (max_balance - balance) / max_balance if balance is not None and max_balance else None
+    overview['generated_at'] = datetime.now().isoformat()
+    return overview
+
+
+def cached_overview(days, points):
+    """
+    (json bytes, gzip bytes) shared by every request within OVERVIEW_TTL
+
+    The lock is held across the query so concurrent tabs wait for one
+    refresh instead of each hitting the DB when the entry expires.
+    """
+    key = (days, points)
+    with _overview_lock:
+        hit = _overview_cache.get(key)
+        if hit and hit[0] > time.monotonic():
+            return hit[1], hit[2]
+        body = json.dumps(load_overview(days, points), separators=(',', ':')).encode()
+        compressed = gzip.compress(body, compresslevel=6)
+        _overview_cache[key] = (time.monotonic() + OVERVIEW_TTL, body, compressed)
+        return body, compressed
+
+
+@app.route('/api/overview')
+def get_overview():
+    """Summary plus latest indicators and sparkline for every active symbol"""
+    days = min(max(int(request.args.get('days', 1)), 1), 30)
+    points = min(max(int(request.args.get('points', 100)), 2), OVERVIEW_MAX_POINTS)
+    body, compressed = cached_overview(days, points)
+
+    response = Response(mimetype='application/json')
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.set_data(body)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f'max-age={OVERVIEW_TTL}'
+    return response
+
+
+# --- Live push (SSE) ---
+# One LISTEN connection per worker fans NOTIFY payloads out to every open tab.
+# Triggers live in db/migrations/004_add_dashboard_notify_triggers.sql.
+
+STREAM_HEARTBEAT = 15  # seconds; keeps proxies from closing idle streams
+
+
+class Subscriber:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.queue = queue.Queue(maxsize=256)
+        self.overflow = False
+
+
+class DashboardHub:
+    """Background LISTEN loop broadcasting new snapshots and summary deltas"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.thread = None
+        self.summary = None
+
+    def subscribe(self, symbol):
+        sub = Subscriber(symbol)
+        with self.lock:
+            self.subscribers.add(sub)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='dashboard-hub', daemon=True)
+                self.thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            self.subscribers.discard(sub)
+
+    def publish(self, event, data, symbol=None, event_id=None):
+        with self.lock:
+            subs = [s for s in self.subscribers if symbol is None or s.symbol == symbol]
+        for sub in subs:
+            try:
+                sub.queue.put_nowait((event, data, event_id))
+            except queue.Full:
+                # Slow client: end its stream, it backfills via Last-Event-ID on reconnect
+                sub.overflow = True
+
+    def _has_subscribers(self):
+        with self.lock:
+            if not self.subscribers:
+                self.thread = None
+                return False
+            return True
+
+    def _publish_summary(self, conn):
+        summary = load_summary(conn)
+        previous = self.summary or {}
+        delta = {k: v for k, v in summary.items() if previous.get(k) != v}
+        self.summary = summary
+        if delta:
+            self.publish('summary', delta)
+
+    def _merge_since(self, since, payload):
+        """Fold one statement's payload into {symbol: last seen id} for subscribed symbols"""
+        with self.lock:
+            symbols = {s.symbol for s in self.subscribers}
+        per_symbol = payload.get('symbols') or dict.fromkeys(symbols, payload.get('since'))
+        for symbol, last_id in per_symbol.items():
+            if symbol in symbols and last_id is not None:
+                since[symbol] = min(last_id, since.get(symbol, last_id))
+
+    def _publish_snapshots(self, conn, since):
+        # One query per symbol per wakeup, however many rows the statement inserted
+        for symbol, last_id in since.items():
+            for row in load_snapshots_since(symbol, last_id, conn=conn):
+                self.publish('snapshot', row, symbol=symbol, event_id=row['id'])
+
+    def _run(self):
+        # Exits once the last tab disconnects; the next subscribe() starts a new thread
+        while True:
+            conn = None
+            try:
+                conn = get_db_conn()
+                conn.set_session(autocommit=True)
+                with conn.cursor() as cur:
+                    cur.execute("LISTEN ema_snapshots; LISTEN dashboard_summary;")
+                self.summary = load_summary(conn)
+
+                while self._has_subscribers():
+                    if select.select([conn], [], [], STREAM_HEARTBEAT) == ([], [], []):
+                        continue
+                    conn.poll()
+                    summary_changed = False
+                    since = {}
+                    while conn.notifies:
+                        note = conn.notifies.pop(0)
+                        if note.channel == 'ema_snapshots':
+                            self._merge_since(since, json.loads(note.payload))
+                        else:
+                            summary_changed = True
+                    if since:
+                        self._publish_snapshots(conn, since)
+                    if summary_changed:
+                        self._publish_summary(conn)
+                return
+            except Exception as e:
+                app.logger.warning("dashboard hub: %s, reconnecting", e)
+                time.sleep(5)
+                if not self._has_subscribers():
+                    return
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+hub = DashboardHub()
+
+
+def load_snapshots_since(symbol, last_id, limit=500, conn=None):
+    """Rows after last_id for one symbol (SSE 'snapshot' events)"""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, timestamp, close_price, ema5, ema20, action, crossover
+                FROM ema_snapshots
+                WHERE symbol = %s AND id > %s
+                ORDER BY id
+                LIMIT %s
+                """,
+                (symbol, last_id, limit),
+            )
+            rows = cur.fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+    return [
+        {
+            'id': r[0],
+            'symbol': symbol,
+            'timestamp': r[1].isoformat(),
+            'close': float(r[2]) if r[2] else None,
+            'ema5': float(r[3]) if r[3] else None,
+            'ema20': float(r[4]) if r[4] else None,
+            'action': r[5],
+            'crossover': r[6],
+        }
+        for r in rows
+    ]
+
+
+def format_sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/api/stream')
+def stream():
+    """SSE stream of new snapshots for ?symbol= plus summary deltas"""
+    symbol = request.args.get('symbol', 'NVDA').upper()
+    last_id = request.headers.get('Last-Event-ID', type=int)
+
+    def generate():
+        # Subscribe before backfilling so nothing lands in between (client dedups by id)
+        sub = hub.subscribe(symbol)
+        try:
+            yield "retry: 5000\n\n"
+            if last_id is not None:
+                for row in load_snapshots_since(symbol, last_id):
+                    yield format_sse('snapshot', row, row['id'])
+            while not sub.overflow:
+                try:
+                    event, data, event_id = sub.queue.get(timeout=STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(event, data, event_id)
+        finally:
+            hub.unsubscribe(sub)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+MAX_CHART_EMA = 1000  # Longest EMA period a chart may request (warmup bars are loaded for it)
 
 
 @app.route('/chart/<symbol>.png')
@@ -148,138 +591,60 @@ def chart_png(symbol):
     from flask import request
     from datetime import datetime, timedelta
     
-    days = int(request.args.get('days', 1))
     hours = request.args.get('hours', None)
     start_time = request.args.get('start_time', None)  # ISO format datetime
-    
-    conn = get_db_conn()
     try:
-        with conn.cursor() as cur:
-            if hours and start_time:
-                # Load extra data for EMA warmup (1 day before)
-                hours = int(hours)
-                start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                end_dt = start_dt + timedelta(hours=hours)
-                warmup_start_dt = start_dt - timedelta(days=1)
-                
-                cur.execute(
-                    """
-                    SELECT timestamp, close_price
-                    FROM ema_snapshots
-                    WHERE symbol = %s
-                      AND timestamp >= %s
-                      AND timestamp <= %s
-                    ORDER BY timestamp
-                    """,
-                    (symbol.upper(), warmup_start_dt, end_dt),
-                )
-            else:
-                # Show full days - load extra day for EMA warmup
-                warmup_days = days + 1
-                cur.execute(
-                    """
-                    SELECT timestamp, close_price
-                    FROM ema_snapshots
-                    WHERE symbol = %s
-                      AND timestamp >= NOW() - INTERVAL '%s days'
-                    ORDER BY timestamp
-                    """,
-                    (symbol.upper(), warmup_days),
-                )
-            rows = cur.fetchall()
-    finally:
-        conn.close()
-
-    if not rows:
+        days = int(request.args.get('days', 1))
+        periods = [int(p) for p in request.args.get('emas', '5,50').split(',') if p.strip()][:4]
+        if hours and start_time:
+            hours = int(hours)
+            start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid days/hours/start_time/emas'}), 400
+    if days < 1 or any(not 1 <= p <= MAX_CHART_EMA for p in periods):
+        return jsonify({'status': 'error', 'message': f'days must be >= 1, emas 1-{MAX_CHART_EMA}'}), 400
+
+    if hours and start_time:
+        end_dt = start_dt + timedelta(hours=hours)
+    else:
+        # Last N sessions, so 1 day on a Monday morning still shows Friday
+        end_dt = datetime.now(timezone.utc)
+        start_dt = last_sessions_start(end_dt, days)
+
+    # Stored ema columns are read directly; other periods (or NULL gaps) are
+    # computed from exactly the warmup bars they need, via the shared cache
+    with CHART_SECONDS.time('load'):
+        conn = get_db_conn()
+        try:
+            timestamps, close_prices, emas = load_ema_window(conn, symbol.upper(), start_dt, end_dt, periods)
+        finally:
+            conn.close()
+    plot_t0 = time.perf_counter()
+
+    if not timestamps:
         # Return empty chart
         fig, ax = plt.subplots(figsize=(12, 6))
         ax.text(0.5, 0.5, 'No data available', ha='center', va='center')
         ax.set_title(f'{symbol.upper()} - No Data')
     else:
-        timestamps = [r[0] for r in rows]
-        close_prices = [float(r[1]) if r[1] else None for r in rows]
-        
-        # Calculate EMA5 and EMA50 dynamically on ALL data (including warmup)
-        def calculate_ema(prices, period):
-            # Filter out None values
-            valid_prices = [p for p in prices if p is not None]
-            if len(valid_prices) < period:
-                return [None] * len(prices)
-            
-            ema = [None] * (period - 1)
-            multiplier = 2 / (period + 1)
-            sma = sum(valid_prices[:period]) / period
-            ema.append(sma)
-            for i in range(period, len(valid_prices)):
-                ema_val = (valid_prices[i] - ema[-1]) * multiplier + ema[-1]
-                ema.append(ema_val)
-            
-            # Pad to match original length if needed
-            while len(ema) < len(prices):
-                ema.append(None)
-            
-            return ema
-        
-        ema5 = calculate_ema(close_prices, 5)
-        ema50 = calculate_ema(close_prices, 50)
-        
-        # Filter to display window only (exclude warmup period)
-        if hours and start_time:
-            display_start_idx = 0
-            for i, ts in enumerate(timestamps):
-                if ts >= start_dt:
-                    display_start_idx = i
-                    break
-            
-            timestamps = timestamps[display_start_idx:]
-            close_prices = close_prices[display_start_idx:]
-            ema5 = ema5[display_start_idx:]
-            ema50 = ema50[display_start_idx:]
-        else:
-            # Filter to show only requested days (exclude warmup day)
-            from datetime import datetime
-            cutoff_time = datetime.now(timestamps[0].tzinfo) - timedelta(days=days)
-            display_start_idx = 0
-            for i, ts in enumerate(timestamps):
-                if ts >= cutoff_time:
-                    display_start_idx = i
-                    break
-            
-            timestamps = timestamps[display_start_idx:]
-            close_prices = close_prices[display_start_idx:]
-            ema5 = ema5[display_start_idx:]
-            ema50 = ema50[display_start_idx:]
-
-        # Insert flat line for gaps > 1 hour (market close to open)
-        from datetime import timedelta
-        timestamps_clean = []
-        close_prices_clean = []
-        ema5_clean = []
-        ema50_clean = []
-        
-        for i, ts in enumerate(timestamps):
-            if i > 0:
-                time_diff = (ts - timestamps[i-1]).total_seconds() / 60  # minutes
-                if time_diff > 60:  # More than 1 hour gap
-                    # Insert point at previous timestamp with previous values (flat line)
-                    timestamps_clean.append(ts)
-                    close_prices_clean.append(close_prices[i-1])
-                    ema5_clean.append(ema5[i-1])
-                    ema50_clean.append(ema50[i-1])
-            
-            timestamps_clean.append(ts)
-            close_prices_clean.append(close_prices[i])
-            ema5_clean.append(ema5[i])
-            ema50_clean.append(ema50[i])
+        ts_ns = to_epoch_ns(timestamps)
+        timestamps = np.asarray(timestamps, dtype=object)
+
+        # Flat connector at each session open (market close to open): the new
+        # timestamp is repeated with the previous bar's values
+        breaks = np.flatnonzero(session_breaks(ts_ns))
+        ts_idx = np.insert(np.arange(len(ts_ns)), breaks, breaks)
+        value_idx = np.insert(np.arange(len(ts_ns)), breaks, breaks - 1)
+        timestamps_clean = timestamps[ts_idx]
 
         fig, ax = plt.subplots(figsize=(12, 6))
         
         # Thin smooth lines with breaks at market close/open
-        ax.plot(timestamps_clean, close_prices_clean, label='Close', color='black', linewidth=0.75)
-        ax.plot(timestamps_clean, ema5_clean, label='EMA 5', color='green', linewidth=0.5)
-        ax.plot(timestamps_clean, ema50_clean, label='EMA 50', color='orange', linewidth=0.5)
+        ax.plot(timestamps_clean, close_prices[value_idx], label='Close', color='black', linewidth=0.75)
+        for period, color in zip(periods, ('green', 'orange', 'royalblue', 'purple')):
+            ax.plot(timestamps_clean, emas[period][value_idx], label=f'EMA {period}', color=color, linewidth=0.5)
 
-        ax.set_title(f'{symbol.upper()} Price & EMA 5/50 (last {days} days)')
+        ax.set_title(f'{symbol.upper()} Price & EMA {"/".join(map(str, periods))} (last {days} days)')
         ax.set_xlabel('Time')
         ax.set_ylabel('Price')
         ax.legend()
@@ -310,20 +675,107 @@ def chart_png(symbol):
         
         fig.tight_layout()
 
+    CHART_SECONDS.observe(time.perf_counter() - plot_t0, 'plot')
+
     # Save to bytes buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100)
-    plt.close(fig)
+    with CHART_SECONDS.time('render'):
+        buf = io.BytesIO()
+        plt.savefig(buf, format='png', dpi=100)
+        plt.close(fig)
     buf.seek(0)
 
     return send_file(buf, mimetype='image/png')
 
 
+@app.route('/api/portfolio')
+def get_portfolio():
+    """Latest stored portfolio snapshot; ?as_of=14:30 or ISO datetime for time travel"""
+    try:
+        as_of = parse_as_of(request.args.get('as_of'))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid as_of'}), 400
+    orders = min(int(request.args.get('orders', 20)), 200)
+
+    conn = get_db_conn()
+    try:
+        snapshot = latest_snapshot(conn, as_of, orders)
+    finally:
+        conn.close()
+
+    if snapshot is None:
+        return jsonify({'status': 'error', 'message': 'No snapshots stored yet'}), 404
+    return jsonify(snapshot)
+
+
+@app.route('/api/news')
+def get_news():
+    """
+    Search the news pool, newest first
+
+    ?q=keywords (websearch syntax) &symbol= &from= &to= (ISO date/datetime,
+    market tz if naive) &limit= (max 100) &cursor= (next_cursor of the
+    previous page). Matched terms are wrapped in <mark>.
+    """
+    try:
+        start = parse_bound(request.args.get('from'))
+        end = parse_bound(request.args.get('to'), end=True)
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid from/to/limit'}), 400
+
+    t0 = time.perf_counter()
+    conn = get_db_conn()
+    try:
+        result = search_news(conn, request.args.get('q'), request.args.get('symbol'), start, end, limit,
+                             request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    finally:
+        conn.close()
+
+    result['took_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+    return jsonify(result)
+
+
 @app.route('/health')
 def health():
     return jsonify({'status': 'ok', 'timestamp': datetime.now().isoformat()})
 
 
+_profile_lock = threading.Lock()
+
+
+@app.route('/debug/profile')
+def profile():
+    """
+    Sample this worker's threads for ?seconds=10 (&interval_ms=5) and return
+    folded stacks (flamegraph.pl / speedscope). Needs TREDDY_PROFILE_TOKEN
+    and the same value in the X-Profile-Token header; 404 when unset.
+    """
+    token = METRICS_CONFIG['profile_token']
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Not found'}), 404
+    if not hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token):
+        return jsonify({'status': 'error', 'message': 'Forbidden'}), 403
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval_ms', 5)) / 1000
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid seconds/interval_ms'}), 400
+    if not 0 < seconds <= METRICS_CONFIG['profile_max_seconds'] or not 0.001 <= interval <= 1:
+        return jsonify({'status': 'error', 'message': 'seconds must be 0-60, interval_ms 1-1000'}), 400
+    if not _profile_lock.acquire(blocking=False):
+        return jsonify({'status': 'error', 'message': 'A profile is already running'}), 409
+    try:
+        stacks = sample_stacks(seconds, interval)
+    finally:
+        _profile_lock.release()
+
+    name = f"treddy-{os.getpid()}-{datetime.now():%Y%m%d-%H%M%S}.folded"
+    return Response(folded(stacks), mimetype='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename={name}'})
+
+
 @app.route('/api/load-historical', methods=['POST'])
 def load_historical():
     """Endpoint to trigger historical data loading"""
@@ -379,6 +831,7 @@ def run_backtest():
     confirmation = float(data.get('confirmation', 0.75))
     start_time = data.get('start_time')  # ISO format datetime (required)
     window_hours = data.get('window_hours')  # Number of hours (required)
+    timeframe = data.get('timeframe', '1m')  # 1m = raw snapshots, or 5m/15m/1h/1d
     
     if not start_time or not window_hours:
         return jsonify({'status': 'error', 'message': 'Start time and window hours are required'}), 400
@@ -393,7 +846,8 @@ def run_backtest():
             '--position-size', str(position_size),
             '--confirmation', str(confirmation),
             '--start-time', start_time,
-            '--window-hours', str(window_hours)
+            '--window-hours', str(window_hours),
+            '--timeframe', timeframe,
         ]
     else:
         symbol = symbols[0] if isinstance(symbols, list) else symbols
@@ -404,7 +858,8 @@ def run_backtest():
             '--position-size', str(position_size),
             '--confirmation', str(confirmation),
             '--start-time', start_time,
-            '--window-hours', str(window_hours)
+            '--window-hours', str(window_hours),
+            '--timeframe', timeframe,
         ]
     
     try:
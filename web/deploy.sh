@@ -11,6 +11,9 @@ echo "Шаг 1: Копирование файлов..."
 rsync -avz --delete \
   /Users/gabby/git/TradingBot/web/ \
   gabby@192.168.1.3:/home/gabby/TradingBot/web/
+rsync -avz --delete --exclude __pycache__ \
+  /Users/gabby/git/TradingBot/tradingbot/ \
+  gabby@192.168.1.3:/home/gabby/TradingBot/tradingbot/
 
 # 2. На сервере: создаём venv и устанавливаем зависимости
 echo "Шаг 2: Установка Python зависимостей..."